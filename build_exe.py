@@ -61,6 +61,16 @@ def copy_source_files(src_dir: Path, dist_dir: Path):
         'model_analysis.py',
         'discord_notifier.py',
         'performance_elo.py',
+        'tournament_classifier.py',
+        'day_ordinal.py',
+        'rate_limiter.py',
+        'http_cache.py',
+        'results_parser.py',
+        'browser_pool.py',
+        'refresh_scheduler.py',
+        'http_client.py',
+        'betfair_stream.py',
+        'analysis_cache.py',
         'cleanup_duplicates.py',
         'delete_duplicates.py',
         'create_seed_database.py',
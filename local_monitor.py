@@ -1,6 +1,12 @@
 """
 Local Monitor with Discord Bot - Monitors bets and responds to commands.
-Commands: !inplay, !pending, !stats, !refresh
+Commands: !inplay, !pending, !stats, !refresh, !latency
+
+Betfair, Supabase, Tennis Explorer and local DB calls are blocking, so they
+run in worker threads (run_io) with a concurrency limit per upstream; the
+bot's event loop only awaits them. Result checks are fanned out, Supabase
+writes happen in the background, and alerts are sent as soon as they're
+known - a slow Supabase call never holds them up.
 """
 
 import json
@@ -17,7 +23,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
 
 import discord
 from discord.ext import commands, tasks
@@ -52,6 +64,27 @@ DISCORD_CHANNEL_ID = 1462470788602007787  # Channel for alerts
 
 CHECK_INTERVAL = 30
 
+# Concurrent blocking calls allowed per upstream (see run_io)
+IO_CONCURRENCY = {'betfair': 4, 'supabase': 4, 'tennis_explorer': 1, 'local_db': 1}
+SUPABASE_READ_TIMEOUT = 8  # Seconds before a tick goes on with the last pending list
+SLOW_TICK_SECONDS = 10     # Ticks slower than this print their latency breakdown
+
+# listMarketBook with EX_BEST_OFFERS weighs 5 per market against Betfair's
+# 200-point request limit, so results are fetched 40 markets at a time
+MARKET_BOOK_CHUNK = 40
+MARKET_CATALOGUE_CHUNK = 200
+SELECTION_IDS_CACHE_PATH = os.path.join(get_app_directory(), 'selection_ids_cache.json')
+SELECTION_IDS_CACHE_DAYS = 14  # Markets older than this are dropped from the cache
+
+# Market stream cache from the app (src/betfair_stream.py); without it the
+# monitor polls listMarketCatalogue/listMarketBook every tick
+sys.path.insert(0, os.path.join(get_app_directory(), 'src'))
+try:
+    from betfair_stream import get_market_stream, subscribe_market_stream
+    STREAM_AVAILABLE = True
+except ImportError:
+    STREAM_AVAILABLE = False
+
 # Local SQLite database path
 LOCAL_DB_PATH = r"C:\Users\Public\Documents\Tennis Betting System\data\tennis_betting.db"
 
@@ -151,6 +184,7 @@ class BetfairClient:
     def __init__(self):
         self.session_token = None
         self.app_key = BETFAIR_APP_KEY
+        self._login_lock = threading.Lock()  # Requests run in several worker threads
 
     def login(self) -> bool:
         if not all([BETFAIR_APP_KEY, BETFAIR_USERNAME, BETFAIR_PASSWORD]):
@@ -174,11 +208,13 @@ class BetfairClient:
 
     def api_request(self, endpoint: str, params: dict) -> Optional[dict]:
         if not self.session_token:
-            if not self.login():
-                return None
+            with self._login_lock:
+                if not self.session_token and not self.login():
+                    return None
+        token = self.session_token
         headers = {
             'X-Application': self.app_key,
-            'X-Authentication': self.session_token,
+            'X-Authentication': token,
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         }
@@ -190,13 +226,61 @@ class BetfairClient:
                 return json.loads(response.read().decode('utf-8'))
         except urllib.error.HTTPError as e:
             if e.code == 401:
-                self.session_token = None
+                # Only drop the token this request used - another thread may have renewed it
+                with self._login_lock:
+                    if self.session_token == token:
+                        self.session_token = None
                 return self.api_request(endpoint, params)
         except Exception:
             pass
         return None
 
+    def market_stream(self):
+        """The shared market stream, or None when it's unavailable or down."""
+        if not STREAM_AVAILABLE:
+            return None
+        if not self.session_token and not self.login():
+            return None
+        return get_market_stream(self.app_key, self.session_token)
+
+    def _stream_inplay_tennis(self, stream) -> List[Dict]:
+        """In-play markets from the stream cache; names are fetched once per market."""
+        market_ids = (stream.cache.market_ids(inplay=True, status='OPEN')
+                      + stream.cache.market_ids(inplay=True, status='SUSPENDED'))
+        missing = stream.cache.missing_catalogue(market_ids)
+        for i in range(0, len(missing), 200):
+            params = {
+                "filter": {"marketIds": missing[i:i + 200]},
+                "marketProjection": ["RUNNER_DESCRIPTION", "EVENT"],
+                "maxResults": "1000"
+            }
+            result = self.api_request("listMarketCatalogue", params) or []
+            stream.cache.set_catalogue([{
+                'market_id': market.get('marketId'),
+                'event_name': market.get('event', {}).get('name', ''),
+                'runners': [{'selection_id': r.get('selectionId'), 'name': r.get('runnerName', ''),
+                             'sort_priority': r.get('sortPriority')} for r in market.get('runners', [])],
+            } for market in result])
+
+        markets = []
+        for market_id in market_ids:
+            catalogue = stream.cache.catalogue(market_id)
+            if not catalogue or len(catalogue['runners']) != 2:
+                continue
+            sorted_runners = sorted(catalogue['runners'], key=lambda r: r.get('sort_priority') or 0)
+            markets.append({
+                'market_id': market_id,
+                'event_name': catalogue.get('event_name', ''),
+                'player1': sorted_runners[0]['name'],
+                'player2': sorted_runners[1]['name'],
+                'selection_ids': {r['name']: r['selection_id'] for r in sorted_runners},
+            })
+        return markets
+
     def get_inplay_tennis(self) -> List[Dict]:
+        stream = self.market_stream()
+        if stream is not None:
+            return self._stream_inplay_tennis(stream)
         params = {
             "filter": {
                 "eventTypeIds": ["2"],
@@ -209,6 +293,10 @@ class BetfairClient:
         result = self.api_request("listMarketCatalogue", params)
         if not result:
             return []
+        if STREAM_AVAILABLE and self.session_token:
+            # The stream subscribes by market ID - hand it the in-play markets
+            subscribe_market_stream(self.app_key, self.session_token,
+                                    [m.get('marketId') for m in result], live=True)
         markets = []
         for market in result:
             runners = market.get('runners', [])
@@ -227,19 +315,38 @@ class BetfairClient:
         return markets
 
     def get_market_result(self, market_id: str) -> Optional[Dict]:
-        params = {
-            "marketIds": [market_id],
-            "priceProjection": {"priceData": ["EX_BEST_OFFERS"]}
-        }
-        result = self.api_request("listMarketBook", params)
-        if result and len(result) > 0:
-            market = result[0]
-            return {
-                'status': market.get('status'),
-                'inplay': market.get('inplay'),
-                'runners': market.get('runners', [])
+        return self.get_market_results([market_id]).get(market_id)
+
+    def get_market_results(self, market_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Status and runners for several markets: stream cache first, then listMarketBook
+        in chunks of MARKET_BOOK_CHUNK. Markets Betfair no longer returns map to None."""
+        results = {market_id: None for market_id in market_ids}
+        stream = self.market_stream()
+        missing = []
+        for market_id in results:
+            market = stream.cache.market_book(market_id) if stream is not None else None
+            if market:
+                results[market_id] = {
+                    'status': market.get('status'),
+                    'inplay': market.get('inplay'),
+                    'runners': market.get('runners', [])
+                }
+            else:
+                missing.append(market_id)
+
+        for i in range(0, len(missing), MARKET_BOOK_CHUNK):
+            params = {
+                "marketIds": missing[i:i + MARKET_BOOK_CHUNK],
+                "priceProjection": {"priceData": ["EX_BEST_OFFERS"]}
             }
-        return None
+            for market in self.api_request("listMarketBook", params) or []:
+                if market.get('marketId') in results:
+                    results[market['marketId']] = {
+                        'status': market.get('status'),
+                        'inplay': market.get('inplay'),
+                        'runners': market.get('runners', [])
+                    }
+        return results
 
     def get_all_tennis_markets(self) -> List[Dict]:
         """Get ALL recent tennis match odds markets (in-play, pre-match, and recently closed)."""
@@ -273,21 +380,79 @@ class BetfairClient:
 
     def get_market_runners(self, market_id: str) -> Optional[Dict]:
         """Get runner name to selectionId mapping for a specific market."""
-        params = {
-            "filter": {"marketIds": [market_id]},
-            "marketProjection": ["RUNNER_DESCRIPTION"]
-        }
-        result = self.api_request("listMarketCatalogue", params)
-        if result and len(result) > 0:
-            runners = result[0].get('runners', [])
-            selection_ids = {}
-            for runner in runners:
-                name = runner.get('runnerName', '')
-                sid = runner.get('selectionId')
-                if name and sid:
-                    selection_ids[name] = sid
-            return selection_ids if selection_ids else None
-        return None
+        return self.get_markets_runners([market_id]).get(market_id)
+
+    def get_markets_runners(self, market_ids: List[str]) -> Dict[str, Dict]:
+        """Runner name to selectionId mappings for several markets (one catalogue call per 200)."""
+        runners_by_market = {}
+        for i in range(0, len(market_ids), MARKET_CATALOGUE_CHUNK):
+            chunk = market_ids[i:i + MARKET_CATALOGUE_CHUNK]
+            params = {
+                "filter": {"marketIds": chunk},
+                "marketProjection": ["RUNNER_DESCRIPTION"],
+                "maxResults": str(len(chunk))
+            }
+            for market in self.api_request("listMarketCatalogue", params) or []:
+                selection_ids = {}
+                for runner in market.get('runners', []):
+                    name = runner.get('runnerName', '')
+                    sid = runner.get('selectionId')
+                    if name and sid:
+                        selection_ids[name] = sid
+                if selection_ids:
+                    runners_by_market[market.get('marketId')] = selection_ids
+        return runners_by_market
+
+
+# ============================================================================
+# SELECTION ID CACHE
+# ============================================================================
+
+class SelectionIdCache:
+    """Runner name -> selectionId per market, kept in memory and in a JSON file.
+
+    A market's runners never change, so once seen (in-play list, catalogue
+    lookup) its selection IDs never need fetching again - not even after a
+    restart.
+    """
+
+    def __init__(self, path: str = SELECTION_IDS_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._markets: Dict[str, Dict] = {}
+        try:
+            with open(path, 'r') as f:
+                self._markets = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, market_id: str) -> Optional[Dict]:
+        entry = self._markets.get(market_id)
+        return entry['selection_ids'] if entry else None
+
+    def update(self, selection_ids_by_market: Dict[str, Dict]):
+        """Add markets' selection IDs, saving the file if anything was new."""
+        now = time.time()
+        with self._lock:
+            new = {market_id: ids for market_id, ids in selection_ids_by_market.items()
+                   if market_id and ids and market_id not in self._markets}
+            if not new:
+                return
+            for market_id, ids in new.items():
+                self._markets[market_id] = {'selection_ids': ids, 'saved_at': now}
+            cutoff = now - SELECTION_IDS_CACHE_DAYS * 86400
+            self._markets = {m: e for m, e in self._markets.items() if e.get('saved_at', now) >= cutoff}
+            try:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._markets, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[{timestamp()}] Could not save selection ID cache: {e}")
+
+    def update_from_markets(self, markets: List[Dict]):
+        """Cache the selection IDs of markets from get_inplay_tennis/get_all_tennis_markets."""
+        self.update({m.get('market_id'): m.get('selection_ids') for m in markets})
 
 
 # ============================================================================
@@ -615,11 +780,8 @@ def determine_result(bet: Dict, market_info: Dict, market_result: Dict) -> Optio
     return (result, profit)
 
 
-def get_selection_ids_for_bet(bet: Dict) -> Optional[Dict]:
-    """Get selection_ids mapping from Supabase bet data or fetch from Betfair.
-
-    Returns dict of {runner_name: selectionId} or None.
-    """
+def _known_selection_ids(bet: Dict) -> Optional[Dict]:
+    """selection_ids stored with the bet in Supabase, else cached for its market."""
     # Try stored selection_ids from Supabase
     sel_ids_raw = bet.get('selection_ids')
     if sel_ids_raw:
@@ -635,22 +797,71 @@ def get_selection_ids_for_bet(bet: Dict) -> Optional[Dict]:
             print(f"[{timestamp()}] Using stored selection_ids for {bet.get('match_description')}")
             return sel_ids_raw
 
+    market_id = bet.get('market_id')
+    return selection_cache.get(market_id) if market_id else None
+
+
+def get_selection_ids_for_bet(bet: Dict) -> Optional[Dict]:
+    """Get selection_ids mapping from Supabase bet data or fetch from Betfair.
+
+    Returns dict of {runner_name: selectionId} or None.
+    """
+    known = _known_selection_ids(bet)
+    if known:
+        return known
+
     # Fallback: fetch from Betfair API
     market_id = bet.get('market_id')
     if market_id:
         print(f"[{timestamp()}] Fetching selection_ids from Betfair for {bet.get('match_description')}")
         fetched = betfair.get_market_runners(market_id)
         if fetched:
+            selection_cache.update({market_id: fetched})
             return fetched
 
     print(f"[{timestamp()}] WARNING: No selection_ids available for {bet.get('match_description')}")
     return None
 
 
+def get_selection_ids_for_bets(bets: List[Dict]) -> Dict:
+    """get_selection_ids_for_bet for several bets with at most one catalogue request
+    (per 200 markets) for all of them. Returns {bet_id: selection_ids or None}.
+
+    Markets the catalogue doesn't return (closed markets aren't listed) are
+    not requested again one by one - those bets get None this time round.
+    """
+    selection_ids = {bet.get('id'): _known_selection_ids(bet) for bet in bets}
+    uncached = list(dict.fromkeys(bet['market_id'] for bet in bets
+                                  if not selection_ids[bet.get('id')] and bet.get('market_id')))
+    if uncached:
+        print(f"[{timestamp()}] Fetching selection_ids from Betfair for {len(uncached)} market(s)")
+        selection_cache.update(betfair.get_markets_runners(uncached))
+
+    for bet in bets:
+        bet_id, market_id = bet.get('id'), bet.get('market_id')
+        if not selection_ids[bet_id] and market_id:
+            selection_ids[bet_id] = selection_cache.get(market_id)
+        if not selection_ids[bet_id]:
+            print(f"[{timestamp()}] WARNING: No selection_ids available for {bet.get('match_description')}")
+    return selection_ids
+
+
 # ============================================================================
 # TENNIS EXPLORER RESULTS CHECKER
 # ============================================================================
 
+# Results pages: only <table> elements are parsed, rows matched with precompiled patterns
+TE_TABLES_ONLY = SoupStrainer('table')
+TE_PLAYER_HREF = re.compile(r'/player/')
+TE_SEED_SUFFIX = re.compile(r'\(\d+\)$')
+TE_SET_SCORE = re.compile(r'^\d{1,2}$')
+
+
+def _te_set_scores(row) -> List[str]:
+    """Cell texts that look like set scores (the first one is total sets won)."""
+    return [text for text in (c.get_text(strip=True) for c in row.find_all('td')) if TE_SET_SCORE.match(text)]
+
+
 def fetch_completed_results(days_back: int = 2) -> List[Dict]:
     """Fetch recent completed match results from Tennis Explorer.
 
@@ -676,10 +887,10 @@ def fetch_completed_results(days_back: int = 2) -> List[Dict]:
                 if response.status_code != 200:
                     continue
 
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = BeautifulSoup(response.text, HTML_PARSER, parse_only=TE_TABLES_ONLY)
 
-                for table in soup.select('table'):
-                    rows = table.select('tr')
+                for table in soup.find_all('table'):
+                    rows = table.find_all('tr')
                     i = 0
                     while i < len(rows):
                         row = rows[i]
@@ -687,13 +898,13 @@ def fetch_completed_results(days_back: int = 2) -> List[Dict]:
 
                         # Match rows come in pairs - first row has class 'bott'
                         if 'bott' in row_class:
-                            p1_link = row.select_one('a[href*="/player/"]')
+                            p1_link = row.find('a', href=TE_PLAYER_HREF)
                             if p1_link and i + 1 < len(rows):
-                                p2_link = rows[i + 1].select_one('a[href*="/player/"]')
+                                p2_link = rows[i + 1].find('a', href=TE_PLAYER_HREF)
                                 if p2_link:
                                     try:
-                                        p1_name = re.sub(r'\(\d+\)$', '', p1_link.get_text(strip=True)).strip()
-                                        p2_name = re.sub(r'\(\d+\)$', '', p2_link.get_text(strip=True)).strip()
+                                        p1_name = TE_SEED_SUFFIX.sub('', p1_link.get_text(strip=True)).strip()
+                                        p2_name = TE_SEED_SUFFIX.sub('', p2_link.get_text(strip=True)).strip()
 
                                         # Skip doubles
                                         if '/' in p1_name or '/' in p2_name:
@@ -701,8 +912,8 @@ def fetch_completed_results(days_back: int = 2) -> List[Dict]:
                                             continue
 
                                         # Get set scores to determine winner
-                                        p1_scores = [c.get_text(strip=True) for c in row.select('td') if re.match(r'^\d{1,2}$', c.get_text(strip=True))]
-                                        p2_scores = [c.get_text(strip=True) for c in rows[i + 1].select('td') if re.match(r'^\d{1,2}$', c.get_text(strip=True))]
+                                        p1_scores = _te_set_scores(row)
+                                        p2_scores = _te_set_scores(rows[i + 1])
 
                                         p1_sets = int(p1_scores[0]) if p1_scores and p1_scores[0].isdigit() else 0
                                         p2_sets = int(p2_scores[0]) if p2_scores and p2_scores[0].isdigit() else 0
@@ -796,6 +1007,131 @@ def settle_from_result(bet: Dict, winner_name: str) -> Optional[tuple]:
     return (result, profit)
 
 
+# ============================================================================
+# NON-BLOCKING I/O
+# ============================================================================
+
+class TickMetrics:
+    """Call latencies per upstream, collected per monitor tick."""
+
+    def __init__(self):
+        self.current: Dict[str, List[float]] = {}
+        self.last: Optional[Dict] = None
+        self._started = None
+
+    def start_tick(self):
+        self.current = {}
+        self._started = time.perf_counter()
+
+    def record(self, kind: str, seconds: float):
+        self.current.setdefault(kind, []).append(seconds)
+
+    def end_tick(self, **counts):
+        if self._started is None:
+            return
+        self.last = {
+            'at': timestamp(),
+            'duration': time.perf_counter() - self._started,
+            'calls': {kind: (len(c), sum(c), max(c)) for kind, c in self.current.items()},
+            **counts,
+        }
+        self._started = None
+
+    def summary(self) -> str:
+        if not self.last:
+            return "No monitor tick completed yet"
+        lines = [f"Last tick {self.last['at']}: {self.last['duration']:.2f}s, "
+                 f"{self.last.get('result_checks', 0)} result check(s)"]
+        for kind, (count, total, slowest) in sorted(self.last['calls'].items(),
+                                                     key=lambda item: -item[1][2]):
+            lines.append(f"  {kind:<16} {count:>3} call(s)  avg {total / count:.2f}s  max {slowest:.2f}s")
+        return "\n".join(lines)
+
+
+tick_metrics = TickMetrics()
+_io_semaphores: Dict[str, asyncio.Semaphore] = {}
+_background_tasks = set()
+_last_pending: List[Dict] = []
+_pending_fetch: Optional[asyncio.Task] = None
+
+
+async def run_io(kind: str, func, *args, **kwargs):
+    """Run a blocking call in a worker thread, at most IO_CONCURRENCY[kind] at once."""
+    semaphore = _io_semaphores.get(kind)
+    if semaphore is None:
+        semaphore = _io_semaphores[kind] = asyncio.Semaphore(IO_CONCURRENCY[kind])
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        finally:
+            tick_metrics.record(kind, time.perf_counter() - started)
+
+
+def run_in_background(kind: str, func, *args, **kwargs):
+    """Start a blocking write (Supabase, local DB) without waiting for it."""
+    async def runner():
+        try:
+            await run_io(kind, func, *args, **kwargs)
+        except Exception as e:
+            print(f"[{timestamp()}] Background {kind} error: {e}")
+
+    task = asyncio.get_running_loop().create_task(runner())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def get_pending_bets_nowait() -> List[Dict]:
+    """Pending bets from Supabase, or the last list if Supabase is slow to answer."""
+    async def fetch():
+        global _last_pending
+        _last_pending = await run_io('supabase', supabase.get_pending_bets)
+        return _last_pending
+
+    global _pending_fetch
+    if _pending_fetch is None or _pending_fetch.done():
+        # A fetch still running from a slow tick is awaited again, not repeated
+        _pending_fetch = asyncio.get_running_loop().create_task(fetch())
+    try:
+        # Shielded: a late answer still refreshes _last_pending for the next tick
+        return await asyncio.wait_for(asyncio.shield(_pending_fetch), SUPABASE_READ_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"[{timestamp()}] Supabase slow - using last pending list ({len(_last_pending)} bets)")
+        return list(_last_pending)
+
+
+async def get_market_results(market_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """Market results for every market, one listMarketBook per MARKET_BOOK_CHUNK markets
+    with the chunks requested concurrently (a failed chunk counts as None)."""
+    market_ids = list(dict.fromkeys(m for m in market_ids if m))
+    chunks = [market_ids[i:i + MARKET_BOOK_CHUNK] for i in range(0, len(market_ids), MARKET_BOOK_CHUNK)]
+    chunk_results = await asyncio.gather(*(run_io('betfair', betfair.get_market_results, chunk)
+                                           for chunk in chunks), return_exceptions=True)
+    results = {market_id: None for market_id in market_ids}
+    for chunk_result in chunk_results:
+        if not isinstance(chunk_result, Exception):
+            results.update(chunk_result)
+    return results
+
+
+def store_market_for_bet(bet_id, market: Dict):
+    """Save a bet's market_id and selection_ids to Supabase in the background."""
+    run_in_background('supabase', supabase._request,
+                      f"pending_bets?id=eq.{bet_id}",
+                      method='PATCH',
+                      data={
+                          'market_id': market.get('market_id'),
+                          'selection_ids': json.dumps(market.get('selection_ids', {}))
+                      })
+
+
+def record_result(bet: Dict, bet_result: str, profit: float):
+    """Write a settled result to Supabase and the local DB in the background."""
+    run_in_background('supabase', supabase.mark_finished, bet.get('id'), bet_result, profit)
+    run_in_background('local_db', update_local_db, bet.get('match_description', ''),
+                      bet.get('selection', ''), bet_result, profit)
+
+
 # ============================================================================
 # DISCORD BOT
 # ============================================================================
@@ -807,6 +1143,7 @@ bot = commands.Bot(command_prefix='!', intents=intents)
 # Shared state
 betfair = BetfairClient()
 supabase = SupabaseClient()
+selection_cache = SelectionIdCache()
 previously_live = {}
 alerted_results = set()  # Track bet IDs that have already had result alerts sent
 
@@ -838,13 +1175,14 @@ def shorten_selection(selection: str) -> str:
 @bot.command(name='inplay')
 async def cmd_inplay(ctx):
     """Show all currently in-play bets."""
-    await asyncio.to_thread(sync_local_to_cloud)
-    # Get bets marked as live in Supabase (primary source)
-    live_bets_from_db = supabase.get_live_bets()
-
-    # Also check Betfair markets for any pending bets we might have missed
-    pending = supabase.get_pending_bets()
-    markets = betfair.get_inplay_tennis()
+    await run_io('local_db', sync_local_to_cloud)
+    # Bets marked as live in Supabase (primary source), plus Betfair markets
+    # for any pending bets we might have missed
+    live_bets_from_db, pending, markets = await asyncio.gather(
+        run_io('supabase', supabase.get_live_bets),
+        run_io('supabase', supabase.get_pending_bets),
+        run_io('betfair', betfair.get_inplay_tennis),
+    )
 
     # Build set of bet IDs already marked as live
     live_bet_ids = {bet.get('id') for bet in live_bets_from_db}
@@ -887,8 +1225,10 @@ async def cmd_inplay(ctx):
 @bot.command(name='debug')
 async def cmd_debug(ctx):
     """Debug: Show Betfair markets and matching attempts."""
-    pending = supabase.get_pending_bets()
-    markets = betfair.get_inplay_tennis()
+    pending, markets = await asyncio.gather(
+        run_io('supabase', supabase.get_pending_bets),
+        run_io('betfair', betfair.get_inplay_tennis),
+    )
 
     lines = []
     lines.append(f"**DEBUG: {len(markets)} Betfair markets, {len(pending)} pending bets**")
@@ -924,8 +1264,8 @@ async def cmd_debug(ctx):
 @bot.command(name='pending')
 async def cmd_pending(ctx):
     """Show all pending bets."""
-    await asyncio.to_thread(sync_local_to_cloud)
-    pending = supabase.get_pending_bets()
+    await run_io('local_db', sync_local_to_cloud)
+    pending = await run_io('supabase', supabase.get_pending_bets)
 
     if not pending:
         await ctx.send("No pending bets.")
@@ -968,8 +1308,8 @@ async def cmd_pending(ctx):
 @bot.command(name='stats')
 async def cmd_stats(ctx):
     """Show today's stats."""
-    await asyncio.to_thread(sync_local_to_cloud)
-    settled = supabase.get_settled_today()
+    await run_io('local_db', sync_local_to_cloud)
+    settled = await run_io('supabase', supabase.get_settled_today)
 
     if not settled:
         await ctx.send("No bets settled today.")
@@ -998,7 +1338,7 @@ async def cmd_stats(ctx):
 async def cmd_alert(ctx, result: str, *, match: str):
     """Manually send an alert. Usage: !alert win/loss Match Description"""
     # Find the bet in Supabase
-    pending = supabase.get_pending_bets()
+    pending = await run_io('supabase', supabase.get_pending_bets)
     bet = None
     for b in pending:
         if match.lower() in b.get('match_description', '').lower():
@@ -1007,7 +1347,7 @@ async def cmd_alert(ctx, result: str, *, match: str):
 
     if not bet:
         # Check settled bets
-        settled = supabase.get_settled_today()
+        settled = await run_io('supabase', supabase.get_settled_today)
         for b in settled:
             if match.lower() in b.get('match_description', '').lower():
                 bet = b
@@ -1050,15 +1390,15 @@ async def cmd_alert(ctx, result: str, *, match: str):
 @bot.command(name='refresh')
 async def cmd_refresh(ctx):
     """Check all pending bets against Betfair + Tennis Explorer and settle finished matches."""
-    await asyncio.to_thread(sync_local_to_cloud)
+    await run_io('local_db', sync_local_to_cloud)
     await ctx.send("Checking pending bets...")
 
     # Ensure Betfair is logged in
     if not betfair.session_token:
-        if not betfair.login():
+        if not await run_io('betfair', betfair.login):
             await ctx.send("Betfair login failed — will check Tennis Explorer only.")
 
-    pending = supabase.get_pending_bets()
+    pending = await run_io('supabase', supabase.get_pending_bets)
     if not pending:
         await ctx.send("No pending bets to check.")
         return
@@ -1069,35 +1409,39 @@ async def cmd_refresh(ctx):
     unsettled_bets = []  # Bets not resolved via Betfair, need TE check
 
     # ---- PHASE 1: Check Betfair ----
-    all_markets = betfair.get_all_tennis_markets() if betfair.session_token else []
+    all_markets = await run_io('betfair', betfair.get_all_tennis_markets) if betfair.session_token else []
     print(f"[{timestamp()}] !refresh: {len(pending)} pending bets, {len(all_markets)} Betfair markets")
+    await run_io('local_db', selection_cache.update_from_markets, all_markets)
 
+    # Find a Betfair market for every bet, then check them all concurrently
+    bet_markets = []
     for bet in pending:
-        bet_id = bet.get('id')
-        match_desc = bet.get('match_description', 'Unknown')
         market_id = bet.get('market_id')
-
-        # Try to find a Betfair market for this bet
         market = None
         if not market_id:
             market = find_market_for_bet(bet, all_markets)
             if market:
                 market_id = market.get('market_id')
-                supabase._request(
-                    f"pending_bets?id=eq.{bet_id}",
-                    method='PATCH',
-                    data={
-                        'market_id': market.get('market_id'),
-                        'selection_ids': json.dumps(market.get('selection_ids', {}))
-                    }
-                )
+                store_market_for_bet(bet.get('id'), market)
 
         if not market_id:
             unsettled_bets.append(bet)
             continue
+        bet_markets.append((bet, market, market_id))
+
+    results = await get_market_results([market_id for _, _, market_id in bet_markets])
+    refresh_selection_ids = await run_io('betfair', get_selection_ids_for_bets, [
+        dict(bet, market_id=market_id) for bet, market, market_id in bet_markets
+        if not (market and market.get('selection_ids'))
+        and (results.get(market_id) or {}).get('status') in ('CLOSED', 'ACTIVE', 'SUSPENDED')
+    ])
+
+    for bet, market, market_id in bet_markets:
+        bet_id = bet.get('id')
+        match_desc = bet.get('match_description', 'Unknown')
 
         # Check market status
-        result = betfair.get_market_result(market_id)
+        result = results.get(market_id)
         status = result.get('status') if result else None
 
         if status == 'CLOSED':
@@ -1105,7 +1449,7 @@ async def cmd_refresh(ctx):
             if market and market.get('selection_ids'):
                 selection_ids = market.get('selection_ids')
             else:
-                selection_ids = get_selection_ids_for_bet(bet)
+                selection_ids = refresh_selection_ids.get(bet_id)
 
             settled_via_bf = False
             if selection_ids:
@@ -1114,8 +1458,7 @@ async def cmd_refresh(ctx):
                 if outcome:
                     bet_result, profit = outcome
                     print(f"[{timestamp()}] [PATH: refresh_betfair] {match_desc} - {bet_result}")
-                    supabase.mark_finished(bet_id, bet_result, profit)
-                    update_local_db(match_desc, bet.get('selection', ''), bet_result, profit)
+                    record_result(bet, bet_result, profit)
                     if bet_id not in alerted_results:
                         send_result_alert(bet, bet_result, profit)
                         alerted_results.add(bet_id)
@@ -1132,7 +1475,7 @@ async def cmd_refresh(ctx):
         elif status in ['ACTIVE', 'SUSPENDED']:
             now_live.append(shorten_match(match_desc))
             if bet_id not in previously_live:
-                sel_ids = (market.get('selection_ids') if market else None) or get_selection_ids_for_bet(bet) or {}
+                sel_ids = (market.get('selection_ids') if market else None) or refresh_selection_ids.get(bet_id) or {}
                 previously_live[bet_id] = {'bet': bet, 'market': {'market_id': market_id, 'selection_ids': sel_ids}}
 
         elif status == 'OPEN':
@@ -1145,7 +1488,7 @@ async def cmd_refresh(ctx):
     # ---- PHASE 2: Check Tennis Explorer for remaining bets ----
     if unsettled_bets:
         await ctx.send(f"Checking Tennis Explorer for {len(unsettled_bets)} unresolved bet(s)...")
-        te_results = fetch_completed_results(days_back=3)
+        te_results = await run_io('tennis_explorer', fetch_completed_results, 3)
 
         for bet in unsettled_bets:
             bet_id = bet.get('id')
@@ -1157,8 +1500,7 @@ async def cmd_refresh(ctx):
                 if outcome:
                     bet_result, profit = outcome
                     print(f"[{timestamp()}] [PATH: refresh_te] {match_desc} - {bet_result}")
-                    supabase.mark_finished(bet_id, bet_result, profit)
-                    update_local_db(match_desc, bet.get('selection', ''), bet_result, profit)
+                    record_result(bet, bet_result, profit)
                     if bet_id not in alerted_results:
                         send_result_alert(bet, bet_result, profit)
                         alerted_results.add(bet_id)
@@ -1210,6 +1552,12 @@ async def cmd_refresh(ctx):
     await ctx.send("\n".join(lines))
 
 
+@bot.command(name='latency')
+async def cmd_latency(ctx):
+    """Show how long the last monitor tick spent on each upstream."""
+    await ctx.send("```" + tick_metrics.summary() + "```")
+
+
 # ============================================================================
 # MONITOR LOOP (runs every 30 seconds)
 # ============================================================================
@@ -1218,13 +1566,16 @@ async def cmd_refresh(ctx):
 async def monitor_loop():
     global previously_live
 
+    tick_metrics.start_tick()
+    result_checks = 0
     try:
-        pending = supabase.get_pending_bets()
+        pending = await get_pending_bets_nowait()
         if not pending:
             return
 
-        markets = betfair.get_inplay_tennis()
+        markets = await run_io('betfair', betfair.get_inplay_tennis)
         print(f"[{timestamp()}] {len(pending)} pending, {len(markets)} in-play markets")
+        await run_io('local_db', selection_cache.update_from_markets, markets)
 
         current_live = {}
 
@@ -1240,87 +1591,96 @@ async def monitor_loop():
                     send_live_alert(bet)
                     # Store market_id and selection_ids for result detection
                     # (local DB sync handles is_live via in_progress field)
-                    supabase._request(
-                        f"pending_bets?id=eq.{bet_id}",
-                        method='PATCH',
-                        data={
-                            'market_id': market.get('market_id'),
-                            'selection_ids': json.dumps(market.get('selection_ids', {}))
-                        }
-                    )
+                    store_market_for_bet(bet_id, market)
 
                 previously_live[bet_id] = {'bet': bet, 'market': market}
 
-        # Check for finished matches
-        for bet_id, data in list(previously_live.items()):
-            if bet_id not in current_live:
-                bet = data['bet']
-                market_info = data['market']
-                market_id = market_info.get('market_id')
-
-                if market_id:
-                    result = betfair.get_market_result(market_id)
-                    status = result.get('status') if result else None
-                    print(f"[{timestamp()}] Checking finished: {bet.get('match_description')} - Status: {status}")
-
-                    if status == 'CLOSED':
-                        print(f"[{timestamp()}] [PATH: main_loop] Settling {bet.get('match_description')}")
-                        outcome = determine_result(bet, market_info, result)
-                        if outcome:
-                            bet_result, profit = outcome
-                            print(f"[{timestamp()}] FINISHED: {bet.get('match_description')} - {bet_result}")
-                            if bet_id not in alerted_results:
-                                send_result_alert(bet, bet_result, profit)
-                                alerted_results.add(bet_id)
-                            supabase.mark_finished(bet_id, bet_result, profit)
-                            update_local_db(bet.get('match_description', ''), bet.get('selection', ''), bet_result, profit)
-                            del previously_live[bet_id]
-                        else:
-                            print(f"[{timestamp()}] Could not determine winner, keeping tracked")
-                    elif status == 'SUSPENDED' or status == 'ACTIVE' or status is None:
-                        # Keep tracking - market not settled yet or API error
-                        pass
-                    else:
-                        # Unknown status, keep tracking to be safe
-                        print(f"[{timestamp()}] Unknown status {status}, keeping tracked")
+        # Live alerts go out before any result checks
+        await send_queued_alerts()
 
-        # Check for any bets marked as live in Supabase that we're not tracking
+        finished = [(bet_id, data) for bet_id, data in previously_live.items()
+                    if bet_id not in current_live and data['market'].get('market_id')]
+        # Bets marked as live in Supabase that we're not tracking
         # This catches bets that finished during a restart or missed alerts
-        for bet in pending:
+        missed = [bet for bet in pending
+                  if bet.get('is_live') and bet.get('market_id')
+                  and bet.get('id') not in previously_live and bet.get('id') not in current_live]
+
+        # Check every market concurrently
+        market_ids = [data['market']['market_id'] for _, data in finished] + [bet['market_id'] for bet in missed]
+        results = await get_market_results(market_ids)
+        result_checks = len(results)
+        # Selection IDs for every missed bet that still needs them, in one request
+        missed_selection_ids = await run_io('betfair', get_selection_ids_for_bets, [
+            bet for bet in missed
+            if (results.get(bet['market_id']) or {}).get('status') in ('CLOSED', 'ACTIVE', 'SUSPENDED', 'OPEN')
+        ])
+
+        # Check for finished matches
+        for bet_id, data in finished:
+            bet = data['bet']
+            market_info = data['market']
+            result = results.get(market_info['market_id'])
+            status = result.get('status') if result else None
+            print(f"[{timestamp()}] Checking finished: {bet.get('match_description')} - Status: {status}")
+
+            if status == 'CLOSED':
+                print(f"[{timestamp()}] [PATH: main_loop] Settling {bet.get('match_description')}")
+                outcome = determine_result(bet, market_info, result)
+                if outcome:
+                    bet_result, profit = outcome
+                    print(f"[{timestamp()}] FINISHED: {bet.get('match_description')} - {bet_result}")
+                    if bet_id not in alerted_results:
+                        send_result_alert(bet, bet_result, profit)
+                        alerted_results.add(bet_id)
+                    record_result(bet, bet_result, profit)
+                    del previously_live[bet_id]
+                else:
+                    print(f"[{timestamp()}] Could not determine winner, keeping tracked")
+            elif status == 'SUSPENDED' or status == 'ACTIVE' or status is None:
+                # Keep tracking - market not settled yet or API error
+                pass
+            else:
+                # Unknown status, keep tracking to be safe
+                print(f"[{timestamp()}] Unknown status {status}, keeping tracked")
+
+        for bet in missed:
             bet_id = bet.get('id')
-            if bet.get('is_live') and bet.get('market_id') and bet_id not in previously_live and bet_id not in current_live:
-                market_id = bet.get('market_id')
-                result = betfair.get_market_result(market_id)
-                status = result.get('status') if result else None
-
-                if status == 'CLOSED':
-                    print(f"[{timestamp()}] [PATH: missed_alert_recovery] Found missed result: {bet.get('match_description')}")
-                    # Use selection_ids (stored or fetched) to correctly identify winner
-                    selection_ids = get_selection_ids_for_bet(bet)
-                    if selection_ids:
-                        market_info = {'selection_ids': selection_ids}
-                        outcome = determine_result(bet, market_info, result)
-                        if outcome:
-                            bet_result, profit = outcome
-                            print(f"[{timestamp()}] MISSED ALERT RECOVERY: {bet.get('match_description')} - {bet_result}")
-                            if bet_id not in alerted_results:
-                                send_result_alert(bet, bet_result, profit)
-                                alerted_results.add(bet_id)
-                            supabase.mark_finished(bet_id, bet_result, profit)
-                            update_local_db(bet.get('match_description', ''), bet.get('selection', ''), bet_result, profit)
-                        else:
-                            print(f"[{timestamp()}] Could not determine winner for missed result (no WINNER runner)")
+            market_id = bet.get('market_id')
+            result = results.get(market_id)
+            status = result.get('status') if result else None
+
+            if status == 'CLOSED':
+                print(f"[{timestamp()}] [PATH: missed_alert_recovery] Found missed result: {bet.get('match_description')}")
+                # Use selection_ids (stored or fetched) to correctly identify winner
+                selection_ids = missed_selection_ids.get(bet_id)
+                if selection_ids:
+                    market_info = {'selection_ids': selection_ids}
+                    outcome = determine_result(bet, market_info, result)
+                    if outcome:
+                        bet_result, profit = outcome
+                        print(f"[{timestamp()}] MISSED ALERT RECOVERY: {bet.get('match_description')} - {bet_result}")
+                        if bet_id not in alerted_results:
+                            send_result_alert(bet, bet_result, profit)
+                            alerted_results.add(bet_id)
+                        record_result(bet, bet_result, profit)
                     else:
-                        print(f"[{timestamp()}] SKIPPING settlement - no selection_ids for {bet.get('match_description')}")
-                elif status in ['ACTIVE', 'SUSPENDED', 'OPEN']:
-                    # Still live, add to tracking with selection_ids
-                    sel_ids = get_selection_ids_for_bet(bet) or {}
-                    previously_live[bet_id] = {'bet': bet, 'market': {'market_id': market_id, 'selection_ids': sel_ids}}
+                        print(f"[{timestamp()}] Could not determine winner for missed result (no WINNER runner)")
+                else:
+                    print(f"[{timestamp()}] SKIPPING settlement - no selection_ids for {bet.get('match_description')}")
+            elif status in ['ACTIVE', 'SUSPENDED', 'OPEN']:
+                # Still live, add to tracking with selection_ids
+                sel_ids = missed_selection_ids.get(bet_id) or {}
+                previously_live[bet_id] = {'bet': bet, 'market': {'market_id': market_id, 'selection_ids': sel_ids}}
 
         # Send any queued alerts via the bot
         await send_queued_alerts()
     except Exception as e:
         print(f"[{timestamp()}] Monitor error: {e}")
+    finally:
+        tick_metrics.end_tick(result_checks=result_checks)
+        if tick_metrics.last and tick_metrics.last['duration'] > SLOW_TICK_SECONDS:
+            print(f"[{timestamp()}] Slow monitor tick\n{tick_metrics.summary()}")
 
 
 @monitor_loop.before_loop
@@ -1328,7 +1688,7 @@ async def before_monitor():
     global previously_live
     await bot.wait_until_ready()
     if not betfair.session_token:
-        if betfair.login():
+        if await run_io('betfair', betfair.login):
             print(f"[{timestamp()}] Betfair login successful")
         else:
             print(f"[{timestamp()}] Betfair login failed — monitor will use TE fallback via !refresh")
@@ -1336,9 +1696,11 @@ async def before_monitor():
     # On startup, find ALL currently live bets and add to previously_live WITHOUT alerting
     # This prevents duplicate alerts when monitor restarts
     print(f"[{timestamp()}] Checking for currently live bets (no alerts on startup)...")
-    pending = supabase.get_pending_bets()
-    markets = betfair.get_inplay_tennis() if betfair.session_token else []
+    pending = await run_io('supabase', supabase.get_pending_bets)
+    markets = await run_io('betfair', betfair.get_inplay_tennis) if betfair.session_token else []
+    await run_io('local_db', selection_cache.update_from_markets, markets)
 
+    was_live = []
     for bet in pending:
         bet_id = bet.get('id')
         market = find_market_for_bet(bet, markets)
@@ -1349,63 +1711,64 @@ async def before_monitor():
             previously_live[bet_id] = {'bet': bet, 'market': market}
             # Store market_id and selection_ids for result detection
             # (don't set is_live - local DB sync handles that)
-            supabase._request(
-                f"pending_bets?id=eq.{bet_id}",
-                method='PATCH',
-                data={
-                    'market_id': market.get('market_id'),
-                    'selection_ids': json.dumps(market.get('selection_ids', {}))
-                }
-            )
+            store_market_for_bet(bet_id, market)
         elif bet.get('is_live') and bet.get('market_id'):
-            # Was marked live but not in current markets - check if finished
-            market_id = bet.get('market_id')
-            result = betfair.get_market_result(market_id)
-            status = result.get('status') if result else None
-            print(f"[{timestamp()}] Startup check (was live): {bet.get('match_description')} - Status: {status}")
+            was_live.append(bet)
+
+    # Was marked live but not in current markets - check if finished
+    results = await get_market_results([bet['market_id'] for bet in was_live])
+    was_live_selection_ids = await run_io('betfair', get_selection_ids_for_bets, [
+        bet for bet in was_live
+        if (results.get(bet['market_id']) or {}).get('status') in ('CLOSED', 'ACTIVE', 'SUSPENDED', 'OPEN')
+    ])
+    for bet in was_live:
+        bet_id = bet.get('id')
+        market_id = bet.get('market_id')
+        result = results.get(market_id)
+        status = result.get('status') if result else None
+        print(f"[{timestamp()}] Startup check (was live): {bet.get('match_description')} - Status: {status}")
 
-            if status == 'CLOSED':
-                print(f"[{timestamp()}] [PATH: startup_check] Settling {bet.get('match_description')}")
-                # Use selection_ids (stored or fetched) to correctly identify winner
-                selection_ids = get_selection_ids_for_bet(bet)
-                if selection_ids:
-                    market_info = {'selection_ids': selection_ids}
-                    outcome = determine_result(bet, market_info, result)
-                    if outcome:
-                        bet_result, profit = outcome
-                        print(f"[{timestamp()}] FINISHED (startup): {bet.get('match_description')} - {bet_result}")
-                        send_result_alert(bet, bet_result, profit)
-                        supabase.mark_finished(bet.get('id'), bet_result, profit)
-                        update_local_db(bet.get('match_description', ''), bet.get('selection', ''), bet_result, profit)
-                    else:
-                        print(f"[{timestamp()}] Could not determine winner at startup (no WINNER runner)")
+        if status == 'CLOSED':
+            print(f"[{timestamp()}] [PATH: startup_check] Settling {bet.get('match_description')}")
+            # Use selection_ids (stored or fetched) to correctly identify winner
+            selection_ids = was_live_selection_ids.get(bet_id)
+            if selection_ids:
+                market_info = {'selection_ids': selection_ids}
+                outcome = determine_result(bet, market_info, result)
+                if outcome:
+                    bet_result, profit = outcome
+                    print(f"[{timestamp()}] FINISHED (startup): {bet.get('match_description')} - {bet_result}")
+                    send_result_alert(bet, bet_result, profit)
+                    record_result(bet, bet_result, profit)
                 else:
-                    print(f"[{timestamp()}] SKIPPING startup settlement - no selection_ids for {bet.get('match_description')}")
-            elif status in ['ACTIVE', 'SUSPENDED', 'OPEN']:
-                # Still live on Betfair, add to tracking with selection_ids
-                sel_ids = get_selection_ids_for_bet(bet) or {}
-                previously_live[bet_id] = {'bet': bet, 'market': {'market_id': market_id, 'selection_ids': sel_ids}}
-            elif status is None:
-                # Market expired/gone on Betfair — leave for !refresh to settle via TE
-                print(f"[{timestamp()}] Startup: {bet.get('match_description')} - market expired, use !refresh to settle")
+                    print(f"[{timestamp()}] Could not determine winner at startup (no WINNER runner)")
+            else:
+                print(f"[{timestamp()}] SKIPPING startup settlement - no selection_ids for {bet.get('match_description')}")
+        elif status in ['ACTIVE', 'SUSPENDED', 'OPEN']:
+            # Still live on Betfair, add to tracking with selection_ids
+            sel_ids = was_live_selection_ids.get(bet_id) or {}
+            previously_live[bet_id] = {'bet': bet, 'market': {'market_id': market_id, 'selection_ids': sel_ids}}
+        elif status is None:
+            # Market expired/gone on Betfair — leave for !refresh to settle via TE
+            print(f"[{timestamp()}] Startup: {bet.get('match_description')} - market expired, use !refresh to settle")
+
+    # Send any queued alerts from startup checks
+    await send_queued_alerts()
 
     # Immediately sync live status from local DB (source of truth for is_live)
     try:
-        sync_live_status_from_local_db()
+        await run_io('local_db', sync_live_status_from_local_db)
         print(f"[{timestamp()}] Initial local DB sync completed")
     except Exception as e:
         print(f"[{timestamp()}] Initial local DB sync error: {e}")
 
-    # Send any queued alerts from startup checks
-    await send_queued_alerts()
-
 
 # Periodic sync: local DB in_progress -> Supabase is_live (every 5 minutes)
 @tasks.loop(minutes=2)
 async def local_db_sync_loop():
     """Sync in_progress status from local database to Supabase every 2 minutes."""
     try:
-        sync_live_status_from_local_db()
+        await run_io('local_db', sync_live_status_from_local_db)
     except Exception as e:
         print(f"[{timestamp()}] Local DB sync loop error: {e}")
 
@@ -0,0 +1,110 @@
+"""
+Tennis Betting System - Analysis Cache
+Keeps each upcoming match's model output between auto-mode cycles
+
+The match model doesn't read the exact odds. They only matter through
+MatchAnalyzer._odds_to_estimated_rank, which maps a price to a rank band for
+players we have no ranking for. So a cached model output is still valid
+while the player data and both odds bands are unchanged. Each cycle
+compares every match against its cache entry:
+- nothing changed                 -> cached result reused as is
+- only the prices moved           -> cached model output re-priced
+                                     (find_value, model tags, M12)
+- player data changed, odds crossed
+  a band or the entry is too old  -> full model run
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import ANALYSIS_CACHE_SETTINGS
+
+HIT = 'hit'
+REPRICE = 'reprice'
+FULL = 'full'
+
+
+class AnalysisCache:
+    """Per-match cache of model output, keyed by players, surface, day and tournament."""
+
+    def __init__(self, settings: Dict = None):
+        self.settings = settings or ANALYSIS_CACHE_SETTINGS
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple, Dict] = {}
+
+    @staticmethod
+    def match_key(match: Dict) -> Tuple:
+        """Cache key of an upcoming match."""
+        return (
+            match.get('player1_id'),
+            match.get('player2_id'),
+            match.get('surface', 'Hard'),
+            (match.get('date') or '')[:10],
+            match.get('tournament'),
+        )
+
+    @staticmethod
+    def match_prices(match: Dict) -> Tuple:
+        """Every price the value stage reads."""
+        return (
+            match.get('player1_odds'),
+            match.get('player2_odds'),
+            match.get('p1_2_0_odds'),
+            match.get('p2_2_0_odds'),
+        )
+
+    def lookup(self, key: Tuple, model_inputs: Tuple, prices: Tuple) -> Tuple[str, Optional[Dict]]:
+        """
+        Decide how much of a match has to be re-analysed.
+
+        Returns:
+            (HIT, entry), (REPRICE, entry) or (FULL, None)
+        """
+        if not self.settings.get("enabled", True):
+            return FULL, None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry['model_inputs'] != model_inputs:
+            return FULL, None
+        if time.time() - entry['analysed_at'] > self.settings.get("max_age_minutes", 180) * 60:
+            return FULL, None
+        if not entry['analysis']:
+            return FULL, None  # Skipped on odds last time - no model output to reuse
+        if entry['prices'] == prices:
+            return HIT, entry
+        return REPRICE, entry
+
+    def store(self, key: Tuple, model_inputs: Tuple, prices: Tuple, result: Dict,
+              reused_model: bool = False):
+        """Remember a match's result (keeping the original model timestamp if re-priced)."""
+        if not self.settings.get("enabled", True):
+            return
+        with self._lock:
+            previous = self._entries.get(key)
+            analysed_at = previous['analysed_at'] if reused_model and previous else time.time()
+            self._entries[key] = {
+                'model_inputs': model_inputs,
+                'prices': prices,
+                'analysis': result.get('analysis'),
+                'result': result,
+                'analysed_at': analysed_at,
+            }
+
+    def retain(self, keys: Iterable[Tuple]):
+        """Drop entries for matches no longer upcoming."""
+        keep = set(keys)
+        with self._lock:
+            for key in [k for k in self._entries if k not in keep]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Module-level cache: auto mode builds a new BetSuggester every cycle
+analysis_cache = AnalysisCache()
@@ -14,6 +14,7 @@ from config import (UI_COLORS, SURFACES, BETTING_SETTINGS, KELLY_STAKING, DB_PAT
                      MODEL12_SETTINGS, check_m12_fade)
 from database import db, TennisDatabase
 from match_analyzer import MatchAnalyzer
+from analysis_cache import analysis_cache, HIT, REPRICE
 from name_matcher import name_matcher
 from te_import_dialog import open_te_import_dialog
 
@@ -631,9 +632,14 @@ class BetSuggester:
         p2_count = db.get_player_match_count(p2_id) if p2_id else 0
         return min(p1_count, p2_count)
 
-    def analyze_upcoming_match(self, match: Dict) -> Dict:
+    def analyze_upcoming_match(self, match: Dict, analysis: Dict = None) -> Dict:
         """
         Analyze an upcoming match and determine value opportunities.
+
+        Args:
+            match: Upcoming match dict
+            analysis: Cached model output for this match, if still valid -
+                only the value stage is re-run against the current odds
         """
         p1_id = match.get('player1_id')
         p2_id = match.get('player2_id')
@@ -665,10 +671,11 @@ class BetSuggester:
                 }
 
         # Get probability analysis (pass odds for WTA/unranked player estimation)
-        analysis = self.analyzer.calculate_win_probability(
-            p1_id, p2_id, surface, match_date, p1_odds, p2_odds,
-            tournament=match.get('tournament')
-        )
+        if analysis is None:
+            analysis = self.analyzer.calculate_win_probability(
+                p1_id, p2_id, surface, match_date, p1_odds, p2_odds,
+                tournament=match.get('tournament')
+            )
 
         result = {
             'match': match,
@@ -821,17 +828,32 @@ class BetSuggester:
         """
         Analyze all upcoming matches and return value opportunities.
         """
-        matches = self.db.get_upcoming_matches(analyzed=False)
+        # Open, not-yet-stale markets with the same minimum liquidity as the
+        # upcoming matches list, straight from the status/start-time index
+        MIN_MATCHED_LIQUIDITY = 25
+        matches = self.db.get_live_upcoming_matches(min_matched=MIN_MATCHED_LIQUIDITY)
         results = []
 
-        # Filter out matches in the past (more than 6 hours ago to allow for timezone differences)
-        from datetime import datetime, timedelta
-        cutoff = (datetime.now() - timedelta(hours=6)).strftime("%Y-%m-%d %H:%M")
-        matches = [m for m in matches if m.get('date', '9999') >= cutoff]
-
-        # Apply same minimum liquidity filter as the upcoming matches list
-        MIN_MATCHED_LIQUIDITY = 25
-        matches = [m for m in matches if (m.get('total_matched') or 0) >= MIN_MATCHED_LIQUIDITY]
+        # Check all stored player IDs in one query, then resolve the names of
+        # any missing ones in one batch through the name resolution cache
+        existing_ids = self.db.get_existing_player_ids(
+            [m.get('player1_id') for m in matches] + [m.get('player2_id') for m in matches]
+        )
+        unresolved_names = []
+        for match in matches:
+            for side in ('player1', 'player2'):
+                if match.get(f'{side}_id') not in existing_ids:
+                    unresolved_names.append(match.get(f'{side}_name', ''))
+        resolved_players = self.db.resolve_player_names(unresolved_names, source='betfair')
+
+        # Fingerprint what the model reads so unchanged matches skip it
+        player_versions = self.db.get_player_data_versions(
+            list(existing_ids) + [p['id'] for p in resolved_players.values() if p]
+        )
+        rankings_version = self.analyzer.rankings_cache_version()
+        live_keys = []
+        analysed_states = []
+        counts = {'full': 0, 'repriced': 0, 'unchanged': 0}
 
         for match in matches:
             p1_id = match.get('player1_id')
@@ -843,18 +865,14 @@ class BetSuggester:
             if '/' in p1_name or '/' in p2_name:
                 continue
 
-            # Try to resolve missing player IDs using name matcher
-            if not p1_id or not self.db.get_player(p1_id):
-                mapped_id = name_matcher.get_db_id(p1_name)
-                if mapped_id and self.db.get_player(mapped_id):
-                    p1_id = mapped_id
-                    match['player1_id'] = mapped_id
+            # Fill in missing player IDs from the batch resolution
+            if p1_id not in existing_ids and resolved_players.get(p1_name):
+                p1_id = resolved_players[p1_name]['id']
+                match['player1_id'] = p1_id
 
-            if not p2_id or not self.db.get_player(p2_id):
-                mapped_id = name_matcher.get_db_id(p2_name)
-                if mapped_id and self.db.get_player(mapped_id):
-                    p2_id = mapped_id
-                    match['player2_id'] = mapped_id
+            if p2_id not in existing_ids and resolved_players.get(p2_name):
+                p2_id = resolved_players[p2_name]['id']
+                match['player2_id'] = p2_id
 
             # Skip auto-created players (negative IDs = no real data, unreliable model output)
             if (p1_id and p1_id < 0) or (p2_id and p2_id < 0):
@@ -863,8 +881,31 @@ class BetSuggester:
             # Now check if we have both player IDs
             if p1_id and p2_id:
                 try:
-                    analysis = self.analyze_upcoming_match(match)
+                    key = analysis_cache.match_key(match)
+                    live_keys.append(key)
+                    model_inputs = (
+                        player_versions.get(p1_id), player_versions.get(p2_id),
+                        self.analyzer._odds_to_estimated_rank(match.get('player1_odds')),
+                        self.analyzer._odds_to_estimated_rank(match.get('player2_odds')),
+                        rankings_version,
+                    )
+                    prices = analysis_cache.match_prices(match)
+                    status, entry = analysis_cache.lookup(key, model_inputs, prices)
+
+                    if status == HIT:
+                        # Nothing moved - reuse the result (already logged)
+                        results.append({**entry['result'], 'match': match})
+                        counts['unchanged'] += 1
+                        continue
+
+                    cached_model = entry['analysis'] if status == REPRICE else None
+                    analysis = self.analyze_upcoming_match(match, analysis=cached_model)
+                    analysis_cache.store(key, model_inputs, prices, analysis,
+                                         reused_model=cached_model is not None)
+                    counts['repriced' if cached_model is not None else 'full'] += 1
                     results.append(analysis)
+                    if not analysis.get('skipped') and match.get('id'):
+                        analysed_states.append((match['id'], analysis['p1_probability']))
                     # Log every analysed match (bets and non-bets)
                     if not analysis.get('skipped'):
                         try:
@@ -874,6 +915,11 @@ class BetSuggester:
                 except Exception as e:
                     print(f"Error analyzing match: {e}")
 
+        analysis_cache.retain(live_keys)
+        self.db.mark_upcoming_matches_analyzed(analysed_states)
+        print(f"Analysis: {counts['full']} full, {counts['repriced']} re-priced, "
+              f"{counts['unchanged']} unchanged")
+
         # Sort by best value (highest EV)
         results.sort(key=lambda x: max(
             [v['expected_value'] for v in x['value_bets']] or [0]
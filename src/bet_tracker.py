@@ -14,6 +14,7 @@ import re
 import json
 from config import UI_COLORS, SURFACES, KELLY_STAKING, get_tour_level, calculate_bet_model, DEFAULT_ANALYSIS_WEIGHTS
 from database import db, TennisDatabase
+from day_ordinal import day_number
 
 # Import Betfair client for live scores
 try:
@@ -757,14 +758,15 @@ class BetTracker:
 
             # Get all pending bets (no result yet)
             cursor.execute("""
-                SELECT id, match_date, player1, player2, selection, match_description
+                SELECT id, match_date, player1, player2, selection, match_description, day
                 FROM bets
                 WHERE result IS NULL
             """)
             pending_bets = cursor.fetchall()
 
             for bet in pending_bets:
-                bet_id, match_date, player1, player2, selection, match_desc = bet
+                bet_id, match_date, player1, player2, selection, match_desc, bet_day = bet
+                bet_day = bet_day or day_number(match_date)
 
                 # Try to extract player names from match_description if not set
                 if (not player1 or not player2) and match_desc:
@@ -787,7 +789,7 @@ class BetTracker:
                     cursor.execute("""
                         SELECT winner_name, loser_name, winner_id, loser_id, score, date
                         FROM matches
-                        WHERE date BETWEEN date(?, '-2 days') AND date(?, '+2 days')
+                        WHERE day BETWEEN ? - 2 AND ? + 2
                         AND (
                             (winner_name LIKE ? AND loser_name LIKE ?)
                             OR (winner_name LIKE ? AND loser_name LIKE ?)
@@ -797,7 +799,7 @@ class BetTracker:
                         ORDER BY date DESC
                         LIMIT 1
                     """, (
-                        match_date, match_date,
+                        bet_day, bet_day,
                         f'%{player1}%', f'%{player2}%',
                         f'%{player2}%', f'%{player1}%',
                         f'{player1[:10]}%', f'{player2[:10]}%',
@@ -3900,6 +3902,13 @@ A 10% edge means we think the player is 10 percentage points more likely to win
         if not self.betfair_client:
             return []
 
+        # Market stream cache first - no API calls for markets already known
+        stream_markets = self.betfair_client.get_stream_inplay_markets()
+        if stream_markets is not None:
+            for market in stream_markets:
+                market['score'] = self._parse_betfair_score(market.pop('book') or {}) or "In-Play"
+            return stream_markets
+
         # Get in-play tennis markets
         params = {
             "filter": {
@@ -3942,6 +3951,9 @@ A 10% edge means we think the player is 10 percentage points more likely to win
         if not market_ids:
             return []
 
+        # Stream these from now on (the subscription only holds markets it was given)
+        self.betfair_client.subscribe_stream(market_ids, live=True)
+
         # Get market books with scores (may be empty if API doesn't return score data)
         scores_by_market = self._get_market_scores(market_ids)
 
@@ -4080,17 +4092,11 @@ A 10% edge means we think the player is 10 percentage points more likely to win
                 if not market_id:
                     continue
 
-                # Get market book to check result
-                params = {
-                    "marketIds": [market_id],
-                    "priceProjection": {"priceData": ["EX_BEST_OFFERS"]}
-                }
-                result = self.betfair_client._api_request("listMarketBook", params)
-
-                if not result or len(result) == 0:
+                # Get market book to check result (stream cache, else listMarketBook)
+                market_book = self.betfair_client.get_market_books([market_id]).get(market_id)
+                if not market_book:
                     continue
 
-                market_book = result[0]
                 status = market_book.get('status')
 
                 # Only process if market is CLOSED (match finished)
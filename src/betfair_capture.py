@@ -15,20 +15,24 @@ Usage:
     3. Or use the batch file: run_betfair_tennis.bat
 """
 
-import requests
 import json
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import sqlite3
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database import db
-from name_matcher import name_matcher
-from config import normalize_tournament_name
+from http_client import http_client
+from config import (normalize_tournament_name, HTTP_CLIENT_SETTINGS, BETFAIR_API_SETTINGS,
+                    ODDS_HISTORY_SETTINGS, BETFAIR_CATALOGUE_SETTINGS, ODDS_API, get_tour_level)
+from rate_limiter import shared_limiter
+from betfair_stream import MarketStream, get_market_stream, subscribe_market_stream
 
 # Optional: Odds API for Pinnacle comparison
 try:
@@ -90,6 +94,40 @@ TENNIS_EVENT_TYPE_ID = "2"
 # Market type for match winner
 MATCH_ODDS_MARKET = "MATCH_ODDS"
 
+# listMarketBook request weight per market, by price projection (Betfair
+# "Market Data Request Limits"); combinations are cheaper than the sum
+PRICE_DATA_WEIGHTS = {
+    frozenset(): 2,
+    frozenset(["SP_AVAILABLE"]): 3,
+    frozenset(["SP_TRADED"]): 7,
+    frozenset(["EX_BEST_OFFERS"]): 5,
+    frozenset(["EX_ALL_OFFERS"]): 17,
+    frozenset(["EX_TRADED"]): 17,
+    frozenset(["EX_BEST_OFFERS", "EX_TRADED"]): 20,
+    frozenset(["EX_ALL_OFFERS", "EX_TRADED"]): 32,
+}
+
+
+def market_book_weight(price_data: List[str]) -> int:
+    """Request weight of one market in a listMarketBook call."""
+    key = frozenset(price_data or [])
+    if key in PRICE_DATA_WEIGHTS:
+        return PRICE_DATA_WEIGHTS[key]
+    # Other combinations: sum of the parts
+    return sum(PRICE_DATA_WEIGHTS.get(frozenset([p]), 0) for p in key) or PRICE_DATA_WEIGHTS[frozenset()]
+
+
+# Weight budget for data requests, shared by every capture instance and thread
+_BETFAIR_WEIGHT_LIMITER = shared_limiter("api.betfair.com", BETFAIR_API_SETTINGS["weight_per_second"],
+                                         BETFAIR_API_SETTINGS["weight_per_second"])
+
+# Full catalogue projection (runner names, start time, event, competition)
+CATALOGUE_PROJECTION = ["RUNNER_DESCRIPTION", "MARKET_START_TIME", "EVENT", "COMPETITION"]
+
+# market_id -> (fetched_at, parsed catalogue entry or None), shared by every capture
+_CATALOGUE_CACHE: Dict[str, Tuple[float, Optional[Dict]]] = {}
+_CATALOGUE_LOCK = threading.Lock()
+
 # Minimum liquidity (GBP) required to capture odds
 # Set to 0 to capture all matches regardless of liquidity
 MIN_LIQUIDITY_GBP = 0
@@ -98,6 +136,21 @@ MIN_LIQUIDITY_GBP = 0
 # Set to 1.0 (100%) to effectively disable skipping
 MAX_ODDS_DISCREPANCY = 1.0
 
+# Callbacks run after save_to_database stores matches (e.g. to requeue
+# background player refreshes); registered with add_save_listener
+_save_listeners = []
+
+
+def add_save_listener(callback):
+    """Call callback() whenever captured matches are saved."""
+    if callback not in _save_listeners:
+        _save_listeners.append(callback)
+
+
+def remove_save_listener(callback):
+    if callback in _save_listeners:
+        _save_listeners.remove(callback)
+
 
 class BetfairTennisCapture:
     """Capture tennis odds from Betfair Exchange."""
@@ -118,7 +171,9 @@ class BetfairTennisCapture:
         self.password = password or file_creds.get('password') or os.environ.get('BETFAIR_PASSWORD', '')
 
         self.session_token = None
-        self.session = requests.Session()
+        self.session = http_client.session_for()
+        self.weight_limiter = _BETFAIR_WEIGHT_LIMITER
+        self.last_market_book_timings = []
 
         if not all([self.app_key, self.username, self.password]):
             print("WARNING: Missing Betfair credentials!")
@@ -179,7 +234,9 @@ class BetfairTennisCapture:
         url = BETFAIR_API_URL + endpoint + "/"
 
         try:
-            response = self.session.post(url, headers=headers, json=params)
+            # Betting API list* calls are reads, so safe to retry
+            response = self.session.post(url, headers=headers, json=params,
+                                         retries=HTTP_CLIENT_SETTINGS["max_retries"])
 
             if response.status_code == 200:
                 return response.json()
@@ -251,7 +308,13 @@ class BetfairTennisCapture:
 
     def get_match_odds_markets(self, event_id: str = None, competition_id: str = None,
                                 hours_ahead: int = 48) -> List[Dict]:
-        """Get match odds markets for tennis matches."""
+        """
+        Get match odds markets for tennis matches.
+
+        The window is listed with start times only; runner, event and
+        competition details come from the catalogue cache, so only markets
+        not seen before (or past the cache TTL) are requested in full.
+        """
         now = datetime.utcnow()
         from_time = now.strftime("%Y-%m-%dT%H:%M:%SZ")
         to_time = (now + timedelta(hours=hours_ahead)).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -271,98 +334,338 @@ class BetfairTennisCapture:
         if competition_id:
             filter_params["competitionIds"] = [competition_id]
 
+        if not BETFAIR_CATALOGUE_SETTINGS["enabled"]:
+            params = {
+                "filter": filter_params,
+                "marketProjection": CATALOGUE_PROJECTION,
+                "maxResults": "1000",
+                "sort": "FIRST_TO_START"
+            }
+            result = self._api_request("listMarketCatalogue", params)
+            markets = self._classify_competitions(self._parse_catalogue(result or []))
+        else:
+            params = {
+                "filter": filter_params,
+                "marketProjection": ["MARKET_START_TIME"],
+                "maxResults": "1000",
+                "sort": "FIRST_TO_START"
+            }
+            listing = self._api_request("listMarketCatalogue", params)
+            if not listing:
+                return []
+            catalogue = self._get_catalogue([m.get('marketId') for m in listing])
+            markets = []
+            for item in listing:
+                market = catalogue.get(item.get('marketId'))
+                if market:
+                    # Start times do move before the off
+                    markets.append({**market, 'market_start_time': item.get('marketStartTime')})
+
+        if markets:
+            if event_id or competition_id:
+                stream = self.market_stream()
+            else:
+                # The full listing (soonest first) decides what the stream subscribes to
+                stream = self.subscribe_stream([m['market_id'] for m in markets])
+            if stream is not None:
+                stream.cache.set_catalogue(markets)
+        return markets
+
+    def _get_catalogue(self, market_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Catalogue entries by market ID from the cache, fetching the rest.
+
+        Markets that aren't two-runner matches are cached as None so they
+        aren't requested again either.
+        """
+        settings = BETFAIR_CATALOGUE_SETTINGS
+        now = time.time()
+        ttl = settings["ttl_minutes"] * 60
+        with _CATALOGUE_LOCK:
+            for market_id in [m for m, entry in _CATALOGUE_CACHE.items() if now - entry[0] > ttl]:
+                del _CATALOGUE_CACHE[market_id]
+            missing = [m for m in dict.fromkeys(market_ids) if m and m not in _CATALOGUE_CACHE]
+
+        chunk = settings["request_chunk"]
+        for i in range(0, len(missing), chunk):
+            batch = missing[i:i + chunk]
+            params = {
+                "filter": {"marketIds": batch},
+                "marketProjection": CATALOGUE_PROJECTION,
+                "maxResults": "1000"
+            }
+            result = self._api_request("listMarketCatalogue", params)
+            if result is None:
+                continue  # Try again next time
+            parsed = {m['market_id']: m for m in self._classify_competitions(self._parse_catalogue(result))}
+            with _CATALOGUE_LOCK:
+                for market_id in batch:
+                    _CATALOGUE_CACHE[market_id] = (now, parsed.get(market_id))
+
+        if missing:
+            print(f"Catalogue: {len(market_ids) - len(missing)} cached, {len(missing)} requested")
+        with _CATALOGUE_LOCK:
+            return {m: _CATALOGUE_CACHE[m][1] for m in market_ids if m in _CATALOGUE_CACHE}
+
+    def _classify_competitions(self, markets: List[Dict]) -> List[Dict]:
+        """
+        Add surface and tour level to catalogue markets.
+
+        Classifications are kept per competition in the database; a
+        competition is only re-classified when its name or the month changes
+        (grass season), unless it was set by hand.
+        """
+        ids = {m['competition_id'] for m in markets if m.get('competition_id')}
+        known = db.get_betfair_competitions(list(ids))
+        new_rows = []
+        for market in markets:
+            name = market.get('competition_name') or ''
+            date_str = (market.get('market_start_time') or '')[:10]
+            month = int(date_str[5:7]) if len(date_str) == 10 else None
+            comp_id = market.get('competition_id')
+            entry = known.get(comp_id)
+            if entry is None or not (entry['manual'] or (entry['name'] == name and entry['month'] == month)):
+                entry = {'competition_id': comp_id, 'name': name, 'month': month, 'manual': 0,
+                         'surface': self._guess_surface(name, date_str),
+                         'level': get_tour_level(name)}
+                if comp_id:
+                    known[comp_id] = entry
+                    new_rows.append(entry)
+            market['surface'] = entry['surface']
+            market['tour_level'] = entry['level'] or get_tour_level(name)
+        if new_rows:
+            db.save_betfair_competitions(new_rows)
+        return markets
+
+
+    @staticmethod
+    def _parse_catalogue(result: List[Dict]) -> List[Dict]:
+        """Two-runner markets from a listMarketCatalogue response."""
+        markets = []
+        for market in result:
+            runners = []
+            for runner in market.get('runners', []):
+                runners.append({
+                    'selection_id': runner.get('selectionId'),
+                    'name': runner.get('runnerName'),
+                    'sort_priority': runner.get('sortPriority')
+                })
+
+            # Only include markets with exactly 2 runners (tennis match)
+            if len(runners) == 2:
+                event = market.get('event', {})
+                competition = market.get('competition', {})
+
+                markets.append({
+                    'market_id': market.get('marketId'),
+                    'market_name': market.get('marketName'),
+                    'market_start_time': market.get('marketStartTime'),
+                    'event_id': event.get('id'),
+                    'event_name': event.get('name'),
+                    'competition_id': competition.get('id'),
+                    'competition_name': competition.get('name'),
+                    'runners': runners
+                })
+        return markets
+
+    @staticmethod
+    def _parse_market_book(market: Dict) -> Dict:
+        """Best back/lay prices per runner from a listMarketBook market."""
+        runners_odds = {}
+
+        for runner in market.get('runners', []):
+            sel_id = runner.get('selectionId')
+            back_prices = runner.get('ex', {}).get('availableToBack', [])
+            lay_prices = runner.get('ex', {}).get('availableToLay', [])
+
+            best_back = back_prices[0] if back_prices else {}
+            best_lay = lay_prices[0] if lay_prices else {}
+
+            runners_odds[sel_id] = {
+                'back_odds': best_back.get('price'),
+                'back_size': best_back.get('size'),
+                'lay_odds': best_lay.get('price'),
+                'lay_size': best_lay.get('size'),
+                'status': runner.get('status'),
+                'total_matched': runner.get('totalMatched', 0)
+            }
+
+        return {
+            'status': market.get('status'),
+            'inplay': market.get('inplay', False),
+            'total_matched': market.get('totalMatched', 0),
+            'runners': runners_odds
+        }
+
+    def _fetch_market_book_batch(self, batch: List[str], price_data: List[str],
+                                 weight_per_market: int, retries: int) -> Tuple[List[Dict], List[Dict]]:
+        """listMarketBook for one batch of market IDs, retrying on failure.
+
+        The last retry splits the batch in half, so one bad market or a
+        TOO_MUCH_DATA rejection doesn't lose the whole batch.
+
+        Returns:
+            (market books, timing dicts - one per request made)
+        """
         params = {
-            "filter": filter_params,
-            "marketProjection": ["RUNNER_DESCRIPTION", "MARKET_START_TIME", "EVENT", "COMPETITION"],
-            "maxResults": "1000",
-            "sort": "FIRST_TO_START"
+            "marketIds": batch,
+            "priceProjection": {
+                "priceData": price_data,
+                "virtualise": True
+            }
         }
 
-        result = self._api_request("listMarketCatalogue", params)
+        weight = len(batch) * weight_per_market
+        start = time.perf_counter()
+        self.weight_limiter.acquire(weight)
+        sent = time.perf_counter()
+        result = self._api_request("listMarketBook", params)
+        timings = [{
+            'markets': len(batch),
+            'weight': weight,
+            'wait_ms': (sent - start) * 1000,
+            'elapsed_ms': (time.perf_counter() - sent) * 1000,
+            'ok': result is not None,
+        }]
+        if result is not None:
+            return result, timings
+        if retries <= 0:
+            return [], timings
+
+        time.sleep(HTTP_CLIENT_SETTINGS["retry_backoff"])
+        if retries == 1 and len(batch) > 1:
+            parts = [batch[:len(batch) // 2], batch[len(batch) // 2:]]
+        else:
+            parts = [batch]
+        markets = []
+        for part in parts:
+            part_markets, part_timings = self._fetch_market_book_batch(part, price_data, weight_per_market,
+                                                                       retries - 1)
+            markets.extend(part_markets)
+            timings.extend(part_timings)
+        return markets, timings
+
+    def _poll_market_books(self, market_ids: List[str]) -> Dict[str, Dict]:
+        """listMarketBook responses for multiple markets, by market ID.
+
+        Markets are split into the largest batches Betfair's request weight
+        limit allows (40 with EX_BEST_OFFERS) and the batches are fetched
+        concurrently under the shared weight budget. Per-batch timings of
+        the last call are kept in self.last_market_book_timings.
+        """
+        self.last_market_book_timings = []
+        if not market_ids:
+            return {}
 
-        if result:
-            markets = []
-            for market in result:
-                runners = []
-                for runner in market.get('runners', []):
-                    runners.append({
-                        'selection_id': runner.get('selectionId'),
-                        'name': runner.get('runnerName'),
-                        'sort_priority': runner.get('sortPriority')
-                    })
-
-                # Only include markets with exactly 2 runners (tennis match)
-                if len(runners) == 2:
-                    event = market.get('event', {})
-                    competition = market.get('competition', {})
-
-                    markets.append({
-                        'market_id': market.get('marketId'),
-                        'market_name': market.get('marketName'),
-                        'market_start_time': market.get('marketStartTime'),
-                        'event_id': event.get('id'),
-                        'event_name': event.get('name'),
-                        'competition_id': competition.get('id'),
-                        'competition_name': competition.get('name'),
-                        'runners': runners
-                    })
-            return markets
+        settings = BETFAIR_API_SETTINGS
+        price_data = settings["price_data"]
+        weight_per_market = market_book_weight(price_data)
+        batch_size = max(1, settings["max_request_weight"] // weight_per_market)
+        batches = [market_ids[i:i + batch_size] for i in range(0, len(market_ids), batch_size)]
+
+        start = time.perf_counter()
+        workers = max(1, min(len(batches), settings["market_book_max_in_flight"]))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._fetch_market_book_batch, batch, price_data,
+                                       weight_per_market, settings["batch_retries"])
+                       for batch in batches]
+            results = [future.result() for future in futures]
+        wall = time.perf_counter() - start
+
+        books = {}
+        timings = []
+        for index, (markets, batch_timings) in enumerate(results):
+            for timing in batch_timings:
+                timing['batch'] = index
+            timings.extend(batch_timings)
+            for market in markets:
+                books[market.get('marketId')] = market
+        self.last_market_book_timings = timings
+
+        slowest = max(t['elapsed_ms'] for t in timings)
+        retried = len(timings) - len(batches)
+        failed = sum(1 for t in timings if not t['ok'])
+        print(f"listMarketBook: {len(books)}/{len(market_ids)} markets in {len(batches)} batches, "
+              f"{wall:.2f}s (slowest batch {slowest:.0f} ms, {retried} retries, {failed} failed requests)")
+
+        return books
+
+    def get_market_books(self, market_ids: List[str]) -> Dict[str, Dict]:
+        """listMarketBook-shaped books by market ID.
+
+        Served from the market stream cache when the stream is healthy;
+        markets it doesn't hold (or all of them, when it's down) are polled.
+        """
+        stream = self.market_stream()
+        if stream is None:
+            return self._poll_market_books(market_ids)
 
-        return []
+        books = stream.cache.market_books(market_ids)
+        missing = [market_id for market_id in market_ids if market_id not in books]
+        print(f"Market stream: {len(books)}/{len(market_ids)} markets from cache")
+        if missing:
+            books.update(self._poll_market_books(missing))
+        return books
 
     def get_market_odds(self, market_ids: List[str]) -> Dict[str, Dict]:
         """Get current odds for multiple markets."""
-        if not market_ids:
-            return {}
+        return {market_id: self._parse_market_book(book)
+                for market_id, book in self.get_market_books(market_ids).items()}
 
-        # Betfair limits to 40 markets per request
-        all_odds = {}
+    # =========================================================================
+    # Market stream
+    # =========================================================================
 
-        for i in range(0, len(market_ids), 40):
-            batch = market_ids[i:i+40]
+    def market_stream(self) -> Optional[MarketStream]:
+        """The shared Exchange Stream subscription, or None to poll REST."""
+        if not self.session_token:
+            return None
+        return get_market_stream(self.app_key, self.session_token)
 
-            params = {
-                "marketIds": batch,
-                "priceProjection": {
-                    "priceData": ["EX_BEST_OFFERS"],
-                    "virtualise": True
-                }
-            }
+    def subscribe_stream(self, market_ids: List[str], live: bool = False) -> Optional[MarketStream]:
+        """Register markets with the shared stream subscription (live: an in-play listing)."""
+        if not self.session_token:
+            return None
+        return subscribe_market_stream(self.app_key, self.session_token, market_ids, live=live)
 
-            result = self._api_request("listMarketBook", params)
-
-            if result:
-                for market in result:
-                    market_id = market.get('marketId')
-                    runners_odds = {}
-
-                    for runner in market.get('runners', []):
-                        sel_id = runner.get('selectionId')
-                        back_prices = runner.get('ex', {}).get('availableToBack', [])
-                        lay_prices = runner.get('ex', {}).get('availableToLay', [])
-
-                        best_back = back_prices[0] if back_prices else {}
-                        best_lay = lay_prices[0] if lay_prices else {}
-
-                        runners_odds[sel_id] = {
-                            'back_odds': best_back.get('price'),
-                            'back_size': best_back.get('size'),
-                            'lay_odds': best_lay.get('price'),
-                            'lay_size': best_lay.get('size'),
-                            'status': runner.get('status'),
-                            'total_matched': runner.get('totalMatched', 0)
-                        }
-
-                    all_odds[market_id] = {
-                        'status': market.get('status'),
-                        'inplay': market.get('inplay', False),
-                        'total_matched': market.get('totalMatched', 0),
-                        'runners': runners_odds
-                    }
+    def _fill_stream_catalogue(self, stream: MarketStream, market_ids: List[str]):
+        """Fetch catalogue entries (runner names) for cached markets that lack them."""
+        missing = stream.cache.missing_catalogue(market_ids)
+        if missing:
+            catalogue = self._get_catalogue(missing)
+            stream.cache.set_catalogue([m for m in catalogue.values() if m])
 
-            time.sleep(0.2)  # Rate limiting
+    def get_stream_inplay_markets(self) -> Optional[List[Dict]]:
+        """
+        In-play match odds markets from the stream cache.
 
-        return all_odds
+        Returns None when the stream is down (poll listMarketCatalogue
+        instead). Each market has market_id, event_name, player1, player2,
+        selection_ids and its listMarketBook-shaped book.
+        """
+        stream = self.market_stream()
+        if stream is None:
+            return None
+
+        market_ids = stream.cache.market_ids(inplay=True, status='OPEN')
+        market_ids += stream.cache.market_ids(inplay=True, status='SUSPENDED')
+        self._fill_stream_catalogue(stream, market_ids)
+
+        markets = []
+        for market_id in market_ids:
+            catalogue = stream.cache.catalogue(market_id)
+            if not catalogue:
+                continue
+            runners = sorted(catalogue['runners'], key=lambda r: r.get('sort_priority') or 0)
+            markets.append({
+                'market_id': market_id,
+                'event_name': catalogue.get('event_name', ''),
+                'player1': runners[0]['name'],
+                'player2': runners[1]['name'],
+                'selection_ids': {runner['name']: runner['selection_id'] for runner in runners},
+                'book': stream.cache.market_book(market_id),
+            })
+        return markets
 
     def capture_all_tennis_matches(self, hours_ahead: int = 48,
                                     competition_filter: str = None) -> List[Dict]:
@@ -389,7 +692,7 @@ class BetfairTennisCapture:
         # Fetch Pinnacle odds for comparison (if API configured)
         pinnacle_matches = []
         odds_api_client = None
-        if ODDS_API_AVAILABLE:
+        if ODDS_API_AVAILABLE and ODDS_API["enabled"]:
             print("Fetching Pinnacle odds for comparison...")
             try:
                 odds_api_client = OddsAPIClient()
@@ -457,7 +760,8 @@ class BetfairTennisCapture:
                 comparison = odds_api_client.compare_odds(
                     p1['name'], p2['name'],
                     p1_odds, p2_odds,
-                    threshold=MAX_ODDS_DISCREPANCY
+                    threshold=MAX_ODDS_DISCREPANCY,
+                    matches=pinnacle_matches
                 )
                 pinnacle_comparison = comparison
 
@@ -489,9 +793,15 @@ class BetfairTennisCapture:
                 'player2_odds': p2_odds,
                 'player1_liquidity': p1_liquidity,
                 'player2_liquidity': p2_liquidity,
+                'player1_selection_id': p1['selection_id'],
+                'player2_selection_id': p2['selection_id'],
+                'player1_lay_odds': p1_odds_data.get('lay_odds'),
+                'player2_lay_odds': p2_odds_data.get('lay_odds'),
+                'player1_matched': p1_odds_data.get('total_matched'),
+                'player2_matched': p2_odds_data.get('total_matched'),
                 'total_matched': odds_data.get('total_matched', 0),
                 'captured_at': datetime.utcnow().isoformat(),
-                'surface': self._guess_surface(comp_name, market.get('market_start_time', '')[:10]),
+                'surface': market.get('surface') or self._guess_surface(comp_name, market.get('market_start_time', '')[:10]),
                 'pinnacle_p1_odds': (pinnacle_comparison.get('pinnacle_odds') or [None, None])[0] if pinnacle_comparison else None,
                 'pinnacle_p2_odds': (pinnacle_comparison.get('pinnacle_odds') or [None, None])[1] if pinnacle_comparison else None,
             }
@@ -517,8 +827,9 @@ class BetfairTennisCapture:
         from config import get_tournament_surface
         return get_tournament_surface(competition_name, date_str)
 
-    def _create_missing_player(self, player_name: str) -> Optional[Dict]:
-        """Create a new player entry for a player not in the database."""
+    @staticmethod
+    def _missing_player_record(player_name: str) -> Dict:
+        """Player row for a runner not in the database."""
         # Parse name into first/last
         parts = player_name.strip().split()
         if len(parts) >= 2:
@@ -534,7 +845,7 @@ class BetfairTennisCapture:
         name_hash = int(hashlib.md5(player_name.lower().encode()).hexdigest()[:8], 16)
         player_id = -(name_hash % 900000 + 100000)  # Range: -100000 to -999999
 
-        player_data = {
+        return {
             'id': player_id,
             'name': player_name,
             'first_name': first_name,
@@ -545,56 +856,61 @@ class BetfairTennisCapture:
             'dob': None,
         }
 
+    def _create_missing_players(self, player_names: List[str]) -> Dict[str, Dict]:
+        """Create player entries for runners not in the database, in one transaction."""
+        records = {name: self._missing_player_record(name) for name in player_names}
+        if not records:
+            return {}
         try:
-            db.insert_player(player_data)
-            print(f"  Added missing player: {player_name}")
-            return player_data
+            db.insert_players_batch(list(records.values()))
         except Exception as e:
-            print(f"  Could not add player {player_name}: {e}")
-            return None
+            print(f"  Could not add players: {e}")
+            return {}
+        for name in records:
+            print(f"  Added missing player: {name}")
+        return records
 
     def save_to_database(self, captured_matches: List[Dict]) -> int:
         """Save captured matches to database as upcoming matches."""
         imported = 0
         players_added = 0
-        player_cache = {}  # Cache player lookups to avoid repeated DB queries
 
-        for match in captured_matches:
-            # Try to find player IDs using name_matcher first, then direct lookup
-            p1_name = match['player1_name']
-            p2_name = match['player2_name']
+        # Price ticks for line movement and CLV (before player resolution -
+        # history is kept for every market, even ones we can't analyse)
+        if ODDS_HISTORY_SETTINGS["enabled"]:
+            try:
+                ticks = db.record_odds_ticks(captured_matches)
+                print(f"Odds history: {ticks} price changes recorded")
+            except Exception as e:
+                print(f"Odds history error: {e}")
+
+        # Resolve all unique runner names in one batch - names seen on earlier
+        # captures come straight from the name_resolutions cache, new ones are
+        # tried against an in-memory name index before the per-name strategies
+        runner_names = [m['player1_name'] for m in captured_matches] + \
+                       [m['player2_name'] for m in captured_matches]
+        cached = db.get_name_resolutions(runner_names, source='betfair')
+        has_new_names = any(n not in cached and '/' not in n for n in runner_names if n)
+        player_cache = db.resolve_player_names(
+            runner_names, source='betfair',
+            name_index=db.build_name_index() if has_new_names else None
+        )
 
-            # Check cache first for player 1
-            if p1_name in player_cache:
-                p1 = player_cache[p1_name]
-            else:
-                p1_mapped_id = name_matcher.get_db_id(p1_name)
-                p1 = None
-                if p1_mapped_id:
-                    p1 = db.get_player(p1_mapped_id)
-                if not p1:
-                    p1 = db.get_player_by_name(p1_name)
-                if not p1:
-                    p1 = self._create_missing_player(p1_name)
-                    if p1:
-                        players_added += 1
-                player_cache[p1_name] = p1
-
-            # Check cache first for player 2
-            if p2_name in player_cache:
-                p2 = player_cache[p2_name]
-            else:
-                p2_mapped_id = name_matcher.get_db_id(p2_name)
-                p2 = None
-                if p2_mapped_id:
-                    p2 = db.get_player(p2_mapped_id)
-                if not p2:
-                    p2 = db.get_player_by_name(p2_name)
-                if not p2:
-                    p2 = self._create_missing_player(p2_name)
-                    if p2:
-                        players_added += 1
-                player_cache[p2_name] = p2
+        new_players = self._create_missing_players(
+            [name for name, player in player_cache.items() if player is None]
+        )
+        if new_players:
+            players_added = len(new_players)
+            player_cache.update(new_players)
+            db.save_name_resolutions([
+                ('betfair', name, player['id'], 'auto_created', 0.5)
+                for name, player in new_players.items()
+            ])
+
+        rows = []
+        for match in captured_matches:
+            p1 = player_cache.get(match['player1_name'])
+            p2 = player_cache.get(match['player2_name'])
 
             # Parse date and time from market_start_time
             start_time = match.get('market_start_time', '')
@@ -608,7 +924,8 @@ class BetfairTennisCapture:
             else:
                 match_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-            match_data = {
+            rows.append({
+                'market_id': match.get('market_id'),
                 'tournament': normalize_tournament_name(match.get('competition_name', '')),
                 'date': match_date,
                 'surface': match.get('surface', 'Hard'),
@@ -622,18 +939,33 @@ class BetfairTennisCapture:
                 'player1_liquidity': match.get('player1_liquidity'),
                 'player2_liquidity': match.get('player2_liquidity'),
                 'total_matched': match.get('total_matched'),
-            }
+            })
 
-            try:
-                db.add_upcoming_match(match_data)
-                imported += 1
-            except Exception as e:
-                print(f"Error importing match: {e}")
+        # All markets in one upsert keyed on market ID
+        try:
+            imported = db.upsert_upcoming_matches(rows)
+        except Exception as e:
+            print(f"Error importing matches: {e}")
+
+        # Markets long started drop out of analysis, then out of the table
+        try:
+            expired, deleted = db.expire_upcoming_matches()
+            if expired or deleted:
+                print(f"Upcoming matches: {expired} expired, {deleted} removed")
+        except Exception as e:
+            print(f"Error expiring matches: {e}")
 
         if players_added > 0:
             print(f"\nAdded {players_added} new players to database")
         print(f"Saved {imported} matches to database")
 
+        if imported:
+            for callback in list(_save_listeners):
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Save listener error: {e}")
+
         return imported
 
 
@@ -0,0 +1,585 @@
+"""
+Tennis Betting System - Betfair Market Stream
+In-memory market cache fed by the Exchange Stream API
+
+One subscription replaces re-polling listMarketBook: the stream sends a
+full image of every subscribed market once, then only deltas -
+ladder changes, traded volume and market definition changes (status,
+in-play, runner results). MarketCache applies them into a book per market
+and hands out listMarketBook-shaped dicts, so code written against the REST
+response reads the cache unchanged.
+
+Betfair caps a subscription at 200 markets, far fewer than the tennis
+MATCH_ODDS markets on a busy ITF/Challenger day, so the stream subscribes
+by market ID: the capture registers its catalogue (soonest first) with
+subscribe_market_stream, in-play listings are registered the same way,
+markets already in play keep their place, and the set is capped at
+max_markets. A changed set is resubscribed on the open
+connection. If the server still answers SUBSCRIPTION_LIMIT_EXCEEDED the cap
+is halved rather than retried as is.
+
+The connection runs on a daemon thread. On disconnect it re-authenticates
+and resubscribes with the last clock, so the server sends only what changed
+in between. Callers fall back to REST polling while the stream is unhealthy:
+
+    subscribe_market_stream(app_key, session_token, market_ids)
+    stream = get_market_stream(app_key, session_token)
+    if stream:
+        books = stream.cache.market_books(market_ids)
+
+betfair_stream_server.py is a local stand-in server speaking the same
+protocol, for running all of this offline.
+"""
+
+import json
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import BETFAIR_STREAM_SETTINGS
+
+
+class StreamError(Exception):
+    """The stream server refused a request or closed the connection."""
+
+
+class SubscriptionLimitError(StreamError):
+    """The server refused the subscription for having too many markets."""
+
+
+# =============================================================================
+# MARKET CACHE
+# =============================================================================
+
+class MarketBook:
+    """Latest state of one market, built from a stream image plus deltas."""
+
+    def __init__(self, market_id: str):
+        self.market_id = market_id
+        self.definition: Dict = {}
+        self.runners: Dict[int, Dict] = {}
+        self.total_matched = 0.0
+        self.updated_at = 0.0
+
+    @property
+    def status(self) -> Optional[str]:
+        return self.definition.get('status')
+
+    @property
+    def inplay(self) -> bool:
+        return bool(self.definition.get('inPlay'))
+
+    def apply(self, change: Dict, received: float):
+        """Apply one market change (mc) - a full image when img is set."""
+        if change.get('img'):
+            self.definition = {}
+            self.runners = {}
+            self.total_matched = 0.0
+        if 'marketDefinition' in change:
+            self.definition = change['marketDefinition']
+        if 'tv' in change:
+            self.total_matched = change['tv']
+
+        for runner_change in change.get('rc', []):
+            runner = self.runners.get(runner_change['id'])
+            if runner is None:
+                runner = {'batb': {}, 'batl': {}, 'ltp': None, 'tv': 0.0}
+                self.runners[runner_change['id']] = runner
+            for side in ('batb', 'batl'):
+                ladder = runner[side]
+                # [level, price, size]; size 0 removes the level
+                for level, price, size in runner_change.get(side, []):
+                    if size:
+                        ladder[level] = (price, size)
+                    else:
+                        ladder.pop(level, None)
+            if 'ltp' in runner_change:
+                runner['ltp'] = runner_change['ltp']
+            if 'tv' in runner_change:
+                runner['tv'] = runner_change['tv']
+
+        self.updated_at = received
+
+    def as_market_book(self) -> Dict:
+        """The book in listMarketBook response shape."""
+        runner_status = {r['id']: r.get('status') for r in self.definition.get('runners', [])}
+        selection_ids = list(runner_status) + [sid for sid in self.runners if sid not in runner_status]
+
+        runners = []
+        for selection_id in selection_ids:
+            prices = self.runners.get(selection_id, {})
+            runners.append({
+                'selectionId': selection_id,
+                'status': runner_status.get(selection_id) or 'ACTIVE',
+                'lastPriceTraded': prices.get('ltp'),
+                'totalMatched': prices.get('tv', 0.0),
+                'ex': {
+                    'availableToBack': [{'price': price, 'size': size}
+                                        for _, (price, size) in sorted(prices.get('batb', {}).items())],
+                    'availableToLay': [{'price': price, 'size': size}
+                                       for _, (price, size) in sorted(prices.get('batl', {}).items())],
+                },
+            })
+
+        return {
+            'marketId': self.market_id,
+            'status': self.status,
+            'inplay': self.inplay,
+            'totalMatched': self.total_matched,
+            'marketTime': self.definition.get('marketTime'),
+            'runners': runners,
+        }
+
+
+class MarketCache:
+    """Thread-safe market books plus the catalogue data the stream doesn't carry.
+
+    Stream market definitions have runner IDs but no names, event or
+    competition, so readers that need names register catalogue entries
+    (in get_match_odds_markets format) and only request the missing ones.
+    """
+
+    def __init__(self, closed_retention: float):
+        self.closed_retention = closed_retention
+        self._lock = threading.Lock()
+        self._books: Dict[str, MarketBook] = {}
+        self._catalogue: Dict[str, Dict] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._books)
+
+    def apply_changes(self, changes: List[Dict], received: float, replace: bool = False):
+        """Apply market changes; replace=True first drops open books under the same lock (see clear)."""
+        with self._lock:
+            if replace:
+                self._drop_open()
+            for change in changes:
+                book = self._books.get(change['id'])
+                if book is None:
+                    book = MarketBook(change['id'])
+                    self._books[change['id']] = book
+                book.apply(change, received)
+
+    def clear(self):
+        """Drop all open books (a new subscription image replaces them).
+
+        Closed markets are kept until prune expires them - they carry the
+        winners, and may have left the subscription since."""
+        with self._lock:
+            self._drop_open()
+
+    def discard(self, market_ids: Iterable[str]):
+        """Drop open books for markets that left the subscription (they get no more deltas)."""
+        with self._lock:
+            self._drop_open(market_ids)
+
+    def _drop_open(self, market_ids: Iterable[str] = None):
+        if market_ids is None:
+            market_ids = list(self._books)
+        for market_id in market_ids:
+            book = self._books.get(market_id)
+            if book is not None and book.status != 'CLOSED':
+                del self._books[market_id]
+
+    def prune(self, now: float) -> int:
+        """Forget markets that closed more than closed_retention seconds ago."""
+        with self._lock:
+            expired = [market_id for market_id, book in self._books.items()
+                       if book.status == 'CLOSED' and now - book.updated_at > self.closed_retention]
+            for market_id in expired:
+                del self._books[market_id]
+                self._catalogue.pop(market_id, None)
+        return len(expired)
+
+    def market_book(self, market_id: str) -> Optional[Dict]:
+        with self._lock:
+            book = self._books.get(market_id)
+            return book.as_market_book() if book else None
+
+    def market_books(self, market_ids: Iterable[str] = None) -> Dict[str, Dict]:
+        """listMarketBook-shaped books by market ID (markets not cached are left out)."""
+        with self._lock:
+            if market_ids is None:
+                market_ids = list(self._books)
+            return {market_id: self._books[market_id].as_market_book()
+                    for market_id in market_ids if market_id in self._books}
+
+    def market_ids(self, inplay: bool = None, status: str = None) -> List[str]:
+        with self._lock:
+            return [market_id for market_id, book in self._books.items()
+                    if (inplay is None or book.inplay == inplay)
+                    and (status is None or book.status == status)]
+
+    def set_catalogue(self, markets: Iterable[Dict]):
+        """Register catalogue entries ({'market_id', 'event_name', 'runners': [...]}, ...)."""
+        with self._lock:
+            for market in markets:
+                self._catalogue[market['market_id']] = market
+
+    def catalogue(self, market_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._catalogue.get(market_id)
+
+    def missing_catalogue(self, market_ids: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [market_id for market_id in market_ids if market_id not in self._catalogue]
+
+
+# =============================================================================
+# STREAM CONNECTION
+# =============================================================================
+
+class MarketStream:
+    """One Exchange Stream market subscription feeding a MarketCache."""
+
+    def __init__(self, app_key: str, session_token: str, settings: Dict = None):
+        self.settings = settings or BETFAIR_STREAM_SETTINGS
+        self.app_key = app_key
+        self.session_token = session_token
+        host, _, port = self.settings["endpoint"].rpartition(':')
+        self.host = host
+        self.port = int(port)
+        self.cache = MarketCache(self.settings["closed_retention"])
+
+        # Subscribed market IDs, in priority order (see subscribe_markets)
+        self.max_markets = self.settings["max_markets"]
+        self._market_ids: List[str] = []
+        self._live_ids: List[str] = []
+        self._upcoming_ids: List[str] = []
+        self._subscription_lock = threading.Lock()
+        # Bumped whenever the market set changes; get_market_stream waits
+        # (once per version) for that subscription's image
+        self.subscription_version = 0
+        self.awaited_version = -1
+
+        # Subscription clocks: resubscribing with them makes the server send
+        # only the changes since, instead of a new full image
+        self.initial_clk: Optional[str] = None
+        self.clk: Optional[str] = None
+
+        self.connection_id: Optional[str] = None
+        self.last_message_at = 0.0
+        self.last_error: Optional[str] = None
+        self.stale = False
+        self.stats = {'connects': 0, 'messages': 0, 'changes': 0, 'heartbeats': 0}
+
+        self._message_id = 0
+        self._subscription_message_id: Optional[int] = None
+        self._send_lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._connected = False
+        self._image_ready = threading.Event()     # An image arrived on this connection
+        self._current_image = threading.Event()   # ...for the latest subscription request
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="betfair-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def wait_for_image(self, timeout: float) -> bool:
+        """Block until the image (or resume delta) for the current market set is in."""
+        return self._current_image.wait(timeout)
+
+    def subscribe_markets(self, market_ids: Iterable[str], live: bool = False) -> bool:
+        """
+        Point the subscription at these markets (priority order, soonest first).
+
+        live=True registers an in-play listing instead of the upcoming
+        catalogue; each call replaces the previous list of its kind. In-play
+        markets come first, then the catalogue, capped at max_markets;
+        settled markets are left out. An open connection is resubscribed
+        when the set changes; markets that stay subscribed keep being served
+        from the cache while the new image arrives, and markets that left
+        are dropped from it. Returns True if it changed.
+        """
+        in_play = set(self.cache.market_ids(inplay=True, status='OPEN')
+                      + self.cache.market_ids(inplay=True, status='SUSPENDED'))
+        closed = set(self.cache.market_ids(status='CLOSED'))
+        with self._subscription_lock:
+            if live:
+                self._live_ids = [m for m in market_ids if m]
+            else:
+                self._upcoming_ids = [m for m in market_ids if m]
+            keep = [market_id for market_id in self._market_ids if market_id in in_play]
+            wanted = [market_id for market_id in dict.fromkeys(self._live_ids + keep + self._upcoming_ids)
+                      if market_id not in closed][:self.max_markets]
+            if set(wanted) == set(self._market_ids):
+                return False
+            self.cache.discard(set(self._market_ids) - set(wanted))
+            self._market_ids = wanted
+            self.subscription_version += 1
+            self._current_image.clear()
+            sock = self._sock if self._connected else None
+            if sock is not None:
+                # New subscription on the same connection: the server answers with a full image
+                try:
+                    self._send(sock, self._subscription(resume=False), subscription=True)
+                except OSError:
+                    pass  # The connection loop reconnects with the new set
+        return True
+
+    def has_markets(self) -> bool:
+        return bool(self._market_ids)
+
+    def _subscription(self, resume: bool) -> Dict:
+        """marketSubscription request for the current market IDs (resume: send the clocks)."""
+        subscription = {
+            'op': 'marketSubscription',
+            'marketFilter': {'marketIds': list(self._market_ids)},
+            'marketDataFilter': {
+                'fields': self.settings["fields"],
+                'ladderLevels': self.settings["ladder_levels"],
+            },
+            'heartbeatMs': self.settings["heartbeat_ms"],
+            'conflateMs': self.settings["conflate_ms"],
+        }
+        if resume and self.initial_clk and self.clk:
+            subscription['initialClk'] = self.initial_clk
+            subscription['clk'] = self.clk
+        else:
+            self.initial_clk = self.clk = None
+        return subscription
+
+    def is_healthy(self) -> bool:
+        """Connected, image applied, and the server isn't silent or flagging stale data."""
+        return (self._connected and self._image_ready.is_set() and not self.stale
+                and time.monotonic() - self.last_message_at < self.settings["stale_after"])
+
+    # =========================================================================
+    # Connection loop
+    # =========================================================================
+
+    def _run(self):
+        backoff = self.settings["reconnect_backoff"]
+        while not self._stop.is_set():
+            if not self._market_ids:
+                # Nothing to subscribe to until subscribe_markets is called
+                self._stop.wait(1.0)
+                continue
+            try:
+                self._session()
+                error = "connection ended"
+            except SubscriptionLimitError as e:
+                self._connected = False
+                self._image_ready.clear()
+                self._current_image.clear()
+                if not self._reduce_subscription(str(e)):
+                    break
+                continue
+            except (OSError, ValueError, StreamError) as e:
+                error = str(e)
+            had_image = self._image_ready.is_set()
+            self._connected = False
+            self._image_ready.clear()
+            self._current_image.clear()
+            if self._stop.is_set():
+                break
+
+            if had_image:
+                # The connection was working - start the backoff over
+                backoff = self.settings["reconnect_backoff"]
+            self.last_error = error
+            print(f"Betfair stream: {error} - reconnecting in {backoff:.1f}s")
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.settings["max_reconnect_backoff"])
+
+    def _reduce_subscription(self, error: str) -> bool:
+        """Halve the market cap after SUBSCRIPTION_LIMIT_EXCEEDED. False once it can't shrink."""
+        with self._subscription_lock:
+            if len(self._market_ids) <= 1:
+                self.last_error = error
+                print(f"Betfair stream: {error} - stopping, markets will be polled")
+                return False
+            self.max_markets = max(1, len(self._market_ids) // 2)
+            self.cache.discard(self._market_ids[self.max_markets:])
+            self._market_ids = self._market_ids[:self.max_markets]
+            self.subscription_version += 1
+            self.initial_clk = self.clk = None
+        self.last_error = error
+        print(f"Betfair stream: {error} - resubscribing to the first {self.max_markets} markets")
+        return True
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.settings["stale_after"])
+        if self.settings["use_tls"]:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        return sock
+
+    def _session(self):
+        """One connection: authenticate, subscribe, then apply messages until it drops."""
+        sock = self._open_socket()
+        self._sock = sock
+        self.stats['connects'] += 1
+        try:
+            reader = sock.makefile('rb')
+            connection = self._read(reader)
+            self.connection_id = connection.get('connectionId')
+
+            self._send(sock, {'op': 'authentication', 'appKey': self.app_key, 'session': self.session_token})
+            self._handle(self._read(reader))
+
+            with self._subscription_lock:
+                self._send(sock, self._subscription(resume=True), subscription=True)
+                self._connected = True
+            self.last_error = None
+
+            while not self._stop.is_set():
+                self._handle(self._read(reader))
+        finally:
+            self._sock = None
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _send(self, sock: socket.socket, message: Dict, subscription: bool = False):
+        # Called from the connection thread and, for resubscriptions, from subscribe_markets
+        with self._send_lock:
+            self._message_id += 1
+            message = {**message, 'id': self._message_id}
+            if subscription:
+                # The server tags that subscription's image with the same id
+                self._subscription_message_id = self._message_id
+            sock.sendall(json.dumps(message).encode('utf-8') + b'\r\n')
+
+    def _read(self, reader) -> Dict:
+        line = reader.readline()
+        if not line:
+            raise StreamError("connection closed by server")
+        self.last_message_at = time.monotonic()
+        self.stats['messages'] += 1
+        return json.loads(line)
+
+    # =========================================================================
+    # Messages
+    # =========================================================================
+
+    def _handle(self, message: Dict):
+        op = message.get('op')
+        if op == 'status':
+            if message.get('statusCode') == 'FAILURE':
+                if message.get('errorCode') == 'SUBSCRIPTION_LIMIT_EXCEEDED':
+                    raise SubscriptionLimitError(
+                        f"SUBSCRIPTION_LIMIT_EXCEEDED with {len(self._market_ids)} markets")
+                raise StreamError(f"{message.get('errorCode')}: {message.get('errorMessage', '')}".strip())
+            return
+        if op != 'mcm':
+            return
+
+        if 'initialClk' in message:
+            self.initial_clk = message['initialClk']
+        if 'clk' in message:
+            self.clk = message['clk']
+
+        change_type = message.get('ct')
+        if change_type == 'HEARTBEAT':
+            self.stats['heartbeats'] += 1
+            self.cache.prune(time.monotonic())
+            return
+
+        # status 503: the server's own feed is behind - prices may be stale
+        self.stale = message.get('status') == 503
+        segment = message.get('segmentType')
+        changes = message.get('mc') or []
+        # A connection's first image replaces the open books. Images for a
+        # resubscription on the same connection reset each market in place
+        # (img): markets that left were already discarded, and the ones that
+        # stayed are never missing from the cache in between.
+        first_image = change_type == 'SUB_IMAGE' and not self._image_ready.is_set()
+        self.cache.apply_changes(changes, time.monotonic(),
+                                 replace=first_image and segment in (None, 'SEG_START'))
+        self.stats['changes'] += len(changes)
+
+        if change_type in ('SUB_IMAGE', 'RESUB_DELTA') and segment in (None, 'SEG_END'):
+            self._image_ready.set()
+            if message.get('id') == self._subscription_message_id:
+                self._current_image.set()
+
+
+# =============================================================================
+# SHARED STREAM
+# =============================================================================
+
+_stream: Optional[MarketStream] = None
+_stream_lock = threading.Lock()
+
+
+def _shared_stream(app_key: str, session_token: str):
+    """(stream, started) - the shared stream, created on first use."""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = MarketStream(app_key, session_token)
+            _stream.start()
+            return _stream, True
+        # Used on the next (re)connect
+        _stream.session_token = session_token
+        return _stream, False
+
+
+def subscribe_market_stream(app_key: str, session_token: str, market_ids: Iterable[str],
+                            live: bool = False) -> Optional[MarketStream]:
+    """
+    Subscribe the shared stream to these markets, starting it if needed.
+
+    Call with the full catalogue listing (soonest first), or with an
+    in-play listing and live=True; see MarketStream.subscribe_markets.
+    Returns the stream even before its image arrives, or None when
+    streaming is off.
+    """
+    if not BETFAIR_STREAM_SETTINGS["enabled"] or not app_key or not session_token:
+        return None
+    stream, _ = _shared_stream(app_key, session_token)
+    stream.subscribe_markets(market_ids, live=live)
+    return stream
+
+
+def get_market_stream(app_key: str, session_token: str) -> Optional[MarketStream]:
+    """
+    The shared market stream, started on first use.
+
+    After the market set changes, waits up to image_timeout for the new
+    image. Returns None when streaming is disabled or the stream isn't
+    healthy (including before any markets were subscribed), in which case
+    the caller polls REST instead; markets the cache doesn't hold yet are
+    polled by the caller either way.
+    """
+    settings = BETFAIR_STREAM_SETTINGS
+    if not settings["enabled"] or not app_key or not session_token:
+        return None
+
+    stream, _ = _shared_stream(app_key, session_token)
+    version = stream.subscription_version
+    if stream.has_markets() and stream.awaited_version != version:
+        # Once per (re)subscription: wait for its image instead of polling the new markets
+        stream.awaited_version = version
+        if not stream.wait_for_image(settings["image_timeout"]):
+            print(f"Betfair stream: no market image after {settings['image_timeout']}s, polling instead")
+    return stream if stream.is_healthy() else None
+
+
+def stop_market_stream():
+    global _stream
+    with _stream_lock:
+        stream, _stream = _stream, None
+    if stream:
+        stream.stop()
@@ -0,0 +1,357 @@
+"""
+Tennis Betting System - Stand-in Betfair Stream Server
+Local server speaking the Exchange Stream API market protocol
+
+Lets betfair_stream.py (and the capture, live score and monitor paths that
+read its cache) run without a Betfair account or network:
+- CRLF-delimited JSON over plain TCP: connection, authentication,
+  marketSubscription (by marketIds, or every market; more than
+  market_limit markets is refused with SUBSCRIPTION_LIMIT_EXCEEDED like
+  Betfair does), heartbeat
+- subscription images (optionally segmented), price/status deltas with
+  clocks, heartbeats, RESUB_DELTA when a client resubscribes with a clock
+- hooks to move prices, suspend, turn in-play, settle markets and drop
+  connections, so the cache and fallback paths can be exercised
+
+    server = StandInStreamServer()
+    server.add_market("1.234", [(101, "Player A"), (102, "Player B")])
+    server.start()          # then TENNIS_BETFAIR_STREAM=127.0.0.1:<port>
+    server.update_prices("1.234", 101, back=(1.8, 250.0), lay=(1.82, 90.0))
+    server.settle("1.234", winner=101)
+
+Usage:
+    python betfair_stream_server.py --port 9999 --markets 50 --tick 1.0
+"""
+
+import argparse
+import json
+import random
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+
+class _StreamHandler(socketserver.StreamRequestHandler):
+    """One client connection."""
+
+    def handle(self):
+        server: "StandInStreamServer" = self.server.stand_in
+        self.subscribed = False
+        self.market_ids = None  # Subscribed market IDs (None: all markets)
+        self.heartbeat_ms = 5000
+        self.send_lock = threading.Lock()
+        self.last_sent = time.monotonic()
+        server._register(self)
+        try:
+            self.send({'op': 'connection', 'connectionId': f"standin-{id(self)}"})
+            authenticated = False
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                op = request.get('op')
+                if op == 'authentication':
+                    if server.session_token and request.get('session') != server.session_token:
+                        self.send(self._failure(request, 'INVALID_SESSION_INFORMATION'))
+                        break
+                    authenticated = True
+                    self.send(self._success(request))
+                elif not authenticated:
+                    self.send(self._failure(request, 'NO_SESSION'))
+                    break
+                elif op == 'marketSubscription':
+                    market_ids = (request.get('marketFilter') or {}).get('marketIds')
+                    count = len(market_ids) if market_ids is not None else len(server.markets)
+                    if count > server.market_limit:
+                        self.send(self._failure(request, 'SUBSCRIPTION_LIMIT_EXCEEDED'))
+                        break
+                    self.heartbeat_ms = request.get('heartbeatMs', 5000)
+                    self.market_ids = set(market_ids) if market_ids is not None else None
+                    self.send(self._success(request))
+                    server._send_image(self, request)
+                    self.subscribed = True
+                elif op == 'heartbeat':
+                    self.send(self._success(request))
+        except (OSError, ValueError):
+            pass
+        finally:
+            server._unregister(self)
+
+    @staticmethod
+    def _success(request: Dict) -> Dict:
+        return {'op': 'status', 'id': request.get('id'), 'statusCode': 'SUCCESS', 'connectionClosed': False}
+
+    @staticmethod
+    def _failure(request: Dict, error_code: str) -> Dict:
+        return {'op': 'status', 'id': request.get('id'), 'statusCode': 'FAILURE',
+                'errorCode': error_code, 'connectionClosed': True}
+
+    def send(self, message: Dict):
+        with self.send_lock:
+            self.wfile.write(json.dumps(message).encode('utf-8') + b'\r\n')
+            self.wfile.flush()
+            self.last_sent = time.monotonic()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StandInStreamServer:
+    """In-process stand-in for stream-api.betfair.com (market stream only)."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, session_token: str = None,
+                 segment_size: int = 0, market_limit: int = 200):
+        """
+        Args:
+            host, port: Listen address (port 0 picks a free port)
+            session_token: If set, authentication must present this token
+            segment_size: Split images into SEG_START/SEG/SEG_END messages of
+                this many markets (0 sends one message)
+            market_limit: Most markets one subscription may cover
+        """
+        self.session_token = session_token
+        self.segment_size = segment_size
+        self.market_limit = market_limit
+        self.markets: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._clients: List[_StreamHandler] = []
+        self._clock = 0
+        self._stop = threading.Event()
+        self._tcp = _TCPServer((host, port), _StreamHandler)
+        self._tcp.stand_in = self
+        self.host, self.port = self._tcp.server_address[:2]
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self._tcp.serve_forever, name="stream-standin", daemon=True).start()
+        threading.Thread(target=self._heartbeats, name="stream-standin-heartbeat", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self.drop_connections()
+        self._tcp.shutdown()
+        self._tcp.server_close()
+
+    # =========================================================================
+    # Market state
+    # =========================================================================
+
+    def add_market(self, market_id: str, runners: List[Tuple[int, str]], market_time: str = None,
+                   event_id: str = None, status: str = 'OPEN', in_play: bool = False):
+        """Add a market (runners as (selection_id, name)) and publish its image."""
+        market_time = market_time or (datetime.utcnow() + timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        market = {
+            'definition': {
+                'eventTypeId': '2',
+                'eventId': event_id or market_id.split('.')[-1],
+                'marketType': 'MATCH_ODDS',
+                'marketTime': market_time,
+                'status': status,
+                'inPlay': in_play,
+                'runners': [{'id': selection_id, 'sortPriority': index + 1, 'status': 'ACTIVE'}
+                            for index, (selection_id, _) in enumerate(runners)],
+            },
+            'names': dict(runners),
+            'runners': {selection_id: {'batb': [], 'batl': [], 'tv': 0.0} for selection_id, _ in runners},
+            'tv': 0.0,
+        }
+        with self._lock:
+            self.markets[market_id] = market
+        self._publish([self._image(market_id, market)])
+
+    def catalogue(self, market_id: str) -> Dict:
+        """The market's catalogue entry in get_match_odds_markets format."""
+        market = self.markets[market_id]
+        return {
+            'market_id': market_id,
+            'market_name': 'Match Odds',
+            'market_start_time': market['definition']['marketTime'],
+            'event_id': market['definition']['eventId'],
+            'event_name': ' v '.join(market['names'].values()),
+            'competition_id': None,
+            'competition_name': 'Stand-in Open',
+            'runners': [{'selection_id': r['id'], 'name': market['names'][r['id']],
+                         'sort_priority': r['sortPriority']} for r in market['definition']['runners']],
+        }
+
+    def update_prices(self, market_id: str, selection_id: int, back: Tuple[float, float] = None,
+                      lay: Tuple[float, float] = None, traded: float = 0.0):
+        """Set a runner's best back/lay (price, size) and add traded volume."""
+        change = {'id': selection_id}
+        with self._lock:
+            market = self.markets[market_id]
+            runner = market['runners'][selection_id]
+            if back is not None:
+                runner['batb'] = [[0, back[0], back[1]]]
+                change['batb'] = runner['batb']
+            if lay is not None:
+                runner['batl'] = [[0, lay[0], lay[1]]]
+                change['batl'] = runner['batl']
+            if traded:
+                runner['tv'] += traded
+                market['tv'] += traded
+                change['tv'] = runner['tv']
+                change['ltp'] = (back or lay or (None,))[0]
+            market_change = {'id': market_id, 'rc': [change]}
+            if traded:
+                market_change['tv'] = market['tv']
+        self._publish([market_change])
+
+    def set_status(self, market_id: str, status: str = None, in_play: bool = None):
+        """Change market status (OPEN/SUSPENDED/CLOSED) and/or the in-play flag."""
+        with self._lock:
+            definition = self.markets[market_id]['definition']
+            if status is not None:
+                definition['status'] = status
+            if in_play is not None:
+                definition['inPlay'] = in_play
+            change = {'id': market_id, 'marketDefinition': json.loads(json.dumps(definition))}
+        self._publish([change])
+
+    def settle(self, market_id: str, winner: int):
+        """Close the market with a WINNER and LOSERs."""
+        with self._lock:
+            definition = self.markets[market_id]['definition']
+            for runner in definition['runners']:
+                runner['status'] = 'WINNER' if runner['id'] == winner else 'LOSER'
+            definition['status'] = 'CLOSED'
+            definition['inPlay'] = True
+            change = {'id': market_id, 'marketDefinition': json.loads(json.dumps(definition))}
+        self._publish([change])
+
+    def drop_connections(self):
+        """Close every client connection (to exercise reconnect/resubscribe)."""
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.connection.shutdown(2)
+            except OSError:
+                pass
+
+    # =========================================================================
+    # Publishing
+    # =========================================================================
+
+    def _image(self, market_id: str, market: Dict) -> Dict:
+        return {
+            'id': market_id,
+            'img': True,
+            'tv': market['tv'],
+            'marketDefinition': json.loads(json.dumps(market['definition'])),
+            'rc': [{'id': selection_id, 'batb': runner['batb'], 'batl': runner['batl'], 'tv': runner['tv']}
+                   for selection_id, runner in market['runners'].items()],
+        }
+
+    def _next_clock(self) -> str:
+        self._clock += 1
+        return str(self._clock)
+
+    def _send_image(self, client: _StreamHandler, request: Dict):
+        with self._lock:
+            changes = [self._image(market_id, market) for market_id, market in self.markets.items()
+                       if client.market_ids is None or market_id in client.market_ids]
+            clock = self._next_clock()
+        change_type = 'RESUB_DELTA' if request.get('clk') else 'SUB_IMAGE'
+        base = {'op': 'mcm', 'id': request.get('id'), 'ct': change_type, 'initialClk': clock, 'clk': clock,
+                'heartbeatMs': request.get('heartbeatMs', 5000), 'pt': int(time.time() * 1000)}
+
+        size = self.segment_size
+        if not size or len(changes) <= size:
+            client.send({**base, 'mc': changes})
+            return
+        segments = [changes[i:i + size] for i in range(0, len(changes), size)]
+        for index, segment in enumerate(segments):
+            segment_type = 'SEG_START' if index == 0 else 'SEG_END' if index == len(segments) - 1 else 'SEG'
+            client.send({**base, 'segmentType': segment_type, 'mc': segment})
+
+    def _publish(self, changes: List[Dict]):
+        with self._lock:
+            clients = [client for client in self._clients if client.subscribed]
+            clock = self._next_clock()
+        message = {'op': 'mcm', 'clk': clock, 'pt': int(time.time() * 1000)}
+        for client in clients:
+            mc = [c for c in changes if client.market_ids is None or c['id'] in client.market_ids]
+            if not mc:
+                continue
+            try:
+                client.send({**message, 'mc': mc})
+            except OSError:
+                pass
+
+    def _heartbeats(self):
+        """HEARTBEAT to any subscriber that has had no message for heartbeatMs."""
+        while not self._stop.wait(0.1):
+            with self._lock:
+                clients = [client for client in self._clients if client.subscribed]
+                clock = str(self._clock)
+            now = time.monotonic()
+            for client in clients:
+                if now - client.last_sent >= client.heartbeat_ms / 1000:
+                    try:
+                        client.send({'op': 'mcm', 'ct': 'HEARTBEAT', 'clk': clock,
+                                     'pt': int(time.time() * 1000)})
+                    except OSError:
+                        pass
+
+    def _register(self, client: _StreamHandler):
+        with self._lock:
+            self._clients.append(client)
+
+    def _unregister(self, client: _StreamHandler):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Betfair stream server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--markets', type=int, default=50, help="Markets to simulate")
+    parser.add_argument('--tick', type=float, default=1.0, help="Seconds between price moves")
+    parser.add_argument('--session-token', default=None, help="Require this session token")
+    parser.add_argument('--market-limit', type=int, default=200, help="Markets allowed per subscription")
+    args = parser.parse_args()
+
+    server = StandInStreamServer(args.host, args.port, session_token=args.session_token,
+                                 market_limit=args.market_limit)
+    for index in range(args.markets):
+        market_id = f"1.{900000000 + index}"
+        server.add_market(market_id, [(10000 + 2 * index, f"Player {2 * index}"),
+                                      (10001 + 2 * index, f"Player {2 * index + 1}")],
+                          market_time=(datetime.utcnow() + timedelta(minutes=15 * index)).strftime(
+                              "%Y-%m-%dT%H:%M:%S.000Z"))
+        for selection_id in server.markets[market_id]['runners']:
+            price = round(random.uniform(1.2, 5.0), 2)
+            server.update_prices(market_id, selection_id, back=(price, 100.0), lay=(round(price + 0.02, 2), 80.0))
+    server.start()
+    print(f"Stand-in stream server on {server.endpoint} with {args.markets} markets")
+    print(f"Run the app with TENNIS_BETFAIR_STREAM={server.endpoint}")
+
+    try:
+        while True:
+            time.sleep(args.tick)
+            market_id = random.choice(list(server.markets))
+            selection_id = random.choice(list(server.markets[market_id]['runners']))
+            price = round(random.uniform(1.2, 5.0), 2)
+            server.update_prices(market_id, selection_id, back=(price, round(random.uniform(20, 500), 2)),
+                                 lay=(round(price + 0.02, 2), 50.0), traded=random.uniform(1, 50))
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,19 @@ Fetch tennis matches and odds from Betfair Exchange
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
-import urllib.request
-import urllib.error
-import ssl
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import threading
 import re
 
+import urllib3
+
 from config import UI_COLORS, SURFACES
 from database import db, TennisDatabase
+from http_client import http_client
+
+# Exchange pages are read with certificate checks off (as before)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
 class BetfairTennisScraper:
@@ -35,9 +37,6 @@ class BetfairTennisScraper:
 
     def __init__(self, database: TennisDatabase = None):
         self.db = database or db
-        self.ssl_context = ssl.create_default_context()
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
 
     def _make_request(self, url: str, headers: Dict = None) -> Optional[Dict]:
         """Make HTTP request and return JSON response."""
@@ -49,10 +48,9 @@ class BetfairTennisScraper:
             }
 
         try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=30, context=self.ssl_context) as response:
-                data = response.read().decode('utf-8')
-                return json.loads(data)
+            response = http_client.request('GET', url, headers=headers, timeout=30, verify=False)
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             print(f"Request error: {e}")
             return None
@@ -0,0 +1,177 @@
+"""
+Tennis Betting System - Browser Pool
+Reusable headless Chrome sessions for the Selenium scrapers
+
+Starting Chrome costs several seconds, so instead of launching and quitting
+a driver for every player lookup, each scraper borrows a warm driver from a
+named pool and hands it back when done. A pool keeps up to `size` drivers;
+workers block until one is free. Drivers that crashed (or have served
+`max_uses` pages, to cap Chrome's memory growth) are quit and replaced the
+next time a worker asks for one.
+
+Usage:
+    pool = get_browser_pool("tennis_abstract", lambda: new_chrome_driver())
+    with pool.session() as driver:
+        driver.get(url)
+"""
+
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from config import BROWSER_POOL_SETTINGS
+
+
+def chrome_options(headless: bool = True, extra_args: List[str] = None) -> Options:
+    """Chrome options shared by the scrapers (headless, no GPU, fixed window)."""
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--log-level=3")  # Suppress logs
+    # Pages are read for their DOM only
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    for arg in extra_args or []:
+        options.add_argument(arg)
+    return options
+
+
+class BrowserPool:
+    """Fixed-size pool of WebDriver sessions shared between worker threads."""
+
+    def __init__(self, factory: Callable[[], webdriver.Remote], size: int = None,
+                 max_uses: int = None):
+        self.factory = factory
+        self.size = max(1, size or BROWSER_POOL_SETTINGS["size"])
+        self.max_uses = max_uses or BROWSER_POOL_SETTINGS["max_uses"]
+        self._idle = queue.LifoQueue()  # Reuse the most recently used (warmest) driver first
+        self._uses: Dict[int, int] = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.replaced = 0
+
+    def _new_driver(self):
+        driver = self.factory()
+        driver.set_page_load_timeout(BROWSER_POOL_SETTINGS["page_load_timeout"])
+        with self._lock:
+            self._created += 1
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _alive(driver) -> bool:
+        """Cheap round trip to check the browser hasn't crashed."""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Borrow a driver, blocking until a slot is free."""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_driver()
+                if self._alive(driver):
+                    return driver
+                # Crashed while idle - replace it
+                self._discard(driver)
+                self.replaced += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, broken: bool = False):
+        """Return a borrowed driver; broken or worn-out drivers are quit."""
+        try:
+            with self._lock:
+                uses = self._uses.get(id(driver), 0) + 1
+                self._uses[id(driver)] = uses
+            if broken or uses >= self.max_uses:
+                self._discard(driver)
+                if broken:
+                    self.replaced += 1
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self):
+        """Context manager yielding a pooled driver."""
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            # Selenium errors usually mean a dead tab or browser; don't reuse it
+            broken = not self._alive(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def close(self):
+        """Quit every idle driver."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': self._idle.qsize(),
+                'replaced': self.replaced,
+            }
+
+
+_pools: Dict[str, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(name: str, factory: Callable[[], webdriver.Remote],
+                     size: int = None) -> BrowserPool:
+    """Shared pool for a scraper, created on first use."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = BrowserPool(factory, size=size)
+            _pools[name] = pool
+        return pool
+
+
+def close_all_pools():
+    """Quit all pooled browsers (registered to run at exit)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
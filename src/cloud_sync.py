@@ -12,13 +12,13 @@ Setup:
 """
 
 import json
-import urllib.request
-import urllib.error
 import os
 import sys
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from http_client import http_client
+
 
 def get_app_directory() -> str:
     """Get the directory where the app is running from."""
@@ -78,17 +78,14 @@ class CloudSync:
             if upsert:
                 # For upserts, need resolution=merge-duplicates to update existing rows
                 headers['Prefer'] = 'return=representation,resolution=merge-duplicates'
-            req = urllib.request.Request(url, data=body, headers=headers, method=method)
-
-            with urllib.request.urlopen(req, timeout=10) as response:
-                response_data = response.read().decode('utf-8')
-                if response_data:
-                    return json.loads(response_data)
-                return {}
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode('utf-8') if e.fp else ''
-            print(f"Supabase error {e.code}: {error_body}")
-            return None
+            response = http_client.request(method, url, endpoint=f"{method} supabase/{endpoint.split('?')[0]}",
+                                           data=body, headers=headers, timeout=10)
+            if response.status_code >= 400:
+                print(f"Supabase error {response.status_code}: {response.text}")
+                return None
+            if response.text:
+                return response.json()
+            return {}
         except Exception as e:
             print(f"Supabase request error: {e}")
             return None
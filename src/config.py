@@ -128,21 +128,6 @@ INDOOR_HARD_TOURNAMENTS = [
 ]
 
 
-def _word_match(keyword: str, text: str) -> bool:
-    """
-    Check if keyword appears in text as a word (not as substring of another word).
-    E.g., 'rome' should match 'Rome Masters' but not 'Jerome'.
-    """
-    import re
-    # Use word boundaries for short keywords to avoid false matches
-    # For multi-word keywords, simple 'in' check is fine
-    if ' ' in keyword or len(keyword) > 6:
-        return keyword in text
-    # For short single words, use word boundary
-    pattern = r'\b' + re.escape(keyword) + r'\b'
-    return bool(re.search(pattern, text, re.IGNORECASE))
-
-
 def normalize_tournament_name(name: str) -> str:
     """
     Normalize tournament name to match database format.
@@ -186,43 +171,9 @@ def get_tournament_surface(tournament_name: str, date_str: str = None) -> str:
     Returns:
         Surface: "Hard", "Clay", or "Grass"
     """
-    if not tournament_name:
-        return "Hard"
-
-    name = tournament_name.lower()
-
-    # Check for explicit surface in name (from Tennis Explorer/databases)
-    # These are safe - they're from authoritative sources
-    if ' - clay' in name or '(clay)' in name:
-        return 'Clay'
-    if ' - grass' in name or '(grass)' in name:
-        return 'Grass'
-    if ' - hard' in name or '(hard)' in name or ' - indoor' in name:
-        return 'Hard'
-
-    # Seasonal check FIRST: Grass only happens June-July
-    # If it's NOT grass season, don't even check grass keywords
-    is_grass_season = False
-    if date_str:
-        try:
-            month = int(date_str[5:7])  # Extract month from YYYY-MM-DD
-            is_grass_season = month in [6, 7]
-        except (ValueError, IndexError):
-            is_grass_season = False
-
-    # Check against known clay tournaments
-    for clay_tourney in CLAY_TOURNAMENTS:
-        if _word_match(clay_tourney, name):
-            return 'Clay'
-
-    # Only check grass tournaments during grass season (June-July)
-    if is_grass_season:
-        for grass_tourney in GRASS_TOURNAMENTS:
-            if _word_match(grass_tourney, name):
-                return 'Grass'
-
-    # Default to Hard (most common surface, especially for Challengers)
-    return 'Hard'
+    # Keyword lists are compiled and results memoized in tournament_classifier
+    from tournament_classifier import get_surface
+    return get_surface(tournament_name, date_str)
 
 # ============================================================================
 # TOURNAMENT CATEGORIES
@@ -256,39 +207,8 @@ def get_tour_level(tournament_name: str) -> str:
     Categorize a tournament name into tour level for display.
     Returns full names: Grand Slam, ATP, WTA, Challenger, ITF
     """
-    if not tournament_name:
-        return "Unknown"
-
-    name = tournament_name.lower()
-
-    # Grand Slams
-    if any(gs in name for gs in ['australian open', 'roland garros', 'french open',
-                                   'wimbledon', 'us open', 'u.s. open']):
-        return "Grand Slam"
-
-    # ATP Tour events
-    if 'atp' in name or 'masters' in name:
-        return "ATP"
-
-    # WTA Tour events
-    if 'wta' in name or "women's" in name or 'ladies' in name:
-        return "WTA"
-
-    # Challenger events
-    if 'challenger' in name or 'ch ' in name:
-        return "Challenger"
-
-    # ITF events (futures, etc.)
-    if 'itf' in name or 'futures' in name or '$' in name:
-        return "ITF"
-
-    # Default - check for common patterns
-    if 'men' in name:
-        return "ATP"
-    if 'women' in name:
-        return "WTA"
-
-    return "Unknown"
+    from tournament_classifier import get_level
+    return get_level(tournament_name)
 
 
 def calculate_bet_model(our_probability: float, implied_probability: float, tournament: str, odds: float = None, factor_scores: dict = None) -> str:
@@ -767,6 +687,15 @@ FORM_SETTINGS = {
     "loss_consistency_baseline": 150,     # StdDev (Elo) at which consistency ~= 0.50
     "loss_consistency_steepness": 2.0,    # Exponent controlling decay rate
     "loss_consistency_min_losses": 2,     # Min losses per player to compute std dev
+    # Rolling form state — live analysis folds each new match into a stored
+    # per-player state instead of rescanning the last 20 matches.
+    # Approximate: older matches keep a decayed weight past the 20-match window
+    # and opponent rank/Elo is frozen when the match is folded in. Off by
+    # default; turn on verify_incremental_state to log the difference first.
+    # Backtests (rank overrides) always use the full calculation.
+    "incremental_state": False,           # Use player_form_state for live analysis
+    "verify_incremental_state": False,    # Also run the full calculation and log the difference
+    "state_recent_results": 3,            # Recent results kept for win-confirmation amplification
 }
 
 # Tournament level weight for form calculation.
@@ -1088,6 +1017,50 @@ IMPORT_SETTINGS = {
     "batch_size": 1000,          # Batch size for database inserts
 }
 
+# ============================================================================
+# NAME RESOLUTION SETTINGS
+# ============================================================================
+# Raw source names (e.g. Betfair runner names) are resolved to player IDs once
+# and cached in the name_resolutions table.
+NAME_RESOLUTION_SETTINGS = {
+    "retry_unmatched_hours": 24,  # Re-try names that fell back to an auto-created player
+}
+
+# ============================================================================
+# HTTP CLIENT
+# ============================================================================
+# All upstream HTTP calls go through http_client.py: one connection pool per
+# host, a shared retry policy and per-endpoint latency/error counters.
+# Cassette mode records responses to DATA_DIR/cassettes ("record") or serves
+# them back without touching the network ("replay"), e.g.
+#   TENNIS_HTTP_CASSETTE=replay python main.py
+HTTP_CLIENT_SETTINGS = {
+    "timeout": 15,                # Default per-request timeout (seconds)
+    "max_retries": 2,             # Retries for GETs on timeouts, 429 and 5xx
+    "retry_backoff": 0.5,         # Seconds before the first retry, doubled each time
+    "pool_maxsize": 4,            # Keep-alive connections per host
+    "host_pool_maxsize": {        # Hosts with more concurrent callers
+        "api.betfair.com": 8,
+        "www.tennisexplorer.com": 6,
+    },
+    "cassette_mode": os.environ.get("TENNIS_HTTP_CASSETTE", "off"),  # off | record | replay
+    "cassette_dir": DATA_DIR / "cassettes",
+}
+
+# ============================================================================
+# HTTP PAGE CACHE
+# ============================================================================
+# Scraped pages are cached gzip-compressed in DATA_DIR/http_cache.
+# TTLs are in seconds; results days older than immutable_after_days never expire.
+HTTP_CACHE_SETTINGS = {
+    "enabled": True,
+    "immutable_after_days": 7,    # Results pages older than this are final
+    "today_ttl": 600,             # Today's and yesterday's results pages
+    "recent_ttl": 6 * 3600,       # Results pages from the last week
+    "rankings_ttl": 24 * 3600,    # Rankings pages update once a day
+    "default_ttl": 3600,          # Anything else (player pages, search)
+}
+
 # ============================================================================
 # PLAYER HAND MAPPING
 # ============================================================================
@@ -1116,10 +1089,171 @@ INJURY_STATUS = [
 # All match data comes from Tennis Explorer via the GitHub scraper
 # GitHub repo: https://github.com/Anners92/tennisdata
 TENNIS_EXPLORER_DATA_URL = "https://github.com/Anners92/tennisdata/raw/main/tennis_data.db.gz"
+# Published next to the dump: {"sha256", "max_match_date", "deltas": [{"url", "sha256", "base_date"}]}
+TENNIS_EXPLORER_MANIFEST_URL = "https://github.com/Anners92/tennisdata/raw/main/manifest.json"
+
+# Dump sync (GitHubDataLoader.sync_from_dump) - merges the dump via ATTACH
+DUMP_SYNC_SETTINGS = {
+    "enabled": True,            # Merge the dump before scraping on quick refresh
+    "delta": True,              # Only merge matches since the last synced date
+    "recheck_days": 3,          # Re-merge this many days before the last synced date
+    "create_players": False,    # Players are locked - dump matches need known players
+    "chunk_size": 256 * 1024,   # Download chunk (bytes)
+    "timeout": 120,             # Download timeout (seconds)
+}
 
 # Scraper settings
 SCRAPER_SETTINGS = {
     "atp_rankings_pages": 15,   # 100 players per page = 1500 ATP players
     "wta_rankings_pages": 15,   # 100 players per page = 1500 WTA players
     "match_history_months": 12, # Months of match history to scrape per player
+    # Results pages are fetched concurrently under a token bucket limiter,
+    # so refresh time is bounded by the request budget, not by latency
+    "te_requests_per_second": 3.0,  # Sustained request rate to tennisexplorer.com
+    "te_burst": 3,                  # Requests allowed back-to-back before throttling
+    "te_max_in_flight": 4,          # Concurrent requests (worker threads)
+    "te_max_retries": 3,            # Retries for timeouts, 429 and 5xx responses
+    "te_retry_backoff": 1.0,        # Seconds before the first retry, doubled each time
+    # Incremental refreshes only fetch days after each tour's ingestion
+    # watermark (app_settings), re-checking the last few days for late results
+    "te_recheck_days": 2,           # Trailing days re-fetched, including the watermark day
+    # Days whose matches were skipped (unknown players, failed inserts) are
+    # recorded and fetched again on later refreshes until they import
+    "te_unresolved_recheck_days": 90,  # Stop re-checking a recorded day after this many days
+}
+
+# Headless Chrome sessions for the Selenium scrapers (Tennis Abstract, Flashscore).
+# Drivers are kept warm in a shared pool instead of launched per lookup.
+BROWSER_POOL_SETTINGS = {
+    "size": 2,                    # Warm drivers per scraper (= max concurrent page loads)
+    "max_uses": 40,               # Pages served before a driver is recycled
+    "page_load_timeout": 20,      # Seconds before driver.get() gives up
+    "ready_timeout": 10,          # Seconds to wait for a page's data to render
+    # Tennis Abstract player pages render from a static JS data file;
+    # fetching it over HTTP skips the browser entirely
+    "ta_js_fast_path": True,
+    "ta_requests_per_second": 2.0,  # Token bucket rate for tennisabstract.com
+}
+
+# Background player refresh (Tennis Abstract) is scheduled by next match start:
+# players about to play are refreshed first and kept fresher than the rest
+REFRESH_SCHEDULER_SETTINGS = {
+    "workers": 2,                   # Concurrent refreshes (one per pooled browser)
+    "lookahead_hours": 48,          # Only players with matches starting within this window
+    "recent_days": 3,               # ...or who played in the last N days
+    "imminent_minutes": 90,         # Matches starting this soon are imminent
+    "imminent_max_age_hours": 2,    # Imminent players are refreshed if data is older than this
+    "max_age_hours": 6,             # Everyone else
+    "rescan_minutes": 10,           # Periodic rescan of upcoming matches
+    "auto_cycle_wait_seconds": 120, # Max time the auto cycle waits for imminent refreshes
+}
+
+# ============================================================================
+# BETFAIR API
+# ============================================================================
+# listMarketBook batches are fetched concurrently. Betfair weights each
+# request by markets x price projection (EX_BEST_OFFERS = 5 points per
+# market) and rejects requests over 200 points, so the batch size follows
+# from the projection; weight_per_second caps the total across threads.
+BETFAIR_API_SETTINGS = {
+    "price_data": ["EX_BEST_OFFERS"],  # listMarketBook price projection
+    "max_request_weight": 200,         # Betfair's per-request data limit
+    "weight_per_second": 1000,         # Request weight budget shared by all threads
+    "market_book_max_in_flight": 6,    # Concurrent listMarketBook requests
+    "batch_retries": 2,                # Retries for a failed batch (the last one splits it)
+}
+
+# ============================================================================
+# BETFAIR STREAM
+# ============================================================================
+# Prices and market status come from one Exchange Stream API subscription
+# held in an in-memory market cache (betfair_stream.py). Capture, live scores
+# and the local monitor read the cache and only poll REST when the stream is
+# down or a market isn't in it. Betfair allows 200 markets per subscription
+# by default, so the stream subscribes by market ID (the capture catalogue,
+# soonest first, plus markets already in play) up to max_markets. To run
+# against the local stand-in server
+# (betfair_stream_server.py):
+#   TENNIS_BETFAIR_STREAM=127.0.0.1:9999 python main.py
+BETFAIR_STREAM_SETTINGS = {
+    "enabled": True,
+    "endpoint": os.environ.get("TENNIS_BETFAIR_STREAM", "stream-api.betfair.com:443"),
+    "use_tls": "TENNIS_BETFAIR_STREAM" not in os.environ,  # The stand-in server is plain TCP
+    "max_markets": 200,              # Betfair's per-subscription market limit
+    "fields": ["EX_BEST_OFFERS", "EX_TRADED_VOL", "EX_LTP", "EX_MARKET_DEF"],
+    "ladder_levels": 1,              # Best price only, like the REST capture
+    "heartbeat_ms": 5000,
+    "conflate_ms": 0,
+    "image_timeout": 10,             # Seconds to wait for a (re)subscription image before polling
+    "stale_after": 20,               # Seconds of silence before the stream counts as down
+    "reconnect_backoff": 1.0,        # Seconds, doubled per failed reconnect
+    "max_reconnect_backoff": 60,
+    "closed_retention": 6 * 3600,    # Keep settled markets (with winners) this long
+}
+
+# ============================================================================
+# ODDS HISTORY
+# ============================================================================
+# Every Betfair capture appends (market, selection, time, back, lay, matched)
+# ticks to odds_history; a runner whose prices haven't moved isn't written
+# again. Ticks older than downsample_after_hours are thinned to the first,
+# last, highest and lowest back price per bucket, which keeps opening odds,
+# closing odds and drift. CLV is filled in from the last pre-play tick.
+ODDS_HISTORY_SETTINGS = {
+    "enabled": True,
+    "downsample_after_hours": 72,  # Full resolution for the last 3 days
+    "bucket_minutes": 30,          # Downsampling bucket
+    "retention_days": 400,         # Ticks older than this are deleted
+}
+
+# ============================================================================
+# ANALYSIS CACHE
+# ============================================================================
+# Auto mode re-analyses upcoming matches every cycle. The model output is
+# kept per match and reused until the players' data changes or a price
+# crosses an odds-to-rank estimation band; in between, a price move only
+# re-runs the value stage. Entries older than max_age_minutes are re-run in
+# full regardless, so anything the fingerprint misses is picked up in time.
+ANALYSIS_CACHE_SETTINGS = {
+    "enabled": True,
+    "max_age_minutes": 180,
+}
+
+# ============================================================================
+# UPCOMING MATCHES
+# ============================================================================
+# upcoming_matches rows are keyed by Betfair market ID. Each capture expires
+# rows by start time in bulk: OPEN markets that started more than
+# stale_after_hours ago drop out of analysis (EXPIRED), and rows older than
+# delete_after_hours are removed.
+UPCOMING_MATCHES_SETTINGS = {
+    "stale_after_hours": 6,      # Matches often start late / run long
+    "delete_after_hours": 72,    # Kept a while for bet date syncing
+}
+
+# ============================================================================
+# BETFAIR CATALOGUE CACHE
+# ============================================================================
+# Captures list the market window with start times only and request runner,
+# event and competition details just for markets not in the catalogue cache.
+# Competition surface/level classifications are stored in the
+# betfair_competitions table.
+BETFAIR_CATALOGUE_SETTINGS = {
+    "enabled": True,
+    "ttl_minutes": 360,     # Re-fetch a market's catalogue after this long
+    "request_chunk": 200,   # Market IDs per full catalogue request
+}
+
+# ============================================================================
+# THE ODDS API (PINNACLE COMPARISON)
+# ============================================================================
+# Responses are cached per sport key in DATA_DIR/odds_api_cache.json. Stale
+# sport keys are refreshed within a daily budget: the remaining monthly
+# quota less reserve_requests, spread over the days until it resets.
+ODDS_API = {
+    "enabled": True,                # Toggle Pinnacle comparison
+    "cache_duration_minutes": 15,   # Cache to preserve API quota
+    "sports_cache_hours": 6,        # Active tennis competitions list (free endpoint)
+    "monthly_quota": 500,           # Free tier; used until the API reports what's left
+    "reserve_requests": 25,         # Never planned away
 }
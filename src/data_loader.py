@@ -21,7 +21,7 @@ if getattr(sys, 'frozen', False):
 else:
     ssl_context = ssl.create_default_context()
 
-from config import SURFACE_MAPPING
+from config import SURFACE_MAPPING, DUMP_SYNC_SETTINGS
 from database import TennisDatabase, db
 
 
@@ -69,6 +69,11 @@ class DataLoader:
 
             self._report_progress("Downloading latest Tennis Explorer data from GitHub...")
 
+            # Merge the published match dump first; the scrape then only fills the gap
+            dump_matches = 0
+            if DUMP_SYNC_SETTINGS["enabled"]:
+                dump_matches = loader.sync_from_dump().get('matches_imported', 0)
+
             # Download and import
             import_stats = loader.quick_refresh()
 
@@ -77,9 +82,11 @@ class DataLoader:
                 return self._fallback_tennis_explorer_refresh(months_back)
 
             # Use correct keys from GitHubDataLoader result
-            results['matches_updated'] = import_stats.get('matches_imported', 0)
+            results['matches_updated'] = import_stats.get('matches_imported', 0) + dump_matches
+            results['dump_matches'] = dump_matches
             results['matches_scraped'] = import_stats.get('matches', 0)
             results['matches_skipped'] = import_stats.get('matches_skipped', 0)
+            results['days_skipped'] = import_stats.get('days_skipped', 0)
             results['players_created'] = 0  # Players are locked, none created
             results['players_in_db'] = import_stats.get('players', 0)
 
@@ -6,14 +6,21 @@ IMPORTANT: All match data is validated before insertion.
 See data_validation.py for validation rules.
 """
 
+import calendar
 import sqlite3
 import json
+import time
 from datetime import datetime, date
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple, Any
 from contextlib import contextmanager
 
-from config import DB_PATH, DATA_DIR, KELLY_STAKING, normalize_tournament_name
+from config import (DB_PATH, DATA_DIR, KELLY_STAKING, NAME_RESOLUTION_SETTINGS,
+                    MATCH_CONTEXT_SETTINGS, PERFORMANCE_ELO_SETTINGS, TOURNAMENT_FORM_WEIGHT,
+                    ODDS_HISTORY_SETTINGS, UPCOMING_MATCHES_SETTINGS,
+                    normalize_tournament_name)
+from tournament_classifier import get_level, get_surface, register_sqlite_functions
+from day_ordinal import day_number
 
 # Import validation after config to avoid circular imports
 _validator = None
@@ -33,6 +40,8 @@ class TennisDatabase:
 
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
+        self._tournaments_by_key = None  # Loaded lazily by get_tournament_info
+        self._tournaments_by_name = {}
         self._ensure_db_exists()
 
     def _ensure_db_exists(self):
@@ -153,6 +162,17 @@ class TennisDatabase:
                 "ALTER TABLE players ADD COLUMN performance_elo REAL",
                 "ALTER TABLE players ADD COLUMN performance_rank INTEGER",
                 "ALTER TABLE players ADD COLUMN tour TEXT",
+                "ALTER TABLE matches ADD COLUMN tour_level TEXT",
+                "ALTER TABLE matches ADD COLUMN tournament_key INTEGER",
+                "ALTER TABLE tournaments ADD COLUMN tournament_key INTEGER",
+                "ALTER TABLE tournaments ADD COLUMN normalized_name TEXT",
+                "ALTER TABLE tournaments ADD COLUMN tour_level TEXT",
+                "ALTER TABLE tournaments ADD COLUMN level_rank INTEGER",
+                "ALTER TABLE tournaments ADD COLUMN default_surface TEXT",
+                "ALTER TABLE tournaments ADD COLUMN form_weight REAL",
+                "ALTER TABLE tournaments ADD COLUMN k_factor INTEGER",
+                "ALTER TABLE matches ADD COLUMN day INTEGER",
+                "ALTER TABLE rankings_history ADD COLUMN day INTEGER",
             ]
             for migration in migrations:
                 try:
@@ -169,6 +189,13 @@ class TennisDatabase:
                     category TEXT,
                     location TEXT,
                     draw_size INTEGER,
+                    tournament_key INTEGER,
+                    normalized_name TEXT,
+                    tour_level TEXT,
+                    level_rank INTEGER,
+                    default_surface TEXT,
+                    form_weight REAL,
+                    k_factor INTEGER,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP
                 )
             """)
@@ -215,6 +242,9 @@ class TennisDatabase:
                     l_SvGms INTEGER,
                     l_bpSaved INTEGER,
                     l_bpFaced INTEGER,
+                    tour_level TEXT,
+                    tournament_key INTEGER,
+                    day INTEGER,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
                     FOREIGN KEY (winner_id) REFERENCES players(id),
@@ -230,6 +260,7 @@ class TennisDatabase:
                     ranking_date TEXT NOT NULL,
                     ranking INTEGER NOT NULL,
                     points INTEGER,
+                    day INTEGER,
                     FOREIGN KEY (player_id) REFERENCES players(id),
                     UNIQUE(player_id, ranking_date)
                 )
@@ -308,6 +339,7 @@ class TennisDatabase:
                     result TEXT,
                     profit_loss REAL,
                     notes TEXT,
+                    day INTEGER,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                     settled_at TEXT
                 )
@@ -338,6 +370,7 @@ class TennisDatabase:
                 "ALTER TABLE bets ADD COLUMN odds_at_close REAL",  # Closing odds for CLV tracking
                 "ALTER TABLE bets ADD COLUMN clv REAL",  # Closing Line Value percentage
                 "ALTER TABLE bets ADD COLUMN weighting TEXT",  # Weight profile used for this bet
+                "ALTER TABLE bets ADD COLUMN day INTEGER",  # Day ordinal of match_date
             ]
             for migration in bets_migrations:
                 try:
@@ -369,6 +402,7 @@ class TennisDatabase:
                     player2_liquidity REAL,
                     total_matched REAL,
                     analyzed INTEGER DEFAULT 0,
+                    day INTEGER,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (player1_id) REFERENCES players(id),
                     FOREIGN KEY (player2_id) REFERENCES players(id)
@@ -380,6 +414,12 @@ class TennisDatabase:
                 "ALTER TABLE upcoming_matches ADD COLUMN player1_liquidity REAL",
                 "ALTER TABLE upcoming_matches ADD COLUMN player2_liquidity REAL",
                 "ALTER TABLE upcoming_matches ADD COLUMN total_matched REAL",
+                "ALTER TABLE upcoming_matches ADD COLUMN day INTEGER",
+                "ALTER TABLE upcoming_matches ADD COLUMN market_id TEXT",
+                "ALTER TABLE upcoming_matches ADD COLUMN start_ts INTEGER",
+                "ALTER TABLE upcoming_matches ADD COLUMN status TEXT DEFAULT 'OPEN'",
+                "ALTER TABLE upcoming_matches ADD COLUMN analyzed_at TEXT",
+                "ALTER TABLE upcoming_matches ADD COLUMN p1_probability REAL",
             ]
             for migration in upcoming_migrations:
                 try:
@@ -387,6 +427,12 @@ class TennisDatabase:
                 except sqlite3.OperationalError:
                     pass  # Column already exists
 
+            # Start time as UTC epoch seconds for rows saved before the column
+            cursor.execute("""
+                UPDATE upcoming_matches SET start_ts = CAST(strftime('%s', date) AS INTEGER)
+                WHERE start_ts IS NULL AND date IS NOT NULL
+            """)
+
             # Player aliases table - maps alternate IDs to canonical IDs
             # The canonical_id should be the ID used by the betting site (from upcoming_matches)
             cursor.execute("""
@@ -399,6 +445,41 @@ class TennisDatabase:
                 )
             """)
 
+            # Name resolution cache - remembers which player a raw source name resolved to
+            # so repeat captures skip the name matching strategies entirely
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS name_resolutions (
+                    source TEXT NOT NULL,
+                    raw_name TEXT NOT NULL,
+                    player_id INTEGER NOT NULL,
+                    strategy TEXT,
+                    confidence REAL,
+                    resolved_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (source, raw_name),
+                    FOREIGN KEY (player_id) REFERENCES players(id)
+                )
+            """)
+
+            # Rolling form state - decayed form sums per player, folded forward one
+            # match at a time so live analysis doesn't rescan the match history
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS player_form_state (
+                    player_id INTEGER PRIMARY KEY,
+                    ref_day INTEGER,
+                    last_day INTEGER,
+                    last_day_ids TEXT,
+                    numerators TEXT,
+                    denominators TEXT,
+                    recent TEXT,
+                    results TEXT,
+                    losses INTEGER DEFAULT 0,
+                    loss_elo_sum REAL DEFAULT 0,
+                    loss_elo_sq REAL DEFAULT 0,
+                    player_rank INTEGER,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
             # App settings table for storing metadata like last refresh time
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS app_settings (
@@ -428,6 +509,46 @@ class TennisDatabase:
                 )
             """)
 
+            # Odds history - append-only price ticks per runner, written at every
+            # capture (unchanged prices are skipped), for line movement and CLV
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS odds_markets (
+                    market_id TEXT PRIMARY KEY,
+                    event_name TEXT,
+                    tournament TEXT,
+                    start_ts INTEGER,
+                    day INTEGER,
+                    player1_name TEXT,
+                    player1_selection_id INTEGER,
+                    player2_name TEXT,
+                    player2_selection_id INTEGER
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS odds_history (
+                    market_id TEXT NOT NULL,
+                    selection_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    back_odds REAL,
+                    lay_odds REAL,
+                    matched REAL,
+                    PRIMARY KEY (market_id, selection_id, ts)
+                ) WITHOUT ROWID
+            """)
+
+            # Surface/level classification per Betfair competition (manual=1 rows are never re-classified)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS betfair_competitions (
+                    competition_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    surface TEXT,
+                    level TEXT,
+                    month INTEGER,
+                    manual INTEGER DEFAULT 0,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
             # Create indexes for performance (wrapped in try-except for schema compatibility)
             index_statements = [
                 "CREATE INDEX IF NOT EXISTS idx_matches_winner ON matches(winner_id)",
@@ -441,6 +562,21 @@ class TennisDatabase:
                 "CREATE INDEX IF NOT EXISTS idx_h2h_players ON head_to_head(player1_id, player2_id)",
                 "CREATE INDEX IF NOT EXISTS idx_bets_date ON bets(match_date)",
                 "CREATE INDEX IF NOT EXISTS idx_players_name ON players(name)",
+                "CREATE INDEX IF NOT EXISTS idx_name_resolutions_player ON name_resolutions(player_id)",
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_tournaments_key ON tournaments(tournament_key)",
+                "CREATE INDEX IF NOT EXISTS idx_tournaments_name ON tournaments(name)",
+                "CREATE INDEX IF NOT EXISTS idx_matches_tournament_key ON matches(tournament_key)",
+                "CREATE INDEX IF NOT EXISTS idx_matches_day ON matches(day)",
+                "CREATE INDEX IF NOT EXISTS idx_matches_winner_day ON matches(winner_id, day)",
+                "CREATE INDEX IF NOT EXISTS idx_matches_loser_day ON matches(loser_id, day)",
+                "CREATE INDEX IF NOT EXISTS idx_rankings_player_day ON rankings_history(player_id, day)",
+                "CREATE INDEX IF NOT EXISTS idx_bets_day ON bets(day)",
+                "CREATE INDEX IF NOT EXISTS idx_upcoming_day ON upcoming_matches(day)",
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_upcoming_market ON upcoming_matches(market_id)",
+                "CREATE INDEX IF NOT EXISTS idx_upcoming_status_start ON upcoming_matches(status, start_ts)",
+                "CREATE INDEX IF NOT EXISTS idx_upcoming_pending ON upcoming_matches(status, analyzed, start_ts)",
+                "CREATE INDEX IF NOT EXISTS idx_odds_markets_day ON odds_markets(day)",
+                "CREATE INDEX IF NOT EXISTS idx_odds_history_ts ON odds_history(ts)",
             ]
             for stmt in index_statements:
                 try:
@@ -449,6 +585,67 @@ class TennisDatabase:
                     # Column or table doesn't exist in this schema - skip this index
                     pass
 
+            # Classify matches stored before tour_level existed (once per database;
+            # every insert path sets the level itself)
+            self._run_migration_once(conn, 'migration:match_tour_level', self._classify_match_levels)
+            self._sync_tournament_dimension(conn)
+            self._backfill_day_columns(conn)
+
+    def _run_migration_once(self, conn, key: str, migrate) -> None:
+        """Run a data migration unless app_settings records it as done."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM app_settings WHERE key = ?", (key,))
+        if cursor.fetchone():
+            return
+        migrate(conn)
+        cursor.execute("""
+            INSERT OR REPLACE INTO app_settings (key, value, updated_at)
+            VALUES (?, 'done', CURRENT_TIMESTAMP)
+        """, (key,))
+
+    def _classify_match_levels(self, conn, reclassify: bool = False) -> int:
+        """
+        Store the tour level on matches so hot loops don't re-classify names.
+
+        Runs the precompiled classifier as a SQL function in one UPDATE.
+        Only touches rows without a level unless reclassify is set.
+        """
+        register_sqlite_functions(conn)
+        cursor = conn.cursor()
+        where = "" if reclassify else " WHERE tour_level IS NULL"
+        try:
+            cursor.execute(f"UPDATE matches SET tour_level = tour_level(tournament){where}")
+        except sqlite3.OperationalError:
+            return 0  # Older schema without the column
+        return cursor.rowcount
+
+    def _backfill_day_columns(self, conn) -> int:
+        """
+        Fill the integer day column for rows written without one.
+
+        Covers raw inserts from other tools and databases predating the column.
+        Rows whose date can't be parsed stay NULL.
+        """
+        conn.create_function("day_number", 1, day_number, deterministic=True)
+        cursor = conn.cursor()
+        updated = 0
+        for table, date_column in (('matches', 'date'), ('bets', 'match_date'),
+                                   ('upcoming_matches', 'date'), ('rankings_history', 'ranking_date')):
+            try:
+                cursor.execute(f"""
+                    UPDATE {table} SET day = day_number({date_column})
+                    WHERE day IS NULL AND {date_column} IS NOT NULL
+                """)
+                updated += cursor.rowcount
+            except sqlite3.OperationalError:
+                pass  # Older schema without the column
+        return updated
+
+    def classify_match_levels(self, reclassify: bool = False) -> int:
+        """Backfill matches.tour_level. Returns number of rows updated."""
+        with self.get_connection() as conn:
+            return self._classify_match_levels(conn, reclassify)
+
     # =========================================================================
     # PLAYER CRUD
     # =========================================================================
@@ -628,6 +825,16 @@ class TennisDatabase:
                 INSERT OR REPLACE INTO player_aliases (alias_id, canonical_id, source)
                 VALUES (?, ?, ?)
             """, (alias_id, canonical_id, source))
+            # Cached name resolutions pointing at the merged ID are now stale
+            cursor.execute(
+                "DELETE FROM name_resolutions WHERE player_id = ?",
+                (alias_id,)
+            )
+            # The canonical player's form state is missing the alias's matches
+            cursor.execute(
+                "DELETE FROM player_form_state WHERE player_id IN (?, ?)",
+                (alias_id, canonical_id)
+            )
 
     def get_all_player_ids(self, canonical_id: int) -> List[int]:
         """
@@ -670,12 +877,20 @@ class TennisDatabase:
         - Betfair: "Frederico Ferreira Silva" (FirstName LastName)
         - Database: "Ferreira Silva Frederico" (LastName FirstName)
         """
+        return self._match_player_by_name(name)[0]
+
+    def _match_player_by_name(self, name: str) -> Tuple[Optional[Dict], Optional[str], float]:
+        """Run the name matching strategies for get_player_by_name().
+
+        Returns (player, strategy, confidence) so callers that persist
+        resolutions can record how the match was made.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
             # Skip doubles players (contain "/")
             if '/' in name:
-                return None
+                return None, None, 0.0
 
             fallback_result = None  # Store auto-created match as fallback
 
@@ -688,7 +903,7 @@ class TennisDatabase:
                     cursor.execute("SELECT * FROM players WHERE id = ?", (mapped_id,))
                     row = cursor.fetchone()
                     if row:
-                        return dict(row)
+                        return dict(row), 'mapping_id', 1.0
 
                 # Check if there's a mapping to a different name
                 mapped_name = name_matcher.get_db_name(name)
@@ -700,7 +915,7 @@ class TennisDatabase:
                     )
                     row = cursor.fetchone()
                     if row:
-                        return dict(row)
+                        return dict(row), 'mapping_name', 1.0
             except ImportError:
                 pass  # name_matcher not available
 
@@ -721,7 +936,7 @@ class TennisDatabase:
             if row:
                 result = dict(row)
                 if result['id'] > 0:
-                    return result
+                    return result, 'exact', 1.0
                 fallback_result = result
 
             # Strategy 2: Try reversed name order (handles DB format "LastName FirstName")
@@ -736,7 +951,7 @@ class TennisDatabase:
                 )
                 row = cursor.fetchone()
                 if row:
-                    return dict(row)
+                    return dict(row), 'reversed', 0.95
 
                 # Also try full reversal: "A B C" -> "C B A"
                 full_reversed = ' '.join(parts[::-1])
@@ -747,7 +962,7 @@ class TennisDatabase:
                 )
                 row = cursor.fetchone()
                 if row:
-                    return dict(row)
+                    return dict(row), 'full_reversed', 0.95
 
             # Strategy 3: All name parts must be present (in any order)
             # This is safer than partial matching
@@ -765,7 +980,7 @@ class TennisDatabase:
                 )
                 row = cursor.fetchone()
                 if row:
-                    return dict(row)
+                    return dict(row), 'all_parts', 0.85
 
             # Strategy 4: First and last name in any order (for 2-part names)
             if len(parts) == 2:
@@ -783,7 +998,7 @@ class TennisDatabase:
                 )
                 row = cursor.fetchone()
                 if row:
-                    return dict(row)
+                    return dict(row), 'first_last', 0.8
 
             # Strategy 5: Fuzzy match using all candidates (last resort)
             # Only for names with 2+ parts, and require high similarity
@@ -819,12 +1034,232 @@ class TennisDatabase:
                         cursor.execute("SELECT * FROM players WHERE id = ?", (best_match['id'],))
                         row = cursor.fetchone()
                         if row:
-                            return dict(row)
+                            score = name_matcher.similarity_score(name, best_match['name'])
+                            return dict(row), 'fuzzy', round(score, 3)
                 except ImportError:
                     pass
 
             # If no real player found, return the auto-created fallback (if any)
-            return fallback_result
+            if fallback_result:
+                return fallback_result, 'auto_created', 0.5
+            return None, None, 0.0
+
+    def get_existing_player_ids(self, player_ids: List[int]) -> set:
+        """Return the subset of player_ids that exist in the players table."""
+        ids = list({pid for pid in player_ids if pid is not None})
+        existing = set()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"SELECT id FROM players WHERE id IN ({placeholders})", chunk)
+                existing.update(row[0] for row in cursor.fetchall())
+        return existing
+
+    def get_player_data_versions(self, player_ids: List[int]) -> Dict[int, tuple]:
+        """Return {player_id: version} for the data the match model reads.
+
+        The version changes whenever the player row, their matches (under any
+        alias ID), their rankings history or their injuries change, so an
+        unchanged version means a cached analysis is still valid.
+        """
+        ids = list({pid for pid in player_ids if pid is not None})
+        if not ids:
+            return {}
+        versions = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS version_ids (player_id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM version_ids")
+            cursor.executemany("INSERT INTO version_ids VALUES (?)", [(pid,) for pid in ids])
+            cursor.execute("""
+                WITH canon AS (
+                    SELECT v.player_id, COALESCE(a.canonical_id, v.player_id) AS canonical_id
+                    FROM version_ids v
+                    LEFT JOIN player_aliases a ON a.alias_id = v.player_id
+                ),
+                members AS (
+                    SELECT player_id, canonical_id AS member_id FROM canon
+                    UNION
+                    SELECT c.player_id, a.alias_id FROM canon c
+                    JOIN player_aliases a ON a.canonical_id = c.canonical_id
+                    UNION
+                    SELECT player_id, player_id FROM canon
+                )
+                SELECT mb.player_id, mb.member_id,
+                       p.current_ranking, p.performance_elo, p.performance_rank,
+                       p.tour, p.updated_at, p.last_ta_update,
+                       (SELECT MAX(rowid) FROM matches WHERE winner_id = mb.member_id),
+                       (SELECT MAX(rowid) FROM matches WHERE loser_id = mb.member_id),
+                       (SELECT MAX(id) || ':' || COUNT(*) FROM rankings_history
+                        WHERE player_id = mb.member_id),
+                       (SELECT group_concat(id || ':' || IFNULL(status, '') || ':' || IFNULL(updated_at, ''))
+                        FROM (SELECT id, status, updated_at FROM injuries
+                              WHERE player_id = mb.member_id ORDER BY id))
+                FROM members mb
+                LEFT JOIN players p ON p.id = mb.member_id
+                ORDER BY mb.player_id, mb.member_id
+            """)
+            for row in cursor.fetchall():
+                versions.setdefault(row[0], []).append(tuple(row[1:]))
+            cursor.execute("DELETE FROM version_ids")
+        return {pid: tuple(rows) for pid, rows in versions.items()}
+
+    # =========================================================================
+    # NAME RESOLUTION CACHE
+    # =========================================================================
+
+    def get_name_resolutions(self, names: List[str], source: str = 'betfair') -> Dict[str, Dict]:
+        """Get cached resolutions for raw names from a source.
+
+        Returns {raw_name: player dict} for names with a cached resolution.
+        Auto-created fallbacks older than NAME_RESOLUTION_SETTINGS['retry_unmatched_hours']
+        are treated as misses so a real player imported since can be picked up.
+        """
+        names = list(dict.fromkeys(n for n in names if n))
+        retry_modifier = f"-{NAME_RESOLUTION_SETTINGS['retry_unmatched_hours']} hours"
+        results = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"""
+                    SELECT p.*, r.raw_name AS resolution_raw_name
+                    FROM name_resolutions r
+                    JOIN players p ON p.id = r.player_id
+                    WHERE r.source = ? AND r.raw_name IN ({placeholders})
+                      AND NOT (r.strategy = 'auto_created'
+                               AND r.resolved_at < datetime('now', ?))
+                """, [source] + chunk + [retry_modifier])
+                for row in cursor.fetchall():
+                    player = dict(row)
+                    results[player.pop('resolution_raw_name')] = player
+        return results
+
+    def save_name_resolutions(self, resolutions: List[Tuple]):
+        """Store name resolutions in batch.
+
+        Each tuple is (source, raw_name, player_id, strategy, confidence).
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT OR REPLACE INTO name_resolutions
+                (source, raw_name, player_id, strategy, confidence, resolved_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, resolutions)
+
+    def invalidate_name_resolutions(self, player_ids: List[int] = None,
+                                    source: str = None) -> int:
+        """Delete cached name resolutions so they are re-resolved on next use.
+
+        Args:
+            player_ids: Only drop resolutions pointing at these players (default: all)
+            source: Only drop resolutions from this source (default: all sources)
+
+        Returns:
+            Number of resolutions removed
+        """
+        conditions = []
+        params = []
+        if player_ids:
+            conditions.append(f"player_id IN ({','.join('?' * len(player_ids))})")
+            params.extend(player_ids)
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM name_resolutions{where}", params)
+            return cursor.rowcount
+
+    def build_name_index(self) -> Dict[str, Dict]:
+        """Normalized name -> player for bulk exact matching.
+
+        Mirrors the exact-match strategy of get_player_by_name(): real players
+        only, and the best-ranked player wins when names collide.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM players WHERE id > 0
+                ORDER BY COALESCE(current_ranking, 999999) DESC
+            """)
+            return {row['name'].replace('-', ' ').strip().lower(): dict(row)
+                    for row in cursor.fetchall() if row['name']}
+
+    def resolve_player_names(self, names: List[str], source: str = 'betfair',
+                             name_index: Dict[str, Dict] = None,
+                             exhaustive: bool = True) -> Dict[str, Optional[Dict]]:
+        """Resolve a batch of raw source names to players.
+
+        Cached resolutions are read in one query. Only names not seen before go
+        through the name_mappings.json / get_player_by_name() strategies, and the
+        new resolutions are written back in a single batch.
+
+        Args:
+            names: Raw source names
+            source: Resolution source ('betfair', 'rankings', ...)
+            name_index: build_name_index() result; when given, uncached names
+                are first tried against it in memory (exact and reversed order)
+            exhaustive: If False, names the index can't match are left
+                unresolved instead of running the slower per-name strategies
+
+        Returns {raw_name: player dict or None} for every non-doubles name.
+        """
+        names = list(dict.fromkeys(n for n in names if n and '/' not in n))
+        if not names:
+            return {}
+
+        resolved = self.get_name_resolutions(names, source)
+
+        # An explicit ID mapping added since the name was cached takes precedence
+        try:
+            from name_matcher import name_matcher
+            for name, player in list(resolved.items()):
+                mapped_id = name_matcher.mappings.get(name)
+                if isinstance(mapped_id, int) and mapped_id != player['id']:
+                    del resolved[name]
+        except ImportError:
+            name_matcher = None
+
+        def has_mapping(name):
+            # Mapped names must go through Strategy 0, not the index
+            return name_matcher is not None and (
+                name_matcher.get_db_id(name) is not None
+                or name_matcher.get_db_name(name) not in (None, name))
+
+        new_resolutions = []
+        for name in names:
+            if name in resolved:
+                continue
+            if name_index is not None and not has_mapping(name):
+                parts = name.replace('-', ' ').lower().split()
+                candidates = [(' '.join(parts), 'exact', 1.0)]
+                if len(parts) >= 2:
+                    candidates.append((' '.join(parts[1:] + parts[:1]), 'reversed', 0.95))
+                    candidates.append((' '.join(parts[::-1]), 'full_reversed', 0.95))
+                hit = next(((name_index[key], strategy, confidence)
+                            for key, strategy, confidence in candidates if key in name_index), None)
+                if hit:
+                    resolved[name] = hit[0]
+                    new_resolutions.append((source, name, hit[0]['id'], hit[1], hit[2]))
+                    continue
+            if not exhaustive:
+                continue
+            player, strategy, confidence = self._match_player_by_name(name)
+            resolved[name] = player
+            if player:
+                new_resolutions.append((source, name, player['id'], strategy, confidence))
+
+        if new_resolutions:
+            self.save_name_resolutions(new_resolutions)
+
+        return {name: resolved.get(name) for name in names}
 
     def search_players(self, query: str, limit: int = 20) -> List[Dict]:
         """Search players by name."""
@@ -916,6 +1351,23 @@ class TennisDatabase:
             except:
                 return True  # Invalid timestamp, needs update
 
+    def get_ta_update_times(self, player_ids: List[int]) -> Dict[int, Optional[datetime]]:
+        """Last Tennis Abstract update time per player (None if never updated)."""
+        ids = list({pid for pid in player_ids if pid is not None})
+        times = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"SELECT id, last_ta_update FROM players WHERE id IN ({placeholders})", chunk)
+                for row in cursor.fetchall():
+                    try:
+                        times[row['id']] = datetime.fromisoformat(row['last_ta_update'])
+                    except (TypeError, ValueError):
+                        times[row['id']] = None
+        return times
+
     # =========================================================================
     # TOURNAMENT CRUD
     # =========================================================================
@@ -946,6 +1398,185 @@ class TennisDatabase:
             row = cursor.fetchone()
             return dict(row) if row else None
 
+    # =========================================================================
+    # TOURNAMENT DIMENSION
+    # =========================================================================
+
+    @staticmethod
+    def _tournament_attributes(name: str, surface: str = None) -> Dict:
+        """Derived dimension columns for a tournament name."""
+        level = get_level(name)
+        return {
+            'normalized_name': normalize_tournament_name(name),
+            'tour_level': level,
+            'level_rank': MATCH_CONTEXT_SETTINGS['level_hierarchy'].get(level, 2),
+            'default_surface': surface or get_surface(name),
+            'form_weight': TOURNAMENT_FORM_WEIGHT.get(level, 1.0),
+            'k_factor': PERFORMANCE_ELO_SETTINGS['k_factors'].get(level, 24),
+        }
+
+    def _sync_tournament_dimension(self, conn, full: bool = False, names=None) -> int:
+        """
+        Populate the tournaments dimension and key matches to it.
+
+        Each distinct tournament name gets one keyed row holding its normalized
+        name, tour level, hierarchy rank, default surface, form weight and
+        Elo K-factor. Incremental mode only looks at unkeyed matches (an index
+        lookup on tournament_key IS NULL), limited to the given tournament
+        names when names is set (single inserts and imports); full mode
+        refreshes every row and re-keys renamed matches. Returns the number
+        of matches keyed.
+        """
+        cursor = conn.cursor()
+        key_filter, name_filter, name_params = "", "", []
+        if names is not None and not full:
+            names = sorted({n for n in names if n})
+            if not names:
+                return 0
+            placeholders = ','.join('?' * len(names))
+            key_filter = f" AND name IN ({placeholders})"
+            name_filter = f" AND tournament IN ({placeholders})"
+            name_params = names
+        try:
+            cursor.execute(f"""
+                SELECT name, tournament_key FROM tournaments
+                WHERE tournament_key IS NOT NULL{key_filter}
+            """, name_params)
+            keys = {row[0]: row[1] for row in cursor.fetchall()}
+
+            where = "" if full else f" WHERE tournament_key IS NULL{name_filter}"
+            cursor.execute(f"""
+                SELECT tournament, surface, COUNT(*) FROM matches{where}
+                GROUP BY tournament, surface
+            """, name_params)
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            return 0  # Older schema without the dimension columns
+
+        # Most common surface per tournament
+        surfaces = {}
+        best_counts = {}
+        for name, surface, count in rows:
+            if not name:
+                continue
+            surfaces.setdefault(name, None)
+            if surface and count > best_counts.get(name, 0):
+                surfaces[name] = surface
+                best_counts[name] = count
+
+        names = set(surfaces)
+        if full:
+            # Upcoming and bet tournaments get keys too so lookups by name hit the dimension
+            for table in ('bets', 'upcoming_matches'):
+                try:
+                    cursor.execute(f"SELECT DISTINCT tournament FROM {table}")
+                    names.update(row[0] for row in cursor.fetchall() if row[0])
+                except sqlite3.OperationalError:
+                    pass
+
+        new_names = sorted(names - set(keys))
+        if new_names:
+            cursor.execute("SELECT COALESCE(MAX(tournament_key), 0) FROM tournaments")
+            next_key = cursor.fetchone()[0]
+            for name in new_names:
+                next_key += 1
+                keys[name] = next_key
+                # Reuse an existing tournaments row with this name if there is one
+                cursor.execute("""
+                    UPDATE tournaments SET tournament_key = ?
+                    WHERE rowid = (SELECT MIN(rowid) FROM tournaments WHERE name = ?)
+                """, (next_key, name))
+                if cursor.rowcount == 0:
+                    cursor.execute(
+                        "INSERT INTO tournaments (id, name, tournament_key) VALUES (?, ?, ?)",
+                        (f"T{next_key}", name, next_key)
+                    )
+
+        refresh = keys if full else new_names
+        if refresh:
+            updates = []
+            for name in refresh:
+                attrs = self._tournament_attributes(name, surfaces.get(name))
+                updates.append((
+                    attrs['normalized_name'], attrs['tour_level'], attrs['level_rank'],
+                    attrs['default_surface'], attrs['form_weight'], attrs['k_factor'],
+                    keys[name],
+                ))
+            cursor.executemany("""
+                UPDATE tournaments
+                SET normalized_name = ?, tour_level = ?, level_rank = ?,
+                    default_surface = ?, form_weight = ?, k_factor = ?
+                WHERE tournament_key = ?
+            """, updates)
+
+        key_lookup = """(SELECT t.tournament_key FROM tournaments t
+                         WHERE t.name = matches.tournament AND t.tournament_key IS NOT NULL)"""
+        if full:
+            cursor.execute(f"UPDATE matches SET tournament_key = {key_lookup} WHERE tournament_key IS NOT {key_lookup}")
+        else:
+            cursor.execute(f"""
+                UPDATE matches SET tournament_key = {key_lookup}
+                WHERE tournament_key IS NULL AND tournament IS NOT NULL{name_filter}
+            """, name_params)
+        keyed = cursor.rowcount
+
+        if new_names or full:
+            self._tournaments_by_key = None
+            self._tournaments_by_name = {}
+        return keyed
+
+    def sync_tournament_dimension(self, full: bool = False) -> int:
+        """Key unkeyed matches to the tournaments dimension (all matches if full)."""
+        with self.get_connection() as conn:
+            return self._sync_tournament_dimension(conn, full)
+
+    def _load_tournament_dimension(self):
+        """Load keyed tournaments into memory for per-match lookups."""
+        by_key = {}
+        by_name = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT tournament_key, name, normalized_name, tour_level, level_rank,
+                           default_surface, form_weight, k_factor
+                    FROM tournaments WHERE tournament_key IS NOT NULL
+                """)
+                rows = cursor.fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+        for row in rows:
+            info = dict(row)
+            by_key[info['tournament_key']] = info
+            by_name[info['name']] = info
+        self._tournaments_by_key = by_key
+        self._tournaments_by_name = by_name
+
+    def get_tournament_info(self, tournament_key: int = None, name: str = None) -> Dict:
+        """
+        Dimension row for a tournament, by key or by name.
+
+        Names not yet in the dimension are classified once and remembered, so
+        callers in per-match loops never re-run string classification.
+
+        Returns:
+            Dict with tour_level, level_rank, default_surface, form_weight, k_factor
+        """
+        if self._tournaments_by_key is None:
+            self._load_tournament_dimension()
+
+        if tournament_key is not None:
+            info = self._tournaments_by_key.get(tournament_key)
+            if info:
+                return info
+
+        name = name or ''
+        info = self._tournaments_by_name.get(name)
+        if info is None:
+            info = {'tournament_key': None, 'name': name, **self._tournament_attributes(name)}
+            self._tournaments_by_name[name] = info
+        return info
+
     def sync_tournament_names(self) -> Dict[str, int]:
         """
         Sync tournament names across all tables to use consistent Betfair naming.
@@ -1015,10 +1646,19 @@ class TennisDatabase:
 
                     # Update if changed
                     if old_name != new_name:
-                        cursor.execute(f'UPDATE {table} SET tournament = ? WHERE tournament = ?',
-                                      (new_name, old_name))
+                        if table == 'matches':
+                            cursor.execute('UPDATE matches SET tournament = ?, tour_level = ? WHERE tournament = ?',
+                                          (new_name, get_level(new_name), old_name))
+                        else:
+                            cursor.execute(f'UPDATE {table} SET tournament = ? WHERE tournament = ?',
+                                          (new_name, old_name))
                         results[table] += cursor.rowcount
 
+            # Re-key matches to the (possibly renamed) tournaments
+            self._sync_tournament_dimension(conn, full=True)
+            # Form states were folded with the old tournament weights
+            cursor.execute("DELETE FROM player_form_state")
+
             conn.commit()
 
         return results
@@ -1059,9 +1699,10 @@ class TennisDatabase:
                  games_won_w, games_won_l, minutes, winner_rank, loser_rank,
                  winner_rank_points, loser_rank_points, winner_seed, loser_seed, best_of,
                  w_ace, w_df, w_svpt, w_1stIn, w_1stWon, w_2ndWon, w_SvGms, w_bpSaved, w_bpFaced,
-                 l_ace, l_df, l_svpt, l_1stIn, l_1stWon, l_2ndWon, l_SvGms, l_bpSaved, l_bpFaced)
+                 l_ace, l_df, l_svpt, l_1stIn, l_1stWon, l_2ndWon, l_SvGms, l_bpSaved, l_bpFaced,
+                 tour_level, day)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 match_data.get('id'),
                 match_data.get('tournament_id'),
@@ -1102,7 +1743,12 @@ class TennisDatabase:
                 match_data.get('l_SvGms'),
                 match_data.get('l_bpSaved'),
                 match_data.get('l_bpFaced'),
+                get_level(match_data.get('tourney_name') or match_data.get('tournament')),
+                day_number(match_data.get('date')),
             ))
+            self._sync_tournament_dimension(
+                conn, names=[match_data.get('tourney_name') or match_data.get('tournament')])
+            self._invalidate_stale_form_state(conn, [match_data])
             return match_data.get('id')
 
     def insert_matches_batch(self, matches: List[Dict], source: str = "unknown",
@@ -1148,9 +1794,10 @@ class TennisDatabase:
                  games_won_w, games_won_l, minutes, winner_rank, loser_rank,
                  winner_rank_points, loser_rank_points, winner_seed, loser_seed, best_of,
                  w_ace, w_df, w_svpt, w_1stIn, w_1stWon, w_2ndWon, w_SvGms, w_bpSaved, w_bpFaced,
-                 l_ace, l_df, l_svpt, l_1stIn, l_1stWon, l_2ndWon, l_SvGms, l_bpSaved, l_bpFaced)
+                 l_ace, l_df, l_svpt, l_1stIn, l_1stWon, l_2ndWon, l_SvGms, l_bpSaved, l_bpFaced,
+                 tour_level, day)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, [
                 (
                     m.get('id'),
@@ -1192,8 +1839,13 @@ class TennisDatabase:
                     m.get('l_SvGms'),
                     m.get('l_bpSaved'),
                     m.get('l_bpFaced'),
+                    get_level(m.get('tourney_name') or m.get('tournament')),
+                    day_number(m.get('date')),
                 ) for m in valid_matches
             ])
+            self._sync_tournament_dimension(
+                conn, names=[m.get('tourney_name') or m.get('tournament') for m in valid_matches])
+            self._invalidate_stale_form_state(conn, valid_matches)
 
         return len(valid_matches), rejected_count
 
@@ -1218,8 +1870,9 @@ class TennisDatabase:
                 params.append(surface)
 
             if since_date:
-                query += " AND date >= ?"
-                params.append(since_date)
+                # Rows without a day (seed copies, older tools) fall back to the date text
+                query += " AND (day >= ? OR (day IS NULL AND date >= ?))"
+                params.extend([day_number(since_date), since_date])
 
             query += " ORDER BY date DESC"
 
@@ -1293,19 +1946,173 @@ class TennisDatabase:
             cursor.execute("SELECT COUNT(*) FROM matches")
             return cursor.fetchone()[0]
 
+    # =========================================================================
+    # PLAYER FORM STATE
+    # =========================================================================
+
+    def get_player_form_state(self, player_id: int) -> Optional[Dict]:
+        """Get the stored rolling form state for a player (canonical ID), or None."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM player_form_state WHERE player_id = ?", (player_id,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        state = dict(row)
+        for key in ('last_day_ids', 'recent', 'results'):
+            state[key] = json.loads(state[key] or '[]')
+        for key in ('numerators', 'denominators'):
+            state[key] = {int(level): value for level, value in json.loads(state[key] or '{}').items()}
+        return state
+
+    def save_player_form_state(self, state: Dict):
+        """Insert or replace a player's rolling form state."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO player_form_state
+                (player_id, ref_day, last_day, last_day_ids, numerators, denominators,
+                 recent, results, losses, loss_elo_sum, loss_elo_sq, player_rank, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (
+                state['player_id'],
+                state['ref_day'],
+                state['last_day'],
+                json.dumps(state['last_day_ids']),
+                json.dumps(state['numerators']),
+                json.dumps(state['denominators']),
+                json.dumps(state['recent']),
+                json.dumps(state['results']),
+                state['losses'],
+                state['loss_elo_sum'],
+                state['loss_elo_sq'],
+                state['player_rank'],
+            ))
+
+    def delete_player_form_state(self, player_ids: List[int] = None) -> int:
+        """Drop stored form states so they are rebuilt on next use (default: all players)."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if player_ids:
+                placeholders = ','.join('?' * len(player_ids))
+                cursor.execute(f"DELETE FROM player_form_state WHERE player_id IN ({placeholders})",
+                               list(player_ids))
+            else:
+                cursor.execute("DELETE FROM player_form_state")
+            return cursor.rowcount
+
+    def _invalidate_stale_form_state(self, conn, matches: List[Dict]):
+        """
+        Drop form states that have already been folded past a newly inserted match.
+
+        States only fold matches newer than their last_day, so a late-arriving
+        older result would otherwise never be counted.
+        """
+        rows = []
+        for m in matches:
+            match_day = day_number(m.get('date'))
+            if match_day is None:
+                continue
+            rows.append((match_day, m.get('winner_id'), m.get('loser_id'),
+                         m.get('winner_id'), m.get('loser_id')))
+        if not rows:
+            return
+        conn.executemany("""
+            DELETE FROM player_form_state
+            WHERE last_day > ?
+              AND player_id IN (?, ?,
+                                (SELECT canonical_id FROM player_aliases WHERE alias_id = ?),
+                                (SELECT canonical_id FROM player_aliases WHERE alias_id = ?))
+        """, rows)
+
+    def insert_result_match(self, cursor, match: Dict) -> bool:
+        """
+        INSERT OR IGNORE one scraped result (Tennis Explorer imports).
+
+        match holds id, tournament, surface, date, winner_id, winner_name,
+        loser_id, loser_name, score and optionally round; tour_level and day
+        are derived. Returns True if the row was new. Pass the new rows to
+        index_imported_matches before the transaction commits.
+        """
+        cursor.execute("""
+            INSERT OR IGNORE INTO matches
+            (id, tournament, surface, date, round, winner_id, winner_name, loser_id, loser_name, score,
+             tour_level, day)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (match['id'], match.get('tournament'), match.get('surface'), match.get('date'),
+              match.get('round'), match['winner_id'], match.get('winner_name'),
+              match['loser_id'], match.get('loser_name'), match.get('score'),
+              get_level(match.get('tournament')), day_number(match.get('date'))))
+        return cursor.rowcount > 0
+
+    def index_imported_matches(self, conn, matches: List[Dict]):
+        """Bookkeeping for rows written with insert_result_match, in the same transaction:
+        key their tournaments and drop form states folded past them."""
+        if matches:
+            self._sync_tournament_dimension(conn, names=[m.get('tournament') for m in matches])
+            self._invalidate_stale_form_state(conn, matches)
+
     # =========================================================================
     # RANKINGS HISTORY
     # =========================================================================
 
+    def apply_rankings(self, rankings: List[Tuple], ranking_date: str,
+                       unranked_ids: List[int] = None, default_rank: int = None) -> int:
+        """Apply a full rankings sync in one transaction.
+
+        Args:
+            rankings: (player_id, ranking, points) tuples; each player's current
+                and peak ranking are updated and a rankings_history row is
+                written for ranking_date
+            ranking_date: Date of the rankings (YYYY-MM-DD)
+            unranked_ids: Players outside the rankings, set to default_rank
+                (no history row)
+            default_rank: Ranking given to unranked_ids
+
+        Returns:
+            Number of players whose current ranking changed
+        """
+        rows = [(player_id, ranking) for player_id, ranking, _ in rankings]
+        if unranked_ids and default_rank is not None:
+            rows += [(player_id, default_rank) for player_id in unranked_ids]
+        today = datetime.now().isoformat()[:10]
+        day = day_number(ranking_date)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, current_ranking FROM players")
+            current = dict(cursor.fetchall())
+            changed = [(ranking, player_id) for player_id, ranking in rows
+                       if current.get(player_id, ranking) != ranking]
+
+            cursor.executemany("""
+                UPDATE players
+                SET current_ranking = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, changed)
+            cursor.executemany("""
+                UPDATE players
+                SET peak_ranking = ?, peak_ranking_date = ?
+                WHERE id = ? AND (peak_ranking IS NULL OR ? < peak_ranking)
+            """, [(ranking, today, player_id, ranking) for player_id, ranking in rows])
+            cursor.executemany("""
+                INSERT OR REPLACE INTO rankings_history
+                (player_id, ranking_date, ranking, points, day)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(player_id, ranking_date, ranking, points, day)
+                  for player_id, ranking, points in rankings])
+
+        return len(changed)
+
     def insert_ranking(self, player_id: int, ranking_date: str, ranking: int, points: int = None):
         """Insert a ranking record."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT OR REPLACE INTO rankings_history
-                (player_id, ranking_date, ranking, points)
-                VALUES (?, ?, ?, ?)
-            """, (player_id, ranking_date, ranking, points))
+                (player_id, ranking_date, ranking, points, day)
+                VALUES (?, ?, ?, ?, ?)
+            """, (player_id, ranking_date, ranking, points, day_number(ranking_date)))
 
     def insert_rankings_batch(self, rankings: List[Tuple]):
         """Insert multiple rankings in batch."""
@@ -1313,9 +2120,10 @@ class TennisDatabase:
             cursor = conn.cursor()
             cursor.executemany("""
                 INSERT OR REPLACE INTO rankings_history
-                (player_id, ranking_date, ranking, points)
-                VALUES (?, ?, ?, ?)
-            """, rankings)
+                (player_id, ranking_date, ranking, points, day)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(player_id, ranking_date, ranking, points, day_number(ranking_date))
+                  for player_id, ranking_date, ranking, points in rankings])
 
     def get_player_ranking_history(self, player_id: int, limit: int = 52) -> List[Dict]:
         """Get ranking history for a player."""
@@ -1570,6 +2378,7 @@ class TennisDatabase:
         tournament = bet_data.get('tournament', '')
         if tournament:
             tournament = normalize_tournament_name(tournament)
+        match_date = bet_data.get('match_date', datetime.now().isoformat()[:10])
 
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -1577,10 +2386,10 @@ class TennisDatabase:
                 INSERT INTO bets
                 (match_date, tournament, match_description, player1, player2, market,
                  selection, stake, odds, our_probability, implied_probability,
-                 ev_at_placement, notes, model, factor_scores, weighting)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 ev_at_placement, notes, model, factor_scores, weighting, day)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
-                bet_data.get('match_date', datetime.now().isoformat()[:10]),
+                match_date,
                 tournament,
                 bet_data.get('match_description'),
                 bet_data.get('player1'),
@@ -1596,11 +2405,12 @@ class TennisDatabase:
                 bet_data.get('model'),
                 bet_data.get('factor_scores'),  # JSON string of factor scores
                 bet_data.get('weighting'),  # Weight profile used
+                day_number(match_date),
             ))
             return cursor.lastrowid
 
     def settle_bet(self, bet_id: int, result: str, profit_loss: float):
-        """Settle a bet with result and profit/loss."""
+        """Settle a bet with result and profit/loss (and closing odds from odds_history if missing)."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -1608,6 +2418,8 @@ class TennisDatabase:
                 SET result = ?, profit_loss = ?, settled_at = CURRENT_TIMESTAMP, in_progress = 0
                 WHERE id = ?
             """, (result, profit_loss, bet_id))
+            if ODDS_HISTORY_SETTINGS["enabled"]:
+                self._fill_clv_from_odds_history(conn, [bet_id])
 
     def delete_bet(self, bet_id: int):
         """Delete a bet by ID."""
@@ -1754,6 +2566,7 @@ class TennisDatabase:
             cursor.execute("""
                 UPDATE bets SET
                     match_date = ?,
+                    day = ?,
                     tournament = ?,
                     match_description = ?,
                     player1 = ?,
@@ -1768,6 +2581,7 @@ class TennisDatabase:
                 WHERE id = ?
             """, (
                 bet_data.get('match_date'),
+                day_number(bet_data.get('match_date')),
                 tournament,
                 bet_data.get('match_description'),
                 bet_data.get('player1'),
@@ -1940,8 +2754,8 @@ class TennisDatabase:
                 # Update if we found a date and it differs
                 if new_date and new_date != current_date:
                     cursor.execute(
-                        "UPDATE bets SET match_date = ? WHERE id = ?",
-                        (new_date, bet_id)
+                        "UPDATE bets SET match_date = ?, day = ? WHERE id = ?",
+                        (new_date, day_number(new_date), bet_id)
                     )
                     updated_count += 1
 
@@ -2041,6 +2855,349 @@ class TennisDatabase:
                 'win_rate': (wins / settled * 100) if settled > 0 else 0,
             }
 
+    # =========================================================================
+    # ODDS HISTORY
+    # =========================================================================
+
+    @staticmethod
+    def _utc_timestamp(value: str) -> Optional[int]:
+        """Unix seconds for a Betfair UTC time string ("2026-01-19T10:30:00.000Z")."""
+        if not value:
+            return None
+        try:
+            parsed = datetime.strptime(value[:19].replace('T', ' '), '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return None
+        return calendar.timegm(parsed.timetuple())
+
+    def record_odds_ticks(self, captured_matches: List[Dict], ts: int = None) -> int:
+        """
+        Append one price tick per runner from a Betfair capture.
+
+        A runner's tick is skipped when back, lay and matched are unchanged
+        since its last tick, so the table only grows when prices move.
+
+        Args:
+            captured_matches: capture_all_tennis_matches() output (market_id,
+                market_start_time, player names, selection ids, odds, ...)
+            ts: Capture time in unix seconds (default: now)
+
+        Returns:
+            Number of ticks written.
+        """
+        ts = ts or int(time.time())
+        markets = []
+        ticks = []
+        for match in captured_matches:
+            if not match.get('market_id') or not match.get('player1_selection_id'):
+                continue
+            start_ts = self._utc_timestamp(match.get('market_start_time'))
+            markets.append((
+                match['market_id'], match.get('event_name'),
+                normalize_tournament_name(match.get('competition_name', '')),
+                start_ts, day_number(match.get('market_start_time', '')[:10]),
+                match['player1_name'], match['player1_selection_id'],
+                match['player2_name'], match['player2_selection_id'],
+            ))
+            for side in ('player1', 'player2'):
+                ticks.append((
+                    match['market_id'], match[f'{side}_selection_id'], ts,
+                    match.get(f'{side}_odds'), match.get(f'{side}_lay_odds'), match.get(f'{side}_matched'),
+                ))
+        if not ticks:
+            return 0
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO odds_markets
+                (market_id, event_name, tournament, start_ts, day,
+                 player1_name, player1_selection_id, player2_name, player2_selection_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(market_id) DO UPDATE SET
+                    start_ts = excluded.start_ts, day = excluded.day
+            """, markets)
+
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS odds_ticks_in (
+                    market_id TEXT, selection_id INTEGER, ts INTEGER,
+                    back_odds REAL, lay_odds REAL, matched REAL
+                )
+            """)
+            cursor.execute("DELETE FROM odds_ticks_in")
+            cursor.executemany("INSERT INTO odds_ticks_in VALUES (?, ?, ?, ?, ?, ?)", ticks)
+
+            # Latest tick per runner is one primary key seek each
+            cursor.execute("""
+                INSERT OR IGNORE INTO odds_history
+                (market_id, selection_id, ts, back_odds, lay_odds, matched)
+                SELECT t.market_id, t.selection_id, t.ts, t.back_odds, t.lay_odds, t.matched
+                FROM odds_ticks_in t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM (
+                        SELECT h.back_odds, h.lay_odds, h.matched FROM odds_history h
+                        WHERE h.market_id = t.market_id AND h.selection_id = t.selection_id
+                        ORDER BY h.ts DESC LIMIT 1
+                    ) last
+                    WHERE last.back_odds IS t.back_odds AND last.lay_odds IS t.lay_odds
+                      AND last.matched IS t.matched
+                )
+            """)
+            written = cursor.rowcount
+            cursor.execute("DELETE FROM odds_ticks_in")
+
+            # Bets on markets that have now started get their closing odds
+            self._fill_clv_from_odds_history(conn)
+
+        self.compact_odds_history(now=ts)
+        return written
+
+    def compact_odds_history(self, now: int = None) -> int:
+        """
+        Downsample ticks older than downsample_after_hours and drop expired ones.
+
+        Within each bucket_minutes bucket a runner keeps its first and last
+        tick and its highest and lowest back price, so opening odds, closing
+        odds and drift extremes survive. Ticks compacted earlier are not
+        revisited (watermark in app_settings).
+
+        Returns:
+            Number of ticks removed.
+        """
+        settings = ODDS_HISTORY_SETTINGS
+        now = now or int(time.time())
+        bucket = settings["bucket_minutes"] * 60
+        cutoff = (now - settings["downsample_after_hours"] * 3600) // bucket * bucket
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM app_settings WHERE key = 'odds_history:compacted_until'")
+            row = cursor.fetchone()
+            since = int(row[0]) if row else 0
+            if cutoff <= since:
+                return 0
+
+            cursor.execute("""
+                DELETE FROM odds_history
+                WHERE ts >= ? AND ts < ?
+                  AND (market_id, selection_id, ts) NOT IN (
+                    SELECT market_id, selection_id, ts FROM (
+                        SELECT market_id, selection_id, ts,
+                               ROW_NUMBER() OVER (PARTITION BY market_id, selection_id, ts / ?
+                                                  ORDER BY ts) AS first_n,
+                               ROW_NUMBER() OVER (PARTITION BY market_id, selection_id, ts / ?
+                                                  ORDER BY ts DESC) AS last_n,
+                               ROW_NUMBER() OVER (PARTITION BY market_id, selection_id, ts / ?
+                                                  ORDER BY back_odds DESC, ts) AS high_n,
+                               ROW_NUMBER() OVER (PARTITION BY market_id, selection_id, ts / ?
+                                                  ORDER BY back_odds IS NULL, back_odds, ts) AS low_n
+                        FROM odds_history
+                        WHERE ts >= ? AND ts < ?
+                    )
+                    WHERE first_n = 1 OR last_n = 1 OR high_n = 1 OR low_n = 1
+                  )
+            """, (since, cutoff, bucket, bucket, bucket, bucket, since, cutoff))
+            removed = cursor.rowcount
+
+            cursor.execute("DELETE FROM odds_history WHERE ts < ?",
+                           (now - settings["retention_days"] * 86400,))
+            removed += cursor.rowcount
+            cursor.execute("""
+                DELETE FROM odds_markets
+                WHERE start_ts < ? AND NOT EXISTS (
+                    SELECT 1 FROM odds_history h WHERE h.market_id = odds_markets.market_id)
+            """, (now - settings["retention_days"] * 86400,))
+
+            cursor.execute("""
+                INSERT OR REPLACE INTO app_settings (key, value, updated_at)
+                VALUES ('odds_history:compacted_until', ?, CURRENT_TIMESTAMP)
+            """, (str(cutoff),))
+            return removed
+
+    def get_odds_summary(self, market_id: str, selection_id: int, at_ts: int = None) -> Optional[Dict]:
+        """
+        Price history summary for one runner.
+
+        Returns dict with opening/closing back odds (and their times), the
+        back odds at at_ts (last tick at or before it), the highest and
+        lowest back odds, max_drift_pct (highest vs opening, positive when
+        the price lengthened) and the tick count - or None with no ticks.
+        Closing odds are the last tick recorded; capture skips in-play
+        markets, so that is the last pre-play price.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    (SELECT back_odds FROM odds_history WHERE market_id = :m AND selection_id = :s
+                     ORDER BY ts LIMIT 1),
+                    (SELECT ts FROM odds_history WHERE market_id = :m AND selection_id = :s
+                     ORDER BY ts LIMIT 1),
+                    (SELECT back_odds FROM odds_history WHERE market_id = :m AND selection_id = :s
+                     ORDER BY ts DESC LIMIT 1),
+                    (SELECT ts FROM odds_history WHERE market_id = :m AND selection_id = :s
+                     ORDER BY ts DESC LIMIT 1),
+                    (SELECT back_odds FROM odds_history WHERE market_id = :m AND selection_id = :s
+                     AND ts <= :at ORDER BY ts DESC LIMIT 1),
+                    MAX(back_odds), MIN(back_odds), COUNT(*)
+                FROM odds_history WHERE market_id = :m AND selection_id = :s
+            """, {'m': market_id, 's': selection_id, 'at': at_ts if at_ts is not None else -1})
+            row = cursor.fetchone()
+
+        if not row or not row[7]:
+            return None
+        opening = row[0]
+        return {
+            'opening_odds': opening,
+            'opening_ts': row[1],
+            'closing_odds': row[2],
+            'closing_ts': row[3],
+            'odds_at': row[4] if at_ts is not None else None,
+            'max_back_odds': row[5],
+            'min_back_odds': row[6],
+            'max_drift_pct': ((row[5] - opening) / opening * 100) if opening and row[5] else None,
+            'ticks': row[7],
+        }
+
+    def _bet_odds_markets_sql(self, bet_where: str = "1") -> str:
+        """bet_id -> (market_id, selection_id, bet placement ts) for match odds bets.
+
+        A bet links to a recorded market when its selection is one runner,
+        its description names the other and the start day is within a day
+        of match_date. Set betting selections ("Name 2-0") don't link.
+        When several markets match (a rematch days apart, a re-listed
+        market), one is picked deterministically: the closest start day,
+        then the latest start, then the highest market ID. bet_where
+        filters bets (alias b) before linking.
+        """
+        return f"""
+            SELECT bet_id, placed_odds, market_id, start_ts, selection_id, placed_ts FROM (
+                SELECT b.id AS bet_id, b.odds AS placed_odds, m.market_id, m.start_ts,
+                       CASE WHEN lower(b.selection) = lower(m.player1_name)
+                            THEN m.player1_selection_id ELSE m.player2_selection_id END AS selection_id,
+                       CAST(strftime('%s', b.created_at) AS INTEGER) AS placed_ts,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY b.id
+                           ORDER BY abs(m.day - b.day), m.start_ts DESC, m.market_id DESC
+                       ) AS link_rank
+                FROM bets b
+                JOIN odds_markets m
+                  ON m.day BETWEEN b.day - 1 AND b.day + 1
+                 AND lower(b.selection) IN (lower(m.player1_name), lower(m.player2_name))
+                 AND instr(lower(b.match_description),
+                           lower(CASE WHEN lower(b.selection) = lower(m.player1_name)
+                                      THEN m.player2_name ELSE m.player1_name END)) > 0
+                WHERE {bet_where}
+            ) WHERE link_rank = 1
+        """
+
+    def get_bet_odds_summary(self, bet_id: int) -> Optional[Dict]:
+        """get_odds_summary() for a bet's runner, with odds_at = odds when the bet was placed."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT market_id, selection_id, placed_ts FROM ({self._bet_odds_markets_sql("b.id = ?")})
+            """, (bet_id,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        summary = self.get_odds_summary(row[0], row[1], at_ts=row[2])
+        if summary:
+            summary['market_id'] = row[0]
+            summary['selection_id'] = row[1]
+        return summary
+
+    def fill_clv_from_odds_history(self, bet_ids: List[int] = None) -> int:
+        """
+        Set odds_at_close and clv for bets that have none, from odds_history.
+
+        Runs after each odds capture and when a bet is settled. Only markets
+        whose start time has passed are used, so the last recorded price is
+        the closing one. Closing odds entered by hand (update_closing_odds)
+        are left alone.
+
+        Args:
+            bet_ids: Only these bets (default: every bet without closing odds)
+
+        Returns:
+            Number of bets updated.
+        """
+        with self.get_connection() as conn:
+            return self._fill_clv_from_odds_history(conn, bet_ids)
+
+    def _fill_clv_from_odds_history(self, conn, bet_ids: List[int] = None) -> int:
+        cursor = conn.cursor()
+        bet_where, params = "b.odds_at_close IS NULL AND b.odds > 0", []
+        if bet_ids is not None:
+            if not bet_ids:
+                return 0
+            bet_where += f" AND b.id IN ({','.join('?' * len(bet_ids))})"
+            params = list(bet_ids)
+        cursor.execute(f"""
+            WITH closing AS (
+                SELECT l.bet_id, l.placed_odds,
+                       (SELECT h.back_odds FROM odds_history h
+                        WHERE h.market_id = l.market_id AND h.selection_id = l.selection_id
+                          AND h.back_odds IS NOT NULL
+                        ORDER BY h.ts DESC LIMIT 1) AS closing_odds
+                FROM ({self._bet_odds_markets_sql(bet_where)}) l
+                WHERE l.start_ts <= CAST(strftime('%s', 'now') AS INTEGER)
+            )
+            UPDATE bets
+            SET odds_at_close = closing.closing_odds,
+                clv = ((1.0 / closing.closing_odds) - (1.0 / closing.placed_odds))
+                      / (1.0 / closing.placed_odds) * 100
+            FROM closing
+            WHERE bets.id = closing.bet_id AND closing.closing_odds > 0
+        """, params)
+        return cursor.rowcount
+
+    # =========================================================================
+    # BETFAIR COMPETITIONS
+    # =========================================================================
+
+    def get_betfair_competitions(self, competition_ids: List[str]) -> Dict[str, Dict]:
+        """Get stored competition classifications by competition ID."""
+        ids = list({cid for cid in competition_ids if cid})
+        competitions = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"""
+                    SELECT competition_id, name, surface, level, month, manual
+                    FROM betfair_competitions WHERE competition_id IN ({placeholders})
+                """, chunk)
+                competitions.update((row['competition_id'], dict(row)) for row in cursor.fetchall())
+        return competitions
+
+    def save_betfair_competitions(self, competitions: List[Dict]):
+        """Store competition classifications in batch (rows set by hand are kept)."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO betfair_competitions (competition_id, name, surface, level, month, manual)
+                VALUES (?, ?, ?, ?, ?, 0)
+                ON CONFLICT(competition_id) DO UPDATE SET
+                    name = excluded.name, surface = excluded.surface, level = excluded.level,
+                    month = excluded.month, updated_at = CURRENT_TIMESTAMP
+                WHERE betfair_competitions.manual = 0
+            """, [(c['competition_id'], c['name'], c['surface'], c['level'], c['month'])
+                  for c in competitions])
+
+    def set_betfair_competition_surface(self, competition_id: str, surface: str, level: str = None):
+        """Pin a competition's surface (and optionally level) so it is never re-classified."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO betfair_competitions (competition_id, surface, level, manual)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT(competition_id) DO UPDATE SET
+                    surface = excluded.surface, level = COALESCE(excluded.level, level),
+                    manual = 1, updated_at = CURRENT_TIMESTAMP
+            """, (competition_id, surface, level))
+
     # =========================================================================
     # UPCOMING MATCHES
     # =========================================================================
@@ -2092,8 +3249,10 @@ class TennisDatabase:
                     INSERT INTO upcoming_matches
                     (tournament, date, round, surface, player1_id, player2_id,
                      player1_name, player2_name, player1_odds, player2_odds,
-                     player1_liquidity, player2_liquidity, total_matched)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     player1_liquidity, player2_liquidity, total_matched, day,
+                     start_ts, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                            CAST(strftime('%s', ?) AS INTEGER), 'OPEN')
                 """, (
                     tournament,
                     match_data.get('date'),
@@ -2108,9 +3267,126 @@ class TennisDatabase:
                     match_data.get('player1_liquidity'),
                     match_data.get('player2_liquidity'),
                     match_data.get('total_matched'),
+                    day_number(match_data.get('date')),
+                    match_data.get('date'),
                 ))
                 return cursor.lastrowid
 
+    _UPSERT_UPCOMING_SQL = """
+        INSERT INTO upcoming_matches
+        (market_id, tournament, date, round, surface, player1_id, player2_id,
+         player1_name, player2_name, player1_odds, player2_odds,
+         player1_liquidity, player2_liquidity, total_matched, day,
+         start_ts, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                CAST(strftime('%s', ?) AS INTEGER), 'OPEN')
+        ON CONFLICT(market_id) DO UPDATE SET
+            player1_odds = excluded.player1_odds,
+            player2_odds = excluded.player2_odds,
+            tournament = excluded.tournament,
+            surface = excluded.surface,
+            player1_liquidity = excluded.player1_liquidity,
+            player2_liquidity = excluded.player2_liquidity,
+            total_matched = excluded.total_matched,
+            date = excluded.date,
+            day = excluded.day,
+            start_ts = excluded.start_ts,
+            status = 'OPEN',
+            analyzed = CASE
+                WHEN player1_odds IS excluded.player1_odds
+                 AND player2_odds IS excluded.player2_odds THEN analyzed
+                ELSE 0 END
+    """
+
+    def upsert_upcoming_matches(self, matches: List[Dict]) -> int:
+        """Add or update a batch of Betfair markets as upcoming matches.
+
+        One INSERT ... ON CONFLICT(market_id) statement covers every market in
+        a single transaction; if it fails, the markets are upserted one by one
+        so a bad row only loses itself. Rows saved before market IDs were
+        stored are adopted by player names and tournament first, so they
+        aren't duplicated. Matches without a market ID go through
+        add_upcoming_match().
+
+        Returns:
+            Number of matches saved.
+        """
+        saved = 0
+        rows = []
+        for match in matches:
+            if not match.get('market_id'):
+                try:
+                    self.add_upcoming_match(match)
+                    saved += 1
+                except Exception as e:
+                    print(f"Error importing match: {e}")
+                continue
+            tournament = match.get('tournament', '')
+            if tournament:
+                tournament = normalize_tournament_name(tournament)
+            rows.append((
+                match['market_id'],
+                tournament,
+                match.get('date'),
+                match.get('round'),
+                match.get('surface'),
+                match.get('player1_id'),
+                match.get('player2_id'),
+                match.get('player1_name'),
+                match.get('player2_name'),
+                match.get('player1_odds'),
+                match.get('player2_odds'),
+                match.get('player1_liquidity'),
+                match.get('player2_liquidity'),
+                match.get('total_matched'),
+                day_number(match.get('date')),
+                match.get('date'),
+            ))
+        if not rows:
+            return saved
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM upcoming_matches WHERE market_id IS NULL LIMIT 1")
+            if cursor.fetchone():
+                # A market already stored under its ID can't be adopted again:
+                # the legacy copy is a duplicate and goes
+                adopt = [(r[0], r[7], r[8], r[1]) for r in rows]
+                cursor.executemany("""
+                    UPDATE OR IGNORE upcoming_matches SET market_id = ?
+                    WHERE id = (
+                        SELECT id FROM upcoming_matches
+                        WHERE market_id IS NULL
+                          AND player1_name = ? AND player2_name = ? AND tournament = ?
+                        LIMIT 1
+                    )
+                """, adopt)
+                cursor.executemany("""
+                    DELETE FROM upcoming_matches
+                    WHERE market_id IS NULL
+                      AND player1_name = ? AND player2_name = ? AND tournament = ?
+                      AND EXISTS (SELECT 1 FROM upcoming_matches WHERE market_id = ?)
+                """, [(p1, p2, tournament, market_id) for market_id, p1, p2, tournament in adopt])
+
+            # A market still being captured hasn't started: keep it OPEN and
+            # follow start time changes. Only an odds move resets analyzed.
+            cursor.execute("SAVEPOINT upsert_upcoming")
+            try:
+                cursor.executemany(self._UPSERT_UPCOMING_SQL, rows)
+                cursor.execute("RELEASE upsert_upcoming")
+                saved += len(rows)
+            except sqlite3.Error as e:
+                cursor.execute("ROLLBACK TO upsert_upcoming")
+                cursor.execute("RELEASE upsert_upcoming")
+                print(f"Batch upsert failed ({e}), saving markets one by one")
+                for row in rows:
+                    try:
+                        cursor.execute(self._UPSERT_UPCOMING_SQL, row)
+                        saved += 1
+                    except sqlite3.Error as row_error:
+                        print(f"Error importing match {row[0]}: {row_error}")
+        return saved
+
     def get_upcoming_matches(self, analyzed: bool = None) -> List[Dict]:
         """Get upcoming matches."""
         with self.get_connection() as conn:
@@ -2124,6 +3400,61 @@ class TennisDatabase:
                 )
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_live_upcoming_matches(self, min_matched: float = 0,
+                                  unanalyzed_only: bool = False) -> List[Dict]:
+        """Get open markets that haven't gone stale, through the status/start index.
+
+        Args:
+            min_matched: Minimum total matched on the market
+            unanalyzed_only: Only markets not analysed since their odds last moved
+        """
+        since_ts = int(time.time()) - UPCOMING_MATCHES_SETTINGS["stale_after_hours"] * 3600
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT * FROM upcoming_matches
+                WHERE status = 'OPEN' {'AND analyzed = 0' if unanalyzed_only else ''}
+                  AND start_ts >= ? AND IFNULL(total_matched, 0) >= ?
+                ORDER BY start_ts
+            """, (since_ts, min_matched))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def mark_upcoming_matches_analyzed(self, states: List[Tuple[int, float]]):
+        """Record analysis state for a batch of (upcoming match id, model P1 probability)."""
+        if not states:
+            return
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE upcoming_matches
+                SET analyzed = 1, analyzed_at = CURRENT_TIMESTAMP, p1_probability = ?
+                WHERE id = ?
+            """, [(p1_probability, match_id) for match_id, p1_probability in states])
+
+    def expire_upcoming_matches(self, now: int = None) -> Tuple[int, int]:
+        """
+        Expire upcoming matches in bulk by start time.
+
+        OPEN markets that started more than stale_after_hours ago become
+        EXPIRED (out of analysis, still there for bet date syncing); rows
+        older than delete_after_hours are deleted.
+
+        Returns:
+            (expired, deleted) row counts
+        """
+        settings = UPCOMING_MATCHES_SETTINGS
+        now = now or int(time.time())
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE upcoming_matches SET status = 'EXPIRED'
+                WHERE status = 'OPEN' AND start_ts < ?
+            """, (now - settings["stale_after_hours"] * 3600,))
+            expired = cursor.rowcount
+            cursor.execute("DELETE FROM upcoming_matches WHERE start_ts < ?",
+                           (now - settings["delete_after_hours"] * 3600,))
+            return expired, cursor.rowcount
+
     def update_upcoming_match_player_id(self, match_id: int, player_position: str,
                                          new_player_id: int):
         """
@@ -2167,6 +3498,248 @@ class TennisDatabase:
             cursor.execute("DELETE FROM players")
             cursor.execute("DELETE FROM tournaments")
 
+    # =========================================================================
+    # DUMP MERGE
+    # =========================================================================
+
+    # Player columns filled in from a dump when the local value is missing
+    DUMP_PLAYER_FILL_COLUMNS = ('first_name', 'last_name', 'country', 'hand', 'height', 'dob', 'tour')
+
+    @staticmethod
+    def _table_columns(cursor, schema: str, table: str) -> List[str]:
+        cursor.execute(f"PRAGMA {schema}.table_info({table})")
+        return [row[1] for row in cursor.fetchall()]
+
+    def merge_dump(self, dump_path, since_date: str = None, create_players: bool = False,
+                   sync_state: Dict[str, str] = None, max_date_key: str = None) -> Dict:
+        """Merge a downloaded tennis_data SQLite dump into this database.
+
+        The dump is ATTACHed and merged with INSERT ... SELECT statements in a
+        single transaction; no rows pass through Python.
+
+        Players are mapped to local IDs (same ID and name, an existing alias,
+        then the same name). Unmatched players are created only when
+        create_players is set, otherwise their matches are skipped. Mapped
+        players get missing details (country, hand, dob...) filled in.
+        Aliases are added unless the alias ID is already a local player or
+        alias. Matches are inserted with remapped player IDs; a match is
+        skipped if its ID exists or the same winner and loser already have a
+        match within 3 days (same rule as the scrape import).
+
+        Args:
+            dump_path: Decompressed dump file
+            since_date: Delta mode - only matches on or after this date are merged
+            create_players: Insert dump players with no local match
+            sync_state: app_settings values committed with the merge
+            max_date_key: app_settings key that records the dump's latest
+                match date (never moved backwards)
+
+        Returns:
+            Dict with players_mapped, players_created, players_updated,
+            aliases_added, matches_considered, matches_imported and
+            max_match_date (of the dump)
+        """
+        stats = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS dump", (str(dump_path),))
+
+            cursor.execute("PRAGMA dump.quick_check")
+            check = cursor.fetchone()[0]
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f"Dump failed integrity check: {check}")
+            dump_player_cols = set(self._table_columns(cursor, 'dump', 'players'))
+            dump_match_cols = set(self._table_columns(cursor, 'dump', 'matches'))
+            if not {'id', 'name'} <= dump_player_cols or \
+                    not {'id', 'date', 'winner_id', 'loser_id'} <= dump_match_cols:
+                raise sqlite3.DatabaseError("Dump is missing the players or matches table")
+
+            # Dump player ID -> local player ID
+            cursor.execute("DROP TABLE IF EXISTS temp.dump_player_map")
+            cursor.execute("DROP TABLE IF EXISTS temp.local_player_names")
+            cursor.execute("""
+                CREATE TEMP TABLE dump_player_map (
+                    src_id INTEGER PRIMARY KEY,
+                    dst_id INTEGER NOT NULL,
+                    is_new INTEGER DEFAULT 0
+                )
+            """)
+            cursor.execute("""
+                CREATE TEMP TABLE local_player_names (
+                    name_key TEXT PRIMARY KEY,
+                    player_id INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("""
+                INSERT INTO temp.local_player_names (name_key, player_id)
+                SELECT lower(name), MIN(id) FROM main.players GROUP BY lower(name)
+            """)
+            # 1. Same ID and same name
+            cursor.execute("""
+                INSERT INTO temp.dump_player_map (src_id, dst_id)
+                SELECT s.id, p.id
+                FROM dump.players s
+                JOIN main.players p ON p.id = s.id AND lower(p.name) = lower(s.name)
+            """)
+            # 2. ID is a known alias
+            cursor.execute("""
+                INSERT OR IGNORE INTO temp.dump_player_map (src_id, dst_id)
+                SELECT s.id, a.canonical_id
+                FROM dump.players s
+                JOIN main.player_aliases a ON a.alias_id = s.id
+            """)
+            # 3. Same name under a different ID
+            cursor.execute("""
+                INSERT OR IGNORE INTO temp.dump_player_map (src_id, dst_id)
+                SELECT s.id, n.player_id
+                FROM dump.players s
+                JOIN temp.local_player_names n ON n.name_key = lower(s.name)
+            """)
+            stats['players_mapped'] = cursor.execute(
+                "SELECT COUNT(*) FROM temp.dump_player_map").fetchone()[0]
+
+            stats['players_created'] = 0
+            if create_players:
+                # Keep the dump ID when it is free, otherwise allocate past the highest ID
+                cursor.execute("""
+                    INSERT OR IGNORE INTO temp.dump_player_map (src_id, dst_id, is_new)
+                    SELECT s.id, s.id, 1
+                    FROM dump.players s
+                    WHERE NOT EXISTS (SELECT 1 FROM main.players p WHERE p.id = s.id)
+                      AND NOT EXISTS (SELECT 1 FROM main.player_aliases a WHERE a.alias_id = s.id)
+                """)
+                cursor.execute("""
+                    INSERT INTO temp.dump_player_map (src_id, dst_id, is_new)
+                    SELECT s.id,
+                           (SELECT MAX(COALESCE((SELECT MAX(id) FROM main.players), 0),
+                                       COALESCE((SELECT MAX(dst_id) FROM temp.dump_player_map), 0)))
+                           + ROW_NUMBER() OVER (ORDER BY s.id),
+                           1
+                    FROM dump.players s
+                    WHERE s.id NOT IN (SELECT src_id FROM temp.dump_player_map)
+                """)
+                columns = [c for c in self._table_columns(cursor, 'main', 'players')
+                           if c in dump_player_cols and c not in ('id', 'created_at', 'updated_at')]
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO main.players (id, {', '.join(columns)})
+                    SELECT m.dst_id, {', '.join('s.' + c for c in columns)}
+                    FROM temp.dump_player_map m
+                    JOIN dump.players s ON s.id = m.src_id
+                    WHERE m.is_new = 1
+                """)
+                stats['players_created'] = cursor.rowcount
+
+            fill = [c for c in self.DUMP_PLAYER_FILL_COLUMNS if c in dump_player_cols]
+            stats['players_updated'] = 0
+            if fill:
+                cursor.execute(f"""
+                    UPDATE main.players
+                    SET {', '.join(f'{c} = COALESCE(players.{c}, src.{c})' for c in fill)},
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM (SELECT m.dst_id, {', '.join('s.' + c for c in fill)}
+                          FROM temp.dump_player_map m
+                          JOIN dump.players s ON s.id = m.src_id
+                          WHERE m.is_new = 0) AS src
+                    WHERE players.id = src.dst_id
+                      AND ({' OR '.join(f'(players.{c} IS NULL AND src.{c} IS NOT NULL)' for c in fill)})
+                """)
+                stats['players_updated'] = cursor.rowcount
+
+            stats['aliases_added'] = 0
+            cursor.execute("SELECT 1 FROM dump.sqlite_master WHERE type = 'table' AND name = 'player_aliases'")
+            if cursor.fetchone():
+                cursor.execute("""
+                    INSERT OR IGNORE INTO main.player_aliases (alias_id, canonical_id, source)
+                    SELECT a.alias_id, m.dst_id, COALESCE(a.source, 'dump')
+                    FROM dump.player_aliases a
+                    JOIN temp.dump_player_map m ON m.src_id = a.canonical_id
+                    WHERE a.alias_id <> m.dst_id
+                      AND NOT EXISTS (SELECT 1 FROM main.players p WHERE p.id = a.alias_id)
+                """)
+                stats['aliases_added'] = cursor.rowcount
+
+            # Matches in the delta window (everything when no watermark)
+            window, params = ("s.date >= ?", [since_date]) if since_date else ("1", [])
+
+            stats['matches_considered'] = cursor.execute(
+                f"SELECT COUNT(*) FROM dump.matches s WHERE {window}", params).fetchone()[0]
+
+            main_match_cols = self._table_columns(cursor, 'main', 'matches')
+            computed = {
+                # Rebuild scrape-style IDs (which embed player IDs) when players were remapped
+                'id': """CASE WHEN (w.dst_id <> s.winner_id OR l.dst_id <> s.loser_id)
+                                   AND s.id LIKE 'TE\\_%' ESCAPE '\\'
+                              THEN 'TE_' || s.date || '_' || w.dst_id || '_' || l.dst_id
+                              ELSE s.id END""",
+                'winner_id': "w.dst_id",
+                'loser_id': "l.dst_id",
+                # Same ordinal as day_number(): julianday('0001-01-01') = 1721425.5
+                'day': "CAST(julianday(substr(s.date, 1, 10)) - 1721424.5 AS INTEGER)",
+                'winner_name': "COALESCE((SELECT name FROM main.players WHERE id = w.dst_id), s.winner_name)",
+                'loser_name': "COALESCE((SELECT name FROM main.players WHERE id = l.dst_id), s.loser_name)",
+            }
+            derived = {'day'}
+            if 'tournament' in dump_match_cols:
+                # Classified like every other insert path (the precompiled classifier as a SQL function)
+                computed['tour_level'] = "tour_level(s.tournament)"
+                derived.add('tour_level')
+            # tournament_key is local to each database; merged rows are keyed below
+            columns = [c for c in main_match_cols
+                       if c not in ('created_at', 'tournament_key')
+                       and (c in dump_match_cols or c in derived)]
+            select = [computed.get(c, f"s.{c}") for c in columns]
+            register_sqlite_functions(conn)
+
+            cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM main.matches")
+            before_rowid = cursor.fetchone()[0]
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO main.matches ({', '.join(columns)})
+                SELECT {', '.join(select)}
+                FROM dump.matches s
+                JOIN temp.dump_player_map w ON w.src_id = s.winner_id
+                JOIN temp.dump_player_map l ON l.src_id = s.loser_id
+                WHERE {window}
+                  AND w.dst_id <> l.dst_id
+                  AND NOT EXISTS (
+                      SELECT 1 FROM main.matches m
+                      WHERE m.winner_id = w.dst_id AND m.loser_id = l.dst_id
+                        AND m.day BETWEEN CAST(julianday(substr(s.date, 1, 10)) - 1721424.5 AS INTEGER) - 3
+                                      AND CAST(julianday(substr(s.date, 1, 10)) - 1721424.5 AS INTEGER) + 3
+                  )
+            """, params)
+            stats['matches_imported'] = cursor.rowcount
+
+            # Key the merged rows to the tournaments dimension (they are the unkeyed ones)
+            if stats['matches_imported']:
+                self._sync_tournament_dimension(conn)
+
+            # Form states already folded past a newly merged (older) match are rebuilt
+            cursor.execute("""
+                DELETE FROM player_form_state
+                WHERE EXISTS (
+                    SELECT 1 FROM main.matches m
+                    WHERE m.rowid > ? AND m.day < player_form_state.last_day
+                      AND player_form_state.player_id IN (
+                          m.winner_id, m.loser_id,
+                          (SELECT canonical_id FROM player_aliases WHERE alias_id = m.winner_id),
+                          (SELECT canonical_id FROM player_aliases WHERE alias_id = m.loser_id))
+                )
+            """, (before_rowid,))
+
+            stats['max_match_date'] = cursor.execute("SELECT MAX(date) FROM dump.matches").fetchone()[0]
+
+            state = dict(sync_state or {})
+            if max_date_key and stats['max_match_date']:
+                cursor.execute("SELECT value FROM app_settings WHERE key = ?", (max_date_key,))
+                row = cursor.fetchone()
+                state[max_date_key] = max(stats['max_match_date'], row[0] if row and row[0] else '')
+            cursor.executemany("""
+                INSERT OR REPLACE INTO app_settings (key, value, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            """, list(state.items()))
+
+        return stats
+
     # =========================================================================
     # STATISTICS
     # =========================================================================
@@ -2271,6 +3844,26 @@ class TennisDatabase:
         key = f'last_{refresh_type}_refresh'
         self.set_setting(key, datetime.now().isoformat())
 
+    def get_ingest_watermark(self, source: str, tour: str) -> Optional[str]:
+        """Get the last fully imported day (YYYY-MM-DD) for a (source, tour), or None."""
+        return self.get_setting(f'watermark:{source}:{tour}')
+
+    def set_ingest_watermark(self, source: str, tour: str, day: str):
+        """Record the last fully imported day (YYYY-MM-DD) for a (source, tour).
+
+        Only call this after the imported matches have been committed.
+        """
+        self.set_setting(f'watermark:{source}:{tour}', day)
+
+    def get_ingest_recheck_days(self, source: str, tour: str) -> List[str]:
+        """Days (YYYY-MM-DD) behind the watermark that still had unimported matches."""
+        value = self.get_setting(f'recheck:{source}:{tour}')
+        return json.loads(value) if value else []
+
+    def set_ingest_recheck_days(self, source: str, tour: str, days: List[str]):
+        """Record the days an incremental refresh should fetch again for a (source, tour)."""
+        self.set_setting(f'recheck:{source}:{tour}', json.dumps(sorted(days)))
+
 
 # Create default instance
 db = TennisDatabase()
@@ -0,0 +1,42 @@
+"""
+Tennis Betting System - Day Ordinals
+Integer day numbers for date columns
+
+Dates are stored as TEXT in a few formats ('2026-01-15', '2026-01-15 14:00',
+'2026-01-15T14:00:00Z'). Each dated table also carries an integer `day`
+column holding the proleptic Gregorian ordinal (same as date.toordinal()),
+so range filters are integer comparisons on an index and day differences
+are plain subtraction instead of strptime per row.
+"""
+
+from datetime import date, datetime
+from typing import Optional
+
+
+def day_number(value) -> Optional[int]:
+    """
+    Day ordinal for a date string or date/datetime object.
+
+    Only the leading YYYY-MM-DD is used, so time suffixes are ignored.
+    Returns None for empty or unparseable values.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def today_number() -> int:
+    """Day ordinal for today."""
+    return date.today().toordinal()
+
+
+def reference_day(as_of_date: str = None) -> int:
+    """Day ordinal for an as-of date (YYYY-MM-DD), or today when not given."""
+    return day_number(as_of_date) or today_number()
@@ -8,13 +8,13 @@ Setup:
 """
 
 import json
-import urllib.request
-import urllib.error
 import os
 import sys
 from typing import Dict, Optional
 from datetime import datetime
 
+from http_client import http_client
+
 
 def get_app_directory() -> str:
     """Get the directory where the app is running from."""
@@ -156,17 +156,18 @@ class DiscordNotifier:
         """POST payload to webhook."""
         try:
             data = json.dumps(payload).encode('utf-8')
-            req = urllib.request.Request(
+            response = http_client.request(
+                'POST',
                 self.webhook_url,
+                endpoint="POST discord webhook",  # Keep the webhook token out of the metrics
                 data=data,
                 headers={
                     'Content-Type': 'application/json',
                     'User-Agent': 'TennisBettingSystem/1.0'
                 },
-                method='POST'
+                timeout=10
             )
-            with urllib.request.urlopen(req, timeout=10) as response:
-                return response.status == 204
+            return response.status_code == 204
         except Exception as e:
             print(f"Discord webhook error: {e}")
             return False
@@ -6,11 +6,24 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 import re
 import time
 from typing import Dict, List, Optional
 
+from browser_pool import chrome_options, get_browser_pool
+from config import BROWSER_POOL_SETTINGS
+
+
+def _new_flashscore_driver(headless: bool = True):
+    """Start a Chrome WebDriver for the pool."""
+    options = chrome_options(headless, extra_args=[
+        '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        '--disable-blink-features=AutomationControlled',
+    ])
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    return webdriver.Chrome(options=options)
+
 
 class FlashscoreChecker:
     """Check tennis match results from Flashscore using Selenium."""
@@ -18,34 +31,28 @@ class FlashscoreChecker:
     BASE_URL = "https://www.flashscore.com"
 
     def __init__(self, headless: bool = True):
-        """Initialize with Chrome WebDriver."""
+        """Initialize with a pooled Chrome WebDriver (borrowed on first use)."""
         self.headless = headless
         self.driver = None
+        self.pool = get_browser_pool("flashscore" if headless else "flashscore_visible",
+                                     lambda: _new_flashscore_driver(headless))
         self._player_cache = {}  # Cache player page URLs
 
     def _get_driver(self):
-        """Create and return a Chrome WebDriver."""
+        """Borrow a warm Chrome WebDriver from the pool."""
         if self.driver is None:
-            options = Options()
-            if self.headless:
-                options.add_argument('--headless=new')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=1920,1080')
-            options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_experimental_option('excludeSwitches', ['enable-automation'])
-
-            self.driver = webdriver.Chrome(options=options)
+            self.driver = self.pool.acquire()
         return self.driver
 
     def close(self):
-        """Close the WebDriver."""
+        """Return the WebDriver to the pool."""
         if self.driver:
-            self.driver.quit()
+            self.pool.release(self.driver)
             self.driver = None
 
+    def _wait(self, driver, timeout: int = None) -> WebDriverWait:
+        return WebDriverWait(driver, timeout or BROWSER_POOL_SETTINGS["ready_timeout"])
+
     def _normalize_name(self, name: str) -> str:
         """Normalize player name for comparison."""
         if not name:
@@ -112,24 +119,26 @@ class FlashscoreChecker:
         try:
             # Go to Flashscore tennis
             driver.get(f"{self.BASE_URL}/tennis/")
-            time.sleep(2)
 
             # Click on search area
-            search_block = WebDriverWait(driver, 5).until(
+            search_block = self._wait(driver).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, '#searchWindow'))
             )
             search_block.click()
-            time.sleep(1)
 
             # Find and use the search input
-            search_input = WebDriverWait(driver, 5).until(
+            search_input = self._wait(driver, 5).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, 'input.searchInput__input'))
             )
             search_input.send_keys(search_term)
-            time.sleep(2)
 
             # Find player in search results (look for TENNIS + exact name match)
-            results = driver.find_elements(By.CSS_SELECTOR, '.searchResult')
+            try:
+                results = self._wait(driver, 5).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.searchResult'))
+                )
+            except TimeoutException:
+                return None
 
             # Get normalized name parts for verification
             name_parts = set(self._normalize_name(player_name).split())
@@ -149,7 +158,10 @@ class FlashscoreChecker:
 
                 if all_parts_match and significant_parts:
                     result.click()
-                    time.sleep(2)
+                    try:
+                        self._wait(driver, 5).until(EC.url_contains('/player/'))
+                    except TimeoutException:
+                        pass
 
                     # Get the player page URL
                     current_url = driver.current_url
@@ -185,7 +197,12 @@ class FlashscoreChecker:
         try:
             # Navigate to results page
             driver.get(results_url)
-            time.sleep(2)
+            try:
+                self._wait(driver).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, '.event__match'))
+                )
+            except TimeoutException:
+                return None
 
             # Find match against opponent
             return self._find_match_on_results_page(driver, player1, player2)
@@ -8,7 +8,7 @@ import sqlite3
 import sys
 import os
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
 from datetime import datetime
 
 
@@ -57,21 +57,184 @@ class GitHubDataLoader:
         except:
             return None
 
-    def import_to_main_database(self) -> dict:
+    def _fetch_manifest(self) -> Optional[dict]:
+        """Dump manifest (checksum, latest match date, deltas), or None if unavailable."""
+        from config import TENNIS_EXPLORER_MANIFEST_URL
+        from http_client import http_client
+
+        try:
+            response = http_client.request('GET', TENNIS_EXPLORER_MANIFEST_URL, timeout=15)
+            if response.status_code != 200:
+                return None
+            return response.json()
+        except Exception:
+            return None
+
+    def _download_dump(self, url: str, expected_sha256: str = None,
+                       validators: dict = None) -> Tuple[Optional[Path], dict]:
+        """Stream a gzipped dump to a temp .db file, verifying it on the way.
+
+        The download is hashed and decompressed chunk by chunk, so neither the
+        compressed nor the decompressed file is held in memory. zlib checks
+        the gzip CRC; the SHA-256 is checked against the manifest when one
+        is published.
+
+        validators ({'etag', 'last_modified'} from the last download) make it
+        a conditional GET. Returns (path, response headers); path is None
+        when the server answers 304 Not Modified.
+        """
+        import hashlib
+        import tempfile
+        import zlib
+        from config import DUMP_SYNC_SETTINGS
+        from http_cache import PageCache
+        from http_client import http_client
+
+        digest = hashlib.sha256()
+        inflater = zlib.decompressobj(zlib.MAX_WBITS | 16)  # gzip wrapper
+        fd, tmp_name = tempfile.mkstemp(prefix='tennis_data_', suffix='.db', dir=self.data_dir)
+        path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                with http_client.request('GET', url, endpoint="GET github tennis_data dump",
+                                         headers=PageCache.conditional_headers(validators),
+                                         stream=True, timeout=DUMP_SYNC_SETTINGS["timeout"]) as response:
+                    if response.status_code == 304:
+                        out.close()
+                        path.unlink(missing_ok=True)
+                        return None, dict(response.headers)
+                    response.raise_for_status()
+                    headers = dict(response.headers)
+                    for chunk in response.iter_content(DUMP_SYNC_SETTINGS["chunk_size"]):
+                        digest.update(chunk)
+                        out.write(inflater.decompress(chunk))
+                out.write(inflater.flush())
+            if not inflater.eof:
+                raise ValueError("Dump download was truncated")
+            if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+                raise ValueError("Dump checksum mismatch")
+        except Exception:
+            path.unlink(missing_ok=True)
+            raise
+        return path, headers
+
+    def sync_from_dump(self, delta: bool = None) -> dict:
+        """Download the tennis_data.db.gz dump and merge it into the database.
+
+        In delta mode the manifest's latest match date is compared with the
+        last synced one: nothing is downloaded when they match, a published
+        delta dump is used instead of the full one when it covers the gap,
+        and only matches from the last synced date (less recheck_days) are
+        merged. Without a manifest the full dump is fetched with a
+        conditional GET (the ETag / Last-Modified saved by the last merge),
+        so an unchanged dump costs a 304. The merge itself is set-based
+        (TennisDatabase.merge_dump).
+
+        Args:
+            delta: Override DUMP_SYNC_SETTINGS["delta"]
+
+        Returns:
+            Dict with 'success', 'up_to_date', 'matches_imported' and the
+            merge counters
+        """
+        from datetime import date, timedelta
+        from config import TENNIS_EXPLORER_DATA_URL, DUMP_SYNC_SETTINGS
+        from database import db
+
+        settings = DUMP_SYNC_SETTINGS
+        if delta is None:
+            delta = settings["delta"]
+        stats = {'success': False, 'up_to_date': False, 'matches_imported': 0}
+
+        last_date = db.get_setting('dump_sync:max_date') if delta else None
+        manifest = self._fetch_manifest() or {}
+        validators = None
+        if not manifest and last_date:
+            # No manifest to compare dates with: ask the server whether the
+            # dump changed since the last merge (ETag / Last-Modified)
+            validators = {'etag': db.get_setting('dump_sync:etag'),
+                          'last_modified': db.get_setting('dump_sync:last_modified')}
+            if not any(validators.values()):
+                validators = None
+        if not manifest:
+            self._report_progress("No dump manifest published - " + (
+                "checking whether the dump changed" if validators else "downloading the full dump unverified"))
+
+        if last_date and manifest.get('max_match_date') and manifest['max_match_date'] <= last_date:
+            self._report_progress(f"Match dump up to date (latest match {last_date})")
+            stats.update(success=True, up_to_date=True)
+            return stats
+
+        url, sha256 = TENNIS_EXPLORER_DATA_URL, manifest.get('sha256')
+        if last_date:
+            # Latest delta that starts on or before our last synced date
+            deltas = [d for d in manifest.get('deltas', [])
+                      if d.get('url') and d.get('base_date') and d['base_date'] <= last_date]
+            if deltas:
+                chosen = max(deltas, key=lambda d: d['base_date'])
+                url, sha256 = chosen['url'], chosen.get('sha256')
+
+        since_date = None
+        if last_date:
+            since_date = (date.fromisoformat(last_date[:10])
+                          - timedelta(days=settings["recheck_days"])).isoformat()
+
+        self._report_progress(f"Downloading match dump ({'delta' if url != TENNIS_EXPLORER_DATA_URL else 'full'})...")
+        dump_path = None
+        try:
+            dump_path, headers = self._download_dump(url, sha256, validators)
+            if dump_path is None:
+                self._report_progress(f"Match dump unchanged since the last sync (latest match {last_date})")
+                stats.update(success=True, up_to_date=True)
+                return stats
+            self._report_progress("Merging match dump...")
+            sync_state = {'dump_sync:sha256': sha256 or ''}
+            if url == TENNIS_EXPLORER_DATA_URL:
+                sync_state['dump_sync:etag'] = headers.get('ETag') or ''
+                sync_state['dump_sync:last_modified'] = headers.get('Last-Modified') or ''
+            merge = db.merge_dump(
+                dump_path,
+                since_date=since_date,
+                create_players=settings["create_players"],
+                sync_state=sync_state,
+                max_date_key='dump_sync:max_date',
+            )
+            stats.update(merge)
+            stats['success'] = True
+            self._report_progress(
+                f"Dump merged: {merge['matches_imported']} of {merge['matches_considered']} matches imported, "
+                f"{merge['players_mapped']} players matched"
+            )
+        except Exception as e:
+            self._report_progress(f"Dump sync failed: {e}")
+        finally:
+            if dump_path is not None:
+                dump_path.unlink(missing_ok=True)
+
+        return stats
+
+    def import_to_main_database(self, incremental: bool = True) -> dict:
         """Scrape matches from Tennis Explorer and import to database.
 
         Players are LOCKED - only matches are imported, linked to existing players.
         Uses the same robust PlayerNameMatcher as manual imports.
+
+        Args:
+            incremental: Only scrape days after each tour's ingestion watermark
+                         (plus a short re-check window) instead of whole months
         """
         from config import DB_PATH
         from tennis_explorer_scraper import TennisExplorerScraper, PlayerNameMatcher
+        from database import db
+        from day_ordinal import day_number
 
         stats = {
             'success': False,
             'players': 0,
             'matches': 0,
             'matches_imported': 0,
-            'matches_skipped': 0
+            'matches_skipped': 0,
+            'days_skipped': 0
         }
 
         try:
@@ -99,40 +262,24 @@ class GitHubDataLoader:
             # Scrape matches from Tennis Explorer
             scraper = TennisExplorerScraper()
 
-            self._report_progress(f"Scraping {self.months_to_fetch} months of ATP matches...")
-            atp_matches = scraper.fetch_recent_results(
-                months_back=self.months_to_fetch,
-                tour_types=["atp-single"],
-                progress_callback=lambda msg: self._report_progress(msg)
-            )
-
-            self._report_progress(f"Scraping {self.months_to_fetch} months of WTA matches...")
-            wta_matches = scraper.fetch_recent_results(
-                months_back=self.months_to_fetch,
-                tour_types=["wta-single"],
-                progress_callback=lambda msg: self._report_progress(msg)
-            )
-
-            self._report_progress(f"Scraping {self.months_to_fetch} months of ITF Women matches...")
-            itf_women_matches = scraper.fetch_recent_results(
-                months_back=self.months_to_fetch,
-                tour_types=["itf-women-single"],
-                progress_callback=lambda msg: self._report_progress(msg)
-            )
-
-            self._report_progress(f"Scraping {self.months_to_fetch} months of ITF Men matches...")
-            itf_men_matches = scraper.fetch_recent_results(
+            # One call for all tours so every page shares the rate-limited worker pool
+            self._report_progress(f"Scraping {self.months_to_fetch} months of ATP, WTA and ITF matches...")
+            all_matches = scraper.fetch_recent_results(
                 months_back=self.months_to_fetch,
-                tour_types=["itf-men-single"],
-                progress_callback=lambda msg: self._report_progress(msg)
+                tour_types=["atp-single", "wta-single", "itf-women-single", "itf-men-single"],
+                progress_callback=lambda msg: self._report_progress(msg),
+                incremental=incremental
             )
-
-            all_matches = atp_matches + wta_matches + itf_women_matches + itf_men_matches
             stats['matches'] = len(all_matches)
+            stats['days_skipped'] = scraper.skipped_days
             self._report_progress(f"Scraped {len(all_matches)} total matches")
 
             if not all_matches:
                 self._report_progress("No matches found to import")
+                if incremental:
+                    # Nothing new since the watermark is not a failure
+                    scraper.commit_watermarks()
+                    stats['success'] = True
                 return stats
 
             # Import matches, matching to existing players only
@@ -147,6 +294,7 @@ class GitHubDataLoader:
             imported = 0
             skipped = 0
             name_match_failures = []
+            inserted = []
 
             for match in all_matches:
                 winner_name = match.get('winner_name', '')
@@ -160,9 +308,11 @@ class GitHubDataLoader:
                 winner_id = name_matcher.find_player_id(winner_name)
                 loser_id = name_matcher.find_player_id(loser_name)
 
-                # Skip if either player not found (players are locked)
+                # Skip if either player not found (players are locked);
+                # the day is fetched again on later refreshes
                 if not winner_id or not loser_id:
                     skipped += 1
+                    scraper.mark_unresolved(match)
                     # Track first 20 name match failures for debugging
                     if len(name_match_failures) < 20:
                         if not winner_id:
@@ -177,13 +327,14 @@ class GitHubDataLoader:
 
                 # Check for duplicate - same players within 3 days
                 match_date = match.get('date', '')
+                match_day = day_number(match_date)
                 try:
                     cursor.execute('''
                         SELECT id FROM matches
                         WHERE winner_id = ? AND loser_id = ?
-                        AND date BETWEEN date(?, '-3 days') AND date(?, '+3 days')
+                        AND day BETWEEN ? - 3 AND ? + 3
                         LIMIT 1
-                    ''', (winner_id, loser_id, match_date, match_date))
+                    ''', (winner_id, loser_id, match_day, match_day))
 
                     if cursor.fetchone():
                         # Duplicate match exists, skip
@@ -195,37 +346,36 @@ class GitHubDataLoader:
                 # Generate unique match ID
                 match_id = f"TE_{match_date}_{winner_id}_{loser_id}"
 
+                row = {
+                    'id': match_id,
+                    'tournament': match.get('tournament', ''),
+                    'date': match_date,
+                    'surface': match.get('surface', 'Hard'),
+                    'winner_id': winner_id,
+                    'loser_id': loser_id,
+                    'winner_name': canonical_winner,
+                    'loser_name': canonical_loser,
+                    'score': match.get('score', ''),
+                }
                 try:
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO matches
-                        (id, tournament, date, surface, winner_id, loser_id,
-                         winner_name, loser_name, score)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        match_id,
-                        match.get('tournament', ''),
-                        match_date,
-                        match.get('surface', 'Hard'),
-                        winner_id,
-                        loser_id,
-                        canonical_winner,
-                        canonical_loser,
-                        match.get('score', '')
-                    ))
-
-                    if cursor.rowcount > 0:
+                    if db.insert_result_match(cursor, row):
+                        inserted.append(row)
                         imported += 1
 
                 except Exception as e:
                     skipped += 1
+                    scraper.mark_unresolved(match)
                     continue
 
                 # Progress update
                 if imported > 0 and imported % 1000 == 0:
                     self._report_progress(f"Imported {imported} matches...")
 
+            db.index_imported_matches(conn, inserted)
             conn.commit()
             conn.close()
+            # Matches are committed - safe to move the watermarks forward
+            scraper.commit_watermarks()
 
             stats['matches_imported'] = imported
             stats['matches_skipped'] = skipped
@@ -246,11 +396,11 @@ class GitHubDataLoader:
 
         return stats
 
-    def quick_refresh(self) -> dict:
+    def quick_refresh(self, incremental: bool = True) -> dict:
         """Scrape and import data in one step."""
-        return self.import_to_main_database()
+        return self.import_to_main_database(incremental=incremental)
 
-    def quick_refresh_recent(self, days: int = 7) -> dict:
+    def quick_refresh_recent(self, days: int = 7, incremental: bool = True) -> dict:
         """Quick refresh - only fetch matches from the last N days.
 
         This is much faster than the full refresh as it only scrapes
@@ -258,19 +408,23 @@ class GitHubDataLoader:
 
         Args:
             days: Number of days to look back (default 7)
+            incremental: Skip days already imported (ingestion watermarks)
 
         Returns:
             Dict with import statistics
         """
         from config import DB_PATH
         from tennis_explorer_scraper import TennisExplorerScraper, PlayerNameMatcher
+        from database import db
+        from day_ordinal import day_number
 
         stats = {
             'success': False,
             'players': 0,
             'matches': 0,
             'matches_imported': 0,
-            'matches_skipped': 0
+            'matches_skipped': 0,
+            'days_skipped': 0
         }
 
         try:
@@ -302,36 +456,42 @@ class GitHubDataLoader:
             atp_matches = scraper.fetch_recent_days(
                 days_back=days,
                 tour_type="atp-single",
-                progress_callback=lambda msg: self._report_progress(msg)
+                progress_callback=lambda msg: self._report_progress(msg),
+                incremental=incremental
             )
 
             self._report_progress(f"Scraping last {days} days of WTA matches...")
             wta_matches = scraper.fetch_recent_days(
                 days_back=days,
                 tour_type="wta-single",
-                progress_callback=lambda msg: self._report_progress(msg)
+                progress_callback=lambda msg: self._report_progress(msg),
+                incremental=incremental
             )
 
             self._report_progress(f"Scraping last {days} days of ITF Women matches...")
             itf_women_matches = scraper.fetch_recent_days(
                 days_back=days,
                 tour_type="itf-women-single",
-                progress_callback=lambda msg: self._report_progress(msg)
+                progress_callback=lambda msg: self._report_progress(msg),
+                incremental=incremental
             )
 
             self._report_progress(f"Scraping last {days} days of ITF Men matches...")
             itf_men_matches = scraper.fetch_recent_days(
                 days_back=days,
                 tour_type="itf-men-single",
-                progress_callback=lambda msg: self._report_progress(msg)
+                progress_callback=lambda msg: self._report_progress(msg),
+                incremental=incremental
             )
 
             all_matches = atp_matches + wta_matches + itf_women_matches + itf_men_matches
             stats['matches'] = len(all_matches)
+            stats['days_skipped'] = scraper.skipped_days
             self._report_progress(f"Scraped {len(all_matches)} total matches from last {days} days")
 
             if not all_matches:
                 self._report_progress("No new matches found")
+                scraper.commit_watermarks()
                 stats['success'] = True
                 return stats
 
@@ -344,6 +504,7 @@ class GitHubDataLoader:
             imported = 0
             skipped = 0
             name_match_failures = []
+            inserted = []
 
             for match in all_matches:
                 winner_name = match.get('winner_name', '')
@@ -357,9 +518,11 @@ class GitHubDataLoader:
                 winner_id = name_matcher.find_player_id(winner_name)
                 loser_id = name_matcher.find_player_id(loser_name)
 
-                # Skip if either player not found (players are locked)
+                # Skip if either player not found (players are locked);
+                # the day is fetched again on later refreshes
                 if not winner_id or not loser_id:
                     skipped += 1
+                    scraper.mark_unresolved(match)
                     if len(name_match_failures) < 20:
                         if not winner_id:
                             name_match_failures.append(f"Winner not found: {winner_name}")
@@ -373,13 +536,14 @@ class GitHubDataLoader:
 
                 # Check for duplicate - same players within 3 days
                 match_date = match.get('date', '')
+                match_day = day_number(match_date)
                 try:
                     cursor.execute('''
                         SELECT id FROM matches
                         WHERE winner_id = ? AND loser_id = ?
-                        AND date BETWEEN date(?, '-3 days') AND date(?, '+3 days')
+                        AND day BETWEEN ? - 3 AND ? + 3
                         LIMIT 1
-                    ''', (winner_id, loser_id, match_date, match_date))
+                    ''', (winner_id, loser_id, match_day, match_day))
 
                     if cursor.fetchone():
                         # Duplicate match exists, skip
@@ -391,33 +555,32 @@ class GitHubDataLoader:
                 # Generate unique match ID
                 match_id = f"TE_{match_date}_{winner_id}_{loser_id}"
 
+                row = {
+                    'id': match_id,
+                    'tournament': match.get('tournament', ''),
+                    'date': match_date,
+                    'surface': match.get('surface', 'Hard'),
+                    'winner_id': winner_id,
+                    'loser_id': loser_id,
+                    'winner_name': canonical_winner,
+                    'loser_name': canonical_loser,
+                    'score': match.get('score', ''),
+                }
                 try:
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO matches
-                        (id, tournament, date, surface, winner_id, loser_id,
-                         winner_name, loser_name, score)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        match_id,
-                        match.get('tournament', ''),
-                        match_date,
-                        match.get('surface', 'Hard'),
-                        winner_id,
-                        loser_id,
-                        canonical_winner,
-                        canonical_loser,
-                        match.get('score', '')
-                    ))
-
-                    if cursor.rowcount > 0:
+                    if db.insert_result_match(cursor, row):
+                        inserted.append(row)
                         imported += 1
 
                 except Exception as e:
                     skipped += 1
+                    scraper.mark_unresolved(match)
                     continue
 
+            db.index_imported_matches(conn, inserted)
             conn.commit()
             conn.close()
+            # Matches are committed - safe to move the watermarks forward
+            scraper.commit_watermarks()
 
             stats['matches_imported'] = imported
             stats['matches_skipped'] = skipped
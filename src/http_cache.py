@@ -0,0 +1,213 @@
+"""
+Tennis Betting System - HTTP Page Cache
+Compressed on-disk cache for scraped pages
+
+Pages are stored gzip-compressed under DATA_DIR/http_cache, one file per
+URL (named by the URL's SHA-256). How long a page stays fresh depends on
+its URL class:
+- results pages for days older than a week never change (immutable),
+  provided they were fetched after that cutoff too
+- today's and yesterday's results pages expire after a few minutes
+- other recent results pages and rankings pages are refreshed daily-ish
+Stale pages that came with an ETag or Last-Modified header are revalidated
+with a conditional request, so an unchanged page costs a 304.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config import DATA_DIR, HTTP_CACHE_SETTINGS
+
+HTTP_CACHE_DIR = DATA_DIR / "http_cache"
+
+
+def cache_ttl(url: str, today: date = None) -> Optional[float]:
+    """
+    Freshness lifetime in seconds for a URL, or None if the page never changes.
+
+    Args:
+        url: Page URL
+        today: Reference date (default: today)
+    """
+    settings = HTTP_CACHE_SETTINGS
+    parsed = urlparse(url)
+    today = today or date.today()
+
+    if '/ranking/' in parsed.path:
+        return settings["rankings_ttl"]
+
+    if parsed.path.startswith('/results'):
+        query = parse_qs(parsed.query)
+        try:
+            year = int(query['year'][0])
+            month = int(query['month'][0])
+            day = int(query['day'][0]) if 'day' in query else None
+        except (KeyError, ValueError):
+            return settings["default_ttl"]
+
+        if day is not None:
+            try:
+                age = (today - date(year, month, day)).days
+            except ValueError:
+                return settings["default_ttl"]
+        else:
+            # Month pages are only settled once the whole month is
+            age = (today - date(year + month // 12, month % 12 + 1, 1)).days + 1
+
+        if age > settings["immutable_after_days"]:
+            return None
+        if age <= 1:
+            return settings["today_ttl"]
+        return settings["recent_ttl"]
+
+    return settings["default_ttl"]
+
+
+class PageCache:
+    """Gzip-compressed page store with per-URL-class TTLs and hit-rate stats."""
+
+    def __init__(self, cache_dir: Path = HTTP_CACHE_DIR, enabled: bool = None):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = HTTP_CACHE_SETTINGS["enabled"] if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.reset_stats()
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.gz"
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _read(self, path: Path) -> Optional[Tuple[Dict, str]]:
+        """(metadata, body) from a cache file; the first line holds the metadata."""
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: Path, meta: Dict, body: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a partial page
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(json.dumps(meta) + "\n")
+            f.write(body)
+        os.replace(tmp, path)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        Cached entry for a URL, or None.
+
+        Returns dict with: body, fetched_at, etag, last_modified, fresh.
+        A fresh entry counts as a hit; a stale one is returned so the caller
+        can revalidate it (see conditional_headers).
+        """
+        if not self.enabled:
+            return None
+        cached = self._read(self._path(url))
+        if cached is None:
+            self._count('misses')
+            return None
+
+        meta, body = cached
+        ttl = cache_ttl(url)
+        if ttl is None and cache_ttl(url, date.fromtimestamp(meta['fetched_at'])) is not None:
+            # Fetched while the day was still settling (maybe partial results):
+            # only a copy fetched after the cutoff is final
+            ttl = HTTP_CACHE_SETTINGS["recent_ttl"]
+        fresh = ttl is None or time.time() - meta['fetched_at'] < ttl
+        self._count('hits' if fresh else 'stale')
+        return {**meta, 'body': body, 'fresh': fresh}
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating a stale entry."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, body: str, headers=None):
+        """Save a 200 response body with its validators."""
+        if not self.enabled:
+            return
+        headers = headers or {}
+        meta = {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+        try:
+            self._write(self._path(url), meta, body)
+            self._count('stores')
+        except OSError as e:
+            print(f"HTTP cache write failed for {url}: {e}")
+
+    def touch(self, url: str, entry: Dict):
+        """Mark a revalidated (304 Not Modified) entry as fresh again."""
+        self._count('revalidated')
+        meta = {k: entry.get(k) for k in ('url', 'etag', 'last_modified')}
+        meta['fetched_at'] = time.time()
+        try:
+            self._write(self._path(url), meta, entry['body'])
+        except OSError:
+            pass
+
+    def iter_pages(self, url_contains: str = None) -> Iterator[Tuple[str, str]]:
+        """Yield (url, body) for every cached page, e.g. to benchmark parsers offline."""
+        if not self.cache_dir.exists():
+            return
+        for path in sorted(self.cache_dir.glob('*/*.gz')):
+            cached = self._read(path)
+            if cached is None:
+                continue
+            meta, body = cached
+            if url_contains and url_contains not in meta['url']:
+                continue
+            yield meta['url'], body
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'hits': 0, 'stale': 0, 'misses': 0, 'revalidated': 0, 'stores': 0}
+
+    def stats(self) -> Dict:
+        """Lookup counters plus hit_rate (fresh hits and 304s over all lookups)."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['stale'] + stats['misses']
+        stats['lookups'] = lookups
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> int:
+        """Delete every cached page. Returns the number of files removed."""
+        removed = 0
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*/*.gz'):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+# Shared cache instance
+page_cache = PageCache()
@@ -0,0 +1,279 @@
+"""
+Tennis Betting System - HTTP Client
+Shared HTTP layer for every upstream service
+
+Betfair, Tennis Explorer, Tennis Abstract, the Odds API, Supabase, Discord
+and the live-score feeds all go through one requests.Session:
+- a keep-alive connection pool per host (sizes in HTTP_CLIENT_SETTINGS)
+- one retry policy: timeouts, 429 and 5xx are retried with exponential
+  backoff (honouring Retry-After), GETs by default and other methods on request
+- per-endpoint counters (calls, errors, retries, latency) so a slow refresh
+  or auto cycle can be traced to the upstream that dominates it
+- cassettes: in "record" mode every response is saved under
+  DATA_DIR/cassettes; in "replay" mode responses are served from there and
+  nothing touches the network, so integration paths can be run offline
+
+Callers use client sessions, which behave like a requests.Session:
+    session = http_client.session_for(headers={'User-Agent': ...})
+    response = session.get(url, timeout=10)
+
+http_client.format_metrics() prints the endpoint table.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlencode, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import HTTP_CLIENT_SETTINGS
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Response headers worth keeping in a cassette
+CASSETTE_HEADERS = ('Content-Type', 'ETag', 'Last-Modified',
+                    'Retry-After', 'x-requests-used', 'x-requests-remaining')
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay mode was asked for a request that was never recorded."""
+
+
+class HttpClient:
+    """Pooled, instrumented HTTP client with record/replay support."""
+
+    def __init__(self, settings: Dict = None):
+        self.settings = settings or HTTP_CLIENT_SETTINGS
+        self.session = requests.Session()
+        self.cassette_mode = self.settings["cassette_mode"]
+        self.cassette_dir = Path(self.settings["cassette_dir"])
+        self._mounted = set()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict] = {}
+
+    # =========================================================================
+    # Connection pools
+    # =========================================================================
+
+    def _mount_host(self, url: str):
+        """Give each host its own keep-alive pool, sized per HTTP_CLIENT_SETTINGS."""
+        parsed = urlparse(url)
+        prefix = f"{parsed.scheme}://{parsed.netloc}/"
+        if prefix in self._mounted:
+            return
+        with self._lock:
+            if prefix in self._mounted:
+                return
+            size = self.settings["host_pool_maxsize"].get(parsed.hostname, self.settings["pool_maxsize"])
+            self.session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size))
+            self._mounted.add(prefix)
+
+    # =========================================================================
+    # Metrics
+    # =========================================================================
+
+    def _record(self, endpoint: str, elapsed: float, error: bool, retries: int):
+        with self._lock:
+            stats = self._metrics.get(endpoint)
+            if stats is None:
+                stats = {'calls': 0, 'errors': 0, 'retries': 0, 'total_s': 0.0, 'max_s': 0.0}
+                self._metrics[endpoint] = stats
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += retries
+            stats['total_s'] += elapsed
+            stats['max_s'] = max(stats['max_s'], elapsed)
+
+    def metrics(self) -> List[Dict]:
+        """Per-endpoint counters, slowest total first."""
+        with self._lock:
+            rows = [{'endpoint': endpoint, **stats} for endpoint, stats in self._metrics.items()]
+        for row in rows:
+            row['avg_ms'] = row['total_s'] / row['calls'] * 1000 if row['calls'] else 0.0
+        return sorted(rows, key=lambda r: r['total_s'], reverse=True)
+
+    def format_metrics(self, limit: int = 15) -> str:
+        """Metrics as a text table (for logs and the console)."""
+        lines = [f"{'Endpoint':<60} {'Calls':>6} {'Err':>5} {'Retry':>5} {'Avg ms':>8} {'Max ms':>8} {'Total s':>8}"]
+        for row in self.metrics()[:limit]:
+            lines.append(f"{row['endpoint'][:60]:<60} {row['calls']:>6} {row['errors']:>5} "
+                         f"{row['retries']:>5} {row['avg_ms']:>8.0f} {row['max_s'] * 1000:>8.0f} "
+                         f"{row['total_s']:>8.2f}")
+        return "\n".join(lines)
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics.clear()
+
+    # =========================================================================
+    # Cassettes
+    # =========================================================================
+
+    @staticmethod
+    def _cassette_key(method: str, url: str, params=None, data=None, json_body=None) -> str:
+        """Stable hash of a request. Headers (auth tokens) are left out."""
+        if params:
+            items = params.items() if isinstance(params, dict) else params
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(sorted(items))}"
+        if json_body is not None:
+            body = json.dumps(json_body, sort_keys=True)
+        elif isinstance(data, dict):
+            body = urlencode(sorted(data.items()))
+        elif isinstance(data, bytes):
+            body = data.decode('utf-8', 'replace')
+        else:
+            body = data or ''
+        return hashlib.sha256(f"{method.upper()} {url}\n{body}".encode('utf-8')).hexdigest()
+
+    def _cassette_path(self, key: str) -> Path:
+        return self.cassette_dir / key[:2] / f"{key}.json"
+
+    def _save_cassette(self, key: str, method: str, url: str, response: requests.Response):
+        record = {
+            'method': method.upper(),
+            'url': urlparse(url)._replace(query='').geturl(),  # No API keys on disk
+            'status': response.status_code,
+            'headers': {h: response.headers[h] for h in CASSETTE_HEADERS if h in response.headers},
+            'body': base64.b64encode(response.content).decode('ascii'),
+        }
+        path = self._cassette_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(record), encoding='utf-8')
+        except OSError as e:
+            print(f"Cassette write failed for {url}: {e}")
+
+    def _load_cassette(self, key: str, url: str) -> requests.Response:
+        path = self._cassette_path(key)
+        try:
+            record = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            raise CassetteMiss(f"No recorded response for {url}")
+
+        response = requests.Response()
+        response.status_code = record['status']
+        response.headers = CaseInsensitiveDict(record['headers'])
+        response._content = base64.b64decode(record['body'])
+        response.encoding = get_encoding_from_headers(response.headers) or 'utf-8'
+        response.url = url
+        return response
+
+    # =========================================================================
+    # Requests
+    # =========================================================================
+
+    def request(self, method: str, url: str, endpoint: str = None, retries: int = None,
+                backoff: float = None, limiter=None, **kwargs) -> requests.Response:
+        """
+        Send a request with pooling, retries, metrics and cassettes.
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            endpoint: Metrics label (default: host + path)
+            retries: Retry budget (default: max_retries for GET, 0 otherwise)
+            backoff: Seconds before the first retry (doubled each time)
+            limiter: Optional TokenBucket; a token is taken before each attempt
+            **kwargs: Passed to requests (params, data, json, headers, timeout, verify...)
+
+        Returns:
+            The final response (which may be an error status).
+
+        Raises:
+            requests.RequestException if every attempt failed to connect.
+        """
+        method = method.upper()
+        if endpoint is None:
+            parsed = urlparse(url)
+            endpoint = f"{method} {parsed.netloc}{parsed.path}"
+        if retries is None:
+            retries = self.settings["max_retries"] if method == 'GET' else 0
+        if backoff is None:
+            backoff = self.settings["retry_backoff"]
+        kwargs.setdefault('timeout', self.settings["timeout"])
+
+        key = None
+        if self.cassette_mode in ('record', 'replay'):
+            key = self._cassette_key(method, url, kwargs.get('params'),
+                                     kwargs.get('data'), kwargs.get('json'))
+        if self.cassette_mode == 'replay':
+            start = time.perf_counter()
+            try:
+                response = self._load_cassette(key, url)
+            except CassetteMiss:
+                self._record(endpoint, time.perf_counter() - start, True, 0)
+                raise
+            self._record(endpoint, time.perf_counter() - start, response.status_code >= 400, 0)
+            return response
+
+        self._mount_host(url)
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                if attempt >= retries:
+                    self._record(endpoint, time.perf_counter() - start, True, attempt)
+                    raise
+                time.sleep(backoff * (2 ** attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                # Honour Retry-After (seconds) when the server sends one
+                retry_after = response.headers.get('Retry-After', '')
+                time.sleep(float(retry_after) if retry_after.isdigit() else backoff * (2 ** attempt))
+                attempt += 1
+                continue
+            break
+
+        self._record(endpoint, time.perf_counter() - start, response.status_code >= 400, attempt)
+        if key is not None:
+            self._save_cassette(key, method, url, response)
+        return response
+
+    def session_for(self, headers: Dict = None, **defaults) -> "ClientSession":
+        """A requests.Session-like view with its own default headers."""
+        return ClientSession(self, headers, **defaults)
+
+
+class ClientSession:
+    """
+    Drop-in for the requests.Session methods the app uses (get/post/request
+    and a mutable .headers), backed by the shared HttpClient.
+
+    Keyword defaults (e.g. retries, limiter, verify) apply to every call.
+    """
+
+    def __init__(self, client: HttpClient, headers: Dict = None, **defaults):
+        self.client = client
+        self.headers = dict(headers or {})
+        self.defaults = defaults
+
+    def request(self, method: str, url: str, headers: Dict = None, **kwargs) -> requests.Response:
+        merged = {**self.headers, **(headers or {})}
+        return self.client.request(method, url, headers=merged, **{**self.defaults, **kwargs})
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PATCH', url, **kwargs)
+
+
+# Shared client instance
+http_client = HttpClient()
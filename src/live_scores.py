@@ -5,13 +5,16 @@ This module provides live score data for in-play tennis matches.
 Uses Flashscore's internal API which provides comprehensive tennis scores.
 """
 
-import json
-import urllib.request
-import urllib.error
-import ssl
 from typing import Dict, List, Optional
 from datetime import datetime
 
+import urllib3
+
+from http_client import http_client
+
+# The feeds are read with certificate checks off (as before); don't warn on every poll
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
 
 class FlashscoreTennis:
     """Fetch live tennis scores from Flashscore."""
@@ -21,9 +24,6 @@ class FlashscoreTennis:
     LIVE_URL = "https://d.flashscore.co.uk/x/feed/f_2_-2_1_en-uk_1"  # Tennis live
 
     def __init__(self):
-        self.ssl_context = ssl.create_default_context()
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': '*/*',
@@ -35,9 +35,9 @@ class FlashscoreTennis:
     def _make_request(self, url: str) -> Optional[str]:
         """Make HTTP request and return response text."""
         try:
-            req = urllib.request.Request(url, headers=self.headers)
-            with urllib.request.urlopen(req, timeout=10, context=self.ssl_context) as response:
-                return response.read().decode('utf-8')
+            response = http_client.request('GET', url, headers=self.headers, timeout=10, verify=False)
+            response.raise_for_status()
+            return response.content.decode('utf-8')
         except Exception as e:
             print(f"Flashscore request error: {e}")
             return None
@@ -164,9 +164,6 @@ class SofascoreTennis:
     LIVE_URL = "https://api.sofascore.com/api/v1/sport/tennis/events/live"
 
     def __init__(self):
-        self.ssl_context = ssl.create_default_context()
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json',
@@ -175,9 +172,9 @@ class SofascoreTennis:
     def _make_request(self, url: str) -> Optional[Dict]:
         """Make HTTP request and return JSON response."""
         try:
-            req = urllib.request.Request(url, headers=self.headers)
-            with urllib.request.urlopen(req, timeout=10, context=self.ssl_context) as response:
-                return json.loads(response.read().decode('utf-8'))
+            response = http_client.request('GET', url, headers=self.headers, timeout=10, verify=False)
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             print(f"Sofascore request error: {e}")
             return None
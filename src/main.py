@@ -33,7 +33,9 @@ if application_path not in sys.path:
 
 from config import DB_PATH, SURFACES, calculate_bet_model
 from database import db
-from betfair_capture import BetfairTennisCapture
+from betfair_capture import BetfairTennisCapture, add_save_listener, remove_save_listener
+from refresh_scheduler import PlayerRefreshScheduler
+from http_client import http_client
 
 # Cloud sync for Discord monitor
 try:
@@ -123,134 +125,63 @@ class ModernButton(tk.Frame):
 
 
 class BackgroundUpdater:
-    """Background thread to update players with matches within 3 days."""
+    """Background player refresh, prioritised by match start time (see refresh_scheduler)."""
 
     def __init__(self, root, status_callback=None):
         self.root = root
         self.status_callback = status_callback
         self.scraper = TennisAbstractScraper() if SCRAPER_AVAILABLE else None
-        self.running = False
-        self.thread = None
-        self.update_interval = 30 * 60  # 30 minutes between full cycles
-        self.player_delay = 5  # 5 seconds between player updates to avoid rate limiting
+        self.scheduler = PlayerRefreshScheduler(
+            self.scraper.fetch_and_update_player, status_callback=self._set_status
+        ) if self.scraper else None
+        self._restart_job = None
+
+    @property
+    def running(self):
+        return bool(self.scheduler and self.scheduler.running)
 
     def start(self):
         """Start the background updater."""
-        if self.running:
+        if self.running or self._restart_job:
             return
-        if not self.scraper:
+        if not self.scheduler:
             # Scraper not available, don't start background updates
             return
-        self.running = True
-        self.thread = threading.Thread(target=self._update_loop, daemon=True)
-        self.thread.start()
+        if not self.scheduler.start():
+            # Workers from the last stop() are still finishing - try again shortly
+            self._set_status("Updater stopping, restarting shortly...", False)
+            self._restart_job = self.root.after(1000, self._retry_start)
+            return
+        # New Betfair matches requeue their players straight away
+        add_save_listener(self.scheduler.requeue)
+
+    def _retry_start(self):
+        self._restart_job = None
+        self.start()
 
     def stop(self):
         """Stop the background updater."""
-        self.running = False
+        if self._restart_job:
+            self.root.after_cancel(self._restart_job)
+            self._restart_job = None
+        if not self.running:
+            return
+        remove_save_listener(self.scheduler.requeue)
+        self.scheduler.stop()
+        self._set_status("Updater stopped", False)
+
+    def wait_for_imminent(self, timeout=None) -> bool:
+        """Requeue, then block until players in imminent matches are refreshed."""
+        if not self.running:
+            return False
+        self.scheduler.requeue()
+        return self.scheduler.wait_for_imminent(timeout)
 
     def _set_status(self, text, is_updating=False):
         """Update status via callback (thread-safe)."""
         if self.status_callback:
             self.root.after(0, lambda: self.status_callback(text, is_updating))
 
-    def _get_players_with_recent_matches(self):
-        """Get unique players with matches within 3 days of today."""
-        players = {}
-        today = datetime.now().date()
-        window_start = today - timedelta(days=3)
-        window_end = today + timedelta(days=3)
-
-        # Get upcoming matches
-        try:
-            upcoming = db.get_upcoming_matches()
-            for match in upcoming:
-                match_date_str = match.get('date', '')
-                if match_date_str:
-                    try:
-                        match_date = datetime.strptime(match_date_str[:10], '%Y-%m-%d').date()
-                        if window_start <= match_date <= window_end:
-                            p1_id = match.get('player1_id')
-                            p2_id = match.get('player2_id')
-                            p1_name = match.get('player1_name')
-                            p2_name = match.get('player2_name')
-                            if p1_id and p1_name:
-                                players[p1_id] = p1_name
-                            if p2_id and p2_name:
-                                players[p2_id] = p2_name
-                    except ValueError:
-                        pass
-        except Exception as e:
-            print(f"Error getting upcoming matches: {e}")
-
-        # Also check recent matches from database
-        try:
-            recent = db.get_recent_matches(days=3)
-            for match in recent:
-                winner_id = match.get('winner_id')
-                loser_id = match.get('loser_id')
-                winner_name = match.get('winner_name')
-                loser_name = match.get('loser_name')
-                if winner_id and winner_name:
-                    players[winner_id] = winner_name
-                if loser_id and loser_name:
-                    players[loser_id] = loser_name
-        except Exception as e:
-            print(f"Error getting recent matches: {e}")
-
-        return players
-
-    def _update_loop(self):
-        """Main update loop."""
-        while self.running:
-            try:
-                players = self._get_players_with_recent_matches()
-
-                if players:
-                    # Filter out players updated within 6 hours
-                    players_to_update = {
-                        pid: name for pid, name in players.items()
-                        if db.player_needs_ta_update(pid, hours=6)
-                    }
-
-                    if players_to_update:
-                        self._set_status(f"Updating {len(players_to_update)} players...", True)
-                        updated_count = 0
-
-                        for i, (player_id, player_name) in enumerate(players_to_update.items(), 1):
-                            if not self.running:
-                                break
-
-                            self._set_status(f"Updating {player_name} ({i}/{len(players_to_update)})", True)
-
-                            try:
-                                self.scraper.fetch_and_update_player(player_id, player_name)
-                                updated_count += 1
-                            except Exception as e:
-                                print(f"Error updating {player_name}: {e}")
-
-                            # Delay between players
-                            if self.running and i < len(players_to_update):
-                                time.sleep(self.player_delay)
-
-                        self._set_status(f"Updated {updated_count} players", False)
-                    else:
-                        skipped = len(players)
-                        self._set_status(f"All {skipped} players up to date", False)
-                else:
-                    self._set_status("No recent players to update", False)
-
-            except Exception as e:
-                self._set_status(f"Error: {str(e)[:30]}", False)
-
-            # Wait for next cycle
-            for _ in range(self.update_interval):
-                if not self.running:
-                    break
-                time.sleep(1)
-
-        self._set_status("Updater stopped", False)
-
 
 class MainApplication:
     """Main hub for the tennis betting tool."""
@@ -331,8 +262,9 @@ class MainApplication:
         self._create_ui()
         self._update_stats()
 
-        # Background updater disabled - we now use GitHub data which is comprehensive
-        self.bg_updater = None
+        # Bulk data comes from GitHub; the background updater only tops up
+        # players in upcoming matches and runs while auto mode is on
+        self.bg_updater = BackgroundUpdater(self.root, self._update_bg_status) if SCRAPER_AVAILABLE else None
 
         # Auto-refresh data from GitHub if stale, then fetch Betfair matches
         self._auto_startup_tasks()
@@ -1157,6 +1089,8 @@ class MainApplication:
                         if result.get('matches_skipped', 0) > 0:
                             update_progress(f"  Matches skipped: {result.get('matches_skipped', 0)} (unknown players)")
                         update_progress(f"  Players in database: {result.get('players_in_db', result.get('players', 0))}")
+                        if result.get('days_skipped', 0) > 0:
+                            update_progress(f"  Days skipped: {result['days_skipped']} (already imported)")
                         # Record the refresh timestamp
                         db.set_last_refresh('full')
                         self.root.after(100, self._update_stats)
@@ -1248,6 +1182,8 @@ class MainApplication:
                         update_progress(f"\nQuick refresh complete!")
                         update_progress(f"  Matches found: {result.get('matches', 0)}")
                         update_progress(f"  Matches imported: {result.get('matches_imported', 0)}")
+                        if result.get('days_skipped', 0) > 0:
+                            update_progress(f"  Days skipped: {result['days_skipped']} (already imported)")
                         if result.get('matches_skipped', 0) > 0:
                             update_progress(f"  Matches skipped: {result.get('matches_skipped', 0)} (unknown players)")
 
@@ -1930,6 +1866,9 @@ class MainApplication:
             self.auto_mode_btn.label.configure(text="Stop Auto")
             self._update_bg_status("Auto mode enabled - running now...", True)
 
+            if self.bg_updater:
+                self.bg_updater.start()
+
             # Run immediately, then schedule next run
             self._run_auto_cycle()
         else:
@@ -1939,6 +1878,9 @@ class MainApplication:
                 self.auto_mode_job = None
             self.next_auto_run = None
 
+            if self.bg_updater:
+                self.bg_updater.stop()
+
             # Update UI to show disabled
             self.auto_mode_status.configure(text="Auto: OFF", fg=self.TEXT_MUTED)
             self.auto_mode_btn.label.configure(text="Auto Mode")
@@ -1965,17 +1907,21 @@ class MainApplication:
                     self.root.after(0, lambda: self._update_bg_status("Auto: Betfair not configured", True))
                     # Continue anyway to process existing matches
 
-                # Small delay between steps
-                time.sleep(1)
+                # Step 2: Make sure players about to play have fresh data
+                if self.bg_updater and self.bg_updater.running:
+                    self.root.after(0, lambda: self._update_bg_status(
+                        "Auto: Refreshing players in imminent matches...", True))
+                    if not self.bg_updater.wait_for_imminent():
+                        print("Auto: imminent player refresh timed out, analysing anyway")
 
-                # Step 2: Find value bets
+                # Step 3: Find value bets
                 self.root.after(0, lambda: self._update_bg_status("Auto: Analyzing matches...", True))
                 from bet_suggester import BetSuggester
                 suggester = BetSuggester()
                 value_bets = suggester.get_top_value_bets()
 
                 if value_bets:
-                    # Step 3: Add bets to tracker (without confirmation)
+                    # Step 4: Add bets to tracker (without confirmation)
                     self.root.after(0, lambda: self._update_bg_status(f"Auto: Found {len(value_bets)} value bets, adding...", True))
                     added = self._auto_add_bets_to_tracker(value_bets)
                     self.root.after(0, lambda: self._update_bg_status(f"Auto: Added {added} bets to tracker", True))
@@ -1985,6 +1931,10 @@ class MainApplication:
                 # Update stats
                 self.root.after(100, self._update_stats)
 
+                # Upstream timings for this cycle (slowest endpoints first)
+                print(f"Auto cycle HTTP:\n{http_client.format_metrics()}")
+                http_client.reset_metrics()
+
                 # Calculate next run time
                 time.sleep(1)
                 if self.auto_mode_enabled:
@@ -5,10 +5,11 @@ Core analysis engine with factor calculations and probability model
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import math
+import statistics
 
 from config import (
     UI_COLORS, SURFACES, DEFAULT_ANALYSIS_WEIGHTS,
@@ -16,8 +17,7 @@ from config import (
     BETTING_SETTINGS, SET_BETTING, KELLY_STAKING, LOGS_DIR,
     OPPONENT_QUALITY_SETTINGS, RECENCY_SETTINGS,
     RECENT_LOSS_SETTINGS, MOMENTUM_SETTINGS, BREAKOUT_SETTINGS,
-    MATCH_CONTEXT_SETTINGS,
-    get_tour_level, TOURNAMENT_FORM_WEIGHT
+    MATCH_CONTEXT_SETTINGS
 )
 from collections import Counter
 import csv
@@ -29,9 +29,13 @@ from pathlib import Path
 staking_log_file = LOGS_DIR / "staking_decisions.csv"
 staking_logger = logging.getLogger("staking")
 staking_logger.setLevel(logging.INFO)
+form_logger = logging.getLogger("form_state")
 from database import db, TennisDatabase
+from day_ordinal import day_number, reference_day, today_number
 from tennis_abstract_scraper import TennisAbstractScraper
 
+RANKINGS_CACHE_PATH = Path(__file__).parent.parent / "data" / "rankings_cache.json"
+
 
 class MatchAnalyzer:
     """Core analysis engine for tennis match predictions."""
@@ -43,12 +47,19 @@ class MatchAnalyzer:
         self._lowest_ranking_cache = None
         self._ranking_id_cache = None
 
+    @staticmethod
+    def rankings_cache_version() -> float:
+        """Modification time of the rankings cache file (0 if there is none)."""
+        try:
+            return RANKINGS_CACHE_PATH.stat().st_mtime
+        except OSError:
+            return 0.0
+
     def _get_ranking_from_cache(self, player_name: str) -> Optional[int]:
         """Look up player ranking from the rankings cache file."""
         if self._rankings_cache is None:
-            cache_path = Path(__file__).parent.parent / "data" / "rankings_cache.json"
             try:
-                with open(cache_path, 'r') as f:
+                with open(RANKINGS_CACHE_PATH, 'r') as f:
                     self._rankings_cache = json.load(f)
             except Exception:
                 self._rankings_cache = {}
@@ -64,6 +75,21 @@ class MatchAnalyzer:
 
         return None
 
+    @staticmethod
+    def _match_day(match: Dict) -> Optional[int]:
+        """Day ordinal of a match (stored day column, parsed only for unbackfilled rows)."""
+        return match.get('day') or day_number(match.get('date'))
+
+    def _matches_before(self, matches: List[Dict], as_of_date: str) -> List[Dict]:
+        """Matches played strictly before as_of_date, compared as day ordinals."""
+        as_of_day = day_number(as_of_date)
+        before = []
+        for m in matches:
+            match_day = self._match_day(m)
+            if match_day is not None and match_day < as_of_day:
+                before.append(m)
+        return before
+
     def _get_ranking_by_id(self, player_id: int) -> Optional[int]:
         """Look up a player's current ranking by ID from cache."""
         if self._ranking_id_cache is None:
@@ -120,7 +146,7 @@ class MatchAnalyzer:
         matches = self.db.get_player_matches(player_id, limit=num_matches * 2)
 
         if as_of_date:
-            matches = [m for m in matches if m.get('date') and m['date'] < as_of_date]
+            matches = self._matches_before(matches, as_of_date)
 
         matches = matches[:num_matches]
 
@@ -150,122 +176,48 @@ class MatchAnalyzer:
 
         # Level relevance lookup for match context
         level_relevance_map = MATCH_CONTEXT_SETTINGS.get("form_level_relevance", {})
-        hierarchy = MATCH_CONTEXT_SETTINGS.get("level_hierarchy", {})
+        ref_day = reference_day(as_of_date)
 
         for idx, match in enumerate(matches):
-            # Tournament level weight — higher-level results carry more weight
-            tournament = match.get('tournament') or match.get('tourney_name') or 'Unknown'
-            tour_level_str = get_tour_level(tournament)
-            tour_weight = TOURNAMENT_FORM_WEIGHT.get(tour_level_str, 1.0)
+            scored = self._score_form_match(match, player_canonical, player_elo)
+            won = scored['won']
+            if won:
+                wins += 1
 
             # Level relevance — when match_level is provided, weight historical results
             # by how close their level is to the current match level.
             # ITF results matter more when analyzing an ITF match; WTA results less so.
+            tour_weight = scored['tour_weight']
             if match_level is not None:
-                hist_level = hierarchy.get(tour_level_str, 2)
-                level_distance = abs(hist_level - match_level)
+                level_distance = abs(scored['level_rank'] - match_level)
                 level_relevance = level_relevance_map.get(level_distance, 0.55)
                 tour_weight *= level_relevance
 
             # Date-based decay — exponential decay with ~83-day half-life
-            match_date_str = match.get('date')
-            if match_date_str:
-                try:
-                    ref_date = datetime.strptime(as_of_date, "%Y-%m-%d") if as_of_date else datetime.now()
-                    match_dt = datetime.strptime(match_date_str[:10], "%Y-%m-%d")
-                    days_ago = (ref_date - match_dt).days
-                    date_decay = math.exp(-days_ago / 120)
-                except (ValueError, TypeError):
-                    date_decay = 1.0
+            match_day = self._match_day(match)
+            if match_day is not None:
+                date_decay = math.exp(-(ref_day - match_day) / 120)
             else:
                 date_decay = 1.0
 
-            # Combined weight: position decay × tournament importance × date freshness
-            weight = (decay ** idx) * tour_weight * date_decay
-
-            # Check if player won (using canonical IDs for alias matching)
-            winner_canonical = self.db.get_canonical_id(match['winner_id'])
-            won = winner_canonical == player_canonical
-            if won:
-                wins += 1
-
-            # Resolve opponent rank — fallback to current ranking if match data is missing
-            if won:
-                opp_rank = match.get('loser_rank')
-                opp_id = match.get('loser_id')
-            else:
-                opp_rank = match.get('winner_rank')
-                opp_id = match.get('winner_id')
-
-            if opp_rank is None or not isinstance(opp_rank, (int, float)):
-                looked_up = self._get_ranking_by_id(opp_id) if opp_id else None
-                opp_rank = looked_up if looked_up else 500
-
-            # Elo-expected match scoring: scores based on how expected the result was
-            opp_elo = self._ranking_to_elo(int(opp_rank))
-            expected_win = 1 / (1 + 10 ** ((opp_elo - player_elo) / 400))
-            # Cap to avoid extreme scores from huge Elo gaps (e.g., #1 vs #1300)
-            expected_win = max(0.05, min(0.95, expected_win))
-
-            # Surprise weighting — upset losses are more informative about true level
-            # Losing to someone you should beat reveals your floor
-            # Wins are not amplified — anyone can beat a weaker opponent
-            if won:
-                surprise = 1.0
-            else:
-                surprise = min(3.0, max(1.0, expected_win / (1 - expected_win)))
-            weight *= surprise
-
-            if won:
-                # Upset win → high score, expected win → modest score
-                base_score = 50 + 50 * (1 - expected_win)
-            else:
-                # Expected loss → near-neutral, upset loss → severe
-                base_score = 60 * (1 - expected_win)
-
-            # Set score dominance modifier — rewards dominant wins, penalizes blowout losses
-            # Try pre-computed game counts first, fall back to parsing score string
-            winner_games = match.get('games_won_w', 0) or 0
-            loser_games = match.get('games_won_l', 0) or 0
-            if winner_games == 0 and loser_games == 0:
-                score_str = match.get('score', '')
-                if score_str:
-                    winner_games, loser_games = self._parse_games_from_score(score_str)
-
-            if won:
-                player_games, opp_games = winner_games, loser_games
-            else:
-                player_games, opp_games = loser_games, winner_games
-
-            total_games = player_games + opp_games
-            if total_games > 0:
-                player_ratio = player_games / total_games
-                dominance = 1 + (player_ratio - 0.5) * 0.3  # 0.85 to 1.15
-            else:
-                dominance = 1.0
-
-            match_score = base_score * dominance
+            # Combined weight: position decay × tournament importance × date freshness × surprise
+            weight = (decay ** idx) * tour_weight * date_decay * scored['surprise']
+            match_score = scored['score']
 
             weighted_score += match_score * weight
             total_weight += weight
 
-            # Get opponent name
-            if won:
-                opponent_name = match.get('loser_name', 'Unknown')
-            else:
-                opponent_name = match.get('winner_name', 'Unknown')
-
             details.append({
                 'date': match['date'],
                 'won': won,
-                'opponent_name': opponent_name,
-                'opponent_rank': opp_rank,
+                'opponent_name': scored['opponent_name'],
+                'opponent_rank': scored['opponent_rank'],
                 'score': match_score,
                 'weight': weight,
-                'tournament': tournament,
-                'dominance': round(dominance, 3),
+                'tournament': scored['tournament'],
+                'dominance': round(scored['dominance'], 3),
                 'date_decay': round(date_decay, 3),
-                'surprise': round(surprise, 2),
+                'surprise': round(scored['surprise'], 2),
             })
 
         # Second pass: amplify confirmed strong wins
@@ -312,6 +264,340 @@ class MatchAnalyzer:
             "has_data": len(matches) >= 3  # Need at least 3 matches for reliable data
         }
 
+    def _score_form_match(self, match: Dict, player_canonical: int, player_elo: float) -> Dict:
+        """
+        Score a single match for form: result, Elo-expected base score with
+        dominance modifier, tournament weight and surprise multiplier.
+        Shared by the full form calculation and the incremental form state.
+        """
+        # Tournament level weight — higher-level results carry more weight
+        # (precomputed on the tournaments dimension, looked up by key)
+        tournament = match.get('tournament') or match.get('tourney_name') or 'Unknown'
+        tournament_info = self.db.get_tournament_info(match.get('tournament_key'), tournament)
+
+        # Check if player won (using canonical IDs for alias matching)
+        winner_canonical = self.db.get_canonical_id(match['winner_id'])
+        won = winner_canonical == player_canonical
+
+        # Resolve opponent rank — fallback to current ranking if match data is missing
+        if won:
+            opp_rank = match.get('loser_rank')
+            opp_id = match.get('loser_id')
+        else:
+            opp_rank = match.get('winner_rank')
+            opp_id = match.get('winner_id')
+
+        if opp_rank is None or not isinstance(opp_rank, (int, float)):
+            looked_up = self._get_ranking_by_id(opp_id) if opp_id else None
+            opp_rank = looked_up if looked_up else 500
+
+        # Elo-expected match scoring: scores based on how expected the result was
+        opp_elo = self._ranking_to_elo(int(opp_rank))
+        expected_win = 1 / (1 + 10 ** ((opp_elo - player_elo) / 400))
+        # Cap to avoid extreme scores from huge Elo gaps (e.g., #1 vs #1300)
+        expected_win = max(0.05, min(0.95, expected_win))
+
+        # Surprise weighting — upset losses are more informative about true level
+        # Losing to someone you should beat reveals your floor
+        # Wins are not amplified — anyone can beat a weaker opponent
+        if won:
+            surprise = 1.0
+        else:
+            surprise = min(3.0, max(1.0, expected_win / (1 - expected_win)))
+
+        if won:
+            # Upset win → high score, expected win → modest score
+            base_score = 50 + 50 * (1 - expected_win)
+        else:
+            # Expected loss → near-neutral, upset loss → severe
+            base_score = 60 * (1 - expected_win)
+
+        # Set score dominance modifier — rewards dominant wins, penalizes blowout losses
+        # Try pre-computed game counts first, fall back to parsing score string
+        winner_games = match.get('games_won_w', 0) or 0
+        loser_games = match.get('games_won_l', 0) or 0
+        if winner_games == 0 and loser_games == 0:
+            score_str = match.get('score', '')
+            if score_str:
+                winner_games, loser_games = self._parse_games_from_score(score_str)
+
+        if won:
+            player_games, opp_games = winner_games, loser_games
+        else:
+            player_games, opp_games = loser_games, winner_games
+
+        total_games = player_games + opp_games
+        if total_games > 0:
+            player_ratio = player_games / total_games
+            dominance = 1 + (player_ratio - 0.5) * 0.3  # 0.85 to 1.15
+        else:
+            dominance = 1.0
+
+        return {
+            'won': won,
+            'opponent_rank': opp_rank,
+            'opponent_name': match.get('loser_name' if won else 'winner_name', 'Unknown'),
+            'score': base_score * dominance,
+            'dominance': dominance,
+            'surprise': surprise,
+            'tour_weight': tournament_info['form_weight'],
+            'level_rank': tournament_info['level_rank'],
+            'tournament': tournament,
+        }
+
+    # =========================================================================
+    # INCREMENTAL FORM STATE
+    # =========================================================================
+
+    def get_incremental_form(self, player_id: int, as_of_date: str = None,
+                             match_level: int = None) -> Dict:
+        """
+        Form score from the stored rolling form state.
+
+        Matches played since the state was last updated (and before as_of_date)
+        are folded in one at a time, so the cost is per new match rather than
+        per history length. Falls back to calculate_form_score when the state
+        has already been folded past as_of_date.
+        """
+        player_canonical = self.db.get_canonical_id(player_id)
+        ref_day = reference_day(as_of_date)
+
+        state = self.db.get_player_form_state(player_canonical)
+        if state and state['last_day'] is not None and state['last_day'] >= ref_day:
+            return self.calculate_form_score(player_id, None, as_of_date, match_level)
+
+        if state:
+            since = date.fromordinal(state['last_day']).isoformat()
+            new_matches = self.db.get_player_matches(player_id, since_date=since)
+            new_matches = [m for m in new_matches if m.get('id') not in state['last_day_ids']]
+        else:
+            # First use — seed from the same window the full calculation uses
+            state = self._empty_form_state(player_canonical)
+            new_matches = self.db.get_player_matches(
+                player_id, limit=FORM_SETTINGS["default_matches"] * 2)
+        new_matches = self._matches_before(new_matches, date.fromordinal(ref_day).isoformat())
+        new_matches = new_matches[:FORM_SETTINGS["default_matches"]]
+
+        if new_matches:
+            player_rank = self._get_ranking_by_id(player_id) or 500
+            player_elo = self._ranking_to_elo(player_rank)
+            # Oldest first — get_player_matches returns most recent first
+            for match in reversed(new_matches):
+                self._fold_form_match(state, match, player_canonical, player_rank, player_elo)
+            state['player_rank'] = player_rank
+            self.db.save_player_form_state(state)
+
+        return self._form_from_state(state, ref_day, match_level)
+
+    @staticmethod
+    def _empty_form_state(player_canonical: int) -> Dict:
+        """A form state with no matches folded in."""
+        return {
+            'player_id': player_canonical,
+            'ref_day': None,
+            'last_day': None,
+            'last_day_ids': [],
+            'numerators': {},
+            'denominators': {},
+            'recent': [],
+            'results': [],
+            'losses': 0,
+            'loss_elo_sum': 0.0,
+            'loss_elo_sq': 0.0,
+            'player_rank': None,
+        }
+
+    def _fold_form_match(self, state: Dict, match: Dict, player_canonical: int,
+                         player_rank: int, player_elo: float):
+        """
+        Fold one match (newer than everything already in the state) into a form state.
+
+        Existing sums are decayed to the match's day and shifted back one
+        position, the match is added to its tournament level bucket, and the
+        win-confirmation amplification is applied against the last 2 results.
+        """
+        match_day = self._match_day(match)
+        if match_day is None:
+            return
+
+        # Re-decay: date decay to the new match's day × one position of recency decay
+        factor = FORM_SETTINGS["recency_decay"]
+        if state['ref_day'] is not None:
+            factor *= math.exp(-(match_day - state['ref_day']) / 120)
+        for buckets in (state['numerators'], state['denominators']):
+            for level in buckets:
+                buckets[level] *= factor
+        for r in state['recent']:
+            r['weight'] *= factor
+        state['ref_day'] = match_day
+
+        scored = self._score_form_match(match, player_canonical, player_elo)
+        level = scored['level_rank']
+        weight = scored['tour_weight'] * scored['surprise']
+        state['numerators'][level] = state['numerators'].get(level, 0.0) + scored['score'] * weight
+        state['denominators'][level] = state['denominators'].get(level, 0.0) + weight
+
+        entry = {
+            'date': (match.get('date') or '')[:10],
+            'won': scored['won'],
+            'opponent_name': scored['opponent_name'],
+            'opponent_rank': scored['opponent_rank'],
+            'score': scored['score'],
+            'weight': weight,
+            'level': level,
+            'tournament': scored['tournament'],
+            'dominance': round(scored['dominance'], 3),
+            'surprise': scored['surprise'],
+        }
+
+        # Amplify confirmed strong wins — same rule as calculate_form_score:
+        # a win over a stronger opponent followed within 2 matches by a win
+        # over a similarly-ranked (or better) opponent boosts both to 2.0
+        if entry['won']:
+            for r in state['recent'][:2]:
+                if not r['won'] or r['opponent_rank'] >= player_rank:
+                    continue
+                if entry['opponent_rank'] <= r['opponent_rank'] * 1.5:
+                    self._amplify_form_entry(state, r)
+                    self._amplify_form_entry(state, entry)
+
+        state['recent'] = ([entry] + state['recent'])[:FORM_SETTINGS.get("state_recent_results", 3)]
+
+        # Result window for W/L counts and the loss-quality moments
+        window = FORM_SETTINGS["default_matches"]
+        state['results'].insert(0, [1 if entry['won'] else 0, entry['opponent_rank']])
+        if not entry['won']:
+            self._add_loss_moment(state, entry['opponent_rank'], 1)
+        while len(state['results']) > window:
+            won, opp_rank = state['results'].pop()
+            if not won:
+                self._add_loss_moment(state, opp_rank, -1)
+
+        if match_day != state['last_day']:
+            state['last_day'] = match_day
+            state['last_day_ids'] = []
+        state['last_day_ids'].append(match.get('id'))
+
+    @staticmethod
+    def _amplify_form_entry(state: Dict, entry: Dict):
+        """Raise a recent result's surprise to 2.0, adding the extra weight to the sums."""
+        if entry['surprise'] >= 2.0:
+            return
+        extra = entry['weight'] * (2.0 / max(entry['surprise'], 1.0) - 1)
+        level = entry['level']
+        state['numerators'][level] = state['numerators'].get(level, 0.0) + entry['score'] * extra
+        state['denominators'][level] = state['denominators'].get(level, 0.0) + extra
+        entry['weight'] += extra
+        entry['surprise'] = 2.0
+
+    def _add_loss_moment(self, state: Dict, opponent_rank, sign: int):
+        """Add (sign=1) or remove (sign=-1) a loss from the loss-quality moments."""
+        elo = self._ranking_to_elo(int(opponent_rank))
+        state['losses'] += sign
+        state['loss_elo_sum'] += sign * elo
+        state['loss_elo_sq'] += sign * elo * elo
+
+    def _form_from_state(self, state: Dict, ref_day: int, match_level: int = None) -> Dict:
+        """Form result dict (same keys as calculate_form_score) read from a form state."""
+        results = state['results']
+        if not results:
+            return {
+                "score": 50,
+                "matches": 0,
+                "wins": 0,
+                "losses": 0,
+                "details": [],
+                "has_data": False
+            }
+
+        # Level relevance is applied per bucket at read time, so one state
+        # serves every match level
+        level_relevance_map = MATCH_CONTEXT_SETTINGS.get("form_level_relevance", {})
+        weighted_score = 0
+        total_weight = 0
+        for level, denominator in state['denominators'].items():
+            relevance = 1.0
+            if match_level is not None:
+                relevance = level_relevance_map.get(abs(level - match_level), 0.55)
+            weighted_score += relevance * state['numerators'].get(level, 0.0)
+            total_weight += relevance * denominator
+        form_score = weighted_score / total_weight if total_weight > 0 else 50
+
+        # Stored weights are relative to the state's ref_day; re-decay to the requested day
+        state_decay = math.exp(-(ref_day - state['ref_day']) / 120)
+        details = []
+        for r in state['recent']:
+            match_day = day_number(r['date'])
+            details.append({
+                'date': r['date'],
+                'won': r['won'],
+                'opponent_name': r['opponent_name'],
+                'opponent_rank': r['opponent_rank'],
+                'score': r['score'],
+                'weight': r['weight'] * state_decay,
+                'tournament': r['tournament'],
+                'dominance': r['dominance'],
+                'date_decay': round(math.exp(-(ref_day - match_day) / 120), 3) if match_day else 1.0,
+                'surprise': round(r['surprise'], 2),
+            })
+
+        wins = sum(won for won, _ in results)
+        losses = state['losses']
+        loss_summary = None
+        if losses > 0:
+            mean = state['loss_elo_sum'] / losses
+            variance = (state['loss_elo_sq'] - losses * mean * mean) / (losses - 1) if losses > 1 else 0.0
+            loss_summary = {
+                'count': losses,
+                'mean_elo': mean,
+                'std_elo': math.sqrt(max(0.0, variance)),
+            }
+
+        return {
+            "score": round(form_score, 1),
+            "matches": len(results),
+            "wins": wins,
+            "losses": len(results) - wins,
+            "avg_opponent_rank": round(sum(rank for _, rank in results) / len(results)),
+            "win_rate": wins / len(results),
+            "details": details,
+            "loss_summary": loss_summary,
+            "has_data": len(results) >= 3,
+            "incremental": True,
+        }
+
+    def _live_form(self, player_id: int, as_of_date: str, match_level: int = None) -> Dict:
+        """
+        Form for live analysis: the incremental state, optionally checked
+        against the full calculation (FORM_SETTINGS["verify_incremental_state"]).
+        """
+        form = self.get_incremental_form(player_id, as_of_date, match_level)
+        if FORM_SETTINGS.get("verify_incremental_state") and form.get('incremental'):
+            full = self.calculate_form_score(player_id, None, as_of_date, match_level)
+            form['verification'] = {
+                'full_score': full['score'],
+                'difference': round(form['score'] - full['score'], 1),
+            }
+            form_logger.info(
+                f"Form state check player={player_id}: incremental={form['score']} "
+                f"full={full['score']} diff={form['verification']['difference']:+.1f}"
+            )
+        return form
+
+    def _loss_elo_summary(self, form: Dict) -> Optional[Dict]:
+        """Loss-opponent Elo count/mean/std — from the form state summary or from form details."""
+        if 'loss_summary' in form:
+            return form['loss_summary']
+        loss_elos = [self._ranking_to_elo(int(d['opponent_rank'])) for d in form['details'] if not d['won']]
+        if not loss_elos:
+            return None
+        mean = sum(loss_elos) / len(loss_elos)
+        return {
+            'count': len(loss_elos),
+            'mean_elo': mean,
+            'std_elo': statistics.stdev(loss_elos) if len(loss_elos) > 1 else 0.0,
+        }
+
     # =========================================================================
     # SURFACE PERFORMANCE
     # =========================================================================
@@ -326,7 +612,7 @@ class MatchAnalyzer:
         if as_of_date:
             # Backtest: compute from raw matches before as_of_date
             all_matches = self.db.get_player_matches(player_id, surface=surface)
-            all_matches = [m for m in all_matches if m.get('date') and m['date'][:10] < as_of_date]
+            all_matches = self._matches_before(all_matches, as_of_date)
 
             career_matches = len(all_matches)
             if career_matches == 0:
@@ -340,9 +626,8 @@ class MatchAnalyzer:
             career_wins = sum(1 for m in all_matches if self.db.get_canonical_id(m['winner_id']) == player_canonical)
             career_win_rate = career_wins / career_matches
 
-            ref_date = datetime.strptime(as_of_date, "%Y-%m-%d")
-            two_years_ago = (ref_date - timedelta(days=365 * SURFACE_SETTINGS["recent_years"])).strftime("%Y-%m-%d")
-            recent_matches = [m for m in all_matches if m.get('date') and m['date'][:10] >= two_years_ago]
+            two_years_ago = day_number(as_of_date) - 365 * SURFACE_SETTINGS["recent_years"]
+            recent_matches = [m for m in all_matches if self._match_day(m) >= two_years_ago]
             recent_wins = sum(1 for m in recent_matches if self.db.get_canonical_id(m['winner_id']) == player_canonical)
             recent_matches_count = len(recent_matches)
             recent_win_rate = recent_wins / recent_matches_count if recent_matches_count > 0 else career_win_rate
@@ -738,7 +1023,7 @@ class MatchAnalyzer:
         if before_date:
             # Backtest: skip pre-computed table, calculate from raw matches before date
             matches = self.db.get_h2h_matches(player1_id, player2_id)
-            matches = [m for m in matches if m.get('date') and m['date'][:10] < before_date]
+            matches = self._matches_before(matches, before_date)
             p1_wins = sum(1 for m in matches if self.db.get_canonical_id(m['winner_id']) == p1_canonical)
             p2_wins = len(matches) - p1_wins
 
@@ -915,37 +1200,25 @@ class MatchAnalyzer:
         # Use the upcoming match date as reference for "today" when provided
         # This correctly calculates rest days relative to when the player will actually play
         if match_date:
-            try:
-                reference_dt = datetime.strptime(match_date[:10], "%Y-%m-%d")
-            except (ValueError, TypeError):
-                reference_dt = datetime.now()
+            reference = day_number(match_date) or today_number()
         else:
             # Fall back to database's most recent match date or current date
-            db_most_recent = self.db.get_most_recent_match_date()
-            if db_most_recent:
-                reference_dt = datetime.strptime(db_most_recent, "%Y-%m-%d")
-            else:
-                reference_dt = datetime.now()
+            reference = day_number(self.db.get_most_recent_match_date()) or today_number()
 
-        # Player's last match date
-        last_match_date = recent_matches[0].get('date')
+        # Day ordinals of the player's matches (most recent first)
+        match_days = [self._match_day(m) or 0 for m in recent_matches]
 
         # Calculate days since last match relative to the DATABASE's most recent date
         # This gives realistic "rest days" based on the data timeline
-        if last_match_date:
-            last_dt = datetime.strptime(last_match_date[:10], "%Y-%m-%d")
-            days_rest = (reference_dt - last_dt).days
+        if match_days[0]:
+            days_rest = reference - match_days[0]
         else:
             days_rest = 7
 
         # Matches in last 7, 14 and 30 days (relative to database's most recent date)
-        date_7d = (reference_dt - timedelta(days=7)).strftime("%Y-%m-%d")
-        date_14d = (reference_dt - timedelta(days=14)).strftime("%Y-%m-%d")
-        date_30d = (reference_dt - timedelta(days=30)).strftime("%Y-%m-%d")
-
-        matches_7d = [m for m in recent_matches if m.get('date', '') >= date_7d]
-        matches_14d = sum(1 for m in recent_matches if m.get('date', '') >= date_14d)
-        matches_30d = sum(1 for m in recent_matches if m.get('date', '') >= date_30d)
+        matches_7d = [m for m, d in zip(recent_matches, match_days) if d >= reference - 7]
+        matches_14d = sum(1 for d in match_days if d >= reference - 14)
+        matches_30d = sum(1 for d in match_days if d >= reference - 30)
 
         # Calculate difficulty points for last 7 days
         difficulty_7d = sum(
@@ -1143,7 +1416,7 @@ class MatchAnalyzer:
                 "has_data": False
             }
 
-        today = datetime.now()
+        today = today_number()
         weighted_score = 0
         total_weight = 0
         details = []
@@ -1173,12 +1446,8 @@ class MatchAnalyzer:
                 opp_rank = default_rank
 
             # Get match date for recency weighting
-            date_str = m.get('date', '')[:10]
-            try:
-                match_date = datetime.strptime(date_str, '%Y-%m-%d')
-                days_ago = (today - match_date).days
-            except (ValueError, TypeError):
-                days_ago = 90
+            match_day = self._match_day(m)
+            days_ago = today - match_day if match_day is not None else 90
 
             # Recency multiplier: recent matches count more
             if days_ago <= 14:
@@ -1248,7 +1517,7 @@ class MatchAnalyzer:
                 "has_data": False
             }
 
-        today = datetime.now()
+        today = today_number()
         weighted_score = 0
         total_weight = 0
         details = []
@@ -1259,13 +1528,8 @@ class MatchAnalyzer:
         for m in matches:
             winner_canonical = self.db.get_canonical_id(m.get('winner_id'))
             won = winner_canonical == player_canonical
-            date_str = m.get('date', '')[:10]
-
-            try:
-                match_date = datetime.strptime(date_str, '%Y-%m-%d')
-                days_ago = (today - match_date).days
-            except (ValueError, TypeError):
-                days_ago = 90  # Default to old if can't parse
+            match_day = self._match_day(m)
+            days_ago = today - match_day if match_day is not None else 90  # Default to old if undated
 
             # Recency weight based on how recent the match is
             if days_ago <= 7:
@@ -1287,7 +1551,7 @@ class MatchAnalyzer:
             result = 'W' if won else 'L'
             details.append({
                 'result': result,
-                'date': date_str,
+                'date': (m.get('date') or '')[:10],
                 'days_ago': days_ago,
                 'recency_weight': recency_weight
             })
@@ -1314,8 +1578,7 @@ class MatchAnalyzer:
         matches = self.db.get_player_matches(player_id, limit=10 if as_of_date else 3)
 
         if as_of_date:
-            matches = [m for m in matches if m.get('date') and m['date'][:10] < as_of_date]
-            matches = matches[:3]
+            matches = self._matches_before(matches, as_of_date)[:3]
 
         if not matches:
             return {
@@ -1324,7 +1587,7 @@ class MatchAnalyzer:
                 "has_recent_loss": False
             }
 
-        today = datetime.strptime(as_of_date, "%Y-%m-%d") if as_of_date else datetime.now()
+        today = reference_day(as_of_date)
         penalty = 0
         details = []
 
@@ -1337,14 +1600,9 @@ class MatchAnalyzer:
             if won:
                 continue  # Only interested in losses
 
-            date_str = m.get('date', '')[:10]
             score = m.get('score', '')
-
-            try:
-                match_date = datetime.strptime(date_str, '%Y-%m-%d')
-                days_ago = (today - match_date).days
-            except (ValueError, TypeError):
-                days_ago = 30  # Default to old if can't parse
+            match_day = self._match_day(m)
+            days_ago = today - match_day if match_day is not None else 30  # Default to old if undated
 
             # Check if it was a 5-setter (marathon loss)
             is_5_setter = score.count(',') >= 4 or score.count('-') >= 5
@@ -1386,8 +1644,7 @@ class MatchAnalyzer:
         matches = self.db.get_player_matches(player_id, limit=10 if as_of_date else 5)
 
         if as_of_date:
-            matches = [m for m in matches if m.get('date') and m['date'][:10] < as_of_date]
-            matches = matches[:5]
+            matches = self._matches_before(matches, as_of_date)[:5]
 
         if not matches:
             return {
@@ -1397,7 +1654,7 @@ class MatchAnalyzer:
                 "has_momentum": False
             }
 
-        today = datetime.strptime(as_of_date, "%Y-%m-%d") if as_of_date else datetime.now()
+        today = reference_day(as_of_date)
         bonus = 0
         wins_counted = 0
         details = []
@@ -1411,14 +1668,9 @@ class MatchAnalyzer:
             if not won:
                 continue
 
-            date_str = m.get('date', '')[:10]
             match_surface = m.get('surface', '')
-
-            try:
-                match_date = datetime.strptime(date_str, '%Y-%m-%d')
-                days_ago = (today - match_date).days
-            except (ValueError, TypeError):
-                days_ago = 30
+            match_day = self._match_day(m)
+            days_ago = today - match_day if match_day is not None else 30
 
             # Only count wins in the window and on same surface
             if days_ago <= window_days and match_surface == surface:
@@ -1480,11 +1732,11 @@ class MatchAnalyzer:
 
         # Get recent matches
         matches = self.db.get_player_matches(player_id, limit=40)
-        ref_date = datetime.strptime(as_of_date, "%Y-%m-%d") if as_of_date else datetime.now()
+        ref_day = reference_day(as_of_date)
 
         # Filter to matches before as_of_date
         if as_of_date:
-            matches = [m for m in matches if m.get('date') and m['date'][:10] < as_of_date]
+            matches = self._matches_before(matches, as_of_date)
 
         cluster_window = settings['cluster_window_days']
         quality_threshold = settings['quality_win_threshold']
@@ -1492,12 +1744,10 @@ class MatchAnalyzer:
         # Find quality wins within the cluster window
         quality_wins = []
         for m in matches:
-            date_str = (m.get('date') or '')[:10]
-            try:
-                match_date = datetime.strptime(date_str, "%Y-%m-%d")
-                days_ago = (ref_date - match_date).days
-            except (ValueError, TypeError):
+            match_day = self._match_day(m)
+            if match_day is None:
                 continue
+            days_ago = ref_day - match_day
 
             if days_ago > cluster_window or days_ago < 0:
                 continue
@@ -1521,7 +1771,7 @@ class MatchAnalyzer:
             rank_threshold = int(player_rank * quality_threshold)
             if opp_rank <= rank_threshold:
                 quality_wins.append({
-                    'date': date_str,
+                    'date': (m.get('date') or '')[:10],
                     'opponent_name': m.get('loser_name', 'Unknown'),
                     'opponent_rank': int(opp_rank),
                     'days_ago': days_ago,
@@ -1642,11 +1892,9 @@ class MatchAnalyzer:
 
     def _home_level_from_history(self, player_id: int, as_of_date: str = None) -> int:
         """Determine home level from match history (fallback method)."""
-        hierarchy = MATCH_CONTEXT_SETTINGS["level_hierarchy"]
-
         matches = self.db.get_player_matches(player_id, limit=20)
         if as_of_date:
-            matches = [m for m in matches if m.get('date') and m['date'][:10] < as_of_date]
+            matches = self._matches_before(matches, as_of_date)
 
         if not matches:
             return 2  # Default to Challenger
@@ -1654,9 +1902,7 @@ class MatchAnalyzer:
         levels = []
         for m in matches:
             tournament = m.get('tournament') or m.get('tourney_name') or ''
-            tour_level = get_tour_level(tournament)
-            level_num = hierarchy.get(tour_level, 2)
-            levels.append(level_num)
+            levels.append(self.db.get_tournament_info(m.get('tournament_key'), tournament)['level_rank'])
 
         # Return the most common non-Unknown level, or max if Unknown dominates
         counter = Counter(levels)
@@ -1674,8 +1920,7 @@ class MatchAnalyzer:
 
         # Determine match level from tournament name
         if tournament:
-            tour_level_str = get_tour_level(tournament)
-            match_level = hierarchy.get(tour_level_str, 2)
+            match_level = self.db.get_tournament_info(name=tournament)['level_rank']
         else:
             match_level = None  # Can't determine without tournament
 
@@ -1776,6 +2021,8 @@ class MatchAnalyzer:
         # Determine if this is a backtest call (rank overrides = historical match)
         is_backtest = p1_rank_override is not None or p2_rank_override is not None
         backtest_date = match_date if is_backtest else None
+        # Live analysis reads form from the rolling per-player state
+        use_form_state = not is_backtest and FORM_SETTINGS.get("incremental_state", False)
 
         # Compute match context (level mismatch detection)
         match_context = self.get_match_context(player1_id, player2_id, tournament, match_date)
@@ -1785,8 +2032,12 @@ class MatchAnalyzer:
         # Get all factor scores in parallel for better performance
         with ThreadPoolExecutor(max_workers=8) as executor:
             futures = {
-                'p1_form': executor.submit(self.calculate_form_score, player1_id, None, match_date, context_match_level, p1_rank_override),
-                'p2_form': executor.submit(self.calculate_form_score, player2_id, None, match_date, context_match_level, p2_rank_override),
+                'p1_form': (executor.submit(self._live_form, player1_id, match_date, context_match_level)
+                            if use_form_state else
+                            executor.submit(self.calculate_form_score, player1_id, None, match_date, context_match_level, p1_rank_override)),
+                'p2_form': (executor.submit(self._live_form, player2_id, match_date, context_match_level)
+                            if use_form_state else
+                            executor.submit(self.calculate_form_score, player2_id, None, match_date, context_match_level, p2_rank_override)),
                 'p1_surface': executor.submit(self.get_surface_stats, player1_id, surface, backtest_date),
                 'p2_surface': executor.submit(self.get_surface_stats, player2_id, surface, backtest_date),
                 'rankings': executor.submit(self.get_ranking_factors, player1_id, player2_id, p1_odds, p2_odds, None, None, p1_rank_override, p2_rank_override),
@@ -1869,27 +2120,18 @@ class MatchAnalyzer:
         loss_quality_diff = 0
         max_stability = FORM_SETTINGS.get("max_stability_adjustment", 0.20)
         if p1_has_form_data and p2_has_form_data:
-            p1_losses = [d for d in p1_form['details'] if not d['won']]
-            p2_losses = [d for d in p2_form['details'] if not d['won']]
-            if p1_losses and p2_losses:
-                # Convert each loss opponent rank to Elo individually
-                p1_loss_elos = [self._ranking_to_elo(int(d['opponent_rank'])) for d in p1_losses]
-                p2_loss_elos = [self._ranking_to_elo(int(d['opponent_rank'])) for d in p2_losses]
-
-                p1_mean_loss_elo = sum(p1_loss_elos) / len(p1_loss_elos)
-                p2_mean_loss_elo = sum(p2_loss_elos) / len(p2_loss_elos)
-
+            p1_loss = self._loss_elo_summary(p1_form)
+            p2_loss = self._loss_elo_summary(p2_form)
+            if p1_loss and p2_loss:
+                # Mean Elo of the opponents each player lost to
                 # Positive = P2 loses to stronger opponents (P2 more stable)
-                loss_quality_diff = (p2_mean_loss_elo - p1_mean_loss_elo) / 400
+                loss_quality_diff = (p2_loss['mean_elo'] - p1_loss['mean_elo']) / 400
 
                 # Consistency dampening: reduce adjustment when losses are scattered
                 # A player losing to #66 AND #470 has unreliable average loss quality
                 min_losses = FORM_SETTINGS.get("loss_consistency_min_losses", 2)
-                if len(p1_loss_elos) >= min_losses and len(p2_loss_elos) >= min_losses:
-                    import statistics
-                    p1_std = statistics.stdev(p1_loss_elos)
-                    p2_std = statistics.stdev(p2_loss_elos)
-                    max_std = max(p1_std, p2_std)
+                if p1_loss['count'] >= min_losses and p2_loss['count'] >= min_losses:
+                    max_std = max(p1_loss['std_elo'], p2_loss['std_elo'])
                     baseline = FORM_SETTINGS.get("loss_consistency_baseline", 150)
                     steepness = FORM_SETTINGS.get("loss_consistency_steepness", 2.0)
                     consistency = 1.0 / (1.0 + (max_std / baseline) ** steepness)
@@ -8,16 +8,28 @@ Usage:
     1. Get your API key from https://the-odds-api.com/
     2. Add to credentials.json: "odds_api_key": "YOUR_KEY"
     3. Use compare_odds() to validate Betfair prices
+
+Responses are cached per sport key in DATA_DIR/odds_api_cache.json, so the
+cache survives restarts. Only stale sport keys are refreshed, and only as
+many as the daily share of the remaining monthly quota allows (soonest
+matches first). Matches are indexed by player-name tokens so each Betfair
+market is compared against a handful of candidates, not every match.
 """
 
-import requests
 import json
 import os
+import re
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+import unicodedata
+from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 
+from config import DATA_DIR, ODDS_API
+from http_client import http_client
+
 # API Configuration
 ODDS_API_BASE = "https://api.the-odds-api.com/v4"
 
@@ -37,6 +49,53 @@ TENNIS_SPORTS = [
 SHARP_BOOKMAKERS = ["pinnacle", "betfair_ex_eu"]
 ALL_BOOKMAKERS = ["pinnacle", "bet365", "unibet_eu", "betfair_ex_eu", "williamhill"]
 
+ODDS_API_CACHE_PATH = DATA_DIR / "odds_api_cache.json"
+
+_NAME_TOKEN_RE = re.compile(r"[a-z]{2,}")
+
+
+def name_tokens(name: str) -> List[str]:
+    """Lower-case ASCII word tokens of a player name, initials dropped."""
+    ascii_name = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode()
+    return _NAME_TOKEN_RE.findall(ascii_name.lower())
+
+
+# =============================================================================
+# PERSISTED RESPONSE CACHE
+# =============================================================================
+
+_store_lock = threading.Lock()
+_store: Optional[Dict] = None
+
+
+def _load_store() -> Dict:
+    """The on-disk cache ({'sports', 'odds', 'quota'}), loaded once per process."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                with open(ODDS_API_CACHE_PATH, 'r', encoding='utf-8') as f:
+                    _store = json.load(f)
+            except (OSError, ValueError):
+                _store = {}
+            _store.setdefault('sports', {})
+            _store.setdefault('odds', {})
+            _store.setdefault('quota', {})
+        return _store
+
+
+def _save_store():
+    with _store_lock:
+        if _store is None:
+            return
+        tmp = ODDS_API_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(_store, f)
+            os.replace(tmp, ODDS_API_CACHE_PATH)
+        except OSError as e:
+            print(f"Odds API cache write error: {e}")
+
 
 def get_app_directory() -> str:
     """Get the directory where the app is running from."""
@@ -68,11 +127,13 @@ class OddsAPIClient:
 
     def __init__(self, api_key: str = None):
         self.api_key = api_key or load_api_key()
-        self.requests_used = 0
-        self.requests_remaining = None
-        self._cache = {}
-        self._cache_time = {}
-        self.cache_duration = timedelta(minutes=15)
+        self.store = _load_store()
+        quota = self.store['quota']
+        self.requests_used = quota.get('used', 0)
+        self.requests_remaining = quota.get('remaining')
+        self.cache_duration = ODDS_API["cache_duration_minutes"] * 60
+        self._index = None
+        self._index_source = None
 
     def _make_request(self, endpoint: str, params: dict = None) -> Optional[dict]:
         """Make API request and track usage."""
@@ -87,11 +148,15 @@ class OddsAPIClient:
         url = f"{ODDS_API_BASE}/{endpoint}"
 
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = http_client.request('GET', url, params=params, timeout=30)
 
             # Track API usage from headers
             self.requests_used = response.headers.get('x-requests-used', self.requests_used)
             self.requests_remaining = response.headers.get('x-requests-remaining')
+            if self.requests_remaining is not None:
+                self._record_usage(int(float(self.requests_remaining)),
+                                   int(float(response.headers.get('x-requests-last', 0))),
+                                   self.requests_used)
 
             if response.status_code == 200:
                 return response.json()
@@ -114,9 +179,90 @@ class OddsAPIClient:
         return self._make_request("sports") or []
 
     def get_tennis_sports(self) -> List[Dict]:
-        """Get list of tennis sports/tournaments with active markets."""
-        sports = self.get_sports()
-        return [s for s in sports if 'tennis' in s.get('key', '').lower() and s.get('active')]
+        """
+        Get list of tennis sports/tournaments with active markets.
+
+        The sports endpoint doesn't count against the quota, but the list is
+        still cached for sports_cache_hours. A failed request falls back to
+        the last list.
+        """
+        cached = self.store['sports']
+        if cached and time.time() - cached.get('fetched_at', 0) < ODDS_API["sports_cache_hours"] * 3600:
+            return cached['data']
+
+        sports = self._make_request("sports")
+        if sports is None:
+            return cached.get('data', [])
+
+        tennis = [s for s in sports if 'tennis' in s.get('key', '').lower() and s.get('active')]
+        self.store['sports'] = {'fetched_at': time.time(), 'data': tennis}
+        _save_store()
+        return tennis
+
+    # =========================================================================
+    # REQUEST BUDGET
+    # =========================================================================
+
+    def _record_usage(self, remaining: int, last_cost: int, used=None):
+        """Track quota from response headers, per UTC day and month."""
+        today = datetime.utcnow().date().isoformat()
+        with _store_lock:
+            quota = self.store['quota']
+            if quota.get('day') != today:
+                previous = quota.get('remaining')
+                if previous is None or quota.get('month') != today[:7]:
+                    previous = remaining + last_cost
+                quota.update({'day': today, 'day_start': previous, 'spent': 0})
+            quota['spent'] = quota.get('spent', 0) + last_cost
+            quota['remaining'] = remaining
+            quota['used'] = used
+            quota['month'] = today[:7]
+
+    def request_allowance(self) -> float:
+        """
+        Credits that may still be spent today.
+
+        The remaining monthly quota (less a reserve) is spread evenly over
+        the days left until it resets on the 1st.
+        """
+        now = datetime.utcnow().date()
+        next_month = date(now.year + now.month // 12, now.month % 12 + 1, 1)
+        days_left = max((next_month - now).days, 1)
+
+        quota = self.store['quota']
+        if quota.get('month') != now.isoformat()[:7]:
+            start, spent = ODDS_API["monthly_quota"], 0  # Quota has reset
+        elif quota.get('day') == now.isoformat():
+            start, spent = quota['day_start'], quota.get('spent', 0)
+        else:
+            start, spent = quota.get('remaining', ODDS_API["monthly_quota"]), 0
+
+        return (start - ODDS_API["reserve_requests"]) / days_left - spent
+
+    def plan_requests(self, stale_keys: List[str], odds_cache: Dict, cost: int) -> List[str]:
+        """
+        Pick which stale sport keys to refresh now.
+
+        Keys never fetched go first, then those with the soonest matches;
+        the rest keep serving cached odds until budget is available.
+        """
+        def next_start(key):
+            starts = [m.get('commence_time', '') for m in odds_cache.get(key, {}).get('matches', [])]
+            return min(starts) if starts else ''
+
+        ordered = sorted(stale_keys, key=lambda k: (k in odds_cache, next_start(k) or '9999'))
+        allowance = self.request_allowance()
+        planned = []
+        for key in ordered:
+            if allowance < cost:
+                break
+            planned.append(key)
+            allowance -= cost
+        return planned
+
+    # =========================================================================
+    # ODDS
+    # =========================================================================
 
     def get_tennis_odds(self, regions: str = "eu,uk", bookmakers: List[str] = None) -> List[Dict]:
         """
@@ -129,26 +275,28 @@ class OddsAPIClient:
         Returns:
             List of matches with odds from each bookmaker
         """
-        # Check cache first
-        cache_key = f"tennis_odds_{regions}"
-        if cache_key in self._cache:
-            cache_age = datetime.now() - self._cache_time.get(cache_key, datetime.min)
-            if cache_age < self.cache_duration:
-                print(f"Using cached odds (age: {cache_age.seconds}s)")
-                return self._cache[cache_key]
-
-        all_matches = []
         tennis_sports = self.get_tennis_sports()
 
         if not tennis_sports:
             print("No active tennis markets found")
             return []
 
-        print(f"Found {len(tennis_sports)} active tennis competitions")
+        cache_key = f"{regions}|{','.join(bookmakers or [])}"
+        odds_cache = self.store['odds'].setdefault(cache_key, {})
+        titles = {sport['key']: sport.get('title', '') for sport in tennis_sports}
+
+        now = time.time()
+        stale = [key for key in titles
+                 if now - odds_cache.get(key, {}).get('fetched_at', 0) >= self.cache_duration]
+        # Each odds request costs one credit per market per region
+        planned = self.plan_requests(stale, odds_cache, cost=len(regions.split(',')))
+
+        if stale:
+            print(f"Found {len(tennis_sports)} active tennis competitions "
+                  f"({len(planned)} to refresh, {len(stale) - len(planned)} deferred by quota)")
 
-        for sport in tennis_sports:
-            sport_key = sport['key']
-            print(f"  Fetching odds for: {sport.get('title', sport_key)}")
+        for sport_key in planned:
+            print(f"  Fetching odds for: {titles[sport_key] or sport_key}")
 
             params = {
                 'regions': regions,
@@ -161,22 +309,50 @@ class OddsAPIClient:
 
             matches = self._make_request(f"sports/{sport_key}/odds", params)
 
-            if matches:
+            if matches is not None:
                 for match in matches:
                     match['sport_key'] = sport_key
-                    match['sport_title'] = sport.get('title', '')
-                all_matches.extend(matches)
+                    match['sport_title'] = titles[sport_key]
+                odds_cache[sport_key] = {'fetched_at': time.time(), 'matches': matches}
 
-        # Update cache
-        self._cache[cache_key] = all_matches
-        self._cache_time[cache_key] = datetime.now()
+        # Forget competitions that are no longer active
+        for sport_key in [k for k in odds_cache if k not in titles]:
+            del odds_cache[sport_key]
+        if stale:
+            _save_store()
 
-        print(f"Total matches with odds: {len(all_matches)}")
-        if self.requests_remaining:
-            print(f"API requests remaining this month: {self.requests_remaining}")
+        all_matches = [match for key in titles for match in odds_cache.get(key, {}).get('matches', [])]
+
+        if stale:
+            print(f"Total matches with odds: {len(all_matches)}")
+            if self.requests_remaining:
+                print(f"API requests remaining this month: {self.requests_remaining}")
 
         return all_matches
 
+    # =========================================================================
+    # MATCH LOOKUP
+    # =========================================================================
+
+    @staticmethod
+    def _outcome_names(match: Dict) -> Tuple[str, ...]:
+        """Player names from the first bookmaker's first market."""
+        bookmakers = match.get('bookmakers') or [{}]
+        markets = bookmakers[0].get('markets') or [{}]
+        return tuple(o.get('name', '') for o in markets[0].get('outcomes', []))
+
+    def _match_index(self, matches: List[Dict]) -> Dict[str, set]:
+        """Name token -> positions in matches, rebuilt when the list changes."""
+        if self._index_source is not matches:
+            index = {}
+            for position, match in enumerate(matches):
+                for name in self._outcome_names(match)[:2]:
+                    for token in name_tokens(name):
+                        index.setdefault(token, set()).add(position)
+            self._index = index
+            self._index_source = matches
+        return self._index
+
     def find_match(self, player1: str, player2: str, matches: List[Dict] = None) -> Optional[Dict]:
         """
         Find a specific match by player names.
@@ -189,17 +365,23 @@ class OddsAPIClient:
         player1_lower = player1.lower().strip()
         player2_lower = player2.lower().strip()
 
+        # Only matches sharing a name token with both players can score > 0.6
+        index = self._match_index(matches)
+        p1_candidates = set().union(*(index.get(t, ()) for t in name_tokens(player1)))
+        p2_candidates = set().union(*(index.get(t, ()) for t in name_tokens(player2)))
+
         best_match = None
         best_score = 0
 
-        for match in matches:
-            outcomes = match.get('bookmakers', [{}])[0].get('markets', [{}])[0].get('outcomes', [])
+        for position in sorted(p1_candidates & p2_candidates):
+            match = matches[position]
+            outcomes = self._outcome_names(match)
             if len(outcomes) < 2:
                 continue
 
             # Get player names from the match
-            match_p1 = outcomes[0].get('name', '').lower()
-            match_p2 = outcomes[1].get('name', '').lower()
+            match_p1 = outcomes[0].lower()
+            match_p2 = outcomes[1].lower()
 
             # Calculate similarity scores
             score1 = max(
@@ -239,14 +421,15 @@ class OddsAPIClient:
         # Fuzzy match
         return SequenceMatcher(None, name1, name2).ratio()
 
-    def get_pinnacle_odds(self, player1: str, player2: str) -> Optional[Tuple[float, float]]:
+    def get_pinnacle_odds(self, player1: str, player2: str,
+                          matches: List[Dict] = None) -> Optional[Tuple[float, float]]:
         """
         Get Pinnacle odds for a specific match.
 
         Returns:
             Tuple of (player1_odds, player2_odds) or None if not found
         """
-        match = self.find_match(player1, player2)
+        match = self.find_match(player1, player2, matches)
 
         if not match:
             return None
@@ -272,7 +455,7 @@ class OddsAPIClient:
 
     def compare_odds(self, player1: str, player2: str,
                      betfair_p1_odds: float, betfair_p2_odds: float,
-                     threshold: float = 0.15) -> Dict:
+                     threshold: float = 0.15, matches: List[Dict] = None) -> Dict:
         """
         Compare Betfair odds against Pinnacle and other bookmakers.
 
@@ -282,6 +465,7 @@ class OddsAPIClient:
             betfair_p1_odds: Betfair odds for player 1
             betfair_p2_odds: Betfair odds for player 2
             threshold: Maximum acceptable odds difference (0.15 = 15%)
+            matches: get_tennis_odds() result to search (fetched if not given)
 
         Returns:
             Dict with comparison results and warnings
@@ -296,7 +480,7 @@ class OddsAPIClient:
             'recommendation': 'OK'
         }
 
-        match = self.find_match(player1, player2)
+        match = self.find_match(player1, player2, matches)
 
         if not match:
             result['warning'] = "Match not found in Odds API"
@@ -49,13 +49,13 @@ import re
 _WOMEN_ITF_PATTERN = re.compile(r'\bw(?:15|25|40|60|80|100)\b', re.IGNORECASE)
 
 
-def _detect_tour_from_matches(matches) -> str:
+def _detect_tour_from_matches(matches, db) -> str:
     """Determine if a player is ATP or WTA from their match tournaments."""
     atp_count = 0
     wta_count = 0
     for match in matches:
-        tournament = match.get('tournament', '')
-        level = get_tour_level(tournament)
+        tournament = match.get('tournament') or ''
+        level = db.get_tournament_info(match.get('tournament_key'), tournament)['tour_level']
         if level in ("ATP", "Challenger"):
             atp_count += 1
         elif level == "WTA":
@@ -120,7 +120,7 @@ def calculate_player_performance_elo(player_id: int, db) -> Optional[Dict]:
     matches.sort(key=lambda m: m.get('date', ''))
 
     # Detect tour from match history
-    tour = _detect_tour_from_matches(matches)
+    tour = _detect_tour_from_matches(matches, db)
 
     canonical_id = db.get_canonical_id(player_id)
 
@@ -151,9 +151,9 @@ def calculate_player_performance_elo(player_id: int, db) -> Optional[Dict]:
         # Expected win probability
         expected = 1 / (1 + math.pow(10, (opp_elo - elo) / 400))
 
-        # K-factor based on tournament importance
-        tournament = match.get('tournament', '')
-        k = get_k_factor(tournament)
+        # K-factor based on tournament importance (precomputed on the tournaments dimension)
+        tournament = match.get('tournament') or ''
+        k = db.get_tournament_info(match.get('tournament_key'), tournament)['k_factor']
 
         # Standard Elo update
         elo += k * (actual - expected)
@@ -3,17 +3,20 @@ Tennis Betting System - Rankings Downloader
 Downloads ATP and WTA rankings from Tennis Explorer and stores them locally.
 """
 
-import requests
-from bs4 import BeautifulSoup
 import re
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Callable
 
-from config import DATA_DIR
+from config import DATA_DIR, SCRAPER_SETTINGS
 from database import db
+from http_cache import page_cache
+from http_client import http_client
+from rate_limiter import shared_limiter
+from results_parser import make_soup
 
 
 # Rankings cache file
@@ -23,6 +26,9 @@ RANKINGS_MAPPINGS_FILE = DATA_DIR / "rankings_name_mappings.json"
 # File to log unmatched players
 UNMATCHED_PLAYERS_FILE = DATA_DIR / "unmatched_players.json"
 
+RANKINGS_PAGE_SIZE = 100  # Players per rankings page (approximate)
+MAX_RANKINGS_PAGES = 30   # Safety limit per tour
+
 
 def load_rankings_mappings() -> Dict[str, str]:
     """Load mappings from DB names to rankings names."""
@@ -111,12 +117,16 @@ class RankingsDownloader:
     BASE_URL = "https://www.tennisexplorer.com"
 
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = http_client.session_for(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         })
+        self.max_in_flight = SCRAPER_SETTINGS["te_max_in_flight"]
+        # Same host as the results scraper, so the same request budget
+        self.rate_limiter = shared_limiter("tennisexplorer.com", SCRAPER_SETTINGS["te_requests_per_second"],
+                                           SCRAPER_SETTINGS["te_burst"])
+        self.cache = page_cache
 
     def fetch_rankings_page(self, tour: str = "atp", page: int = 1) -> List[Dict]:
         """
@@ -141,22 +151,35 @@ class RankingsDownloader:
             url += f"?page={page}"
 
         try:
-            response = self.session.get(url, timeout=30)
-            if response.status_code != 200:
-                print(f"Failed to fetch {tour} rankings page {page}: {response.status_code}")
-                return rankings
+            # Rankings pages change once a day - serve repeats from the page cache
+            cached = self.cache.lookup(url)
+            if cached and cached['fresh']:
+                html = cached['body']
+            else:
+                response = self.session.get(url, timeout=30,
+                                            headers=self.cache.conditional_headers(cached),
+                                            limiter=self.rate_limiter)
+                if response.status_code == 304 and cached:
+                    self.cache.touch(url, cached)
+                    html = cached['body']
+                elif response.status_code != 200:
+                    print(f"Failed to fetch {tour} rankings page {page}: {response.status_code}")
+                    return rankings
+                else:
+                    html = response.text
+                    self.cache.store(url, html, response.headers)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(html, tables_only=True)
 
             # Find ranking table rows
             # Tennis Explorer uses table rows with player data
-            tables = soup.select('table')
+            tables = soup.find_all('table')
 
             for table in tables:
-                rows = table.select('tr')
+                rows = table.find_all('tr')
 
                 for row in rows:
-                    cells = row.select('td')
+                    cells = row.find_all('td')
                     if len(cells) < 4:
                         continue
 
@@ -225,44 +248,62 @@ class RankingsDownloader:
         Returns:
             List of all ranking entries
         """
-        all_rankings = []
-        page = 1
-        players_per_page = 100  # Approximate
-
-        while True:
-            if progress_callback:
-                progress_callback(f"Fetching {tour.upper()} rankings page {page}...")
+        return self._fetch_tours([tour], max_rank, progress_callback)[tour]
 
-            page_rankings = self.fetch_rankings_page(tour, page)
-
-            if not page_rankings:
-                break
-
-            all_rankings.extend(page_rankings)
-
-            # Check if we've reached our target
-            max_rank_on_page = max(r['rank'] for r in page_rankings)
-            if max_rank_on_page >= max_rank:
-                # Filter to only include up to max_rank
-                all_rankings = [r for r in all_rankings if r['rank'] <= max_rank]
-                break
+    def _fetch_tours(self, tours: List[str], max_rank: int,
+                     progress_callback: Callable = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch the rankings pages of several tours concurrently.
 
-            page += 1
-            time.sleep(0.5)  # Be respectful to the server
+        All pages expected to cover max_rank are requested at once (paced by
+        the shared rate limiter). If ties push max_rank past the last page,
+        further pages are fetched one at a time.
 
-            # Safety limit
-            if page > 30:
-                break
+        Returns:
+            Dict of tour -> ranking entries in rank order
+        """
+        first_pages = min(MAX_RANKINGS_PAGES, max(1, -(-max_rank // RANKINGS_PAGE_SIZE)))
+        pages = {tour: {} for tour in tours}
+        jobs = [(tour, page) for tour in tours for page in range(1, first_pages + 1)]
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            while jobs:
+                futures = {executor.submit(self.fetch_rankings_page, tour, page): (tour, page)
+                           for tour, page in jobs}
+                for done, future in enumerate(as_completed(futures), 1):
+                    tour, page = futures[future]
+                    pages[tour][page] = future.result()
+                    if progress_callback:
+                        progress_callback(f"Fetched {tour.upper()} rankings page {page} "
+                                          f"({done}/{len(futures)})")
+
+                jobs = []
+                for tour in tours:
+                    last_page = max(pages[tour])
+                    contiguous = all(pages[tour].get(p) for p in range(1, last_page + 1))
+                    if (contiguous and last_page < MAX_RANKINGS_PAGES
+                            and max(r['rank'] for r in pages[tour][last_page]) < max_rank):
+                        jobs.append((tour, last_page + 1))
+
+        results = {}
+        for tour in tours:
+            all_rankings = []
+            # Pages after the first empty one are past the end of the list
+            for page in sorted(pages[tour]):
+                if not pages[tour][page]:
+                    break
+                all_rankings.extend(pages[tour][page])
+            results[tour] = [r for r in all_rankings if r['rank'] <= max_rank]
 
-        if progress_callback:
-            progress_callback(f"Fetched {len(all_rankings)} {tour.upper()} rankings")
+            if progress_callback:
+                progress_callback(f"Fetched {len(results[tour])} {tour.upper()} rankings")
 
-        return all_rankings
+        return results
 
     def download_all_rankings(self, max_rank: int = 2000,
                              progress_callback: Callable = None) -> Dict:
         """
-        Download both ATP and WTA rankings.
+        Download both ATP and WTA rankings (fetched concurrently).
 
         Args:
             max_rank: Maximum rank to fetch for each tour
@@ -278,17 +319,9 @@ class RankingsDownloader:
             'max_rank': max_rank
         }
 
-        # Fetch ATP
         if progress_callback:
-            progress_callback("Downloading ATP rankings...")
-        result['atp'] = self.fetch_all_rankings('atp', max_rank, progress_callback)
-
-        time.sleep(1)
-
-        # Fetch WTA
-        if progress_callback:
-            progress_callback("Downloading WTA rankings...")
-        result['wta'] = self.fetch_all_rankings('wta', max_rank, progress_callback)
+            progress_callback("Downloading ATP and WTA rankings...")
+        result.update(self._fetch_tours(['atp', 'wta'], max_rank, progress_callback))
 
         return result
 
@@ -351,143 +384,104 @@ class RankingsDownloader:
         # Load custom name mappings (DB name -> Rankings name)
         custom_mappings = load_rankings_mappings()
 
-        # Build a lookup of all rankings by name variations
-        rankings_lookup = {}
-
-        def add_name_variations(name: str, rank: int, points: int, tour: str):
-            """Add various name formats to lookup."""
-            name_lower = name.lower().strip()
-            rankings_lookup[name_lower] = (rank, points, tour)
-
-            # Also add "LastName FirstName" format
-            parts = name.split()
-            if len(parts) >= 2:
-                reversed_name = f"{parts[-1]} {' '.join(parts[:-1])}".lower()
-                rankings_lookup[reversed_name] = (rank, points, tour)
-
-                # Last name + first initial for more reliable matching
-                last_name = parts[-1].lower()
-                first_initial = parts[0][0].lower() if parts[0] else ''
-                key = f"_last_{last_name}_{first_initial}"
-                if key not in rankings_lookup:
-                    rankings_lookup[key] = (rank, points, tour, name)
-
-            # Add truncated versions (for DB names that got cut off)
-            # e.g., "Matheus Pucinelli De Almeida" -> also match "Matheus Pucinelli De Al"
-            if len(name_lower) > 15:
-                for length in [15, 18, 20, 22, 25]:
-                    if len(name_lower) > length:
-                        truncated = name_lower[:length]
-                        if truncated not in rankings_lookup:
-                            rankings_lookup[truncated] = (rank, points, tour)
-
-        # Build lookup from ATP rankings
-        for r in rankings.get('atp', []):
-            add_name_variations(r['name'], r['rank'], r.get('points'), 'ATP')
-
-        # Build lookup from WTA rankings
-        for r in rankings.get('wta', []):
-            add_name_variations(r['name'], r['rank'], r.get('points'), 'WTA')
+        # (name, rank, points, tour) in rank order, ATP first
+        entries = [(r['name'], r['rank'], r.get('points'), tour.upper())
+                   for tour in ('atp', 'wta') for r in rankings.get(tour, [])]
 
-        if progress_callback:
-            progress_callback(f"Built lookup with {len(rankings_lookup)} name variations")
+        rankings_lookup = {}     # lower-cased rankings name -> entry
+        last_initial_lookup = {}  # "last_name first_initial" -> entry
+        for entry in entries:
+            name = entry[0]
+            rankings_lookup.setdefault(name.lower().strip(), entry)
+            parts = name.lower().split()
+            if len(parts) >= 2 and parts[0]:
+                last_initial_lookup.setdefault(f"{parts[-1]} {parts[0][0]}", entry)
 
         # Get all players from database
         all_players = db.get_all_players()
+        player_ids = {p['id'] for p in all_players}
 
         if progress_callback:
-            progress_callback(f"Updating {len(all_players)} players...")
-
-        updated_count = 0
+            progress_callback(f"Matching {len(entries)} ranked names to {len(all_players)} players...")
+
+        matched = {}  # player_id -> entry
+
+        # Custom mappings take precedence
+        for player in all_players:
+            mapped_name = custom_mappings.get((player.get('name') or '').strip())
+            if mapped_name and mapped_name.lower() in rankings_lookup:
+                matched[player['id']] = rankings_lookup[mapped_name.lower()]
+
+        # Rankings names through the shared name resolver: cached resolutions
+        # plus an in-memory exact/reversed index (no per-name fuzzy queries)
+        resolved = db.resolve_player_names([e[0] for e in entries], source='rankings',
+                                           name_index=db.build_name_index(), exhaustive=False)
+        for entry in entries:
+            player = resolved.get(entry[0])
+            if player and player['id'] in player_ids and player['id'] not in matched:
+                matched[player['id']] = entry
+
+        # DB-side fallbacks for names the resolver can't see
         unmatched_players = []
-
-        for i, player in enumerate(all_players):
-            player_name_orig = player.get('name', '').strip()
-            player_name = player_name_orig.lower()
+        unranked_ids = []
+        prefix_lookups = {}
+        for player in all_players:
             player_id = player['id']
+            if player_id in matched:
+                continue
+            player_name_orig = (player.get('name') or '').strip()
+            player_name = player_name_orig.lower()
 
-            found = False
-
-            # Try custom mapping first (DB name -> Rankings name)
-            if player_name_orig in custom_mappings:
-                mapped_name = custom_mappings[player_name_orig].lower()
-                if mapped_name in rankings_lookup:
-                    rank, points, tour = rankings_lookup[mapped_name][:3]
-                    db.update_player_ranking(player_id, rank, points)
-                    if tour == 'ATP':
-                        stats['atp_updated'] += 1
-                    else:
-                        stats['wta_updated'] += 1
-                    updated_count += 1
-                    found = True
-
-            # Try exact match
-            if not found and player_name in rankings_lookup:
-                rank, points, tour = rankings_lookup[player_name][:3]
-                db.update_player_ranking(player_id, rank, points)
-                if tour == 'ATP':
-                    stats['atp_updated'] += 1
-                else:
-                    stats['wta_updated'] += 1
-                updated_count += 1
-                found = True
-
-            # Try prefix match (DB name might be truncated)
+            # Prefix match (DB name might be truncated)
             # e.g., "matheus pucinelli de al" should match "matheus pucinelli de almeida"
-            if not found and len(player_name) >= 15:
-                for rankings_name, value in rankings_lookup.items():
-                    if not rankings_name.startswith('_'):  # Skip special keys
-                        if rankings_name.startswith(player_name):
-                            rank, points, tour = value[:3]
-                            db.update_player_ranking(player_id, rank, points)
-                            if tour == 'ATP':
-                                stats['atp_updated'] += 1
-                            else:
-                                stats['wta_updated'] += 1
-                            updated_count += 1
-                            found = True
-                            break
-
-            # Try last name + first initial match for players not found
-            if not found:
+            entry = None
+            if len(player_name) >= 15:
+                length = len(player_name)
+                if length not in prefix_lookups:
+                    prefix_lookups[length] = {}
+                    for rankings_name, ranked in rankings_lookup.items():
+                        prefix_lookups[length].setdefault(rankings_name[:length], ranked)
+                entry = prefix_lookups[length].get(player_name)
+
+            # Last name + first initial
+            if entry is None:
                 parts = player_name.split()
-                if len(parts) >= 2:
-                    last_name = parts[-1].lower()
-                    first_initial = parts[0][0].lower() if parts[0] else ''
-                    last_key = f"_last_{last_name}_{first_initial}"
-                    if last_key in rankings_lookup:
-                        entry = rankings_lookup[last_key]
-                        rank, points, tour = entry[:3]
-                        db.update_player_ranking(player_id, rank, points)
-                        if tour == 'ATP':
-                            stats['atp_updated'] += 1
-                        else:
-                            stats['wta_updated'] += 1
-                        updated_count += 1
-                        found = True
+                if len(parts) >= 2 and parts[0]:
+                    entry = last_initial_lookup.get(f"{parts[-1]} {parts[0][0]}")
+
+            if entry is not None:
+                matched[player_id] = entry
+                continue
 
             # Set default rank for players not found in rankings
-            if not found:
-                if set_default_for_unranked:
-                    # Set default rank for any player not in the rankings list
-                    # This ensures players ranked beyond 1500 get a reasonable default
-                    db.update_player_ranking(player_id, DEFAULT_RANK)
-                    stats['set_to_default'] += 1
-                    updated_count += 1
-
-                    # Track unmatched players (only those with reasonable names)
-                    if len(player_name_orig) > 3 and ' ' in player_name_orig:
-                        unmatched_players.append({
-                            'id': player_id,
-                            'name': player_name_orig,
-                            'current_rank': DEFAULT_RANK
-                        })
-                else:
-                    stats['not_found'] += 1
+            if set_default_for_unranked:
+                # This ensures players ranked beyond 1500 get a reasonable default
+                unranked_ids.append(player_id)
+                stats['set_to_default'] += 1
+
+                # Track unmatched players (only those with reasonable names)
+                if len(player_name_orig) > 3 and ' ' in player_name_orig:
+                    unmatched_players.append({
+                        'id': player_id,
+                        'name': player_name_orig,
+                        'current_rank': DEFAULT_RANK
+                    })
+            else:
+                stats['not_found'] += 1
 
-            # Progress update every 100 players
-            if i % 100 == 0 and progress_callback:
-                progress_callback(f"Updated {updated_count} players...")
+        for name, rank, points, tour in matched.values():
+            if tour == 'ATP':
+                stats['atp_updated'] += 1
+            else:
+                stats['wta_updated'] += 1
+
+        # All rank changes and rankings_history rows in one transaction
+        if progress_callback:
+            progress_callback(f"Writing {len(matched)} rankings...")
+        ranking_date = (rankings.get('downloaded_at') or datetime.now().isoformat())[:10]
+        stats['changed'] = db.apply_rankings(
+            [(player_id, rank, points) for player_id, (_, rank, points, _) in matched.items()],
+            ranking_date, unranked_ids=unranked_ids, default_rank=DEFAULT_RANK)
 
         # Save unmatched players for review (limit to 500 most relevant)
         # Sort by name length (shorter names more likely to be real players)
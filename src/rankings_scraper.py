@@ -2,11 +2,11 @@
 Rankings Scraper - Fetch current ATP and WTA rankings
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
 from typing import List, Dict, Optional
 from database import db
+from http_client import http_client
 
 
 class RankingsScraper:
@@ -24,8 +24,7 @@ class RankingsScraper:
     }
 
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(self.HEADERS)
+        self.session = http_client.session_for(headers=self.HEADERS)
 
     def scrape_atp_rankings(self, max_rank: int = 500) -> List[Dict]:
         """Scrape ATP rankings from Tennis Explorer."""
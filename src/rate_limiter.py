@@ -0,0 +1,65 @@
+"""
+Tennis Betting System - Rate Limiter
+Thread-safe token bucket for polite scraping
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens per
+second. Each request takes one token, blocking until one is available, so
+any number of worker threads together stay within the per-host budget.
+Requests that cost more than others (e.g. Betfair calls, which are
+weighted by how much data they ask for) take their weight in tokens.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket limiter shared between worker threads."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens if they are available, without waiting."""
+        tokens = min(float(tokens), self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1):
+        """Take tokens (a request's weight), sleeping until they are available."""
+        tokens = min(float(tokens), self.capacity)  # A request heavier than the bucket waits for a full one
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def shared_limiter(host: str, rate: float, burst: int = 1) -> TokenBucket:
+    """Bucket for a host, shared by every scraper that requests from it."""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(rate, burst)
+            _limiters[host] = limiter
+        return limiter
@@ -0,0 +1,234 @@
+"""
+Tennis Betting System - Player Refresh Scheduler
+Background Tennis Abstract refreshes ordered by when players are on court
+
+Players are queued by (imminent?, next match start, last update): someone
+starting in 20 minutes is refreshed before anyone playing tomorrow, and
+players without an upcoming match (recent results only) go last, stalest
+first. A player is only queued once their data is older than the allowed
+age, which is tighter for imminent matches. A small worker pool drains the
+queue; the queue is rebuilt periodically and whenever new matches are
+captured (see requeue).
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from config import REFRESH_SCHEDULER_SETTINGS
+from database import db, TennisDatabase
+
+
+def _parse_start(value: str) -> Optional[datetime]:
+    """Start time from an upcoming_matches date ('YYYY-MM-DD[ HH:MM:SS]')."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value[:19])
+    except ValueError:
+        return None
+
+
+class PlayerRefreshScheduler:
+    """Priority queue of player refreshes drained by a worker pool."""
+
+    def __init__(self, refresh_func: Callable[[int, str], object],
+                 status_callback: Callable[[str, bool], None] = None,
+                 database: TennisDatabase = None, workers: int = None):
+        self.refresh_func = refresh_func
+        self.status_callback = status_callback
+        self.db = database or db
+        self.workers = workers or REFRESH_SCHEDULER_SETTINGS["workers"]
+        self.running = False
+        self.refreshed = 0
+
+        self._heap = []
+        self._queued: Dict[int, Tuple] = {}  # player_id -> live priority (stale heap entries are skipped)
+        self._names: Dict[int, str] = {}
+        self._in_flight = set()
+        self._imminent = set()               # Imminent players queued or in flight
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._threads = []
+
+    def _set_status(self, text: str, is_updating: bool = False):
+        if self.status_callback:
+            self.status_callback(text, is_updating)
+
+    def start(self) -> bool:
+        """
+        Start the workers and the periodic rescan.
+
+        Returns False without starting while threads from before the last
+        stop() are still finishing an in-flight refresh, so a quick
+        stop/start can't leave two sets of workers running.
+        """
+        if self.running:
+            return True
+        if any(thread.is_alive() for thread in self._threads):
+            return False
+        self.running = True
+        self._threads = [threading.Thread(target=self._scan_loop, daemon=True)]
+        self._threads += [threading.Thread(target=self._worker, daemon=True)
+                          for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        """Stop after in-flight refreshes finish; queued players are dropped."""
+        self.running = False
+        self._wake.set()
+        with self._cond:
+            self._heap.clear()
+            self._queued.clear()
+            self._imminent &= self._in_flight
+            self._cond.notify_all()
+
+    def _candidates(self) -> Dict[int, Tuple[str, Optional[datetime]]]:
+        """player_id -> (name, next start) for players worth keeping fresh."""
+        settings = REFRESH_SCHEDULER_SETTINGS
+        # Betfair start times are stored in UTC
+        now = datetime.utcnow()
+        window_start = now - timedelta(hours=1)  # Matches often start late
+        window_end = now + timedelta(hours=settings["lookahead_hours"])
+
+        candidates = {}
+        for match in self.db.get_upcoming_matches():
+            start = _parse_start(match.get('date'))
+            if start is None or not window_start <= start <= window_end:
+                continue
+            for side in ('player1', 'player2'):
+                player_id = match.get(f'{side}_id')
+                name = match.get(f'{side}_name')
+                if not player_id or not name:
+                    continue
+                current = candidates.get(player_id)
+                if current is None or start < current[1]:
+                    candidates[player_id] = (name, start)
+
+        for match in self.db.get_recent_matches(days=settings["recent_days"]):
+            for side in ('winner', 'loser'):
+                player_id = match.get(f'{side}_id')
+                name = match.get(f'{side}_name')
+                if player_id and name and player_id not in candidates:
+                    candidates[player_id] = (name, None)
+
+        return candidates
+
+    def requeue(self) -> int:
+        """
+        Rebuild the queue from upcoming and recent matches.
+
+        Safe to call from any thread (e.g. right after a Betfair capture).
+        Returns the number of players queued or re-prioritised.
+        """
+        settings = REFRESH_SCHEDULER_SETTINGS
+        candidates = self._candidates()
+        last_updates = self.db.get_ta_update_times(list(candidates))
+
+        now = datetime.now()  # last_ta_update is local time
+        imminent_cutoff = datetime.utcnow() + timedelta(minutes=settings["imminent_minutes"])
+        changed = 0
+
+        with self._cond:
+            for player_id, (name, start) in candidates.items():
+                if player_id in self._in_flight:
+                    continue
+                imminent = start is not None and start <= imminent_cutoff
+                max_age = settings["imminent_max_age_hours" if imminent else "max_age_hours"]
+                last_update = last_updates.get(player_id)
+                if last_update is not None and now - last_update < timedelta(hours=max_age):
+                    continue
+
+                priority = (
+                    0 if imminent else 1,
+                    start.timestamp() if start else float('inf'),
+                    last_update.timestamp() if last_update else 0.0,
+                )
+                if self._queued.get(player_id) == priority:
+                    continue
+                self._queued[player_id] = priority
+                self._names[player_id] = name
+                heapq.heappush(self._heap, (priority, next(self._counter), player_id))
+                if imminent:
+                    self._imminent.add(player_id)
+                changed += 1
+
+            if changed:
+                self._cond.notify_all()
+
+        if changed:
+            self._set_status(f"Queued {len(self._queued)} players for refresh", True)
+        return changed
+
+    def pending(self) -> int:
+        """Players queued or being refreshed."""
+        with self._cond:
+            return len(self._queued) + len(self._in_flight)
+
+    def wait_for_imminent(self, timeout: float = None) -> bool:
+        """
+        Block until every imminent player has been refreshed.
+
+        Returns False if the timeout expired (or the scheduler stopped) first.
+        """
+        if timeout is None:
+            timeout = REFRESH_SCHEDULER_SETTINGS["auto_cycle_wait_seconds"]
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._imminent and self.running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return not self._imminent
+
+    def _next_player(self) -> Optional[Tuple[int, str]]:
+        """Pop the highest-priority player, waiting while the queue is empty."""
+        with self._cond:
+            while self.running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                priority, _, player_id = heapq.heappop(self._heap)
+                if self._queued.get(player_id) != priority:
+                    continue  # Superseded by a later requeue
+                del self._queued[player_id]
+                self._in_flight.add(player_id)
+                return player_id, self._names.pop(player_id, '')
+            return None
+
+    def _worker(self):
+        while self.running:
+            job = self._next_player()
+            if job is None:
+                break
+            player_id, name = job
+            self._set_status(f"Updating {name} ({self.pending()} pending)", True)
+            try:
+                self.refresh_func(player_id, name)
+                self.refreshed += 1
+            except Exception as e:
+                print(f"Error updating {name}: {e}")
+            finally:
+                with self._cond:
+                    self._in_flight.discard(player_id)
+                    self._imminent.discard(player_id)
+                    idle = not self._queued and not self._in_flight
+                    self._cond.notify_all()
+            if idle and self.running:
+                self._set_status(f"Updated {self.refreshed} players", False)
+
+    def _scan_loop(self):
+        while self.running:
+            try:
+                self.requeue()
+            except Exception as e:
+                print(f"Refresh scheduler scan error: {e}")
+            self._wake.wait(REFRESH_SCHEDULER_SETTINGS["rescan_minutes"] * 60)
+            self._wake.clear()
@@ -0,0 +1,274 @@
+"""
+Tennis Betting System - Results Page Parser
+Lean parsing of Tennis Explorer results pages
+
+Results pages are parsed with lxml when it is installed (falling back to
+the stdlib html.parser), and only <table> elements are built into the
+tree. Rows are walked with find/find_all and precompiled regexes instead
+of CSS selectors, and each match comes out as a compact ResultRow tuple.
+
+Run as a script to benchmark against the cached page corpus:
+    python results_parser.py [--limit N]
+It reports pages/second for the lean parser and for the previous parser
+(full html.parser tree walked with CSS selectors), and checks that both
+produce identical rows.
+"""
+
+import re
+import time
+from collections import namedtuple
+from typing import Iterator, List
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from tournament_classifier import get_surface
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+_TABLES_ONLY = SoupStrainer('table')
+
+PLAYER_HREF = re.compile(r'/player/')
+SEED_SUFFIX = re.compile(r'\(\d+\)$')
+SET_SCORE = re.compile(r'^\d{1,2}$')
+ROW_DATE = re.compile(r'^(\d{1,2})\.(\d{1,2})\.$')
+STARTS_WITH_DIGIT = re.compile(r'^\d')
+
+ResultRow = namedtuple('ResultRow', ['winner_name', 'loser_name', 'tournament',
+                                     'surface', 'date', 'score', 'year'])
+
+
+def make_soup(html: str, tables_only: bool = False, parser: str = None) -> BeautifulSoup:
+    """Parse HTML with the fastest available backend, optionally keeping only tables."""
+    return BeautifulSoup(html, parser or HTML_PARSER,
+                         parse_only=_TABLES_ONLY if tables_only else None)
+
+
+def _player_link(row):
+    return row.find('a', href=PLAYER_HREF)
+
+
+def _set_scores(row) -> List[str]:
+    """Cell texts that look like set scores (the first one is total sets won)."""
+    scores = []
+    for cell in row.find_all('td'):
+        text = cell.get_text(strip=True)
+        if SET_SCORE.match(text):
+            scores.append(text)
+    return scores
+
+
+def parse_results_page(html: str, year: int, month: int, day: int = None,
+                       soup: BeautifulSoup = None) -> List[ResultRow]:
+    """
+    Parse a Tennis Explorer results page into ResultRow tuples.
+
+    Args:
+        html: Page HTML
+        year: Year for date construction
+        month: Month for date construction
+        day: Day (if known) for date construction
+        soup: Pre-built soup
+    """
+    return list(iter_results_page(html, year, month, day, soup))
+
+
+def iter_results_page(html: str, year: int, month: int, day: int = None,
+                      soup: BeautifulSoup = None) -> Iterator[ResultRow]:
+    """Yield ResultRow tuples as they are parsed, so callers can keep rows before a failure."""
+    if soup is None:
+        soup = make_soup(html, tables_only=True)
+
+    current_tournament = ""
+    current_surface = "Hard"
+    # If day is provided (day-specific URL), use it as the default date
+    if day:
+        current_date = f"{year}-{month:02d}-{day:02d}"
+    else:
+        current_date = f"{year}-{month:02d}-01"
+
+    for table in soup.find_all('table'):
+        rows = table.find_all('tr')
+        i = 0
+
+        while i < len(rows):
+            row = rows[i]
+
+            # Tournament header - has t-name but no player link
+            t_name = row.find(['td', 'th'], class_='t-name')
+            player_link = _player_link(row)
+            if t_name and not player_link:
+                text = t_name.get_text(strip=True)
+                # Skip if it looks like a date
+                if not STARTS_WITH_DIGIT.match(text):
+                    current_tournament = text
+                    current_surface = get_surface(current_tournament)
+                i += 1
+                continue
+
+            # Date in first cell (format like "18.01.")
+            first_cell = row.find('td')
+            if first_cell:
+                date_match = ROW_DATE.match(first_cell.get_text(strip=True))
+                if date_match:
+                    parsed_day, month_num = date_match.groups()
+                    current_date = f"{year}-{month_num.zfill(2)}-{parsed_day.zfill(2)}"
+
+            # Match rows come in pairs - first row has class 'bott' and the winner info
+            if 'bott' in row.get('class', []) and player_link and i + 1 < len(rows):
+                next_row = rows[i + 1]
+                player2_link = _player_link(next_row)
+
+                if player2_link:
+                    try:
+                        # Player names without seeding numbers like "(20)"
+                        player1_name = SEED_SUFFIX.sub('', player_link.get_text(strip=True)).strip()
+                        player2_name = SEED_SUFFIX.sub('', player2_link.get_text(strip=True)).strip()
+
+                        # Skip doubles
+                        if '/' in player1_name or '/' in player2_name:
+                            i += 2
+                            continue
+
+                        p1_scores = _set_scores(row)
+                        p2_scores = _set_scores(next_row)
+                        p1_sets = int(p1_scores[0]) if p1_scores and p1_scores[0].isdigit() else 0
+                        p2_sets = int(p2_scores[0]) if p2_scores and p2_scores[0].isdigit() else 0
+
+                        # Winner has more sets; set scores follow the total
+                        if p1_sets > p2_sets:
+                            winner_name, loser_name = player1_name, player2_name
+                            winner_scores, loser_scores = p1_scores[1:], p2_scores[1:]
+                        else:
+                            winner_name, loser_name = player2_name, player1_name
+                            winner_scores, loser_scores = p2_scores[1:], p1_scores[1:]
+
+                        score = " ".join(f"{w}-{l}" for w, l in zip(winner_scores, loser_scores))
+
+                        yield ResultRow(winner_name, loser_name, current_tournament,
+                                        current_surface, current_date, score, year)
+                        i += 2
+                        continue
+
+                    except Exception:
+                        pass
+
+            i += 1
+
+
+def _parse_results_page_baseline(html: str, year: int, month: int, day: int = None) -> List[ResultRow]:
+    """The parser this module replaced: full html.parser tree walked with CSS selectors.
+
+    Kept only as the benchmark baseline.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    matches = []
+    current_tournament = ""
+    current_surface = "Hard"
+    current_date = f"{year}-{month:02d}-{day:02d}" if day else f"{year}-{month:02d}-01"
+
+    for table in soup.select('table'):
+        rows = table.select('tr')
+        i = 0
+        while i < len(rows):
+            row = rows[i]
+            t_name = row.select_one('td.t-name, th.t-name')
+            player_link = row.select_one('a[href*="/player/"]')
+            if t_name and not player_link:
+                text = t_name.get_text(strip=True)
+                if not re.match(r'^\d', text):
+                    current_tournament = text
+                    current_surface = get_surface(current_tournament)
+                i += 1
+                continue
+
+            cells = row.select('td')
+            if cells:
+                date_match = re.match(r'^(\d{1,2})\.(\d{1,2})\.$', cells[0].get_text(strip=True))
+                if date_match:
+                    parsed_day, month_num = date_match.groups()
+                    current_date = f"{year}-{month_num.zfill(2)}-{parsed_day.zfill(2)}"
+
+            if 'bott' in row.get('class', []) and player_link and i + 1 < len(rows):
+                next_row = rows[i + 1]
+                player2_link = next_row.select_one('a[href*="/player/"]')
+                if player2_link:
+                    try:
+                        player1_name = re.sub(r'\(\d+\)$', '', player_link.get_text(strip=True)).strip()
+                        player2_name = re.sub(r'\(\d+\)$', '', player2_link.get_text(strip=True)).strip()
+                        if '/' in player1_name or '/' in player2_name:
+                            i += 2
+                            continue
+
+                        p1_scores = [c.get_text(strip=True) for c in row.select('td')
+                                     if re.match(r'^\d{1,2}$', c.get_text(strip=True))]
+                        p2_scores = [c.get_text(strip=True) for c in next_row.select('td')
+                                     if re.match(r'^\d{1,2}$', c.get_text(strip=True))]
+                        p1_sets = int(p1_scores[0]) if p1_scores and p1_scores[0].isdigit() else 0
+                        p2_sets = int(p2_scores[0]) if p2_scores and p2_scores[0].isdigit() else 0
+                        if p1_sets > p2_sets:
+                            winner_name, loser_name = player1_name, player2_name
+                            winner_scores, loser_scores = p1_scores[1:], p2_scores[1:]
+                        else:
+                            winner_name, loser_name = player2_name, player1_name
+                            winner_scores, loser_scores = p2_scores[1:], p1_scores[1:]
+                        score = " ".join(f"{w}-{l}" for w, l in zip(winner_scores, loser_scores))
+
+                        matches.append(ResultRow(winner_name, loser_name, current_tournament,
+                                                 current_surface, current_date, score, year))
+                        i += 2
+                        continue
+                    except Exception:
+                        pass
+            i += 1
+
+    return matches
+
+
+def benchmark(limit: int = None):
+    """Parse every cached results page with both backends and compare."""
+    from http_cache import page_cache
+    from urllib.parse import parse_qs, urlparse
+
+    pages = []
+    for url, html in page_cache.iter_pages('/results/'):
+        query = parse_qs(urlparse(url).query)
+        try:
+            year = int(query['year'][0])
+            month = int(query['month'][0])
+            day = int(query['day'][0]) if 'day' in query else None
+        except (KeyError, ValueError):
+            continue
+        pages.append((html, year, month, day))
+        if limit and len(pages) >= limit:
+            break
+
+    if not pages:
+        print("No cached results pages - run a refresh first to build the corpus.")
+        return
+
+    def run(label, parse):
+        start = time.perf_counter()
+        outputs = [parse(html, y, m, d) for html, y, m, d in pages]
+        elapsed = time.perf_counter() - start
+        rows = sum(len(o) for o in outputs)
+        print(f"{label:<32} {len(pages) / elapsed:8.1f} pages/s  ({rows} matches, {elapsed:.2f}s)")
+        return outputs
+
+    print(f"Benchmarking {len(pages)} cached results pages (backend: {HTML_PARSER})")
+    baseline = run("html.parser, CSS selectors", _parse_results_page_baseline)
+    lean = run(f"{HTML_PARSER}, tables only", parse_results_page)
+
+    mismatches = sum(1 for a, b in zip(baseline, lean) if a != b)
+    print(f"Identical output: {len(pages) - mismatches}/{len(pages)} pages")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Benchmark the results page parser")
+    arg_parser.add_argument("--limit", type=int, default=None, help="Max pages to parse")
+    benchmark(arg_parser.parse_args().limit)
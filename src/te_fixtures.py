@@ -0,0 +1,513 @@
+"""
+Tennis Betting System - Tennis Explorer Fixtures
+Recorded page corpus, stand-in server and scraper throughput benchmark
+
+The corpus is a directory of gzipped Tennis Explorer pages (results,
+rankings and player pages) with an index.json holding each page's URL
+path, kind, status, size, fetch time and the details needed to replay it
+(tour, date, player slug...). FixtureServer serves the corpus on
+localhost with configurable latency, so the scrapers can be pointed at it
+(scraper.BASE_URL = server.base_url) and run without touching the site.
+
+Results pages are requested by calendar date, so the server shifts dates:
+a request for a month N months after the recording month gets the corpus
+page N months earlier. Days the corpus doesn't have get an empty results
+page (counted as misses).
+
+Usage:
+    python te_fixtures.py record [--months 1] [--players 20]
+    python te_fixtures.py bench [--latency-ms 50] [--save run.json] [--compare run.json]
+    python te_fixtures.py serve [--port 8765]
+
+The benchmark runs fetch_recent_results -> import_results_to_database
+against the stand-in server, importing into a scratch copy of the database
+(players kept, matches cleared), and reports pages/s, rows parsed/s,
+name-resolution hit rate and DB insert rate.
+"""
+
+import gzip
+import hashlib
+import json
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from config import DATA_DIR, DB_PATH
+
+FIXTURES_DIR = DATA_DIR / "fixtures" / "tennis_explorer"
+
+PLAYER_LINK = re.compile(r'href="/player/([^/"]+)/"[^>]*>([^<]+)</a>')
+EMPTY_RESULTS_PAGE = "<html><body><table class=\"result\"></table></body></html>"
+
+# Metrics where a lower value is better (everything else: higher is better)
+LOWER_IS_BETTER = ('fetch_s', 'import_s', 'player_s', 'rankings_s')
+
+
+def _page_key(path: str, query: str = '') -> str:
+    """Lookup key for a request: path plus sorted query string."""
+    params = sorted(parse_qs(query).items())
+    return path + ('?' + urlencode([(k, v[0]) for k, v in params]) if params else '')
+
+
+def _shift_months(year: int, month: int, months: int):
+    index = year * 12 + (month - 1) - months
+    return index // 12, index % 12 + 1
+
+
+# =============================================================================
+# Corpus
+# =============================================================================
+
+class FixtureCorpus:
+    """On-disk page corpus: pages/<sha>.html.gz plus index.json."""
+
+    def __init__(self, corpus_dir: Path = FIXTURES_DIR):
+        self.corpus_dir = Path(corpus_dir)
+        self.index_path = self.corpus_dir / "index.json"
+        self.index = {'recorded_on': None, 'pages': {}}
+        if self.index_path.exists():
+            self.index = json.loads(self.index_path.read_text(encoding='utf-8'))
+
+    @property
+    def recorded_on(self) -> Optional[date]:
+        value = self.index.get('recorded_on')
+        return date.fromisoformat(value) if value else None
+
+    def pages(self, kind: str = None) -> List[Dict]:
+        """Index entries, optionally only one kind ('results', 'player', 'rankings')."""
+        return [meta for meta in self.index['pages'].values() if kind is None or meta['kind'] == kind]
+
+    def add(self, url: str, body: str, kind: str, status: int = 200, content_type: str = None,
+            elapsed_ms: float = None, **details):
+        parsed = urlparse(url)
+        key = _page_key(parsed.path, parsed.query)
+        filename = hashlib.sha256(key.encode('utf-8')).hexdigest() + ".html.gz"
+        path = self.corpus_dir / "pages" / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(body)
+        self.index['pages'][key] = {
+            'key': key,
+            'file': filename,
+            'kind': kind,
+            'status': status,
+            'content_type': content_type or 'text/html; charset=utf-8',
+            'bytes': len(body.encode('utf-8')),
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_ms': round(elapsed_ms, 1) if elapsed_ms is not None else None,
+            **details,
+        }
+
+    def load(self, key: str) -> Optional[str]:
+        meta = self.index['pages'].get(key)
+        if meta is None:
+            return None
+        with gzip.open(self.corpus_dir / "pages" / meta['file'], 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def save(self, recorded_on: date = None):
+        self.index['recorded_on'] = (recorded_on or date.today()).isoformat()
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path.write_text(json.dumps(self.index, indent=1), encoding='utf-8')
+
+
+# =============================================================================
+# Recorder
+# =============================================================================
+
+class FixtureRecorder:
+    """Record live Tennis Explorer pages into a corpus (rate limited like the scraper)."""
+
+    def __init__(self, corpus: FixtureCorpus = None, progress_callback=None):
+        from tennis_explorer_scraper import TennisExplorerScraper
+
+        self.corpus = corpus or FixtureCorpus()
+        self.scraper = TennisExplorerScraper()
+        self.progress_callback = progress_callback or print
+
+    def _record(self, url: str, kind: str, **details) -> Optional[str]:
+        start = time.perf_counter()
+        try:
+            response = self.scraper.session.get(url, timeout=30, limiter=self.scraper.rate_limiter)
+        except Exception as e:
+            self.progress_callback(f"  Failed {url}: {e}")
+            return None
+        if response.status_code != 200:
+            self.progress_callback(f"  Failed {url}: HTTP {response.status_code}")
+            return None
+        self.corpus.add(url, response.text, kind, response.status_code,
+                        response.headers.get('Content-Type'),
+                        (time.perf_counter() - start) * 1000, **details)
+        return response.text
+
+    def record(self, months: int = 1, tour_types: List[str] = None, rankings_pages: int = 2,
+               players: int = 20) -> Dict:
+        """
+        Record results pages for every day of the last `months` months, the
+        first rankings pages per tour, and this year's page for up to
+        `players` players seen in the results.
+        """
+        base = self.scraper.BASE_URL
+        tour_types = tour_types or ["atp-single", "wta-single"]
+        today = date.today()
+        counts = {'results': 0, 'rankings': 0, 'player': 0}
+
+        seen_players = {}
+        for tour_type in tour_types:
+            for offset in range(months):
+                year, month = _shift_months(today.year, today.month, offset)
+                days = self.scraper._month_days(year, month, tour_type)
+                self.progress_callback(f"Recording {tour_type} {year}-{month:02d} ({len(days)} days)...")
+                for _, _, day, _ in days:
+                    url = f"{base}/results/?type={tour_type}&year={year}&month={month:02d}&day={day:02d}"
+                    html = self._record(url, 'results', tour_type=tour_type,
+                                        date=date(year, month, day).isoformat())
+                    if html is None:
+                        continue
+                    counts['results'] += 1
+                    for slug, name in PLAYER_LINK.findall(html):
+                        seen_players.setdefault(slug, name.strip())
+
+        for tour, path in (("atp", "atp-men"), ("wta", "wta-women")):
+            for page in range(1, rankings_pages + 1):
+                url = f"{base}/ranking/{path}/" + (f"?page={page}" if page > 1 else "")
+                if self._record(url, 'rankings', tour=tour, page=page) is not None:
+                    counts['rankings'] += 1
+
+        for slug, name in list(seen_players.items())[:players]:
+            url = f"{base}/player/{slug}/?annual={today.year}"
+            if self._record(url, 'player', slug=slug, player_name=name, year=today.year) is not None:
+                counts['player'] += 1
+
+        self.corpus.save(today)
+        self.progress_callback(f"Recorded {counts['results']} results, {counts['rankings']} rankings "
+                               f"and {counts['player']} player pages to {self.corpus.corpus_dir}")
+        return counts
+
+
+# =============================================================================
+# Stand-in server
+# =============================================================================
+
+class FixtureServer:
+    """Serve a corpus over HTTP on localhost with simulated latency."""
+
+    def __init__(self, corpus: FixtureCorpus = None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 port: int = 0, shift_dates: bool = True):
+        self.corpus = corpus or FixtureCorpus()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.shift_dates = shift_dates
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def _month_offset(self) -> int:
+        recorded = self.corpus.recorded_on
+        if not self.shift_dates or recorded is None:
+            return 0
+        today = date.today()
+        return (today.year - recorded.year) * 12 + today.month - recorded.month
+
+    def resolve(self, path: str, query: str):
+        """(body, status) for a request path and query."""
+        key = _page_key(path, query)
+        body = self.corpus.load(key)
+        if body is not None:
+            return body, 200, True
+
+        if path.startswith('/results'):
+            params = {k: v[0] for k, v in parse_qs(query).items()}
+            offset = self._month_offset()
+            if offset and 'year' in params and 'month' in params:
+                try:
+                    year, month = _shift_months(int(params['year']), int(params['month']), offset)
+                except ValueError:
+                    year, month = None, None
+                if year:
+                    params.update(year=str(year), month=f"{month:02d}")
+                    body = self.corpus.load(_page_key(path, urlencode(params)))
+                    if body is not None:
+                        return body, 200, True
+            # A day outside the corpus looks like a day without matches
+            return EMPTY_RESULTS_PAGE, 200, False
+        return "Not found", 404, False
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                delay = server.latency_ms + (random.uniform(0, server.jitter_ms) if server.jitter_ms else 0)
+                if delay:
+                    time.sleep(delay / 1000)
+                parsed = urlparse(self.path)
+                body, status, hit = server.resolve(parsed.path, parsed.query)
+                data = body.encode('utf-8')
+                with server._lock:
+                    server.stats['requests'] += 1
+                    server.stats['hits' if hit else 'misses'] += 1
+                    server.stats['bytes'] += len(data)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'bytes': 0}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def _scratch_database(work_dir: Path):
+    """Copy of the live database with its players but no matches."""
+    from database import TennisDatabase
+
+    path = work_dir / "bench.db"
+    if Path(DB_PATH).exists():
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(path)
+        src.backup(dst)
+        src.close()
+        dst.execute("DELETE FROM matches")
+        dst.execute("DELETE FROM player_form_state")
+        dst.commit()
+        dst.close()
+    return TennisDatabase(path)
+
+
+def run_benchmark(corpus: FixtureCorpus = None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                  requests_per_second: float = None, max_in_flight: int = None,
+                  progress_callback=None) -> Dict:
+    """
+    Run the scrape -> import pipeline against the stand-in server.
+
+    Args:
+        corpus: Page corpus (default FIXTURES_DIR)
+        latency_ms: Simulated server latency per request
+        jitter_ms: Extra random latency (uniform 0..jitter_ms)
+        requests_per_second: Rate limit (default: unthrottled)
+        max_in_flight: Scraper worker threads (default: SCRAPER_SETTINGS)
+
+    Returns:
+        Dict of metrics (see format_results)
+    """
+    from http_cache import PageCache
+    from rankings_downloader import RankingsDownloader
+    from rate_limiter import TokenBucket
+    from tennis_explorer_scraper import TennisExplorerScraper
+
+    corpus = corpus or FixtureCorpus()
+    log = progress_callback or (lambda msg: None)
+    results_pages = corpus.pages('results')
+    if not results_pages:
+        raise ValueError(f"No results pages in {corpus.corpus_dir} - run 'record' first")
+
+    tours = sorted({meta['tour_type'] for meta in results_pages})
+    recorded = corpus.recorded_on
+    earliest = min(date.fromisoformat(meta['date']) for meta in results_pages)
+    months_back = (recorded.year - earliest.year) * 12 + recorded.month - earliest.month + 1
+
+    work_dir = Path(tempfile.mkdtemp(prefix="te_bench_"))
+    metrics = {'corpus_pages': len(corpus.pages()), 'latency_ms': latency_ms}
+    try:
+        database = _scratch_database(work_dir)
+        limiter = TokenBucket(requests_per_second, 1) if requests_per_second else None
+
+        with FixtureServer(corpus, latency_ms, jitter_ms) as server:
+            scraper = TennisExplorerScraper(database=database)
+            scraper.BASE_URL = server.base_url
+            scraper.cache = PageCache(work_dir / "http_cache", enabled=False)
+            scraper.rate_limiter = limiter
+            if max_in_flight:
+                scraper.max_in_flight = max_in_flight
+
+            # 1. Results pages: fetch + parse
+            log(f"Fetching {months_back} month(s) of {', '.join(tours)} results...")
+            start = time.perf_counter()
+            matches = scraper.fetch_recent_results(months_back=months_back, tour_types=tours)
+            fetch_s = time.perf_counter() - start
+            metrics.update(
+                results_pages=server.stats['requests'],
+                corpus_hits=server.stats['hits'],
+                corpus_misses=server.stats['misses'],
+                rows_parsed=len(matches),
+                fetch_s=fetch_s,
+                pages_per_s=server.stats['requests'] / fetch_s if fetch_s else 0.0,
+                rows_per_s=len(matches) / fetch_s if fetch_s else 0.0,
+            )
+
+            # 2. Import: name resolution + inserts
+            log(f"Importing {len(matches)} matches...")
+            start = time.perf_counter()
+            stats = scraper.import_results_to_database(matches)
+            import_s = time.perf_counter() - start
+            # Players are locked, so a skipped match is exactly one failed lookup
+            lookups = stats['players_matched'] + stats['matches_skipped']
+            metrics.update(
+                import_s=import_s,
+                matches_imported=stats['matches_imported'],
+                name_hit_rate=stats['players_matched'] / lookups if lookups else 0.0,
+                inserts_per_s=stats['matches_imported'] / import_s if import_s else 0.0,
+            )
+
+            # 3. Player pages
+            player_pages = corpus.pages('player')
+            if player_pages:
+                server.reset_stats()
+                start = time.perf_counter()
+                rows = sum(len(scraper.fetch_player_year_matches(meta['slug'], meta['player_name'], meta['year']))
+                           for meta in player_pages)
+                player_s = time.perf_counter() - start
+                metrics.update(player_pages=len(player_pages), player_rows=rows, player_s=player_s,
+                               player_pages_per_s=len(player_pages) / player_s if player_s else 0.0)
+
+            # 4. Rankings pages
+            rankings_pages = corpus.pages('rankings')
+            if rankings_pages:
+                downloader = RankingsDownloader()
+                downloader.BASE_URL = server.base_url
+                downloader.cache = scraper.cache
+                downloader.rate_limiter = limiter
+                start = time.perf_counter()
+                rows = sum(len(downloader.fetch_rankings_page(meta['tour'], meta['page']))
+                           for meta in rankings_pages)
+                rankings_s = time.perf_counter() - start
+                metrics.update(rankings_pages=len(rankings_pages), rankings_rows=rows, rankings_s=rankings_s,
+                               rankings_pages_per_s=len(rankings_pages) / rankings_s if rankings_s else 0.0)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return metrics
+
+
+def format_results(metrics: Dict) -> str:
+    lines = [
+        f"Corpus: {metrics['corpus_pages']} pages, server latency {metrics['latency_ms']:.0f} ms",
+        f"Results pages:   {metrics['results_pages']:>6} in {metrics['fetch_s']:.2f}s  "
+        f"{metrics['pages_per_s']:8.1f} pages/s  ({metrics['corpus_hits']} from corpus, "
+        f"{metrics['corpus_misses']} empty)",
+        f"Rows parsed:     {metrics['rows_parsed']:>6}             {metrics['rows_per_s']:8.1f} rows/s",
+        f"Name resolution: {metrics['name_hit_rate']:>6.1%} hit rate",
+        f"DB inserts:      {metrics['matches_imported']:>6} in {metrics['import_s']:.2f}s  "
+        f"{metrics['inserts_per_s']:8.1f} rows/s",
+    ]
+    if 'player_pages' in metrics:
+        lines.append(f"Player pages:    {metrics['player_pages']:>6} in {metrics['player_s']:.2f}s  "
+                     f"{metrics['player_pages_per_s']:8.1f} pages/s  ({metrics['player_rows']} matches)")
+    if 'rankings_pages' in metrics:
+        lines.append(f"Rankings pages:  {metrics['rankings_pages']:>6} in {metrics['rankings_s']:.2f}s  "
+                     f"{metrics['rankings_pages_per_s']:8.1f} pages/s  ({metrics['rankings_rows']} players)")
+    return "\n".join(lines)
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float = 0.10) -> List[str]:
+    """Metrics that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for key, base in baseline.items():
+        value = current.get(key)
+        if not isinstance(base, (int, float)) or not isinstance(value, (int, float)) or not base:
+            continue
+        if key in LOWER_IS_BETTER:
+            change = (value - base) / base
+        elif key.endswith(('_per_s', '_rate')):
+            change = (base - value) / base
+        else:
+            continue
+        if change > tolerance:
+            regressions.append(f"{key}: {base:.3f} -> {value:.3f} ({change:+.0%} worse)")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    arg_parser = argparse.ArgumentParser(description="Tennis Explorer fixture corpus and benchmark")
+    arg_parser.add_argument("--corpus", default=str(FIXTURES_DIR), help="Corpus directory")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="Record live pages into the corpus")
+    record_cmd.add_argument("--months", type=int, default=1, help="Months of results pages")
+    record_cmd.add_argument("--tours", default="atp-single,wta-single", help="Comma-separated tour types")
+    record_cmd.add_argument("--rankings-pages", type=int, default=2, help="Rankings pages per tour")
+    record_cmd.add_argument("--players", type=int, default=20, help="Player pages to record")
+
+    bench_cmd = commands.add_parser("bench", help="Run the scrape/import benchmark")
+    bench_cmd.add_argument("--latency-ms", type=float, default=50.0, help="Simulated server latency")
+    bench_cmd.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency")
+    bench_cmd.add_argument("--rps", type=float, default=None, help="Rate limit (default: unthrottled)")
+    bench_cmd.add_argument("--workers", type=int, default=None, help="Scraper worker threads")
+    bench_cmd.add_argument("--save", help="Write metrics to this JSON file")
+    bench_cmd.add_argument("--compare", help="Baseline metrics JSON; exit 1 on regressions")
+    bench_cmd.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression (0.10 = 10%%)")
+
+    serve_cmd = commands.add_parser("serve", help="Serve the corpus until interrupted")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    serve_cmd.add_argument("--latency-ms", type=float, default=0.0)
+
+    args = arg_parser.parse_args()
+    fixture_corpus = FixtureCorpus(Path(args.corpus))
+
+    if args.command == "record":
+        FixtureRecorder(fixture_corpus).record(args.months, args.tours.split(","),
+                                               args.rankings_pages, args.players)
+    elif args.command == "serve":
+        fixture_server = FixtureServer(fixture_corpus, args.latency_ms, port=args.port).start()
+        print(f"Serving {len(fixture_corpus.pages())} pages at {fixture_server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            fixture_server.stop()
+    else:
+        result = run_benchmark(fixture_corpus, args.latency_ms, args.jitter_ms, args.rps,
+                               args.workers, progress_callback=print)
+        print(format_results(result))
+        if args.save:
+            Path(args.save).write_text(json.dumps(result, indent=1), encoding='utf-8')
+        if args.compare:
+            found = compare_results(result, json.loads(Path(args.compare).read_text(encoding='utf-8')),
+                                    args.tolerance)
+            for line in found:
+                print(f"REGRESSION {line}")
+            sys.exit(1 if found else 0)
@@ -5,7 +5,6 @@ Allows manual import of match data from specific Tennis Explorer player URLs.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
 from bs4 import BeautifulSoup
 import re
 from typing import List, Dict, Optional
@@ -13,6 +12,7 @@ from datetime import datetime
 
 from config import UI_COLORS
 from database import db
+from http_client import http_client
 from name_matcher import name_matcher
 
 
@@ -494,7 +494,7 @@ class TennisExplorerImportDialog:
     def _scrape_url(self, url: str) -> tuple[List[Dict], str]:
         """Scrape matches from Tennis Explorer URL."""
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http_client.request('GET', url, headers=headers, timeout=15)
 
         if response.status_code != 200:
             raise Exception(f"HTTP {response.status_code}")
@@ -741,6 +741,7 @@ class TennisExplorerImportDialog:
 
         imported = 0
         skipped = 0
+        inserted = []
 
         with db.get_connection() as conn:
             cursor = conn.cursor()
@@ -839,24 +840,24 @@ class TennisExplorerImportDialog:
                 surface = self._guess_surface(match['tournament'])
 
                 # Insert match
-                cursor.execute("""
-                    INSERT OR IGNORE INTO matches (id, tournament, surface, date, round,
-                                        winner_id, winner_name, loser_id, loser_name, score)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    match_id,
-                    match['tournament'],
-                    surface,
-                    match['date'],
-                    match['round'],
-                    winner_id,
-                    winner_name,
-                    loser_id,
-                    loser_name,
-                    match['score']
-                ))
+                row = {
+                    'id': match_id,
+                    'tournament': match['tournament'],
+                    'surface': surface,
+                    'date': match['date'],
+                    'round': match['round'],
+                    'winner_id': winner_id,
+                    'winner_name': winner_name,
+                    'loser_id': loser_id,
+                    'loser_name': loser_name,
+                    'score': match['score'],
+                }
+                if db.insert_result_match(cursor, row):
+                    inserted.append(row)
                 imported += 1
 
+            db.index_imported_matches(conn, inserted)
+
         return imported, skipped
 
     def _guess_surface(self, tournament: str, date_str: str = None) -> str:
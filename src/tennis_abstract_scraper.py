@@ -1,56 +1,68 @@
 """
 Tennis Betting System - Tennis Abstract Scraper
 Fetches recent match data from tennisabstract.com for individual players
+
+Player pages are rendered from a static JS data file (jsmatches/<Name>.js).
+When that file is reachable it is fetched directly over HTTP, which is far
+cheaper than loading the page; otherwise the page is loaded in a pooled
+headless browser (see browser_pool.py).
 """
 
+import json
 import re
-import time
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from browser_pool import chrome_options, get_browser_pool
+from config import BROWSER_POOL_SETTINGS
 from database import db, TennisDatabase
+from http_client import http_client
+from rate_limiter import shared_limiter
+from results_parser import make_soup
+
+_TA_RATE_LIMITER = shared_limiter("tennisabstract.com", BROWSER_POOL_SETTINGS["ta_requests_per_second"], 2)
+
+# `var matchmx = [[...], ...];` - one array per match, newest first
+MATCHMX = re.compile(r'var\s+matchmx\s*=\s*(\[.*?\]);', re.S)
+MX_DATE, MX_TOURNEY, MX_SURFACE, MX_RESULT, MX_ROUND, MX_SCORE, MX_OPPONENT, MX_MINUTES = (
+    0, 1, 2, 4, 8, 9, 11, 20)
+
+
+def _new_chrome_driver(headless: bool = True):
+    """Start a Chrome WebDriver for the pool."""
+    service = Service(ChromeDriverManager().install())
+    return webdriver.Chrome(service=service, options=chrome_options(headless))
+
+
+def _recent_results_ready(driver):
+    """Wait condition: the recent-results table has been populated by JS."""
+    rows = driver.find_elements(By.CSS_SELECTOR, "#recent-results tr")
+    return len(rows) > 1
 
 
 class TennisAbstractScraper:
     """Scrape recent match data from Tennis Abstract."""
 
     BASE_URL = "https://www.tennisabstract.com/cgi-bin/player.cgi?p="
+    JS_MATCHES_URL = "https://www.tennisabstract.com/jsmatches/{}.js"
 
     def __init__(self, database: TennisDatabase = None, headless: bool = True):
         self.db = database or db
         self.headless = headless
-        self.driver = None
-
-    def _init_driver(self):
-        """Initialize Chrome WebDriver."""
-        if self.driver:
-            return
-
-        options = Options()
-        if self.headless:
-            options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--log-level=3")  # Suppress logs
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-
-    def _close_driver(self):
-        """Close the WebDriver."""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
+        self.pool = get_browser_pool("tennis_abstract" if headless else "tennis_abstract_visible",
+                                     lambda: _new_chrome_driver(headless))
+        self.session = http_client.session_for(headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        self.rate_limiter = _TA_RATE_LIMITER
 
     def _format_player_name_for_url(self, player_name: str) -> str:
         """Convert player name to Tennis Abstract URL format (e.g., 'Mariano Navone' -> 'MarianoNavone')."""
@@ -108,95 +120,160 @@ class TennisAbstractScraper:
         Returns list of match dicts with: date, tournament, surface, round,
         opponent, won (bool), score, sets_won, sets_lost, minutes
         """
-        matches = []
         formatted_name = self._format_player_name_for_url(player_name)
+
+        if BROWSER_POOL_SETTINGS["ta_js_fast_path"]:
+            matches = self._fetch_from_js(formatted_name, limit)
+            if matches is not None:
+                return matches
+
+        return self._fetch_with_browser(formatted_name, player_name, limit)
+
+    def _fetch_from_js(self, formatted_name: str, limit: int) -> Optional[List[Dict]]:
+        """
+        Read matches from the page's JS data file over HTTP.
+
+        Returns None if the file can't be fetched or doesn't look as expected,
+        so the caller can fall back to the browser.
+        """
+        try:
+            response = self.session.get(self.JS_MATCHES_URL.format(formatted_name), timeout=10,
+                                        endpoint="GET www.tennisabstract.com/jsmatches/*.js",
+                                        limiter=self.rate_limiter)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+
+        data = MATCHMX.search(response.text)
+        if not data:
+            return None
+        try:
+            rows = json.loads(data.group(1))
+        except ValueError:
+            return None
+
+        matches = []
+        for row in rows:
+            if not isinstance(row, list) or len(row) <= MX_OPPONENT:
+                return None
+            date_str = str(row[MX_DATE])
+            if not re.fullmatch(r'\d{8}', date_str):
+                return None
+
+            result = row[MX_RESULT]
+            won = True if result == 'W' else False if result == 'L' else None
+            score = ' '.join(re.findall(r'\d+-\d+(?:\(\d+\))?', row[MX_SCORE] or '')) or None
+
+            sets_won = sets_lost = None
+            if score and won is not None:
+                # Score is from the winner's perspective
+                winner_sets, loser_sets, _ = self._parse_score(score)
+                sets_won, sets_lost = (winner_sets, loser_sets) if won else (loser_sets, winner_sets)
+
+            minutes = None
+            if len(row) > MX_MINUTES and str(row[MX_MINUTES]).isdigit():
+                minutes = int(row[MX_MINUTES])
+
+            matches.append({
+                'date': f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}",
+                'tournament': row[MX_TOURNEY],
+                'surface': row[MX_SURFACE],
+                'round': row[MX_ROUND],
+                'opponent': self._clean_opponent_name(row[MX_OPPONENT]),
+                'won': won,
+                'score': score,
+                'sets_won': sets_won,
+                'sets_lost': sets_lost,
+                'minutes': minutes,
+            })
+
+        matches.sort(key=lambda m: m['date'], reverse=True)
+        return matches[:limit]
+
+    def _fetch_with_browser(self, formatted_name: str, player_name: str, limit: int) -> List[Dict]:
+        """Load the player page in a pooled browser and parse the recent-results table."""
+        matches = []
         url = f"{self.BASE_URL}{formatted_name}"
 
         try:
-            self._init_driver()
-            self.driver.get(url)
+            with self.pool.session() as driver:
+                driver.get(url)
 
-            # Wait for the recent results table to load
-            wait = WebDriverWait(self.driver, 15)
-            try:
-                wait.until(EC.presence_of_element_located((By.ID, "recent-results")))
-                time.sleep(2)  # Extra time for JS to populate
-            except TimeoutException:
-                print(f"Timeout waiting for page to load for {player_name}")
-                return matches
+                # Wait until the recent results table has rows
+                try:
+                    WebDriverWait(driver, BROWSER_POOL_SETTINGS["ready_timeout"]).until(
+                        _recent_results_ready)
+                except TimeoutException:
+                    print(f"Timeout waiting for page to load for {player_name}")
+                    return matches
+
+                # One round trip for the whole table instead of one per cell
+                table_html = driver.find_element(By.ID, "recent-results").get_attribute("outerHTML")
+        except Exception as e:
+            print(f"Error fetching data for {player_name}: {e}")
+            return matches
 
-            # Find the recent results table
+        rows = make_soup(table_html).find_all('tr')
+
+        for row in rows[1:]:  # Skip header row
             try:
-                recent_table = self.driver.find_element(By.ID, "recent-results")
-            except NoSuchElementException:
-                print(f"Could not find recent-results table for {player_name}")
-                return matches
+                cells = row.find_all('td')
+                if len(cells) < 7:
+                    continue
 
-            rows = recent_table.find_elements(By.TAG_NAME, "tr")
+                row_text = [' '.join(cell.get_text().split()) for cell in cells]
 
-            for row in rows[1:]:  # Skip header row
-                try:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) < 7:
-                        continue
-
-                    row_text = [cell.text.strip() for cell in cells]
-
-                    # Parse date (format: "19-Jan-2026")
-                    date_str = row_text[0] if row_text else None
-                    date = self._parse_ta_date(date_str)
-                    if not date:
-                        continue
-
-                    # Parse other columns
-                    tournament = row_text[1] if len(row_text) > 1 else None
-                    surface = row_text[2] if len(row_text) > 2 else None
-                    round_name = row_text[3] if len(row_text) > 3 else None
-
-                    # Column 6: match-up info (e.g., "(6)Alex Michelsen [USA] d. Navone")
-                    # Column 7: score (e.g., "2-6 6-2 7-5")
-                    matchup_cell = row_text[6] if len(row_text) > 6 else ""
-                    score_cell = row_text[7] if len(row_text) > 7 else ""
-
-                    # Parse the matchup cell
-                    match_info = self._parse_score_cell(matchup_cell, player_name, score_cell)
-                    if not match_info:
-                        continue
-
-                    # Parse duration (last column, format: "2:25")
-                    minutes = None
-                    time_str = row_text[-1] if row_text else None
-                    if time_str and ':' in time_str:
-                        try:
-                            parts = time_str.split(':')
-                            minutes = int(parts[0]) * 60 + int(parts[1])
-                        except:
-                            pass
-
-                    match = {
-                        'date': date,
-                        'tournament': tournament,
-                        'surface': surface,
-                        'round': round_name,
-                        'opponent': match_info['opponent'],
-                        'won': match_info['won'],
-                        'score': match_info['score'],
-                        'sets_won': match_info['sets_won'],
-                        'sets_lost': match_info['sets_lost'],
-                        'minutes': minutes,
-                    }
-                    matches.append(match)
-
-                    if len(matches) >= limit:
-                        break
-
-                except Exception as e:
+                # Parse date (format: "19-Jan-2026")
+                date_str = row_text[0] if row_text else None
+                date = self._parse_ta_date(date_str)
+                if not date:
                     continue
 
-        except Exception as e:
-            print(f"Error fetching data for {player_name}: {e}")
-        finally:
-            self._close_driver()
+                # Parse other columns
+                tournament = row_text[1] if len(row_text) > 1 else None
+                surface = row_text[2] if len(row_text) > 2 else None
+                round_name = row_text[3] if len(row_text) > 3 else None
+
+                # Column 6: match-up info (e.g., "(6)Alex Michelsen [USA] d. Navone")
+                # Column 7: score (e.g., "2-6 6-2 7-5")
+                matchup_cell = row_text[6] if len(row_text) > 6 else ""
+                score_cell = row_text[7] if len(row_text) > 7 else ""
+
+                # Parse the matchup cell
+                match_info = self._parse_score_cell(matchup_cell, player_name, score_cell)
+                if not match_info:
+                    continue
+
+                # Parse duration (last column, format: "2:25")
+                minutes = None
+                time_str = row_text[-1] if row_text else None
+                if time_str and ':' in time_str:
+                    try:
+                        parts = time_str.split(':')
+                        minutes = int(parts[0]) * 60 + int(parts[1])
+                    except:
+                        pass
+
+                match = {
+                    'date': date,
+                    'tournament': tournament,
+                    'surface': surface,
+                    'round': round_name,
+                    'opponent': match_info['opponent'],
+                    'won': match_info['won'],
+                    'score': match_info['score'],
+                    'sets_won': match_info['sets_won'],
+                    'sets_lost': match_info['sets_lost'],
+                    'minutes': minutes,
+                }
+                matches.append(match)
+
+                if len(matches) >= limit:
+                    break
+
+            except Exception as e:
+                continue
 
         return matches
 
@@ -6,9 +6,16 @@ Scrapes player profiles and match history from tennisexplorer.com
 import requests
 from bs4 import BeautifulSoup
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from database import db
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from config import SCRAPER_SETTINGS
+from database import db, TennisDatabase
+from http_cache import page_cache
+from http_client import http_client
+from rate_limiter import shared_limiter
+from results_parser import make_soup, iter_results_page
 
 
 class PlayerNameMatcher:
@@ -350,18 +357,104 @@ class PlayerNameMatcher:
         return player_ids[0]
 
 
+# One limiter per host, shared by every scraper instance and worker thread
+_TE_RATE_LIMITER = shared_limiter("tennisexplorer.com", SCRAPER_SETTINGS["te_requests_per_second"],
+                                  SCRAPER_SETTINGS["te_burst"])
+
+# Player profile match table patterns
+TOUR_HEADER = re.compile(r'(ITF|ATP|WTA|Challenger|Open|Masters)')
+PROFILE_DATE = re.compile(r'(\d{1,2})\.(\d{1,2})\.')
+GAME_SCORE = re.compile(r'\d-\d')
+TRAILING_INITIAL = re.compile(r'\s+[A-Z]\.$')
+SCORE_CELL = re.compile(r'^[\d\-,\s]+$')
+ROUND_CODES = frozenset(['1R', '2R', '3R', '4R', 'R16', 'R32', 'R64', 'R128', 'QF', 'SF', 'F'])
+
+
 class TennisExplorerScraper:
     """Scraper for Tennis Explorer player data."""
 
     BASE_URL = "https://www.tennisexplorer.com"
+    WATERMARK_SOURCE = "tennis_explorer"
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, database: TennisDatabase = None):
+        self.db = database or db
+        self.session = http_client.session_for(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         })
+        # Concurrent results fetcher workers (the host's pool is sized in HTTP_CLIENT_SETTINGS)
+        self.max_in_flight = SCRAPER_SETTINGS["te_max_in_flight"]
+        self.rate_limiter = _TE_RATE_LIMITER
+        self.cache = page_cache
+        # Incremental refresh bookkeeping (see commit_watermarks)
+        self.failed_days = set()
+        self.fetched_days = set()
+        self.recheck_fetches = set()
+        self.unresolved_days = set()
+        self.pending_watermarks = {}
+        self.skipped_days = 0
+
+    def _get_page(self, url: str) -> Optional[str]:
+        """GET a page through the page cache and rate limiter.
+
+        Fresh cached pages are returned without a request; stale ones are
+        revalidated. Timeouts, 429 and 5xx are retried with backoff, each
+        attempt taking a rate limiter token.
+
+        Returns:
+            Page HTML, or None if the request failed
+        """
+        cached = self.cache.lookup(url)
+        if cached and cached['fresh']:
+            return cached['body']
+
+        try:
+            response = self.session.get(url, timeout=30,
+                                        headers=self.cache.conditional_headers(cached),
+                                        retries=SCRAPER_SETTINGS["te_max_retries"],
+                                        backoff=SCRAPER_SETTINGS["te_retry_backoff"],
+                                        limiter=self.rate_limiter)
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+        if response.status_code == 304 and cached:
+            self.cache.touch(url, cached)
+            return cached['body']
+        if response.status_code == 200:
+            self.cache.store(url, response.text, response.headers)
+            return response.text
+        print(f"Failed to fetch results: {response.status_code}")
+        return None
+
+    def fetch_results_days(self, days: List[Tuple[int, int, int, str]],
+                           progress_callback=None) -> List[List[Dict]]:
+        """Fetch and parse several day results pages concurrently.
+
+        Pages are fetched and parsed by up to te_max_in_flight worker threads,
+        with every request going through the shared per-host rate limiter.
+
+        Args:
+            days: List of (year, month, day, tour_type)
+            progress_callback: Optional callback, called from this thread as pages complete
+
+        Returns:
+            One list of match dictionaries per requested day, in request order
+        """
+        results = [[] for _ in days]
+        if not days:
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = [executor.submit(self.fetch_results_day, year, month, day, tour_type)
+                       for year, month, day, tour_type in days]
+            for idx, future in enumerate(futures):
+                results[idx] = future.result()
+                if progress_callback and (idx + 1) % 10 == 0:
+                    progress_callback(f"  Fetched {idx + 1}/{len(days)} results pages...")
+
+        return results
 
     def search_player(self, player_name: str) -> Optional[str]:
         """Search for a player and return their profile URL slug."""
@@ -380,7 +473,7 @@ class TennisExplorerScraper:
             if response.status_code != 200:
                 return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
 
             # Look for player links in search results
             player_links = soup.select('a[href*="/player/"]')
@@ -420,7 +513,7 @@ class TennisExplorerScraper:
             if response.status_code != 200:
                 return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
             page_text = soup.get_text()
 
             profile = {
@@ -494,18 +587,18 @@ class TennisExplorerScraper:
         current_surface = "Hard"
 
         # Find all tables and look for match rows
-        for table in soup.select('table'):
-            rows = table.select('tr')
+        for table in soup.find_all('table'):
+            rows = table.find_all('tr')
 
             for row in rows:
-                cells = row.select('td')
+                cells = row.find_all('td')
                 if len(cells) < 3:
                     continue
 
                 row_text = row.get_text()
 
                 # Check if this is a tournament header (contains ITF, ATP, WTA, Challenger, etc.)
-                if re.search(r'(ITF|ATP|WTA|Challenger|Open|Masters)', row_text):
+                if TOUR_HEADER.search(row_text):
                     tournament_cell = cells[0] if cells else None
                     if tournament_cell:
                         current_tournament = tournament_cell.get_text().strip()
@@ -514,8 +607,8 @@ class TennisExplorerScraper:
 
                 # Look for match pattern: "DD.MM. | | Player - Opponent | Round | Score"
                 # Match rows have a date like "17.01." and a score like "6-1, 6-3"
-                date_match = re.search(r'(\d{1,2})\.(\d{1,2})\.', row_text)
-                score_match = re.search(r'\d-\d', row_text)
+                date_match = PROFILE_DATE.search(row_text)
+                score_match = GAME_SCORE.search(row_text)
 
                 if date_match and score_match:
                     try:
@@ -541,7 +634,7 @@ class TennisExplorerScraper:
                         if len(parts) >= 2:
                             opponent = parts[1].strip()
                             # Clean up opponent name (remove initials like "L.")
-                            opponent = re.sub(r'\s+[A-Z]\.$', '', opponent)
+                            opponent = TRAILING_INITIAL.sub('', opponent)
                         else:
                             continue
 
@@ -549,7 +642,7 @@ class TennisExplorerScraper:
                         score = ""
                         for cell in cells:
                             cell_text = cell.get_text().strip()
-                            if re.match(r'^[\d\-,\s]+$', cell_text) and '-' in cell_text:
+                            if SCORE_CELL.match(cell_text) and '-' in cell_text:
                                 score = cell_text
                                 break
 
@@ -557,7 +650,7 @@ class TennisExplorerScraper:
                         round_name = ""
                         for cell in cells:
                             cell_text = cell.get_text().strip()
-                            if cell_text in ['1R', '2R', '3R', '4R', 'R16', 'R32', 'R64', 'R128', 'QF', 'SF', 'F']:
+                            if cell_text in ROUND_CODES:
                                 round_name = cell_text
                                 break
 
@@ -604,7 +697,7 @@ class TennisExplorerScraper:
             if response.status_code != 200:
                 return matches
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
 
             # Extract player's last name for matching (used to determine wins)
             name_parts = player_name.split()
@@ -784,7 +877,7 @@ class TennisExplorerScraper:
                     'height': profile.get('height'),
                     'dob': profile.get('dob'),
                 }
-                db.update_player_info(player_id, player_update)
+                self.db.update_player_info(player_id, player_update)
 
             # Add matches to database
             matches_added = 0
@@ -798,7 +891,7 @@ class TennisExplorerScraper:
 
             # Update ranking if available
             if profile.get('ranking'):
-                db.update_player_ranking(player_id, profile['ranking'])
+                self.db.update_player_ranking(player_id, profile['ranking'])
                 result['ranking_updated'] = profile['ranking']
 
             result['success'] = True
@@ -808,7 +901,7 @@ class TennisExplorerScraper:
             result['matches_added'] = matches_added
 
             # Mark player as updated
-            db.update_player_ta_timestamp(player_id)
+            self.db.update_player_ta_timestamp(player_id)
 
         except Exception as e:
             result['message'] = f"Error updating database: {e}"
@@ -836,7 +929,7 @@ class TennisExplorerScraper:
 
         # Update the ranking in database
         ranking = profile['ranking']
-        db.update_player_ranking(player_id, ranking)
+        self.db.update_player_ranking(player_id, ranking)
 
         return ranking
 
@@ -846,8 +939,6 @@ class TennisExplorerScraper:
 
         Returns dict with: success, updated_count, failed_count, updates list
         """
-        import time
-
         result = {
             'success': False,
             'updated_count': 0,
@@ -857,7 +948,7 @@ class TennisExplorerScraper:
         }
 
         # Get all upcoming matches
-        upcoming = db.get_upcoming_matches()
+        upcoming = self.db.get_upcoming_matches()
 
         if not upcoming:
             result['message'] = "No upcoming matches found"
@@ -927,7 +1018,16 @@ class TennisExplorerScraper:
             List of match dictionaries
         """
         url = f"{self.BASE_URL}/results/?type={tour_type}&year={year}&month={month:02d}&day={day:02d}"
-        return self._parse_results_page(url, year, month, day)
+        html = self._get_page(url)
+        if html is None:
+            # Remembered so the watermark doesn't advance past a day we never got
+            self.failed_days.add((tour_type, date(year, month, day)))
+            return []
+        self.fetched_days.add((tour_type, date(year, month, day)))
+        matches = self._parse_results_html(html, year, month, day)
+        for match in matches:
+            match['tour_type'] = tour_type
+        return matches
 
     def fetch_results_page(self, year: int, month: int, tour_type: str = "atp-single",
                           use_day_by_day: bool = True) -> List[Dict]:
@@ -944,30 +1044,26 @@ class TennisExplorerScraper:
         """
         if use_day_by_day:
             # Day-by-day fetching captures ALL tournaments including ATP 250
-            import calendar
-            import time
-
-            all_matches = []
-            days_in_month = calendar.monthrange(year, month)[1]
-
-            # For current month, only fetch up to today
-            today = datetime.now()
-            if year == today.year and month == today.month:
-                days_in_month = min(days_in_month, today.day)
-
-            for day in range(1, days_in_month + 1):
-                day_matches = self.fetch_results_day(year, month, day, tour_type)
-                all_matches.extend(day_matches)
-                time.sleep(0.3)  # Be respectful to the server
-
-            return all_matches
+            days = self._month_days(year, month, tour_type)
+            return [m for day_matches in self.fetch_results_days(days) for m in day_matches]
 
         # Legacy month-only URL (missing some tournaments)
         url = f"{self.BASE_URL}/results/?type={tour_type}&year={year}&month={month:02d}"
         return self._parse_results_page(url, year, month)
 
+    @staticmethod
+    def _month_days(year: int, month: int, tour_type: str) -> List[Tuple[int, int, int, str]]:
+        """(year, month, day, tour_type) for each day of a month, up to today for the current month."""
+        import calendar
+
+        days_in_month = calendar.monthrange(year, month)[1]
+        today = datetime.now()
+        if year == today.year and month == today.month:
+            days_in_month = min(days_in_month, today.day)
+        return [(year, month, day, tour_type) for day in range(1, days_in_month + 1)]
+
     def _parse_results_page(self, url: str, year: int, month: int, day: int = None) -> List[Dict]:
-        """Parse match results from a Tennis Explorer results page.
+        """Fetch and parse match results from a Tennis Explorer results page.
 
         Args:
             url: The URL to fetch
@@ -978,148 +1074,23 @@ class TennisExplorerScraper:
         Returns:
             List of match dictionaries
         """
-        matches = []
+        html = self._get_page(url)
+        if html is None:
+            return []
+        return self._parse_results_html(html, year, month, day)
 
+    def _parse_results_html(self, html: str, year: int, month: int, day: int = None) -> List[Dict]:
+        """Parse match results from Tennis Explorer results page HTML."""
+        matches = []
         try:
-            response = self.session.get(url, timeout=30)
-            if response.status_code != 200:
-                print(f"Failed to fetch results: {response.status_code}")
-                return matches
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            current_tournament = ""
-            current_surface = "Hard"
-            # If day is provided (day-specific URL), use it as the default date
-            if day:
-                current_date = f"{year}-{month:02d}-{day:02d}"
-            else:
-                current_date = f"{year}-{month:02d}-01"
-
-            # Find all tables with match data
-            tables = soup.select('table')
-
-            for table in tables:
-                rows = table.select('tr')
-                i = 0
-
-                while i < len(rows):
-                    row = rows[i]
-                    row_class = row.get('class', [])
-
-                    # Check for tournament header - has t-name but no player link
-                    t_name = row.select_one('td.t-name, th.t-name')
-                    player_link = row.select_one('a[href*="/player/"]')
-                    if t_name and not player_link:
-                        # This is likely a tournament header row
-                        text = t_name.get_text(strip=True)
-                        # Skip if it looks like a date
-                        if not re.match(r'^\d', text):
-                            current_tournament = text
-                            current_surface = self._guess_surface(current_tournament)
-                        i += 1
-                        continue
-
-                    # Check for date in row (format like "18.01." in first cell)
-                    cells = row.select('td')
-                    if cells:
-                        first_cell = cells[0].get_text(strip=True)
-                        date_match = re.match(r'^(\d{1,2})\.(\d{1,2})\.$', first_cell)
-                        if date_match:
-                            parsed_day, month_num = date_match.groups()
-                            current_date = f"{year}-{month_num.zfill(2)}-{parsed_day.zfill(2)}"
-
-                    # Match rows come in pairs - check if this is a first row of a match
-                    # First row has class 'bott' and contains winner info
-                    if 'bott' in row_class:
-                        player1_link = row.select_one('a[href*="/player/"]')
-                        if player1_link and i + 1 < len(rows):
-                            next_row = rows[i + 1]
-                            player2_link = next_row.select_one('a[href*="/player/"]')
-
-                            if player2_link:
-                                try:
-                                    # Get player names (remove seeding numbers like "(20)")
-                                    player1_name = re.sub(r'\(\d+\)$', '', player1_link.get_text(strip=True)).strip()
-                                    player2_name = re.sub(r'\(\d+\)$', '', player2_link.get_text(strip=True)).strip()
-
-                                    # Skip doubles
-                                    if '/' in player1_name or '/' in player2_name:
-                                        i += 2
-                                        continue
-
-                                    # Get set scores from both rows
-                                    cells1 = row.select('td')
-                                    cells2 = next_row.select('td')
-
-                                    # Extract scores - look for the total sets won (usually 3rd cell)
-                                    p1_sets = 0
-                                    p2_sets = 0
-                                    p1_scores = []
-                                    p2_scores = []
-
-                                    for cell in cells1:
-                                        text = cell.get_text(strip=True)
-                                        # Match set scores (single digit, or with tiebreak like "62")
-                                        if re.match(r'^\d{1,2}$', text):
-                                            p1_scores.append(text)
-
-                                    for cell in cells2:
-                                        text = cell.get_text(strip=True)
-                                        if re.match(r'^\d{1,2}$', text):
-                                            p2_scores.append(text)
-
-                                    # First score is usually total sets won
-                                    if p1_scores:
-                                        p1_sets = int(p1_scores[0]) if p1_scores[0].isdigit() else 0
-                                    if p2_scores:
-                                        p2_sets = int(p2_scores[0]) if p2_scores[0].isdigit() else 0
-
-                                    # Determine winner (more sets won)
-                                    if p1_sets > p2_sets:
-                                        winner_name = player1_name
-                                        loser_name = player2_name
-                                        winner_scores = p1_scores[1:]  # Skip total
-                                        loser_scores = p2_scores[1:]
-                                    else:
-                                        winner_name = player2_name
-                                        loser_name = player1_name
-                                        winner_scores = p2_scores[1:]
-                                        loser_scores = p1_scores[1:]
-
-                                    # Build score string
-                                    score_parts = []
-                                    for j in range(min(len(winner_scores), len(loser_scores))):
-                                        score_parts.append(f"{winner_scores[j]}-{loser_scores[j]}")
-                                    score = " ".join(score_parts)
-
-                                    match_data = {
-                                        'winner_name': winner_name,
-                                        'loser_name': loser_name,
-                                        'tournament': current_tournament,
-                                        'surface': current_surface,
-                                        'date': current_date,
-                                        'score': score,
-                                        'year': year
-                                    }
-
-                                    matches.append(match_data)
-                                    i += 2  # Skip both rows
-                                    continue
-
-                                except Exception as e:
-                                    pass
-
-                    i += 1
-
-            return matches
-
+            for row in iter_results_page(html, year, month, day):
+                matches.append(row._asdict())
         except Exception as e:
-            print(f"Error fetching results: {e}")
-            return matches
+            print(f"Error parsing results: {e}")
+        return matches
 
     def fetch_recent_days(self, days_back: int = 7, tour_type: str = "atp-single",
-                          progress_callback=None) -> List[Dict]:
+                          progress_callback=None, incremental: bool = False) -> List[Dict]:
         """Fetch match results for a specific number of recent days.
 
         This is much faster than fetch_recent_results as it only fetches
@@ -1129,31 +1100,37 @@ class TennisExplorerScraper:
             days_back: Number of days to fetch (default 7)
             tour_type: Tour type to fetch (e.g., 'atp-single', 'wta-single')
             progress_callback: Optional callback for progress updates
+            incremental: Skip days already imported (before the tour's watermark
+                         minus the re-check window); call commit_watermarks()
+                         after the matches are committed
 
         Returns:
             List of match dictionaries
         """
-        import time
-
-        all_matches = []
-        today = datetime.now()
+        today = datetime.now().date()
         tour_label = "ATP" if "atp" in tour_type else ("WTA" if "wta" in tour_type else "ITF")
 
-        for i in range(days_back):
-            target_date = today - timedelta(days=i)
-            year = target_date.year
-            month = target_date.month
-            day = target_date.day
+        target_dates = [today - timedelta(days=i) for i in range(days_back)]
+        if incremental and target_dates:
+            start = self._incremental_start(tour_type, target_dates[-1])
+            recheck = self._recheck_days(tour_type, start)
+            skipped = sum(1 for d in target_dates if d < start and d not in recheck)
+            target_dates = [d for d in target_dates if d >= start or d in recheck]
+            self.skipped_days += skipped
+            if progress_callback and skipped:
+                progress_callback(f"  {tour_label}: skipping {skipped} day(s) already imported")
 
-            if progress_callback:
-                progress_callback(f"  Fetching {tour_label} {target_date.strftime('%Y-%m-%d')}...")
+        if not target_dates:
+            return []
 
-            day_matches = self.fetch_results_day(year, month, day, tour_type)
-            all_matches.extend(day_matches)
+        if progress_callback:
+            progress_callback(f"  Fetching {tour_label} {target_dates[-1].isoformat()} "
+                              f"to {today.isoformat()}...")
 
-            # Small delay to be respectful to server
-            if i < days_back - 1:
-                time.sleep(0.3)
+        days = [(d.year, d.month, d.day, tour_type) for d in target_dates]
+        all_matches = [m for day_matches in self.fetch_results_days(days) for m in day_matches]
+        if incremental:
+            self._stage_watermark(tour_type, target_dates)
 
         if progress_callback:
             progress_callback(f"  Found {len(all_matches)} {tour_label} matches")
@@ -1161,13 +1138,16 @@ class TennisExplorerScraper:
         return all_matches
 
     def fetch_recent_results(self, months_back: int = 3, tour_types: List[str] = None,
-                            progress_callback=None) -> List[Dict]:
+                            progress_callback=None, incremental: bool = False) -> List[Dict]:
         """Fetch recent match results from Tennis Explorer.
 
         Args:
             months_back: Number of months to fetch (default 3)
             tour_types: List of tour types to fetch (default: ATP and WTA singles)
             progress_callback: Optional callback for progress updates
+            incremental: Skip days already imported (before each tour's watermark
+                         minus the re-check window); call commit_watermarks()
+                         after the matches are committed
 
         Returns:
             List of all match dictionaries
@@ -1175,36 +1155,127 @@ class TennisExplorerScraper:
         if tour_types is None:
             tour_types = ["atp-single", "wta-single"]
 
-        all_matches = []
         now = datetime.now()
 
+        # Calculate year/month going backwards
+        months = []
+        target_date = datetime(now.year, now.month, 1)
+        for _ in range(months_back):
+            months.append((target_date.year, target_date.month))
+            target_date = (target_date - timedelta(days=1)).replace(day=1)
+
+        # Every (tour, month) becomes a run of day pages; all of them share one
+        # worker pool so the whole refresh is paced by the rate limiter
+        groups = []
+        days = []
         for tour_type in tour_types:
-            tour_label = "ATP" if "atp" in tour_type else "WTA"
+            tour_start = None
+            if incremental and months:
+                earliest = date(months[-1][0], months[-1][1], 1)
+                tour_start = self._incremental_start(tour_type, earliest)
+                recheck = self._recheck_days(tour_type, tour_start)
+            for year, month in months:
+                month_days = self._month_days(year, month, tour_type)
+                if tour_start:
+                    kept = [d for d in month_days
+                            if date(d[0], d[1], d[2]) >= tour_start or date(d[0], d[1], d[2]) in recheck]
+                    self.skipped_days += len(month_days) - len(kept)
+                    month_days = kept
+                groups.append((tour_type, year, month, len(days), len(days) + len(month_days)))
+                days.extend(month_days)
+
+        if incremental and progress_callback and self.skipped_days:
+            progress_callback(f"Skipping {self.skipped_days} day(s) already imported")
 
-            for i in range(months_back):
-                # Calculate year/month going backwards
-                target_date = datetime(now.year, now.month, 1)
-                for _ in range(i):
-                    target_date = target_date.replace(day=1) - timedelta(days=1)
-                    target_date = target_date.replace(day=1)
+        if progress_callback:
+            progress_callback(f"Fetching {len(days)} results pages for {len(tour_types)} tour(s), "
+                              f"{months_back} month(s)...")
 
-                year = target_date.year
-                month = target_date.month
+        self.cache.reset_stats()
+        day_results = self.fetch_results_days(days, progress_callback)
+        if incremental:
+            for tour_type in tour_types:
+                self._stage_watermark(tour_type, [date(y, m, d) for y, m, d, t in days if t == tour_type])
 
-                if progress_callback:
-                    progress_callback(f"Fetching {tour_label} results for {year}-{month:02d}...")
+        all_matches = []
+        for tour_type, year, month, start, end in groups:
+            tour_label = "ATP" if "atp" in tour_type else ("WTA" if "wta" in tour_type else "ITF")
+            matches = [m for day_matches in day_results[start:end] for m in day_matches]
+            all_matches.extend(matches)
+            if progress_callback:
+                progress_callback(f"Found {len(matches)} {tour_label} matches for {year}-{month:02d}")
 
-                matches = self.fetch_results_page(year, month, tour_type)
-                all_matches.extend(matches)
+        if progress_callback:
+            stats = self.cache.stats()
+            progress_callback(f"Page cache: {stats['hit_rate']:.0%} hit rate "
+                              f"({stats['hits']} cached, {stats['revalidated']} revalidated, "
+                              f"{stats['stores']} downloaded)")
 
-                if progress_callback:
-                    progress_callback(f"Found {len(matches)} {tour_label} matches for {year}-{month:02d}")
+        return all_matches
 
-                # Small delay to be respectful
-                import time
-                time.sleep(0.5)
+    def _incremental_start(self, tour_type: str, start: date) -> date:
+        """First day to fetch for a tour: the watermark day minus the re-check window."""
+        watermark = self.db.get_ingest_watermark(self.WATERMARK_SOURCE, tour_type)
+        if not watermark:
+            return start
+        recheck = max(1, SCRAPER_SETTINGS["te_recheck_days"])
+        resume = date.fromisoformat(watermark) - timedelta(days=recheck - 1)
+        return max(start, resume)
+
+    def _recheck_days(self, tour_type: str, start: date) -> set:
+        """Recorded days before start that still had unimported matches; fetched again."""
+        days = {date.fromisoformat(d)
+                for d in self.db.get_ingest_recheck_days(self.WATERMARK_SOURCE, tour_type)}
+        days = {d for d in days if d < start}
+        self.recheck_fetches.update((tour_type, d) for d in days)
+        return days
+
+    def _stage_watermark(self, tour_type: str, fetched: List[date]):
+        """Queue a tour's new watermark: the last fetched day before any failed page."""
+        if not fetched:
+            return
+        # A failed re-check of an older day stays recorded instead of moving the watermark back
+        failed = sorted(d for t, d in self.failed_days
+                        if t == tour_type and (t, d) not in self.recheck_fetches)
+        end = max(fetched)
+        if failed:
+            end = min(end, failed[0] - timedelta(days=1))
+        self.pending_watermarks[tour_type] = end
+
+    def mark_unresolved(self, match: Dict):
+        """Record that a fetched match wasn't imported, so commit_watermarks keeps its day for re-checking."""
+        try:
+            self.unresolved_days.add((match['tour_type'], date.fromisoformat(match['date'][:10])))
+        except (KeyError, TypeError, ValueError):
+            pass
 
-        return all_matches
+    def commit_watermarks(self) -> Dict[str, str]:
+        """Persist staged watermarks. Call only after the fetched matches are committed.
+
+        Days with matches reported through mark_unresolved (unknown players
+        while players are locked, failed inserts) are recorded per tour and
+        fetched again by later incremental refreshes, until they import or
+        are older than te_unresolved_recheck_days. Recorded days fetched
+        again this run are cleared unless they were reported again.
+
+        Returns:
+            Dict of tour_type -> watermark day written
+        """
+        cutoff = date.today() - timedelta(days=SCRAPER_SETTINGS["te_unresolved_recheck_days"])
+        written = {}
+        for tour_type, day in self.pending_watermarks.items():
+            self.db.set_ingest_watermark(self.WATERMARK_SOURCE, tour_type, day.isoformat())
+            written[tour_type] = day.isoformat()
+
+            recheck = {date.fromisoformat(d)
+                       for d in self.db.get_ingest_recheck_days(self.WATERMARK_SOURCE, tour_type)}
+            recheck = {d for d in recheck if (tour_type, d) not in self.fetched_days}
+            recheck.update(d for t, d in self.unresolved_days if t == tour_type)
+            self.db.set_ingest_recheck_days(self.WATERMARK_SOURCE, tour_type,
+                                            [d.isoformat() for d in recheck if d >= cutoff])
+        self.pending_watermarks = {}
+        self.unresolved_days = set()
+        return written
 
     def import_results_to_database(self, matches: List[Dict], progress_callback=None,
                                     players_locked: bool = True) -> Dict:
@@ -1232,7 +1303,7 @@ class TennisExplorerScraper:
         # Use the robust PlayerNameMatcher for player lookup
         name_matcher = PlayerNameMatcher()
         try:
-            with db.get_connection() as conn:
+            with self.db.get_connection() as conn:
                 name_matcher.load_players(conn)
             if progress_callback:
                 progress_callback(f"Loaded {len(name_matcher.players)} players for matching")
@@ -1246,7 +1317,7 @@ class TennisExplorerScraper:
         next_negative_id = -1
         if not players_locked:
             try:
-                with db.get_connection() as conn:
+                with self.db.get_connection() as conn:
                     cursor = conn.cursor()
                     cursor.execute("SELECT MIN(id) FROM players WHERE id < 0")
                     result = cursor.fetchone()
@@ -1278,8 +1349,9 @@ class TennisExplorerScraper:
                     if canonical_name:
                         winner_name = canonical_name
                 elif players_locked:
-                    # Players locked - skip this match
+                    # Players locked - skip this match (its day is re-checked later)
                     skipped_count += 1
+                    self.mark_unresolved(match)
                     continue
                 elif winner_key in new_players:
                     winner_id = new_players[winner_key]
@@ -1300,8 +1372,9 @@ class TennisExplorerScraper:
                     if canonical_name:
                         loser_name = canonical_name
                 elif players_locked:
-                    # Players locked - skip this match
+                    # Players locked - skip this match (its day is re-checked later)
                     skipped_count += 1
+                    self.mark_unresolved(match)
                     continue
                 elif loser_key in new_players:
                     loser_id = new_players[loser_key]
@@ -1344,7 +1417,7 @@ class TennisExplorerScraper:
                 progress_callback(f"Creating {len(new_players)} new players...")
 
             try:
-                with db.get_connection() as conn:
+                with self.db.get_connection() as conn:
                     cursor = conn.cursor()
                     for name, player_id in new_players.items():
                         # Convert name back to title case
@@ -1370,9 +1443,9 @@ class TennisExplorerScraper:
                 except ImportError:
                     validate_match_data = None
 
-                with db.get_connection() as conn:
+                with self.db.get_connection() as conn:
                     cursor = conn.cursor()
-                    inserted = 0
+                    inserted = []
                     rejected = 0
                     for m in matches_to_insert:
                         # Generate a unique match ID
@@ -1399,16 +1472,11 @@ class TennisExplorerScraper:
                                 rejected += 1
                                 continue  # Skip invalid matches
 
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO matches
-                            (id, tournament, surface, date, winner_id, winner_name, loser_id, loser_name, score)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (match_id, m['tournament'], m['surface'], m['date'],
-                              m['winner_id'], m['winner_name'], m['loser_id'], m['loser_name'], m['score']))
-                        if cursor.rowcount > 0:
-                            inserted += 1
+                        if self.db.insert_result_match(cursor, match_data):
+                            inserted.append(match_data)
+                    self.db.index_imported_matches(conn, inserted)
                     conn.commit()
-                    stats['matches_imported'] = inserted
+                    stats['matches_imported'] = len(inserted)
                     if rejected > 0:
                         print(f"[VALIDATION] Rejected {rejected} invalid matches from Tennis Explorer")
             except Exception as e:
@@ -1432,8 +1500,6 @@ class TennisExplorerScraper:
         Returns:
             Dict with success status and counts
         """
-        import time
-
         stats = {
             'success': False,
             'message': '',
@@ -1487,7 +1553,7 @@ class TennisExplorerScraper:
         # Use robust PlayerNameMatcher for opponent lookup
         name_matcher = PlayerNameMatcher()
         try:
-            with db.get_connection() as conn:
+            with self.db.get_connection() as conn:
                 name_matcher.load_players(conn)
         except Exception as e:
             print(f"Error loading players for matching: {e}")
@@ -1495,7 +1561,7 @@ class TennisExplorerScraper:
         # Get next negative ID for creating new players
         next_negative_id = -1
         try:
-            with db.get_connection() as conn:
+            with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT MIN(id) FROM players WHERE id < 0")
                 result = cursor.fetchone()
@@ -1569,14 +1635,14 @@ class TennisExplorerScraper:
 
         # Create new players first
         players_to_create = [(pid, name.title()) for name, pid in new_players.items()
-                            if pid < 0 and not db.get_player(pid)]
+                            if pid < 0 and not self.db.get_player(pid)]
 
         if players_to_create:
             if progress_callback:
                 progress_callback(f"Creating {len(players_to_create)} opponent records...")
 
             try:
-                with db.get_connection() as conn:
+                with self.db.get_connection() as conn:
                     cursor = conn.cursor()
                     for pid, name in players_to_create:
                         cursor.execute("""
@@ -1599,9 +1665,9 @@ class TennisExplorerScraper:
             except ImportError:
                 validate_match_data = None
 
-            with db.get_connection() as conn:
+            with self.db.get_connection() as conn:
                 cursor = conn.cursor()
-                inserted = 0
+                inserted = []
                 for m in matches_to_insert:
                     # Generate unique match ID
                     match_id = f"TE_{m['date']}_{m['winner_id']}_{m['loser_id']}"
@@ -1627,18 +1693,12 @@ class TennisExplorerScraper:
                         if not is_valid:
                             continue
 
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO matches
-                        (id, tournament, surface, date, round, winner_id, winner_name, loser_id, loser_name, score)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (match_id, m['tournament'], m['surface'], m['date'], m['round'],
-                          m['winner_id'], m['winner_name'], m['loser_id'], m['loser_name'], m['score']))
-
-                    if cursor.rowcount > 0:
-                        inserted += 1
+                    if self.db.insert_result_match(cursor, match_data):
+                        inserted.append(match_data)
 
+                self.db.index_imported_matches(conn, inserted)
                 conn.commit()
-                stats['matches_imported'] = inserted
+                stats['matches_imported'] = len(inserted)
 
         except Exception as e:
             stats['message'] = f"Error inserting matches: {e}"
@@ -1689,7 +1749,7 @@ class TennisExplorerScraper:
             return stats
 
         try:
-            with db.get_connection() as conn:
+            with self.db.get_connection() as conn:
                 cursor = conn.cursor()
 
                 # Build index of real players by last name for matching
@@ -0,0 +1,124 @@
+"""
+Tennis Betting System - Tournament Classifier
+Precompiled surface and tour level detection for tournament names
+
+The keyword lists live in config.py. They are compiled once into a single
+alternation regex per surface, and results are memoized per
+(normalized name, month), so repeated lookups from form calculations and
+backtests cost a dict hit instead of a keyword scan.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from config import CLAY_TOURNAMENTS, GRASS_TOURNAMENTS
+
+GRASS_SEASON_MONTHS = (6, 7)
+
+
+def _compile_keywords(keywords) -> re.Pattern:
+    """
+    Compile a keyword list into one alternation regex.
+
+    Multi-word or long keywords match as plain substrings; short single
+    words need word boundaries so e.g. 'rome' doesn't match 'Jerome'.
+    """
+    parts = []
+    for keyword in keywords:
+        if ' ' in keyword or len(keyword) > 6:
+            parts.append(re.escape(keyword))
+        else:
+            parts.append(r'\b' + re.escape(keyword) + r'\b')
+    return re.compile('|'.join(parts))
+
+
+_CLAY_PATTERN = _compile_keywords(CLAY_TOURNAMENTS)
+_GRASS_PATTERN = _compile_keywords(GRASS_TOURNAMENTS)
+
+# Tour level rules - checked in order, first match wins
+_LEVEL_RULES = [
+    ("Grand Slam", re.compile(r"australian open|roland garros|french open|wimbledon|us open|u\.s\. open")),
+    ("ATP", re.compile(r"atp|masters")),
+    ("WTA", re.compile(r"wta|women's|ladies")),
+    ("Challenger", re.compile(r"challenger|ch ")),
+    ("ITF", re.compile(r"itf|futures|\$")),
+    ("ATP", re.compile(r"men")),
+    ("WTA", re.compile(r"women")),
+]
+
+
+def _month_from_date(date_str: Optional[str]) -> Optional[int]:
+    """Extract the month from a YYYY-MM-DD date string, or None."""
+    if not date_str:
+        return None
+    try:
+        return int(date_str[5:7])
+    except (ValueError, IndexError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _level(name: str) -> str:
+    """Tour level for an already-lowercased tournament name."""
+    if not name:
+        return "Unknown"
+    for level, pattern in _LEVEL_RULES:
+        if pattern.search(name):
+            return level
+    return "Unknown"
+
+
+@lru_cache(maxsize=16384)
+def _classify(name: str, month: Optional[int]) -> Tuple[str, str]:
+    """(surface, level) for an already-lowercased tournament name."""
+    level = _level(name)
+    if not name:
+        return "Hard", level
+
+    # Explicit surface in name (from Tennis Explorer/databases)
+    if ' - clay' in name or '(clay)' in name:
+        return "Clay", level
+    if ' - grass' in name or '(grass)' in name:
+        return "Grass", level
+    if ' - hard' in name or '(hard)' in name or ' - indoor' in name:
+        return "Hard", level
+
+    if _CLAY_PATTERN.search(name):
+        return "Clay", level
+
+    # Grass only happens June-July
+    if month in GRASS_SEASON_MONTHS and _GRASS_PATTERN.search(name):
+        return "Grass", level
+
+    return "Hard", level
+
+
+def classify_tournament(tournament_name: str, date_str: str = None) -> Tuple[str, str]:
+    """
+    Classify a tournament name into (surface, tour level).
+
+    Args:
+        tournament_name: Tournament name (e.g., "Oeiras Challenger 2026")
+        date_str: Optional date string (YYYY-MM-DD) for seasonal surface detection
+
+    Returns:
+        Tuple of (surface, level), e.g. ("Hard", "Challenger")
+    """
+    return _classify((tournament_name or '').lower(), _month_from_date(date_str))
+
+
+def get_surface(tournament_name: str, date_str: str = None) -> str:
+    """Surface for a tournament: "Hard", "Clay", or "Grass"."""
+    return classify_tournament(tournament_name, date_str)[0]
+
+
+def get_level(tournament_name: str) -> str:
+    """Tour level for a tournament: Grand Slam, ATP, WTA, Challenger, ITF or Unknown."""
+    return _level((tournament_name or '').lower())
+
+
+def register_sqlite_functions(conn):
+    """Expose the classifier to SQL as tour_level(name) and tournament_surface(name, date)."""
+    conn.create_function("tour_level", 1, get_level, deterministic=True)
+    conn.create_function("tournament_surface", 2, get_surface, deterministic=True)
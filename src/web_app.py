@@ -1182,7 +1182,7 @@ def download_offline():
     """Generate a standalone HTML file with all data for true offline use."""
     try:
         # Get all data
-        upcoming = db.get_upcoming_matches()
+        upcoming = db.get_live_upcoming_matches()
         for match in upcoming:
             if match.get('player1_id') and match.get('player2_id'):
                 try:
@@ -1594,7 +1594,7 @@ def api_sync_pull():
     """Pull all data for mobile sync."""
     try:
         # Get matches with analysis
-        upcoming = db.get_upcoming_matches()
+        upcoming = db.get_live_upcoming_matches()
         for match in upcoming:
             if match.get('player1_id') and match.get('player2_id'):
                 try:
@@ -1713,7 +1713,7 @@ def home():
 
 @app.route('/matches')
 def matches():
-    upcoming = db.get_upcoming_matches()
+    upcoming = db.get_live_upcoming_matches()
 
     # Add analysis to each match
     for match in upcoming: